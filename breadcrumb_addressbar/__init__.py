@@ -15,21 +15,83 @@ __author__ = "Your Name"
 __email__ = "your.email@example.com"
 
 __all__: list[str] = [
+    "AncestorWarmup",
+    "BookmarkPopup",
+    "BookmarkStore",
     "BreadcrumbAddressBar",
     "BreadcrumbItem",
+    "ColumnarListing",
+    "FolderFilter",
+    "FolderIndexer",
+    "FolderListPopup",
+    "FolderListingCache",
     "FolderSelectionPopup",
+    "FrecencyStore",
+    "FuzzyMatcher",
+    "JumpBox",
+    "JumpPopup",
+    "ListingPrefetcher",
+    "MemoryBudget",
+    "MountLatencyTracker",
+    "NavigationPredictor",
+    "PathNode",
+    "PersistentListingStore",
+    "ScanProcessPool",
+    "SortedListing",
+    "SubdirProber",
+    "SubtreeSearch",
     "ThemeManager",
+    "get_latency_tracker",
+    "get_listing_cache",
+    "get_memory_budget",
     "get_theme_manager",
+    "intern_path",
 ]
 
 
 def __getattr__(name: str) -> Any:  # PEP 562 lazy export
     if name == "BreadcrumbAddressBar":
         return getattr(import_module(".core", __name__), name)
-    if name == "BreadcrumbItem":
+    if name in {"BreadcrumbItem", "JumpBox", "JumpPopup"}:
         return getattr(import_module(".widgets", __name__), name)
     if name == "FolderSelectionPopup":
         return getattr(import_module(".popup", __name__), name)
+    if name in {"FolderListingCache", "ListingPrefetcher", "SubdirProber", "get_listing_cache"}:
+        return getattr(import_module(".listing", __name__), name)
+    if name == "AncestorWarmup":
+        return getattr(import_module(".warmup", __name__), name)
+    if name == "NavigationPredictor":
+        return getattr(import_module(".predictor", __name__), name)
+    if name == "FolderListPopup":
+        return getattr(import_module(".list_popup", __name__), name)
+    if name == "FolderFilter":
+        return getattr(import_module(".filters", __name__), name)
+    if name == "BookmarkStore":
+        return getattr(import_module(".bookmarks", __name__), name)
+    if name == "BookmarkPopup":
+        return getattr(import_module(".bookmark_popup", __name__), name)
+    if name == "FolderIndexer":
+        return getattr(import_module(".indexer", __name__), name)
+    if name == "FuzzyMatcher":
+        return getattr(import_module(".fuzzy", __name__), name)
+    if name in {"PathNode", "intern_path"}:
+        return getattr(import_module(".pathnode", __name__), name)
+    if name == "SubtreeSearch":
+        return getattr(import_module(".search", __name__), name)
+    if name == "FrecencyStore":
+        return getattr(import_module(".frecency", __name__), name)
+    if name == "SortedListing":
+        return getattr(import_module(".sorting", __name__), name)
+    if name == "ColumnarListing":
+        return getattr(import_module(".columnar", __name__), name)
+    if name == "PersistentListingStore":
+        return getattr(import_module(".store", __name__), name)
+    if name in {"MemoryBudget", "get_memory_budget"}:
+        return getattr(import_module(".budget", __name__), name)
+    if name in {"MountLatencyTracker", "get_latency_tracker"}:
+        return getattr(import_module(".latency", __name__), name)
+    if name == "ScanProcessPool":
+        return getattr(import_module(".scanpool", __name__), name)
     if name in {"ThemeManager", "get_theme_manager"}:
         return getattr(import_module(".themes", __name__), name)
     raise AttributeError(f"module {__name__} has no attribute {name}")
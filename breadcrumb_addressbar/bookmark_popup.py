@@ -0,0 +1,131 @@
+"""
+Bookmark Popup
+
+Quick-jump menu listing the bookmarks under the current folder first,
+followed by all bookmarks.
+"""
+
+from PySide6.QtCore import QPoint, Signal
+from PySide6.QtGui import QAction
+from PySide6.QtWidgets import QMenu, QWidget
+
+from .bookmarks import BookmarkStore
+from .logger_setup import get_logger
+
+# メニューに並べるブックマーク数の上限（セクションごと）
+MAX_MENU_BOOKMARKS = 200
+
+_ADD_TEXT = "このフォルダをブックマーク"
+_REMOVE_TEXT = "このフォルダのブックマークを削除"
+_UNDER_SECTION_TEXT = "このフォルダ以下"
+_ALL_SECTION_TEXT = "すべてのブックマーク"
+_NO_BOOKMARKS_TEXT = "ブックマークはありません"
+
+
+class BookmarkPopup(QMenu):
+    """
+    Popup menu for jumping to bookmarked folders.
+
+    The first action toggles the bookmark of the current folder. Selection
+    is dispatched through QMenu.triggered using the path stored as data.
+    """
+
+    # シグナル
+    folderSelected = Signal(str)  # 選択されたブックマークのパス
+    bookmarksChanged = Signal()  # ブックマークの追加・削除通知
+
+    def __init__(self, store: BookmarkStore, parent: QWidget | None = None):
+        """
+        Initialize the popup.
+
+        Args:
+            store: Bookmarks to list
+            parent: Parent widget
+        """
+        super().__init__(parent)
+        self._logger = get_logger("breadcrumb_addressbar.bookmark_popup")
+        self._store = store
+        self._current_path = ""
+        self._toggle_action: QAction | None = None
+        self.setMinimumWidth(300)
+        self.triggered.connect(self._on_action_triggered)
+
+    def store(self) -> BookmarkStore:
+        """Get the bookmarks listed by the popup."""
+        return self._store
+
+    def populateForPath(self, path: str) -> None:
+        """
+        Populate the menu for the given current folder without showing it.
+
+        Args:
+            path: Current folder of the address bar
+        """
+        self._current_path = path
+        self.clear()
+        self._toggle_action = None
+
+        if path:
+            bookmarked = self._store.contains(path)
+            self._toggle_action = QAction(_REMOVE_TEXT if bookmarked else _ADD_TEXT, self)
+            self.addAction(self._toggle_action)
+
+        under = self._store.under(path, limit=MAX_MENU_BOOKMARKS) if path else []
+        if under:
+            self.addSection(_UNDER_SECTION_TEXT)
+            self._add_bookmark_actions(under)
+
+        everything = self._store.bookmarks()
+        if everything:
+            self.addSection(_ALL_SECTION_TEXT)
+            self._add_bookmark_actions(everything[:MAX_MENU_BOOKMARKS])
+            if len(everything) > MAX_MENU_BOOKMARKS:
+                more = self.addAction(f"ほか {len(everything) - MAX_MENU_BOOKMARKS} 件")
+                more.setEnabled(False)
+        else:
+            if self._toggle_action is not None:
+                self.addSeparator()
+            empty = self.addAction(_NO_BOOKMARKS_TEXT)
+            empty.setEnabled(False)
+
+    def showForPath(self, path: str, position: tuple[int, int] | None = None) -> None:
+        """
+        Show the popup for the given current folder.
+
+        Args:
+            path: Current folder of the address bar
+            position: Position to show the popup (x, y)
+        """
+        self.populateForPath(path)
+        if position:
+            self.popup(QPoint(position[0], position[1]))
+        else:
+            self.exec()
+
+    def _add_bookmark_actions(self, bookmarks: list[tuple[str, str]]) -> None:
+        """Append one action per (name, path) bookmark."""
+        for name, path in bookmarks:
+            action = QAction(name, self)
+            action.setData(path)
+            action.setToolTip(path)
+            self.addAction(action)
+
+    def _on_action_triggered(self, action: QAction) -> None:
+        """
+        Dispatch a triggered action.
+
+        Args:
+            action: Triggered action; bookmark actions carry their path as data
+        """
+        if action is self._toggle_action:
+            if self._store.contains(self._current_path):
+                self._store.remove(self._current_path)
+            else:
+                self._store.add(self._current_path)
+            self._logger.info(f"Bookmark toggled: {self._current_path}")
+            self.bookmarksChanged.emit()
+            return
+        path = action.data()
+        if isinstance(path, str) and path:
+            self._logger.info(f"Bookmark selected: {path}")
+            self.folderSelected.emit(path)
@@ -0,0 +1,236 @@
+"""
+Bookmarks
+
+Persisted folder bookmarks kept in a sorted index, so the bookmarks under
+any folder are found with a binary search.
+"""
+
+import json
+import os
+import sys
+from bisect import bisect_left
+
+from .logger_setup import get_logger
+
+_FORMAT_VERSION = 1
+
+
+def default_bookmarks_path() -> str:
+    """
+    Get the default location of the bookmarks file in the user config directory.
+
+    Returns:
+        JSON file path
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~\\AppData\\Roaming")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Application Support")
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    return os.path.join(base, "breadcrumb_addressbar", "bookmarks.json")
+
+
+class BookmarkStore:
+    """
+    Folder bookmarks with prefix lookup.
+
+    Bookmarked paths are kept in a sorted list, so every bookmark under a
+    folder lies in one contiguous run found with bisect. The file is read
+    on first use rather than on construction, so large shared bookmark
+    files do not slow down creating the address bar.
+    """
+
+    def __init__(self, file_path: str | None = None, autosave: bool = True):
+        """
+        Initialize the store without reading the file.
+
+        Args:
+            file_path: JSON file to load from and save to (None keeps bookmarks in memory)
+            autosave: Whether every change is written to file_path immediately
+        """
+        self._logger = get_logger("breadcrumb_addressbar.bookmarks")
+        self._file_path = file_path
+        self._autosave = autosave
+        self._paths: list[str] = []
+        self._names: dict[str, str] = {}
+        self._loaded = file_path is None
+
+    @property
+    def file_path(self) -> str | None:
+        """Get the file the bookmarks are persisted to."""
+        return self._file_path
+
+    def is_loaded(self) -> bool:
+        """
+        Get whether the bookmarks file has been read.
+
+        Returns:
+            True once the bookmarks are in memory
+        """
+        return self._loaded
+
+    def add(self, path: str, name: str | None = None) -> bool:
+        """
+        Bookmark a folder, or rename an existing bookmark.
+
+        Args:
+            path: Folder path
+            name: Display name (defaults to the folder name)
+
+        Returns:
+            True if the bookmarks changed
+        """
+        if not path:
+            return False
+        self._ensure_loaded()
+        path = os.path.normpath(path)
+        name = name or os.path.basename(path) or path
+        if self._names.get(path) == name:
+            return False
+        if path not in self._names:
+            self._paths.insert(bisect_left(self._paths, path), path)
+        self._names[path] = name
+        self._changed()
+        return True
+
+    def remove(self, path: str) -> bool:
+        """
+        Remove a bookmark.
+
+        Args:
+            path: Folder path
+
+        Returns:
+            True if the folder was bookmarked
+        """
+        self._ensure_loaded()
+        path = os.path.normpath(path) if path else path
+        if path not in self._names:
+            return False
+        del self._names[path]
+        del self._paths[bisect_left(self._paths, path)]
+        self._changed()
+        return True
+
+    def contains(self, path: str) -> bool:
+        """
+        Check whether a folder is bookmarked.
+
+        Args:
+            path: Folder path
+
+        Returns:
+            True if bookmarked
+        """
+        self._ensure_loaded()
+        return bool(path) and os.path.normpath(path) in self._names
+
+    def bookmarks(self) -> list[tuple[str, str]]:
+        """
+        Get all bookmarks ordered by path.
+
+        Returns:
+            List of (name, path) tuples
+        """
+        self._ensure_loaded()
+        return [(self._names[path], path) for path in self._paths]
+
+    def under(self, folder: str, limit: int | None = None) -> list[tuple[str, str]]:
+        """
+        Get the bookmarks inside a folder (at any depth).
+
+        Args:
+            folder: Folder path
+            limit: Maximum number of bookmarks to return
+
+        Returns:
+            List of (name, path) tuples ordered by path, excluding folder itself
+        """
+        self._ensure_loaded()
+        if not folder:
+            return []
+        folder = os.path.normpath(folder)
+        prefix = folder if folder.endswith(os.sep) else folder + os.sep
+        # 接頭辞が同じパスはソート済みの一覧で連続しているので、先頭を二分探索する
+        result = []
+        for index in range(bisect_left(self._paths, prefix), len(self._paths)):
+            path = self._paths[index]
+            if not path.startswith(prefix) or (limit is not None and len(result) >= limit):
+                break
+            result.append((self._names[path], path))
+        return result
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._paths)
+
+    def load(self) -> bool:
+        """
+        Read the bookmarks file, replacing the bookmarks in memory.
+
+        Returns:
+            True if the file was read
+        """
+        self._loaded = True
+        self._paths = []
+        self._names = {}
+        if self._file_path is None:
+            return False
+        try:
+            with open(self._file_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            self._logger.warning(f"Failed to load bookmarks from {self._file_path}: {e}")
+            return False
+
+        if not isinstance(data, dict) or data.get("version") != _FORMAT_VERSION:
+            self._logger.warning(f"Unsupported bookmarks format: {self._file_path}")
+            return False
+
+        for entry in data.get("bookmarks", []):
+            if isinstance(entry, dict) and isinstance(entry.get("path"), str) and entry["path"]:
+                path = os.path.normpath(entry["path"])
+                self._names[path] = str(entry.get("name") or os.path.basename(path) or path)
+        # 一度にソートする（1件ずつ挿入するより速い）
+        self._paths = sorted(self._names)
+        self._logger.debug(f"Loaded {len(self._paths)} bookmarks from {self._file_path}")
+        return True
+
+    def save(self) -> bool:
+        """
+        Write the bookmarks to the file.
+
+        Returns:
+            True if the file was written
+        """
+        if self._file_path is None or not self._loaded:
+            return False
+        data = {
+            "version": _FORMAT_VERSION,
+            "bookmarks": [{"path": path, "name": self._names[path]} for path in self._paths],
+        }
+        tmp_path = f"{self._file_path}.tmp"
+        try:
+            directory = os.path.dirname(self._file_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self._file_path)
+            return True
+        except OSError as e:
+            self._logger.error(f"Failed to save bookmarks to {self._file_path}: {e}")
+            return False
+
+    def _ensure_loaded(self) -> None:
+        """Read the bookmarks file on first use."""
+        if not self._loaded:
+            self.load()
+
+    def _changed(self) -> None:
+        """Persist a change if autosave is enabled."""
+        if self._autosave:
+            self.save()
@@ -0,0 +1,313 @@
+"""
+Memory Budget
+
+One process-wide byte budget shared by the caches (folder listings,
+prebuilt popups, folder metadata, frecency history, navigation model and
+folder index), so many bars in a long-lived session stay within a
+predictable amount of memory.
+"""
+
+import threading
+import weakref
+from typing import Protocol
+
+from PySide6.QtCore import QCoreApplication, QObject, Qt, Signal
+
+from .logger_setup import get_logger
+
+# 既定の予算（バイト）
+DEFAULT_LIMIT_BYTES = 256 * 1024 * 1024
+# trim()で残す割合（予算と使用量の小さい方に対して）
+TRIM_RATIO = 0.5
+# 1回の強制で予算に収まらなかった場合に繰り返す回数
+_MAX_ENFORCE_PASSES = 3
+
+# キャッシュの種類ごとの既定の重み（大きいほど追い出されにくい）
+DEFAULT_WEIGHTS: dict[str, float] = {
+    "listings": 4.0,  # フォルダ一覧（再スキャンが高価）
+    "index": 4.0,  # フォルダ索引（検索用の小文字コピーだけを手放す）
+    "frecency": 2.0,  # よく使うフォルダの履歴
+    "menus": 2.0,  # 構築済みポップアップ
+    "predictor": 1.0,  # 遷移予測モデル
+    "metadata": 1.0,  # フォルダごとの項目数・更新日時
+    "probes": 0.5,  # サブフォルダ有無の判定結果
+}
+
+
+class BudgetedCache(Protocol):
+    """Interface of a cache governed by a MemoryBudget."""
+
+    def memory_usage(self) -> int:
+        """Get the estimated number of bytes held by the cache."""
+        ...
+
+    def evict(self, nbytes: int) -> int:
+        """Drop the least valuable entries worth at least nbytes; return the bytes freed."""
+        ...
+
+
+class MemoryBudget(QObject):
+    """
+    Global byte budget over registered caches.
+
+    Caches report their own estimated usage (memory_usage()) and give
+    memory back on request (evict()). When the total exceeds the limit,
+    space is shared by weight: every cache may keep up to level * weight
+    bytes, with the level chosen so the kept total fits the budget, so
+    small caches are left alone and the largest consumers relative to
+    their weight shrink first.
+
+    Caches are held weakly and grouped by name for statistics. Checks
+    requested from worker threads (request_check()) run on the budget's
+    thread, so caches that are not thread-safe are only evicted there.
+    """
+
+    # シグナル
+    _checkRequested = Signal()  # 任意のスレッドから発行し、予算のスレッドで確認する
+
+    def __init__(self, limit_bytes: int = DEFAULT_LIMIT_BYTES, parent: QObject | None = None):
+        """
+        Initialize the budget.
+
+        Args:
+            limit_bytes: Maximum total estimated bytes of the registered caches
+            parent: Parent object
+        """
+        super().__init__(parent)
+        self._logger = get_logger("breadcrumb_addressbar.budget")
+        self._limit = max(0, limit_bytes)
+        self._weights = dict(DEFAULT_WEIGHTS)
+        # キャッシュ → 名前（キャッシュが解放されると項目も消える）
+        self._caches: weakref.WeakKeyDictionary[BudgetedCache, str] = weakref.WeakKeyDictionary()
+        self._evicted: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._check_pending = False
+        self._enforcements = 0
+        self._trims = 0
+        self._checkRequested.connect(self._on_check_requested, Qt.ConnectionType.QueuedConnection)
+
+    def register(self, name: str, cache: BudgetedCache, weight: float | None = None) -> None:
+        """
+        Put a cache under the budget.
+
+        Registering the same cache again only updates its name.
+
+        Args:
+            name: Cache kind used for weights and statistics (e.g. "listings")
+            cache: Cache implementing memory_usage() and evict()
+            weight: Weight of every cache of this name (None keeps the
+                    current or default weight)
+        """
+        with self._lock:
+            self._caches[cache] = name
+            if weight is not None:
+                self._weights[name] = max(1e-6, weight)
+            self._weights.setdefault(name, 1.0)
+        self.request_check()
+
+    def unregister(self, cache: BudgetedCache) -> None:
+        """
+        Release a cache from the budget.
+
+        Args:
+            cache: Registered cache
+        """
+        with self._lock:
+            self._caches.pop(cache, None)
+
+    def limit(self) -> int:
+        """Get the budget in bytes."""
+        return self._limit
+
+    def set_limit(self, limit_bytes: int) -> None:
+        """
+        Set the budget, evicting right away if usage exceeds it.
+
+        Args:
+            limit_bytes: Maximum total estimated bytes
+        """
+        self._limit = max(0, limit_bytes)
+        self.enforce()
+
+    def weight(self, name: str) -> float:
+        """Get the weight of a cache kind."""
+        with self._lock:
+            return self._weights.get(name, 1.0)
+
+    def set_weight(self, name: str, weight: float) -> None:
+        """
+        Set the weight of a cache kind.
+
+        Args:
+            name: Cache kind
+            weight: Relative share of the budget (higher keeps more)
+        """
+        with self._lock:
+            self._weights[name] = max(1e-6, weight)
+
+    def usage(self) -> int:
+        """Get the total estimated bytes of the registered caches."""
+        return sum(usage for _, _, usage in self._snapshot())
+
+    def request_check(self) -> None:
+        """
+        Ask for the budget to be checked soon (callable from any thread).
+
+        Requests are coalesced and served from the event loop of the
+        budget's thread.
+        """
+        if self._check_pending:
+            return
+        self._check_pending = True
+        self._checkRequested.emit()
+
+    def enforce(self, target: int | None = None) -> int:
+        """
+        Evict until the total usage fits target.
+
+        Call from the budget's thread.
+
+        Args:
+            target: Bytes to fit in (defaults to the limit)
+
+        Returns:
+            Estimated bytes freed
+        """
+        target = self._limit if target is None else max(0, target)
+        freed = 0
+        # 求めた量を手放せなかったキャッシュ（以降は使用量を固定とみなす）
+        exhausted: set[int] = set()
+        for attempt in range(_MAX_ENFORCE_PASSES):
+            entries = self._snapshot()
+            if sum(usage for _, _, usage in entries) <= target:
+                break
+            if not attempt:
+                self._enforcements += 1
+            fixed = sum(usage for cache, _, usage in entries if id(cache) in exhausted)
+            candidates = [entry for entry in entries if id(entry[0]) not in exhausted]
+            level = self._water_level(candidates, target - fixed)
+            stuck = len(exhausted)
+            progress = 0
+            for cache, name, usage in candidates:
+                allowed = int(level * self.weight(name))
+                if usage <= allowed:
+                    continue
+                released = max(0, cache.evict(usage - allowed))
+                if released < usage - allowed:
+                    exhausted.add(id(cache))
+                progress += released
+                with self._lock:
+                    self._evicted[name] = self._evicted.get(name, 0) + released
+            freed += progress
+            if not progress and len(exhausted) == stuck:
+                # どのキャッシュもこれ以上手放せない
+                break
+        if freed:
+            self._logger.debug(f"Memory budget enforced: freed {freed} bytes, target {target}")
+        return freed
+
+    def trim(self, ratio: float = TRIM_RATIO) -> int:
+        """
+        Shrink the caches, e.g. on a low-memory notification.
+
+        Args:
+            ratio: Fraction of min(limit, usage) to keep (0 drops everything
+                   the caches can give back)
+
+        Returns:
+            Estimated bytes freed
+        """
+        self._trims += 1
+        keep = min(self._limit, self.usage()) * min(1.0, max(0.0, ratio))
+        return self.enforce(int(keep))
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get budget statistics.
+
+        Returns:
+            Dictionary with the limit, current usage, registered caches,
+            enforcements that had to evict, trims and total evicted bytes
+        """
+        entries = self._snapshot()
+        with self._lock:
+            evicted = sum(self._evicted.values())
+        return {
+            "limit": self._limit,
+            "usage": sum(usage for _, _, usage in entries),
+            "caches": len(entries),
+            "enforcements": self._enforcements,
+            "trims": self._trims,
+            "evicted": evicted,
+        }
+
+    def cache_stats(self) -> dict[str, dict[str, float]]:
+        """
+        Get usage per cache kind.
+
+        Returns:
+            Dictionary keyed by cache name with the number of caches,
+            their estimated bytes, the weight and the bytes evicted so far
+        """
+        result: dict[str, dict[str, float]] = {}
+        for _, name, usage in self._snapshot():
+            entry = result.setdefault(name, {"caches": 0, "bytes": 0})
+            entry["caches"] += 1
+            entry["bytes"] += usage
+        with self._lock:
+            for name, entry in result.items():
+                entry["weight"] = self._weights.get(name, 1.0)
+                entry["evicted"] = self._evicted.get(name, 0)
+        return result
+
+    def _snapshot(self) -> list[tuple[BudgetedCache, str, int]]:
+        """Get the live caches with their names and current usage."""
+        with self._lock:
+            caches = list(self._caches.items())
+        return [(cache, name, max(0, cache.memory_usage())) for cache, name in caches]
+
+    def _water_level(self, entries: list[tuple[BudgetedCache, str, int]], target: int) -> float:
+        """Get the level at which the sum of min(usage, level * weight) equals target."""
+        remaining = float(max(0, target))
+        weighted = sorted((usage / self.weight(name), self.weight(name), usage) for _, name, usage in entries)
+        total_weight = sum(weight for _, weight, _ in weighted)
+        # 重みあたりの使用量が少ないキャッシュから、そのまま収まるかを確かめる
+        for ratio, weight, usage in weighted:
+            if ratio * total_weight > remaining:
+                break
+            remaining -= usage
+            total_weight -= weight
+        return remaining / total_weight if total_weight > 0 else 0.0
+
+    def _on_check_requested(self) -> None:
+        self._check_pending = False
+        self.enforce()
+
+
+_budget: MemoryBudget | None = None
+_budget_lock = threading.Lock()
+
+
+def get_memory_budget() -> MemoryBudget:
+    """
+    Get the process-wide memory budget.
+
+    Returns:
+        Shared MemoryBudget instance
+    """
+    global _budget
+    with _budget_lock:
+        if _budget is None:
+            _budget = MemoryBudget()
+            app = QCoreApplication.instance()
+            if app is not None and _budget.thread() is not app.thread():
+                # 確認はメインスレッドのイベントループで行う
+                _budget.moveToThread(app.thread())
+        return _budget
+
+
+def request_memory_check() -> None:
+    """Ask the process-wide budget, if created, to check usage soon (any thread)."""
+    budget = _budget
+    if budget is not None:
+        budget.request_check()
@@ -0,0 +1,492 @@
+"""
+Columnar Folder Listing
+
+Compact storage for very large directory listings: the folder names live
+in one UTF-8 blob indexed by an offsets array, per-entry flags and
+metadata live in parallel arrays, and full paths are joined only when an
+entry is read.
+"""
+
+import os
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from typing import Any, overload
+
+from .sorting import (
+    METADATA_SORT_MODES,
+    SORT_MTIME,
+    SORT_NATURAL,
+    FolderMetadata,
+    SortedListing,
+    get_sort_key,
+    natural_key,
+)
+
+# この件数以上の一覧は列形式で保持する
+COLUMNAR_MIN_ENTRIES = 4096
+
+# エントリごとのフラグ
+FLAG_HIDDEN = 0x01  # 表示ルールで表示している隠しフォルダ
+FLAG_MTIME = 0x02  # 更新日時を収集済み
+FLAG_ITEM_COUNT = 0x04  # 項目数を収集済み
+
+# 二分探索で計算したソートキーを覚えておく行数の上限
+MAX_CACHED_KEYS = 4096
+
+_SEPARATOR = b"\0"
+# os.listdir()が返すデコードできない名前（サロゲート）もそのまま往復させる
+_ERRORS = "surrogateescape"
+
+
+class ColumnarListing(Sequence[tuple[str, str]]):
+    """
+    Sorted folder listing stored column-wise.
+
+    Readers see a sequence of (folder_name, folder_path) tuples like
+    SortedListing; entries are decoded and joined to the directory on
+    access, so an entry costs a few bytes of name plus fixed-size array
+    slots instead of two strings and a tuple. Slicing returns another
+    ColumnarListing.
+
+    Instead of a key per entry, the listing keeps a rank column
+    (array('I')) for every other sort mode it has been ordered by, so
+    with_mode() re-sorts by rank and derived listings inherit the ranks;
+    the metadata modes break ties by the natural rank. Binary searches
+    (index_of(), merge()) compute the keys of the rows they visit and keep
+    them, so repeated lookups reuse the upper levels of the search.
+    """
+
+    __slots__ = (
+        "_blob",
+        "_derived",
+        "_flags",
+        "_item_counts",
+        "_keys",
+        "_mtimes",
+        "_offsets",
+        "_ranks",
+        "directory",
+        "mode",
+    )
+
+    def __init__(self, directory: str, names: Iterable[str] = (), mode: str = SORT_NATURAL):
+        """
+        Initialize the listing, sorting names by mode.
+
+        Args:
+            directory: Directory containing the folders
+            names: Folder names in any order
+            mode: One of SORT_MODES (metadata modes need metadata, see with_mode())
+        """
+        self.directory = directory
+        self.mode = mode
+        self._derived: dict[str, ColumnarListing] = {}
+        self._ranks: dict[str, array[int]] = {}
+        self._keys: dict[int, Any] = {}
+        self._mtimes: array[int] | None = None
+        self._item_counts: array[int] | None = None
+        key = get_sort_key(SORT_NATURAL if mode in METADATA_SORT_MODES else mode)
+        self._set_names(sorted(names, key=key))
+
+    @classmethod
+    def from_entries(
+        cls, entries: Iterable[tuple[str, str]], directory: str, mode: str = SORT_NATURAL
+    ) -> ColumnarListing:
+        """
+        Build a listing from (folder_name, folder_path) entries of one directory.
+
+        Args:
+            entries: Folder entries in any order
+            directory: Directory containing the folders
+            mode: Sort mode
+
+        Returns:
+            New listing
+        """
+        return cls(directory, (name for name, _ in entries), mode)
+
+    def _set_names(self, names: list[str]) -> None:
+        """Encode names (already in order) into the blob, offsets and flags columns."""
+        encoded = [name.encode("utf-8", _ERRORS) for name in names]
+        # 先頭と末尾にも区切りを置き、名前の完全一致をfind()1回で探せるようにする
+        self._blob = _SEPARATOR + _SEPARATOR.join(encoded) + _SEPARATOR
+        offsets = array("I", [0]) * (len(encoded) + 1)
+        position = 1
+        for i, name in enumerate(encoded):
+            offsets[i] = position
+            position += len(name) + 1
+        offsets[len(encoded)] = position
+        self._offsets = offsets
+        self._flags = array("B", [FLAG_HIDDEN if name.startswith(".") else 0 for name in names])
+
+    def _take(self, indexes: Sequence[int] | range, mode: str) -> ColumnarListing:
+        """Build a listing of the entries at indexes, in that order."""
+        listing = ColumnarListing.__new__(ColumnarListing)
+        listing.directory = self.directory
+        listing.mode = mode
+        listing._derived = {}
+        listing._keys = {}
+        if isinstance(indexes, range) and indexes.step == 1:
+            # 連続した範囲はバイト列と配列の切り出しだけで作る
+            start, stop = indexes.start, max(indexes.start, indexes.stop)
+            first = self._offsets[start]
+            listing._blob = _SEPARATOR + (self._blob[first : self._offsets[stop]] or _SEPARATOR)
+            listing._offsets = array("I", (offset - first + 1 for offset in self._offsets[start : stop + 1]))
+            listing._flags = self._flags[start:stop]
+            listing._mtimes = self._mtimes[start:stop] if self._mtimes is not None else None
+            listing._item_counts = self._item_counts[start:stop] if self._item_counts is not None else None
+            listing._ranks = {other: ranks[start:stop] for other, ranks in self._ranks.items()}
+            return listing
+        # 他の並び順の順位は行を並べ替えても使えるので引き継ぐ（この一覧の並び順も順位になる）
+        listing._ranks = {
+            other: array("I", (ranks[i] for i in indexes)) for other, ranks in self._ranks.items() if other != mode
+        }
+        if self.mode != mode:
+            listing._ranks[self.mode] = array("I", indexes)
+        # 1行ずつデコードせず、バイト列を一度にデコードして並べ替える
+        every_name = self.names()
+        listing._set_names([every_name[i] for i in indexes])
+        listing._flags = array("B", (self._flags[i] for i in indexes))
+        listing._mtimes = array("q", (self._mtimes[i] for i in indexes)) if self._mtimes is not None else None
+        listing._item_counts = (
+            array("q", (self._item_counts[i] for i in indexes)) if self._item_counts is not None else None
+        )
+        return listing
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @overload
+    def __getitem__(self, index: int) -> tuple[str, str]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> ColumnarListing: ...
+
+    def __getitem__(self, index: int | slice) -> tuple[str, str] | ColumnarListing:
+        if isinstance(index, slice):
+            return self._take(range(*index.indices(len(self))), self.mode)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("listing index out of range")
+        name = self._name(index)
+        return name, os.path.join(self.directory, name)
+
+    def __iter__(self) -> Iterator[tuple[str, str]]:
+        directory = self.directory
+        for name in self.names():
+            yield name, os.path.join(directory, name)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ColumnarListing):
+            return self.directory == other.directory and self._blob == other._blob
+        if isinstance(other, list | tuple):
+            return len(other) == len(self) and all(a == b for a, b in zip(self, other, strict=True))
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"ColumnarListing({self.directory!r}, {len(self)} entries, mode={self.mode!r})"
+
+    def _name(self, index: int) -> str:
+        offsets = self._offsets
+        return self._blob[offsets[index] : offsets[index + 1] - 1].decode("utf-8", _ERRORS)
+
+    def name(self, index: int) -> str:
+        """
+        Get the folder name of an entry.
+
+        Args:
+            index: Entry position
+
+        Returns:
+            Folder name
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("listing index out of range")
+        return self._name(index)
+
+    def names(self) -> list[str]:
+        """
+        Get every folder name in order without building paths.
+
+        Returns:
+            Folder names
+        """
+        if not len(self):
+            return []
+        return self._blob[1:-1].decode("utf-8", _ERRORS).split("\0")
+
+    def flags(self, index: int) -> int:
+        """
+        Get the flags of an entry.
+
+        Args:
+            index: Entry position
+
+        Returns:
+            Combination of the FLAG_* constants
+        """
+        return self._flags[index]
+
+    def index_of(self, path: str) -> int:
+        """
+        Find the entry of a folder path.
+
+        Args:
+            path: Folder path
+
+        Returns:
+            Entry position, or -1 if the folder is not listed
+        """
+        name = os.path.basename(path)
+        if not name or os.path.join(self.directory, name) != path:
+            return -1
+        if self.mode not in METADATA_SORT_MODES:
+            # 名前順の一覧は、探索で訪れた行のキー（覚えておいたもの）と比べて二分探索する
+            index = bisect_left(range(len(self)), get_sort_key(self.mode)(name), key=self._key_at)
+            return index if index < len(self) and self._name(index) == name else -1
+        position = self._blob.find(_SEPARATOR + name.encode("utf-8", _ERRORS) + _SEPARATOR)
+        if position < 0:
+            return -1
+        # 見つかった区切りの次が名前の先頭なので、オフセット配列を二分探索する
+        return bisect_right(self._offsets, position + 1) - 1
+
+    def has_metadata(self, item_counts: bool = False) -> bool:
+        """
+        Check whether folder metadata has been collected.
+
+        Args:
+            item_counts: Whether item counts are required as well
+
+        Returns:
+            True if the metadata is available
+        """
+        return self._mtimes is not None and (self._item_counts is not None or not item_counts)
+
+    def set_metadata(self, metadata: dict[str, FolderMetadata], item_counts: bool = False) -> None:
+        """
+        Store folder metadata in the mtime and item count columns.
+
+        Args:
+            metadata: Folder metadata keyed by folder path
+            item_counts: Whether metadata includes item counts
+        """
+        count = len(self)
+        mtimes = array("q", [-1]) * count
+        counts = array("q", [-1]) * count if item_counts else None
+        directory = self.directory
+        flags = self._flags
+        for i, name in enumerate(self.names()):
+            flags[i] &= ~(FLAG_MTIME | FLAG_ITEM_COUNT)
+            value = metadata.get(os.path.join(directory, name))
+            if value is None:
+                continue
+            if value.mtime_ns >= 0:
+                mtimes[i] = value.mtime_ns
+                flags[i] |= FLAG_MTIME
+            if counts is not None and value.item_count >= 0:
+                counts[i] = value.item_count
+                flags[i] |= FLAG_ITEM_COUNT
+        self._mtimes = mtimes
+        self._item_counts = counts
+        self._derived = {}
+        # 名前順の順位はそのまま使える
+        self._ranks = {mode: ranks for mode, ranks in self._ranks.items() if mode not in METADATA_SORT_MODES}
+        if self.mode in METADATA_SORT_MODES:
+            self._keys = {}
+
+    def metadata_at(self, index: int) -> FolderMetadata | None:
+        """
+        Get the collected metadata of an entry.
+
+        Args:
+            index: Entry position
+
+        Returns:
+            Metadata (item_count is -1 if not collected), or None if none
+            was collected for the entry
+        """
+        if self._mtimes is None or not self._flags[index] & FLAG_MTIME:
+            return None
+        count = self._item_counts[index] if self._item_counts is not None else -1
+        return FolderMetadata(self._mtimes[index], count)
+
+    @property
+    def metadata(self) -> dict[str, FolderMetadata] | None:
+        """
+        Get the collected metadata keyed by folder path.
+
+        This builds every path; prefer metadata_at() for large listings.
+        """
+        if self._mtimes is None:
+            return None
+        result = {}
+        for i, (_, path) in enumerate(self):
+            value = self.metadata_at(i)
+            if value is not None:
+                result[path] = value
+        return result
+
+    def with_mode(self, mode: str) -> ColumnarListing:
+        """
+        Get the listing ordered by another sort mode.
+
+        Re-sorted copies are remembered until the metadata changes, and
+        each mode's keys are computed once: later re-sorts use its rank
+        column. Metadata modes order entries without metadata last.
+
+        Args:
+            mode: One of SORT_MODES or METADATA_SORT_MODES
+
+        Returns:
+            This listing if already in mode, otherwise a re-sorted copy
+        """
+        if mode == self.mode:
+            return self
+        derived = self._derived.get(mode)
+        if derived is None:
+            derived = self._take(self._order(mode), mode)
+            self._derived[mode] = derived
+        return derived
+
+    def merge(self, batch: Iterable[tuple[str, str]]) -> list[int]:
+        """
+        Insert a batch of entries at their sorted positions.
+
+        The new entries have no metadata; rank columns and re-sorted copies
+        are dropped.
+
+        Args:
+            batch: New folder entries of this directory in any order
+
+        Returns:
+            Positions at which the entries were inserted, in insertion order
+        """
+        if self.mode in METADATA_SORT_MODES:
+            entries = [((1, 0, natural_key(name)), name) for name, _ in batch]
+        else:
+            name_key = get_sort_key(self.mode)
+            entries = [(name_key(name), name) for name, _ in batch]
+        if not entries:
+            return []
+
+        count = len(self)
+        rows = range(count)
+        # 既存の行の間（挿入先）と、先に挿入したエントリを数えた挿入時の位置
+        gaps: list[int] = []
+        positions: list[int] = []
+        inserted: list[Any] = []
+        for key, _ in entries:
+            gap = bisect_right(rows, key, key=self._key_at)
+            gaps.append(gap)
+            positions.append(gap + bisect_right(inserted, key))
+            insort(inserted, key)
+
+        # 既存の行は番号、新しいエントリは-1-番号で表した新しい並び
+        order: list[int] = []
+        previous = 0
+        for new in sorted(range(len(entries)), key=lambda i: (gaps[i], entries[i][0], i)):
+            order.extend(range(previous, gaps[new]))
+            order.append(-1 - new)
+            previous = gaps[new]
+        order.extend(range(previous, count))
+
+        names = self.names()
+        flags, mtimes, counts = self._flags, self._mtimes, self._item_counts
+        merged = [names[i] if i >= 0 else entries[-1 - i][1] for i in order]
+        self._set_names(merged)
+        self._flags = array("B", (flags[i] if i >= 0 else self._flags[row] for row, i in enumerate(order)))
+        if mtimes is not None:
+            self._mtimes = array("q", (mtimes[i] if i >= 0 else -1 for i in order))
+        if counts is not None:
+            self._item_counts = array("q", (counts[i] if i >= 0 else -1 for i in order))
+        self._ranks = {}
+        self._keys = {}
+        self._derived = {}
+        return positions
+
+    def filtered(self, predicate: Callable[[tuple[str, str]], bool]) -> ColumnarListing:
+        """
+        Get the entries matching predicate, keeping their columns and rank columns.
+
+        Args:
+            predicate: Function returning True for entries to keep
+
+        Returns:
+            New listing in the same mode
+        """
+        return self._take([i for i, entry in enumerate(self) if predicate(entry)], self.mode)
+
+    def _order(self, mode: str) -> list[int]:
+        """Get the entry positions ordered by mode, computing its keys only if it has no rank column yet."""
+        count = len(self)
+        ranks = self._ranks.get(mode)
+        if ranks is not None:
+            # 順位は並びの逆写像なので、並べ替えずに置き直すだけで並びになる
+            order = [0] * count
+            for i, rank in enumerate(ranks):
+                order[rank] = i
+            return order
+        if mode in METADATA_SORT_MODES:
+            column = self._mtimes if mode == SORT_MTIME else self._item_counts
+            # 同じ値の中は自然順（自然順の順位で比べ、名前のキーは作らない）
+            natural = range(count) if self.mode == SORT_NATURAL else self._rank_column(SORT_NATURAL)
+
+            def metadata_key(i: int) -> tuple[int, int, int]:
+                value = column[i] if column is not None else -1
+                # メタデータのないエントリは末尾に回す
+                return (1, 0, natural[i]) if value < 0 else (0, -value, natural[i])
+
+            order = sorted(range(count), key=metadata_key)
+        else:
+            name_key = get_sort_key(mode)
+            keys = [name_key(name) for name in self.names()]
+            order = sorted(range(count), key=keys.__getitem__)
+        ranks = array("I", bytes(4 * count))
+        for rank, i in enumerate(order):
+            ranks[i] = rank
+        self._ranks[mode] = ranks
+        return order
+
+    def _rank_column(self, mode: str) -> array[int]:
+        """Get the rank of every entry under mode (not the listing's own mode)."""
+        ranks = self._ranks.get(mode)
+        if ranks is None:
+            self._order(mode)
+            ranks = self._ranks[mode]
+        return ranks
+
+    def _key_at(self, index: int) -> Any:
+        """Get the sort key of an entry in the listing's mode, remembering it for later searches."""
+        key = self._keys.get(index)
+        if key is None:
+            if len(self._keys) >= MAX_CACHED_KEYS:
+                self._keys.clear()
+            name = self._name(index)
+            if self.mode in METADATA_SORT_MODES:
+                column = self._mtimes if self.mode == SORT_MTIME else self._item_counts
+                value = column[index] if column is not None else -1
+                key = (1, 0, natural_key(name)) if value < 0 else (0, -value, natural_key(name))
+            else:
+                key = get_sort_key(self.mode)(name)
+            self._keys[index] = key
+        return key
+
+    def memory_size(self) -> int:
+        """
+        Get the number of bytes held by the columns.
+
+        Returns:
+            Size of the names blob and the arrays (including rank columns)
+        """
+        arrays = [self._offsets, self._flags, self._mtimes, self._item_counts, *self._ranks.values()]
+        return len(self._blob) + sum(a.itemsize * len(a) for a in arrays if a is not None)
+
+
+# 一覧として扱う型（小さい一覧はタプルのリスト、大きい一覧は列形式）
+FolderListing = SortedListing | ColumnarListing
@@ -5,14 +5,32 @@ Main breadcrumb address bar widget for file manager navigation.
 """
 
 import os
-
-from PySide6.QtCore import QSize, Qt, Signal
-from PySide6.QtGui import QFont
-from PySide6.QtWidgets import QHBoxLayout, QLabel, QWidget
-
+import re
+from collections.abc import Sequence
+from typing import Any
+
+from PySide6.QtCore import QObject, QRunnable, QSize, Qt, QThread, QThreadPool, Signal
+from PySide6.QtGui import QFont, QKeySequence, QShortcut
+from PySide6.QtWidgets import QHBoxLayout, QInputDialog, QLabel, QToolButton, QWidget
+
+from .bookmark_popup import BookmarkPopup
+from .bookmarks import BookmarkStore, default_bookmarks_path
+from .budget import get_memory_budget
+from .filters import DEFAULT_FILTER, FolderFilter
+from .frecency import FrecencyStore
+from .fuzzy import FuzzyMatcher
+from .indexer import FolderIndex, FolderIndexer
+from .list_popup import FolderListPopup, MetadataLoader
+from .listing import FolderListingCache, ListingPrefetcher, SubdirProber, get_listing_cache
 from .logger_setup import get_logger
-from .popup import FolderSelectionPopup
-from .widgets import BreadcrumbItem
+from .pathnode import PathNode, intern_path
+from .popup import FolderSelectionPopup, PopupMenuCache
+from .predictor import NavigationPredictor
+from .scanpool import ScanProcessPool
+from .sorting import ALL_SORT_MODES
+from .store import PersistentListingStore
+from .warmup import AncestorWarmup
+from .widgets import HOVER_INTENT_DELAY_MS, BreadcrumbItem, JumpBox, JumpPopup
 
 
 class BreadcrumbAddressBar(QWidget):
@@ -52,6 +70,20 @@ class BreadcrumbAddressBar(QWidget):
         self._use_combo_popup = False
         self._use_list_popup = False
 
+        # ホバー時のフォルダ一覧プリフェッチ
+        self._hover_prefetch_enabled = True
+        self._hover_prefetch_delay = HOVER_INTENT_DELAY_MS
+        self._prefetcher = ListingPrefetcher(parent=self)
+
+        # setPath後の祖先ディレクトリのウォームアップ（オプション）
+        self._ancestor_warmup_enabled = False
+        self._warmup = AncestorWarmup(self._prefetcher, parent=self)
+
+        # 遷移予測による投機的プリフェッチ（オプション）
+        self._predictor: NavigationPredictor | None = None
+        self._prediction_top_k = 2
+        self._speculative_prefetches = 0
+
         # ロガー
         self._logger = get_logger("breadcrumb_addressbar.core")
 
@@ -59,8 +91,64 @@ class BreadcrumbAddressBar(QWidget):
         self._layout = QHBoxLayout(self)
         self._breadcrumb_items: list[BreadcrumbItem] = []
 
-        # ポップアップインスタンス（シンプルに戻す）
+        # ポップアップインスタンス（直近に表示したもの）と構築済みポップアップのキャッシュ
         self._popup: FolderSelectionPopup | None = None
+        self._popup_cache = PopupMenuCache(self._create_popup)
+
+        # キャッシュはプロセス全体で1つのメモリ予算に登録する
+        self._memory_budget = get_memory_budget()
+        self._memory_budget.register("listings", self._prefetcher.cache)
+        self._memory_budget.register("menus", self._popup_cache)
+
+        # サブフォルダをサブメニューとして展開するカスケード表示（オプション）
+        self._cascading_popups = False
+        self._subdir_prober: SubdirProber | None = None
+
+        # リスト型ポップアップ（メタデータ列は表示中の行だけ遅延読み込み）
+        self._list_popup: FolderListPopup | None = None
+        self._list_popup_metadata = False
+        self._metadata_loader: MetadataLoader | None = None
+
+        # ポップアップの表示順（Noneならキャッシュの並び順）
+        self._sort_mode: str | None = None
+
+        # よく使うフォルダの固定表示（オプション）
+        self._frecency: FrecencyStore | None = None
+        self._pinned_count = 3
+
+        # ブックマーク（ストアは最初に使われるまで読み込まない）
+        self._bookmarks_enabled = False
+        self._bookmark_store: BookmarkStore | None = None
+        self._bookmark_button: QToolButton | None = None
+        self._bookmark_popup: BookmarkPopup | None = None
+
+        # フォルダ索引と名前で移動するジャンプボックス（オプション）
+        self._folder_indexer: FolderIndexer | None = None
+        self._jump_box: JumpBox | None = None
+        self._jump_popup: JumpPopup | None = None
+        # あいまい検索の候補（履歴・ブックマークと索引で別々に作り直す）
+        self._recent_matcher: FuzzyMatcher | None = None
+        self._index_matcher: FuzzyMatcher | None = None
+        # 索引の照合器は大きいのでワーカースレッドで作り、できるまでは古いものを使う
+        self._index_generation = 0
+        self._index_matcher_generation = -1
+        self._index_matcher_pending = -1
+        # 監視による小さな更新は作り直さずに照合器へ反映する
+        self._index_matcher_patched = False
+        self._matcher_pool = QThreadPool(self)
+        self._matcher_pool.setMaxThreadCount(1)
+        self._matcher_pool.setThreadPriority(QThread.Priority.LowPriority)
+        # タスクはバーではなくこの子オブジェクトを持つ（プールより後に作る）
+        self._matcher_relay = _IndexMatcherRelay(self)
+        self._matcher_relay.built.connect(self._on_index_matcher_built, Qt.ConnectionType.QueuedConnection)
+        self._jump_shortcut = QShortcut(QKeySequence("Ctrl+J"), self)
+        self._jump_shortcut.setContext(Qt.ShortcutContext.WidgetWithChildrenShortcut)
+        self._jump_shortcut.activated.connect(self.showJumpPopup)
+
+        # ポップアップから「このフォルダ以下を検索」（オプション）
+        self._subtree_search_enabled = False
+        self._search_max_depth: int | None = None
+        self._search_popup: FolderSelectionPopup | None = None
 
         # レイアウト設定
         self._setup_layout()
@@ -84,8 +172,11 @@ class BreadcrumbAddressBar(QWidget):
         """
         if path != self._current_path:
             self._logger.info(f"Setting path: {path}")
+            previous_path = self._current_path
             self._current_path = path
             self._update_display()
+            self._start_ancestor_warmup()
+            self._update_prediction(previous_path, path)
             self.pathChanged.emit(path)
 
     def getPath(self) -> str:
@@ -162,6 +253,756 @@ class BreadcrumbAddressBar(QWidget):
         """
         return self._popup_position_offset
 
+    def setHoverPrefetchEnabled(self, enabled: bool) -> None:
+        """
+        Set whether hovering a breadcrumb button prefetches its folder listing.
+
+        Args:
+            enabled: True to prefetch on hover intent
+        """
+        if enabled != self._hover_prefetch_enabled:
+            self._hover_prefetch_enabled = enabled
+            if not enabled:
+                self._prefetcher.cancel_all()
+            self._logger.debug(f"Hover prefetch enabled: {enabled}")
+
+    def getHoverPrefetchEnabled(self) -> bool:
+        """
+        Get whether hover prefetch is enabled.
+
+        Returns:
+            True if listings are prefetched on hover intent
+        """
+        return self._hover_prefetch_enabled
+
+    def setHoverPrefetchDelay(self, msecs: int) -> None:
+        """
+        Set the hover-intent delay before a prefetch starts.
+
+        Args:
+            msecs: Delay in milliseconds
+        """
+        if msecs >= 0 and msecs != self._hover_prefetch_delay:
+            self._hover_prefetch_delay = msecs
+            for item in self._breadcrumb_items:
+                item.set_hover_intent_delay(msecs)
+
+    def setAncestorWarmupEnabled(self, enabled: bool) -> None:
+        """
+        Set whether the listings of the current path and its ancestors are
+        warmed in the background after each setPath().
+
+        Args:
+            enabled: True to enable ancestor warm-up
+        """
+        if enabled != self._ancestor_warmup_enabled:
+            self._ancestor_warmup_enabled = enabled
+            if enabled:
+                self._start_ancestor_warmup()
+            else:
+                self._warmup.cancel()
+            self._logger.debug(f"Ancestor warm-up enabled: {enabled}")
+
+    def getAncestorWarmupEnabled(self) -> bool:
+        """
+        Get whether ancestor warm-up is enabled.
+
+        Returns:
+            True if ancestor warm-up is enabled
+        """
+        return self._ancestor_warmup_enabled
+
+    def warmupStats(self) -> dict[str, float]:
+        """
+        Get ancestor warm-up and listing cache statistics.
+
+        Returns:
+            Warm-up statistics (see AncestorWarmup.stats()) plus the listing
+            cache hits, misses and hit rate
+        """
+        stats = self._warmup.stats()
+        cache_stats = self._prefetcher.cache.stats()
+        lookups = cache_stats["hits"] + cache_stats["misses"]
+        stats["cache_hits"] = cache_stats["hits"]
+        stats["cache_misses"] = cache_stats["misses"]
+        stats["cache_hit_rate"] = cache_stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _start_ancestor_warmup(self) -> None:
+        """Warm the current directory first, then its ancestors."""
+        if not self._ancestor_warmup_enabled or not self._current_path:
+            return
+        paths = [path for _, path in reversed(self._split_path(self._current_path))]
+        self._warmup.start(paths)
+
+    def setNavigationPredictor(self, predictor: NavigationPredictor | None, top_k: int = 2) -> None:
+        """
+        Set the navigation predictor used for speculative prefetch.
+
+        Every path change trains the predictor, and the top_k most likely
+        next directories are prefetched in the background. Persisting the
+        model between sessions is left to the application
+        (NavigationPredictor.save()/load()).
+
+        Args:
+            predictor: Predictor instance, or None to disable prediction
+            top_k: Number of predicted directories to prefetch
+        """
+        self._predictor = predictor
+        if predictor is not None:
+            self._memory_budget.register("predictor", predictor)
+        self._prediction_top_k = max(0, top_k)
+        self._speculative_prefetches = 0
+
+    def getNavigationPredictor(self) -> NavigationPredictor | None:
+        """
+        Get the navigation predictor.
+
+        Returns:
+            Predictor instance, or None if prediction is disabled
+        """
+        return self._predictor
+
+    def predictionStats(self) -> dict[str, float]:
+        """
+        Get speculative prefetch statistics.
+
+        Returns:
+            Predictor statistics (see NavigationPredictor.stats()) plus the
+            number of speculative prefetches issued; empty if disabled
+        """
+        if self._predictor is None:
+            return {}
+        stats = self._predictor.stats()
+        stats["prefetches"] = self._speculative_prefetches
+        return stats
+
+    def _update_prediction(self, previous_path: str, path: str) -> None:
+        """Train the predictor and prefetch the likely next directories."""
+        if self._predictor is None:
+            return
+        self._predictor.record(previous_path, path)
+        for predicted in self._predictor.predict(path, self._prediction_top_k):
+            if self._prefetcher.prefetch(predicted):
+                self._speculative_prefetches += 1
+
+    def setPersistentListingStore(self, store: PersistentListingStore | None) -> None:
+        """
+        Set an on-disk store for folder listings, for warm application starts.
+
+        Popups for directories whose stored snapshot still matches are
+        populated from disk and rescanned in the background. The store
+        backs the listing cache, which is shared by all bars by default.
+
+        Args:
+            store: Persistent store, or None to keep listings in memory only
+        """
+        self._prefetcher.cache.set_store(store)
+        self._logger.debug(f"Persistent listing store: {store.path if store else None}")
+
+    def getPersistentListingStore(self) -> PersistentListingStore | None:
+        """
+        Get the on-disk store backing the listing cache.
+
+        Returns:
+            Persistent store, or None if listings are kept in memory only
+        """
+        return self._prefetcher.cache.store
+
+    def setScanProcessPool(self, pool: ScanProcessPool | None) -> None:
+        """
+        Run folder scans in helper processes with a deadline per request.
+
+        A scan stuck on a dead network mount then fails after the pool's
+        timeout: the popup shows that the folder is not responding instead
+        of a loading entry that never resolves, and the hung helper is
+        replaced. The pool backs the listing cache, which is shared by all
+        bars by default; the caller closes it when no longer needed.
+
+        Args:
+            pool: Scan process pool, or None to scan in worker threads
+        """
+        self._prefetcher.cache.set_scan_pool(pool)
+        self._logger.debug(f"Scan process pool: {f'timeout {pool.timeout}s' if pool else None}")
+
+    def getScanProcessPool(self) -> ScanProcessPool | None:
+        """
+        Get the helper processes running the listing cache's scans.
+
+        Returns:
+            Scan process pool, or None if scans run in worker threads
+        """
+        return self._prefetcher.cache.scan_pool
+
+    def setPopupCacheSize(self, count: int) -> None:
+        """
+        Set how many fully built popups are kept for reuse.
+
+        Args:
+            count: Maximum number of live popups (at least 1)
+        """
+        self._popup_cache.set_max_menus(count)
+
+    def setCascadingPopups(self, enabled: bool) -> None:
+        """
+        Set whether folders with sub folders open as cascading submenus.
+
+        Submenus are listed only when hovered; expand indicators come from
+        background "has any sub folder" probes.
+
+        Args:
+            enabled: True to enable cascading submenus
+        """
+        if enabled == self._cascading_popups:
+            return
+        self._cascading_popups = enabled
+        if enabled and self._subdir_prober is None:
+            self._subdir_prober = SubdirProber(parent=self, cache=self._prefetcher.cache)
+            self._subdir_prober.set_folder_filter(self._prefetcher.cache.folder_filter)
+            self._memory_budget.register("probes", self._subdir_prober)
+        # 構築済みのポップアップはモードが異なるため作り直す
+        self._popup = None
+        self._popup_cache.clear()
+
+    def getCascadingPopups(self) -> bool:
+        """
+        Get whether cascading submenus are enabled.
+
+        Returns:
+            True if folders with sub folders open as submenus
+        """
+        return self._cascading_popups
+
+    def setFrecencyStore(self, store: FrecencyStore | None, pinned_count: int = 3) -> None:
+        """
+        Record selected folders and pin the most frecent ones in popups.
+
+        Args:
+            store: Frecency store fed by folder selections (None to disable)
+            pinned_count: Maximum number of pinned folders per popup
+        """
+        self._frecency = store
+        if store is not None:
+            self._memory_budget.register("frecency", store)
+        self._pinned_count = max(0, pinned_count)
+        self._recent_matcher = None
+        self._popup = None
+        self._popup_cache.clear()
+
+    def getFrecencyStore(self) -> FrecencyStore | None:
+        """
+        Get the frecency store fed by folder selections.
+
+        Returns:
+            Frecency store, or None if disabled
+        """
+        return self._frecency
+
+    def setSubtreeSearchEnabled(self, enabled: bool, max_depth: int | None = None) -> None:
+        """
+        Offer "search below this folder" at the top of the folder popups.
+
+        Args:
+            enabled: True to add the search entry to the popups
+            max_depth: Maximum number of levels searched (None for unlimited)
+        """
+        self._subtree_search_enabled = enabled
+        self._search_max_depth = max_depth
+        self._popup = None
+        self._popup_cache.clear()
+
+    def getSubtreeSearchEnabled(self) -> bool:
+        """
+        Get whether the folder popups offer searching below their folder.
+
+        Returns:
+            True if the search entry is shown
+        """
+        return self._subtree_search_enabled
+
+    def searchBelow(self, path: str, query: str, max_depth: int | None = None) -> FolderSelectionPopup:
+        """
+        Show a popup listing the folders below path whose name matches query.
+
+        Matches are added while the background walk finds them; closing
+        the popup stops the walk.
+
+        Args:
+            path: Folder to search below
+            query: Folder name query (substring, glob, or "re:" regex)
+            max_depth: Maximum number of levels searched (defaults to the
+                       depth set with setSubtreeSearchEnabled())
+
+        Returns:
+            Popup showing the matches
+
+        Raises:
+            re.error: If the query is an invalid regular expression
+        """
+        if self._search_popup is None:
+            # 検索結果はフォルダ一覧ではないので、ポップアップキャッシュとは別に持つ
+            self._search_popup = self._create_popup()
+        self._search_popup.searchBelow(path, query, self._search_max_depth if max_depth is None else max_depth)
+
+        item = next((i for i in self._breadcrumb_items if i.path == path), None)
+        if item is None and self._breadcrumb_items:
+            item = self._breadcrumb_items[-1]
+        if item is not None:
+            pos = item.mapToGlobal(item.rect().bottomLeft())
+            pos.setX(pos.x() + self._popup_position_offset[0])
+            pos.setY(pos.y() + self._popup_position_offset[1])
+            self._search_popup.popup(pos)
+        self._logger.debug(f"Showing search popup below {path}: {query!r}")
+        return self._search_popup
+
+    def _on_search_requested(self, path: str) -> None:
+        """
+        Ask for a folder name and search below path.
+
+        Args:
+            path: Folder whose popup offered the search
+        """
+        query, ok = QInputDialog.getText(self, "フォルダを検索", f"{path} 以下で探すフォルダ名:")
+        if not ok or not query.strip():
+            return
+        try:
+            self.searchBelow(path, query.strip())
+        except re.error as e:
+            self._logger.warning(f"Invalid search pattern {query!r}: {e}")
+
+    def enableBookmarks(self, enabled: bool) -> None:
+        """
+        Enable or disable bookmarks and the bookmark button at the end of the bar.
+
+        The bookmarks file is read on first use, not here.
+
+        Args:
+            enabled: True to enable bookmarks
+        """
+        if enabled == self._bookmarks_enabled:
+            return
+        self._bookmarks_enabled = enabled
+        if enabled and self._bookmark_button is None:
+            self._bookmark_button = QToolButton(self)
+            self._bookmark_button.setText("★")
+            self._bookmark_button.setToolTip("ブックマーク")
+            self._bookmark_button.setAutoRaise(True)
+            self._bookmark_button.clicked.connect(self.showBookmarksPopup)
+        self._update_display()
+
+    def isBookmarksEnabled(self) -> bool:
+        """
+        Get whether bookmarks are enabled.
+
+        Returns:
+            True if the bookmark button is shown
+        """
+        return self._bookmarks_enabled
+
+    def setBookmarkStore(self, store: BookmarkStore | None) -> None:
+        """
+        Set the bookmarks used by the bar.
+
+        Args:
+            store: Bookmark store (None to use the default file on next use)
+        """
+        self._bookmark_store = store
+        self._bookmark_popup = None
+        self._recent_matcher = None
+
+    def getBookmarkStore(self) -> BookmarkStore:
+        """
+        Get the bookmarks used by the bar, creating the default store if needed.
+
+        Returns:
+            Bookmark store (its file is read on first lookup)
+        """
+        if self._bookmark_store is None:
+            self._bookmark_store = BookmarkStore(default_bookmarks_path())
+        return self._bookmark_store
+
+    def addBookmark(self, path: str | None = None, name: str | None = None) -> bool:
+        """
+        Bookmark a folder.
+
+        Args:
+            path: Folder path (defaults to the current path)
+            name: Display name (defaults to the folder name)
+
+        Returns:
+            True if the bookmarks changed
+        """
+        changed = self.getBookmarkStore().add(path if path is not None else self._current_path, name)
+        if changed:
+            self._on_bookmarks_changed()
+        return changed
+
+    def removeBookmark(self, path: str | None = None) -> bool:
+        """
+        Remove a bookmark.
+
+        Args:
+            path: Folder path (defaults to the current path)
+
+        Returns:
+            True if the folder was bookmarked
+        """
+        changed = self.getBookmarkStore().remove(path if path is not None else self._current_path)
+        if changed:
+            self._on_bookmarks_changed()
+        return changed
+
+    def getBookmarks(self, under: str | None = None) -> list[tuple[str, str]]:
+        """
+        Get bookmarks, optionally only those inside a folder.
+
+        Args:
+            under: Folder to look in (None for all bookmarks)
+
+        Returns:
+            List of (name, path) tuples ordered by path
+        """
+        store = self.getBookmarkStore()
+        return store.bookmarks() if under is None else store.under(under)
+
+    def showBookmarksPopup(self) -> None:
+        """Show the bookmark quick-jump popup below the bookmark button."""
+        if self._bookmark_popup is None:
+            self._bookmark_popup = BookmarkPopup(self.getBookmarkStore(), self)
+            self._bookmark_popup.folderSelected.connect(self._on_folder_selected)
+            self._bookmark_popup.bookmarksChanged.connect(self._on_bookmarks_changed)
+        anchor: QWidget = self._bookmark_button if self._bookmark_button is not None else self
+        pos = anchor.mapToGlobal(anchor.rect().bottomLeft())
+        self._bookmark_popup.showForPath(
+            self._current_path,
+            (pos.x() + self._popup_position_offset[0], pos.y() + self._popup_position_offset[1]),
+        )
+
+    def setFolderIndexer(self, indexer: FolderIndexer | None) -> None:
+        """
+        Set the folder index searched by the jump box and the jump popup.
+
+        The indexer is not started here; call its start() to crawl.
+
+        Args:
+            indexer: Background folder indexer, or None
+        """
+        if self._folder_indexer is not None:
+            self._folder_indexer.indexUpdated.disconnect(self._on_index_updated)
+            self._folder_indexer.foldersPatched.disconnect(self._on_index_folders_patched)
+            self._folder_indexer.folderChanged.disconnect(self._on_watched_folder_changed)
+        self._folder_indexer = indexer
+        self._index_matcher = None
+        self._index_matcher_patched = False
+        self._index_generation += 1
+        # 前の索引の照合器が後から届いても使わない
+        self._index_matcher_generation = self._index_generation - 1
+        if indexer is not None:
+            indexer.indexUpdated.connect(self._on_index_updated)
+            indexer.foldersPatched.connect(self._on_index_folders_patched)
+            indexer.folderChanged.connect(self._on_watched_folder_changed)
+            self._memory_budget.register("index", indexer)
+
+    def getFolderIndexer(self) -> FolderIndexer | None:
+        """
+        Get the folder index queried by the jump box.
+
+        Returns:
+            Folder indexer, or None
+        """
+        return self._folder_indexer
+
+    def setJumpBoxEnabled(self, enabled: bool) -> None:
+        """
+        Show or hide the jump box that finds folders by fuzzy name.
+
+        Candidates come from the frecency history, the bookmarks and the
+        folder index (see jumpCandidates()).
+
+        Args:
+            enabled: True to show the jump box at the end of the bar
+        """
+        if enabled and self._jump_box is None:
+            self._jump_box = JumpBox(self)
+            self._jump_box.setMaximumWidth(240)
+            self._jump_box.folder_chosen.connect(self._on_folder_selected)
+            self._jump_box.set_search(self.jumpCandidates)
+        elif not enabled and self._jump_box is not None:
+            self._layout.removeWidget(self._jump_box)
+            self._jump_box.deleteLater()
+            self._jump_box = None
+        self._update_display()
+
+    def showJumpPopup(self) -> None:
+        """Show the fuzzy jump popup below the bar (also bound to Ctrl+J)."""
+        if self._jump_popup is None:
+            self._jump_popup = JumpPopup(self)
+            self._jump_popup.set_search(self.jumpCandidates)
+            self._jump_popup.folder_chosen.connect(self._on_folder_selected)
+        pos = self.mapToGlobal(self.rect().bottomLeft())
+        pos.setX(pos.x() + self._popup_position_offset[0])
+        pos.setY(pos.y() + self._popup_position_offset[1])
+        self._jump_popup.show_at(pos)
+
+    def jumpCandidates(self, text: str, limit: int = 20) -> list[str]:
+        """
+        Rank folders from history, bookmarks and the folder index by fuzzy match.
+
+        Args:
+            text: Typed text (e.g. "prjbuild")
+            limit: Maximum number of results
+
+        Returns:
+            Folder paths, best first; on equal scores history and bookmarks win
+        """
+        results: list[tuple[int, str]] = []
+        for matcher in self._jump_matchers():
+            results.extend(matcher.ranked(text, limit))
+        # sortは安定なので、同点なら先に追加した履歴・ブックマークが前に残る
+        results.sort(key=lambda result: result[0], reverse=True)
+        return list(dict.fromkeys(path for _, path in results))[:limit]
+
+    def _jump_matchers(self) -> list[FuzzyMatcher]:
+        """Get the fuzzy matchers over the jump sources, building them if needed."""
+        if self._recent_matcher is None:
+            recent = self._frecency.paths() if self._frecency is not None else []
+            if self._bookmarks_enabled or self._bookmark_store is not None:
+                recent += [path for _, path in self.getBookmarkStore().bookmarks()]
+            self._recent_matcher = FuzzyMatcher(recent)
+        matchers = [self._recent_matcher]
+        if self._folder_indexer is not None:
+            if self._index_matcher_generation != self._index_generation:
+                self._build_index_matcher()
+            if self._index_matcher is not None:
+                matchers.append(self._index_matcher)
+        return matchers
+
+    def _build_index_matcher(self) -> None:
+        """Start building the index matcher on the worker thread, unless already building."""
+        if self._folder_indexer is None or self._index_matcher_pending == self._index_generation:
+            return
+        self._index_matcher_pending = self._index_generation
+        # 監視による更新と競合しないよう、索引の複製を渡す
+        task = _IndexMatcherTask(self._matcher_relay, self._folder_indexer.index().copy(), self._index_generation)
+        self._matcher_pool.start(task)
+
+    def _on_index_matcher_built(self, matcher: FuzzyMatcher, generation: int) -> None:
+        """Swap in a finished index matcher and refresh the open jump widgets (main thread)."""
+        if generation <= self._index_matcher_generation or self._folder_indexer is None:
+            return
+        self._index_matcher = matcher
+        self._index_matcher_generation = generation
+        if generation != self._index_generation:
+            # 構築中に索引が更新されたので、もう一度作る
+            self._build_index_matcher()
+        self._refresh_jump_widgets()
+
+    def _on_index_folders_patched(self, added: list[str], removed: list[str]) -> None:
+        """Apply folders added or removed by a watched change to the current index matcher."""
+        matcher = self._index_matcher
+        if matcher is None or self._index_matcher_generation != self._index_generation:
+            return
+        self._index_matcher_patched = matcher.patch(added, removed)
+
+    def _on_index_updated(self) -> None:
+        """Bring the index matcher up to date, rebuilding it in the background if needed."""
+        self._index_generation += 1
+        if self._index_matcher_patched:
+            # 差分を反映済みなので作り直さない
+            self._index_matcher_patched = False
+            self._index_matcher_generation = self._index_generation
+            self._refresh_jump_widgets()
+        elif self._index_matcher is not None:
+            # 作り直している間は古い照合器を使う
+            self._build_index_matcher()
+
+    def _refresh_jump_widgets(self) -> None:
+        """Search again in the open jump widgets."""
+        if self._jump_box is not None:
+            self._jump_box.refresh()
+        if self._jump_popup is not None and self._jump_popup.isVisible():
+            self._jump_popup.refresh()
+
+    def _on_watched_folder_changed(self, path: str) -> None:
+        """Retry folders below a changed folder that recently failed to list."""
+        self._prefetcher.cache.invalidate_failures(path)
+
+    def _on_bookmarks_changed(self) -> None:
+        """Rebuild the history and bookmark matcher on next use."""
+        self._recent_matcher = None
+
+    def isJumpBoxEnabled(self) -> bool:
+        """
+        Get whether the jump box is shown.
+
+        Returns:
+            True if the jump box is shown
+        """
+        return self._jump_box is not None
+
+    def setUseListPopup(self, enabled: bool) -> None:
+        """
+        Set whether folders are shown in a list view popup instead of a menu.
+
+        Args:
+            enabled: True to use the list popup
+        """
+        self._use_list_popup = enabled
+
+    def getUseListPopup(self) -> bool:
+        """
+        Get whether folders are shown in a list view popup.
+
+        Returns:
+            True if the list popup is used
+        """
+        return self._use_list_popup
+
+    def setListPopupMetadataColumns(self, enabled: bool) -> None:
+        """
+        Set whether the list popup shows item count and modification time.
+
+        The values are read in the background only for rows on screen.
+
+        Args:
+            enabled: True to show the metadata columns
+        """
+        self._list_popup_metadata = enabled
+        if self._list_popup is not None:
+            self._list_popup.setMetadataColumns(enabled)
+
+    def getListPopupMetadataColumns(self) -> bool:
+        """
+        Get whether the list popup shows metadata columns.
+
+        Returns:
+            True if the metadata columns are shown
+        """
+        return self._list_popup_metadata
+
+    def setSortMode(self, mode: str | None) -> None:
+        """
+        Set the order of the folders in the popups.
+
+        Args:
+            mode: One of the modes in breadcrumb_addressbar.sorting (e.g.
+                  "natural", "mtime" for newest first, "items" for most
+                  items first), or None to keep the listing cache's order
+
+        Raises:
+            ValueError: If the mode is unknown
+        """
+        if mode is not None and mode not in ALL_SORT_MODES:
+            raise ValueError(f"Unknown sort mode: {mode}")
+        if mode == self._sort_mode:
+            return
+        self._sort_mode = mode
+        # 構築済みのポップアップは古い順序で並んでいるため作り直す
+        self._popup = None
+        self._popup_cache.clear()
+
+    def getSortMode(self) -> str | None:
+        """
+        Get the order of the folders in the popups.
+
+        Returns:
+            Sort mode, or None if the listing cache's order is used
+        """
+        return self._sort_mode
+
+    def setFolderFilter(self, folder_filter: FolderFilter | None) -> None:
+        """
+        Set the name rules deciding which folders this bar lists.
+
+        The rules are applied while scanning, before any per-entry stat.
+        A bar on the shared listing cache switches to a cache of its own,
+        so other bars keep their rules.
+
+        Args:
+            folder_filter: Name rules, or None for the default (hide
+                           folders starting with ".")
+        """
+        folder_filter = folder_filter or DEFAULT_FILTER
+        cache = self._prefetcher.cache
+        if folder_filter == cache.folder_filter:
+            return
+
+        if cache is get_listing_cache():
+            private = FolderListingCache(
+                sort_mode=cache.sort_mode,
+                folder_filter=folder_filter,
+                negative_ttl=cache.negative_ttl,
+                latency_tracker=cache.latency_tracker,
+                scan_pool=cache.scan_pool,
+            )
+            private.set_store(cache.store)
+            self._prefetcher.set_cache(private)
+            self._memory_budget.register("listings", private)
+        else:
+            cache.set_folder_filter(folder_filter)
+        if self._subdir_prober is not None:
+            self._subdir_prober.set_folder_filter(folder_filter)
+
+        # 構築済みのポップアップは古いルールの一覧を表示しているため作り直す
+        self._popup = None
+        self._popup_cache.clear()
+        if self._list_popup is not None:
+            self._list_popup.deleteLater()
+            self._list_popup = None
+        self._logger.debug(f"Folder filter set: {folder_filter!r}")
+
+    def getFolderFilter(self) -> FolderFilter:
+        """
+        Get the name rules deciding which folders this bar lists.
+
+        Returns:
+            Folder filter
+        """
+        return self._prefetcher.cache.folder_filter
+
+    def refreshFolder(self, path: str | None = None) -> None:
+        """
+        Forget what is cached about a folder so its next popup rescans it.
+
+        The cached listing and built popup of the folder are dropped, and
+        remembered failures (missing folder, access denied, timeout) of
+        the folder and the folders below it are forgotten.
+
+        Args:
+            path: Folder to refresh (defaults to the current path)
+        """
+        path = path or self._current_path
+        if not path:
+            return
+        self._prefetcher.cache.invalidate(path)
+        self._popup_cache.invalidate(path)
+        if self._subdir_prober is not None:
+            self._subdir_prober.invalidate(path)
+        self._logger.debug(f"Folder refreshed: {path}")
+
+    def mountLatencyStats(self) -> dict[int, dict[str, Any]]:
+        """
+        Get stat and scan latency percentiles per mounted file system.
+
+        Mounts whose median latency is high are treated as slow: hover,
+        prediction and warm-up prefetches and list popup metadata columns
+        are turned off there, probes run one at a time and popups show
+        the loading entry without waiting for a scan.
+
+        Returns:
+            Dictionary keyed by st_dev (see MountLatencyTracker.stats())
+        """
+        return self._prefetcher.cache.latency_tracker.stats()
+
+    def popupCacheStats(self) -> dict[str, int]:
+        """
+        Get statistics of the built popup cache.
+
+        Returns:
+            Dictionary with live menu count, hits and misses
+        """
+        return self._popup_cache.stats()
+
     def refresh_theme(self) -> None:
         """
         Refresh the theme for all breadcrumb items.
@@ -236,10 +1077,11 @@ class BreadcrumbAddressBar(QWidget):
         self._clear_items()
 
         if not self._current_path:
+            self._add_trailing_widgets()
             return
 
         # パスを分割
-        path_parts = self._split_path(self._current_path)
+        path_parts = self._split_path_nodes(self._current_path)
 
         # 表示するアイテムを決定（省略表示対応）
         display_items = self._get_display_items(path_parts)
@@ -248,6 +1090,9 @@ class BreadcrumbAddressBar(QWidget):
         for i, (text, path, is_current) in enumerate(display_items):
             item = BreadcrumbItem(text, path, is_current, self)
             item.clicked_with_info.connect(self._on_item_clicked_with_info)
+            item.hover_intent.connect(self._on_item_hover_intent)
+            item.hover_left.connect(self._on_item_hover_left)
+            item.set_hover_intent_delay(self._hover_prefetch_delay)
 
             # サイズとフォントを設定
             item.setMinimumHeight(self._button_height)
@@ -280,6 +1125,19 @@ class BreadcrumbAddressBar(QWidget):
 
                 self._layout.addWidget(separator_label)
 
+        self._add_trailing_widgets()
+
+    def _add_trailing_widgets(self) -> None:
+        """Append the bookmark button and the jump box to the end of the bar if enabled."""
+        if self._bookmark_button is not None:
+            self._bookmark_button.setVisible(self._bookmarks_enabled)
+            if self._bookmarks_enabled:
+                self._bookmark_button.setFixedHeight(self._button_height)
+                self._layout.addWidget(self._bookmark_button)
+        if self._jump_box is not None:
+            self._jump_box.setFixedHeight(self._button_height)
+            self._layout.addWidget(self._jump_box)
+
     def _clear_items(self) -> None:
         """Clear all breadcrumb items from the layout."""
         # 既存のアイテムを削除
@@ -293,7 +1151,8 @@ class BreadcrumbAddressBar(QWidget):
             child = self._layout.takeAt(0)
             if child is not None:
                 widget = child.widget()
-                if widget is not None:
+                # ブックマークボタンとジャンプボックスは作り直さずに再利用する
+                if widget is not None and widget not in (self._bookmark_button, self._jump_box):
                     widget.deleteLater()
 
     def _split_path(self, path: str) -> list[tuple[str, str]]:
@@ -306,58 +1165,42 @@ class BreadcrumbAddressBar(QWidget):
         Returns:
             List of tuples (display_text, full_path)
         """
-        parts = []
+        return [(text, node.path()) for text, node in self._split_path_nodes(path)]
 
-        # ルートディレクトリの処理
-        if path.startswith("/"):
-            parts.append(("/", "/"))
-            path = path[1:]
-        elif path.startswith("C:\\"):
-            parts.append(("C:\\", "C:\\"))
-            path = path[3:]
+    def _split_path_nodes(self, path: str) -> list[tuple[str, PathNode]]:
+        """
+        Split path into parts with display text and interned path node.
 
-        # 残りのパスを分割
-        if path:
-            # Windowsパスの場合はバックスラッシュを保持
-            if "\\" in path:
-                path_parts = path.split("\\")
-                current_path = parts[0][1] if parts else ""
-
-                for part in path_parts:
-                    if part:
-                        if current_path.endswith("\\"):
-                            current_path = current_path + part
-                        else:
-                            current_path = current_path + "\\" + part
-                        display_text = self._get_display_text(part, current_path)
-                        parts.append((display_text, current_path))
-            else:
-                # Unixパスの場合
-                path_parts = path.split("/")
-                current_path = parts[0][1] if parts else ""
+        The nodes of consecutive parts are parent and child, so the buttons
+        of the bar share one chain of nodes instead of prefix strings.
 
-                for part in path_parts:
-                    if part:
-                        current_path = os.path.join(current_path, part).replace("\\", "/")
-                        display_text = self._get_display_text(part, current_path)
-                        parts.append((display_text, current_path))
+        Args:
+            path: Path to split
 
-        return parts
+        Returns:
+            List of tuples (display_text, node), root first
+        """
+        node = intern_path(path)
+        if node is None:
+            return []
+        return [(self._get_display_text(part.name, part), part) for part in node.ancestors()]
 
-    def _get_display_text(self, part: str, full_path: str) -> str:
+    def _get_display_text(self, part: str, full_path: str | PathNode) -> str:
         """
         Get display text for a path part.
 
         Args:
             part: Path part
-            full_path: Full path
+            full_path: Full path, or its interned node
 
         Returns:
             Display text
         """
-        # カスタムラベルをチェック
-        if full_path in self._custom_labels:
-            return self._custom_labels[full_path]
+        # カスタムラベルをチェック（ラベルがなければパス文字列を組み立てない）
+        if self._custom_labels:
+            label = self._custom_labels.get(str(full_path))
+            if label is not None:
+                return label
 
         # 長い名前の省略
         if len(part) > 20:
@@ -365,7 +1208,9 @@ class BreadcrumbAddressBar(QWidget):
 
         return part
 
-    def _get_display_items(self, path_parts: list[tuple[str, str]]) -> list[tuple[str, str, bool]]:
+    def _get_display_items(
+        self, path_parts: Sequence[tuple[str, str | PathNode]]
+    ) -> list[tuple[str, str | PathNode, bool]]:
         """
         Get items to display with ellipsis handling.
 
@@ -421,6 +1266,25 @@ class BreadcrumbAddressBar(QWidget):
                     self._logger.debug(f"Navigating to path: {path}")
                     self.setPath(path)
 
+    def _on_item_hover_intent(self, path: str) -> None:
+        """
+        Prefetch the folder listing of a hovered breadcrumb item.
+
+        Args:
+            path: Hovered path
+        """
+        if self._hover_prefetch_enabled and self._prefetcher.prefetch(path):
+            self._logger.debug(f"Prefetching listing on hover: {path}")
+
+    def _on_item_hover_left(self, path: str) -> None:
+        """
+        Cancel a pending prefetch when the pointer leaves an item.
+
+        Args:
+            path: Path of the item that was left
+        """
+        self._prefetcher.cancel(path)
+
     def _show_folder_popup(self, path: str) -> None:
         """
         Show folder selection popup for the specified path.
@@ -440,14 +1304,14 @@ class BreadcrumbAddressBar(QWidget):
             if not clicked_item and self._breadcrumb_items:
                 clicked_item = self._breadcrumb_items[-1]
 
-            if clicked_item:
+            if clicked_item and self._use_list_popup:
+                self._warmup.note_popup_opened(path)
+                self._show_list_popup(clicked_item, path)
+            elif clicked_item:
                 # QMenuベースのポップアップを使用（QToolButtonにアタッチ）
-                if not self._popup:
-                    self._popup = FolderSelectionPopup(self)
-                    self._popup.folderSelected.connect(self._on_folder_selected)
-
-                # メニュー内容を準備してからボタンにアタッチ
-                self._popup.populateForPath(path)
+                # 構築済みのポップアップがあればそのまま再利用する
+                self._warmup.note_popup_opened(path)
+                self._popup = self._popup_cache.acquire(path)
                 clicked_item.setMenu(self._popup)
 
                 # QToolButtonのメニュー表示（グローバル座標の補正が必要な場合は手動表示）
@@ -463,6 +1327,44 @@ class BreadcrumbAddressBar(QWidget):
         except Exception as e:
             self._logger.error(f"Failed to show folder popup: {e}")
 
+    def _show_list_popup(self, item: BreadcrumbItem, path: str) -> None:
+        """
+        Show the list view popup below a breadcrumb item.
+
+        Args:
+            item: Breadcrumb item the popup belongs to
+            path: Folder path to list
+        """
+        if self._metadata_loader is None:
+            self._metadata_loader = MetadataLoader(parent=self, cache=self._prefetcher.cache)
+            self._memory_budget.register("metadata", self._metadata_loader)
+        if self._list_popup is None:
+            self._list_popup = FolderListPopup(
+                self, cache=self._prefetcher.cache, loader=self._metadata_loader, prefetcher=self._prefetcher
+            )
+            self._list_popup.folderSelected.connect(self._on_folder_selected)
+        self._list_popup.setMetadataColumns(self._list_popup_metadata)
+
+        pos = item.mapToGlobal(item.rect().bottomLeft())
+        pos.setX(pos.x() + self._popup_position_offset[0])
+        pos.setY(pos.y() + self._popup_position_offset[1])
+        self._list_popup.showForPath(path, pos)
+        self._logger.debug(f"Showing list popup for path: {path}")
+
+    def _create_popup(self) -> FolderSelectionPopup:
+        """Create a folder popup connected to this bar."""
+        popup = FolderSelectionPopup(self, prefetcher=self._prefetcher)
+        popup.setSortMode(self._sort_mode)
+        if self._cascading_popups:
+            popup.setCascading(True, self._subdir_prober)
+        if self._frecency is not None:
+            popup.setFrecencyStore(self._frecency, self._pinned_count)
+        if self._subtree_search_enabled:
+            popup.setSearchEnabled(True)
+            popup.searchRequested.connect(self._on_search_requested)
+        popup.folderSelected.connect(self._on_folder_selected)
+        return popup
+
     def _on_folder_selected(self, folder_path: str) -> None:
         """
         Handle folder selection from popup.
@@ -470,6 +1372,11 @@ class BreadcrumbAddressBar(QWidget):
         Args:
             folder_path: Selected folder path
         """
+        if folder_path and self._frecency is not None:
+            self._frecency.record(folder_path)
+            self._recent_matcher = None
+            # 親フォルダのポップアップは固定表示が変わるので作り直す
+            self._popup_cache.invalidate(os.path.dirname(folder_path))
         if folder_path and folder_path != self._current_path:
             self.setPath(folder_path)
             self.folderSelected.emit(folder_path)
@@ -492,3 +1399,25 @@ class BreadcrumbAddressBar(QWidget):
     def sizeHint(self) -> QSize:
         """Get the recommended size for this widget."""
         return QSize(400, self._button_height + 8)  # パディングを考慮
+
+
+class _IndexMatcherRelay(QObject):
+    """Carries index matchers built on the worker thread to the address bar."""
+
+    built = Signal(object, int)  # 構築した照合器、索引の世代
+
+
+class _IndexMatcherTask(QRunnable):
+    """Runnable that builds the fuzzy matcher over a copy of the folder index."""
+
+    def __init__(self, relay: _IndexMatcherRelay, index: FolderIndex, generation: int):
+        super().__init__()
+        self._relay = relay
+        self._index = index
+        self._generation = generation
+
+    def run(self) -> None:
+        matcher = FuzzyMatcher(self._index.paths())
+        # 最初の問い合わせで索引を作らずに済むよう、文字・単語の先頭・文字の組などの索引をここで作る
+        matcher.warm_up()
+        self._relay.built.emit(matcher, self._generation)
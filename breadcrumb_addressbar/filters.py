@@ -0,0 +1,125 @@
+"""
+Folder Filters
+
+Include/exclude rules for folder names, compiled into a single matcher
+that is applied to names before anything is stat'ed.
+"""
+
+import fnmatch
+import hashlib
+import re
+from collections.abc import Iterable
+
+# よく隠したいフォルダ
+COMMON_EXCLUDES = ("node_modules", "__pycache__", ".git")
+
+# この接頭辞で始まるパターンは正規表現、それ以外はglobとして扱う
+REGEX_PREFIX = "re:"
+
+
+def _translate(pattern: str) -> str:
+    """Translate a glob or "re:" pattern to a regular expression."""
+    if pattern.startswith(REGEX_PREFIX):
+        expression = pattern[len(REGEX_PREFIX) :]
+        re.compile(expression)  # 不正なパターンはここでre.errorにする
+        return expression
+    return fnmatch.translate(pattern)
+
+
+def _group(name: str, patterns: list[str]) -> str:
+    return f"(?P<{name}>" + "|".join(f"(?:{p})" for p in patterns) + ")"
+
+
+class FolderFilter:
+    """
+    Immutable set of folder name rules.
+
+    A folder is hidden if its name matches an exclude pattern, or starts
+    with "." while hidden folders are not shown, unless it matches an
+    include pattern. Patterns are globs ("build*") or regular expressions
+    with the "re:" prefix ("re:^v\\d+$"), and always match the whole name.
+    """
+
+    __slots__ = ("_exclude", "_fingerprint", "_include", "_match", "_show_hidden")
+
+    def __init__(self, exclude: Iterable[str] = (), include: Iterable[str] = (), show_hidden: bool = False):
+        """
+        Initialize and compile the rules.
+
+        Args:
+            exclude: Patterns of folders to hide
+            include: Patterns of folders to show even if excluded or hidden
+            show_hidden: Whether folders starting with "." are shown
+
+        Raises:
+            re.error: If a regular expression is invalid
+        """
+        self._exclude = tuple(exclude)
+        self._include = tuple(include)
+        self._show_hidden = show_hidden
+
+        include_patterns = [_translate(p) for p in self._include]
+        exclude_patterns = [_translate(p) for p in self._exclude]
+        if not show_hidden:
+            exclude_patterns.append(r"\..*")
+
+        # すべてのルールを1つの正規表現にまとめ、名前ごとに1回だけ照合する
+        groups = []
+        if include_patterns:
+            groups.append(_group("include", include_patterns))
+        if exclude_patterns:
+            groups.append(_group("exclude", exclude_patterns))
+        self._match = re.compile("|".join(groups), re.DOTALL).fullmatch if groups else None
+
+        rules = repr((self._exclude, self._include, self._show_hidden)).encode("utf-8", "surrogatepass")
+        self._fingerprint = hashlib.blake2b(rules, digest_size=8).hexdigest()
+
+    @property
+    def exclude(self) -> tuple[str, ...]:
+        """Get the exclude patterns."""
+        return self._exclude
+
+    @property
+    def include(self) -> tuple[str, ...]:
+        """Get the include patterns."""
+        return self._include
+
+    @property
+    def show_hidden(self) -> bool:
+        """Get whether folders starting with "." are shown."""
+        return self._show_hidden
+
+    @property
+    def fingerprint(self) -> str:
+        """Get a stable hash of the rules, for use in cache keys."""
+        return self._fingerprint
+
+    def is_visible(self, name: str) -> bool:
+        """
+        Check whether a folder name passes the rules.
+
+        Args:
+            name: Folder name (not a path)
+
+        Returns:
+            True if the folder should be listed
+        """
+        if self._match is None:
+            return True
+        match = self._match(name)
+        return match is None or (bool(self._include) and match.group("include") is not None)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FolderFilter):
+            return NotImplemented
+        return self._fingerprint == other._fingerprint
+
+    def __hash__(self) -> int:
+        return hash(self._fingerprint)
+
+    def __repr__(self) -> str:
+        return f"FolderFilter(exclude={self._exclude!r}, include={self._include!r}, show_hidden={self._show_hidden!r})"
+
+
+# 従来通り「.」で始まるフォルダだけを隠す既定のルール
+DEFAULT_FILTER = FolderFilter()
@@ -0,0 +1,264 @@
+"""
+Frecency Store
+
+Frequency x recency ranking of visited folders, used to pin the folders
+a user returns to most at the top of the popup.
+"""
+
+import json
+import math
+import os
+import time
+from bisect import bisect_left, insort
+
+from .logger_setup import get_logger
+
+_FORMAT_VERSION = 1
+# 記憶したフォルダ1件あたりの推定バイト数（スコア・親ごとの索引・パス文字列）
+_ENTRY_BYTES = 320
+
+
+def _log2_add(a: float, b: float) -> float:
+    """Return log2(2**a + 2**b) without overflow."""
+    if a < b:
+        a, b = b, a
+    return a + math.log2(1.0 + 2.0 ** (b - a))
+
+
+class FrecencyStore:
+    """
+    Bounded-memory frecency ranking of folders.
+
+    Every visit adds 1 to a folder's score, and scores halve every
+    ``half_life`` seconds. Scores are kept in the log domain relative to a
+    fixed epoch (log2 of the sum of 2**(t / half_life) over all visits),
+    so the ranking never needs to be recomputed as time passes.
+
+    Each parent directory keeps its children sorted by score, so the top k
+    children are read in O(k) regardless of the size of the history.
+    """
+
+    def __init__(self, max_entries: int = 2048, max_children: int = 32, half_life: float = 3 * 24 * 3600.0):
+        """
+        Initialize the store.
+
+        Args:
+            max_entries: Maximum number of remembered folders
+            max_children: Maximum number of remembered folders per parent
+            half_life: Seconds after which a visit counts half
+        """
+        self._logger = get_logger("breadcrumb_addressbar.frecency")
+        self._max_entries = max(1, max_entries)
+        self._max_children = max(1, max_children)
+        self._half_life = max(1.0, half_life)
+        self._scores: dict[str, float] = {}
+        # 親ごとに (-スコア, パス) の昇順リストを保持する
+        self._children: dict[str, list[tuple[float, str]]] = {}
+        self._records = 0
+
+    def record(self, path: str, timestamp: float | None = None) -> None:
+        """
+        Record a visit to a folder.
+
+        Args:
+            path: Visited folder
+            timestamp: Visit time (defaults to now)
+        """
+        if not path:
+            return
+        visit = (time.time() if timestamp is None else timestamp) / self._half_life
+        old = self._scores.get(path)
+        new = visit if old is None else _log2_add(old, visit)
+        self._set_score(path, old, new)
+        self._records += 1
+
+        children = self._children[os.path.dirname(path)]
+        if len(children) > self._max_children:
+            # 今記録したフォルダ以外で最もスコアの低いものを捨てる
+            victim = children[-1][1] if children[-1][1] != path else children[-2][1]
+            self._remove(victim)
+        if len(self._scores) > self._max_entries:
+            self._evict()
+
+    def score(self, path: str, now: float | None = None) -> float:
+        """
+        Get the current frecency of a folder.
+
+        Args:
+            path: Folder path
+            now: Time to evaluate the decay at (defaults to now)
+
+        Returns:
+            Sum of the decayed visits (0.0 if unknown)
+        """
+        log_score = self._scores.get(path)
+        if log_score is None:
+            return 0.0
+        now_units = (time.time() if now is None else now) / self._half_life
+        return 2.0 ** (log_score - now_units)
+
+    def top(self, parent: str, k: int = 3) -> list[str]:
+        """
+        Get the most frecent remembered children of a directory.
+
+        Args:
+            parent: Directory path
+            k: Maximum number of folders
+
+        Returns:
+            Up to k folder paths, most frecent first
+        """
+        children = self._children.get(parent)
+        if not children or k <= 0:
+            return []
+        return [path for _, path in children[:k]]
+
+    def paths(self) -> list[str]:
+        """
+        Get every remembered folder.
+
+        Returns:
+            Folder paths, most frecent first
+        """
+        return sorted(self._scores, key=self._scores.__getitem__, reverse=True)
+
+    def remove(self, path: str) -> None:
+        """
+        Forget a folder.
+
+        Args:
+            path: Folder path
+        """
+        if path in self._scores:
+            self._remove(path)
+
+    def clear(self) -> None:
+        """Forget all folders."""
+        self._scores.clear()
+        self._children.clear()
+        self._records = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get store statistics.
+
+        Returns:
+            Dictionary with remembered folders, parents and recorded visits
+        """
+        return {"entries": len(self._scores), "parents": len(self._children), "records": self._records}
+
+    def memory_usage(self) -> int:
+        """
+        Get the estimated number of bytes held by the scores.
+
+        Returns:
+            Estimated size in bytes
+        """
+        return len(self._scores) * _ENTRY_BYTES
+
+    def evict(self, nbytes: int) -> int:
+        """
+        Forget the least frecent folders (see MemoryBudget).
+
+        Args:
+            nbytes: Bytes to free
+
+        Returns:
+            Estimated bytes freed
+        """
+        count = min(len(self._scores), -(-max(0, nbytes) // _ENTRY_BYTES))
+        self._drop_least(count)
+        return count * _ENTRY_BYTES
+
+    def save(self, file_path: str) -> bool:
+        """
+        Persist a snapshot of the scores to a JSON file.
+
+        Args:
+            file_path: Destination file
+
+        Returns:
+            True if the file was written
+        """
+        data = {"version": _FORMAT_VERSION, "half_life": self._half_life, "scores": self._scores}
+        tmp_path = f"{file_path}.tmp"
+        try:
+            directory = os.path.dirname(file_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, file_path)
+            return True
+        except OSError as e:
+            self._logger.error(f"Failed to save frecency snapshot to {file_path}: {e}")
+            return False
+
+    def load(self, file_path: str) -> bool:
+        """
+        Load a snapshot saved by save(), replacing the current scores.
+
+        Args:
+            file_path: Source file
+
+        Returns:
+            True if the file was loaded
+        """
+        try:
+            with open(file_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            self._logger.warning(f"Failed to load frecency snapshot from {file_path}: {e}")
+            return False
+
+        if not isinstance(data, dict) or data.get("version") != _FORMAT_VERSION:
+            self._logger.warning(f"Unsupported frecency snapshot format: {file_path}")
+            return False
+
+        # 半減期が異なる場合はスコアの尺度を合わせる
+        ratio = float(data.get("half_life", self._half_life)) / self._half_life
+        self.clear()
+        scores = data.get("scores", {})
+        if isinstance(scores, dict):
+            for path, log_score in sorted(scores.items(), key=lambda item: item[1], reverse=True):
+                if len(self._scores) >= self._max_entries:
+                    break
+                parent = os.path.dirname(path)
+                if len(self._children.get(parent, ())) >= self._max_children:
+                    continue
+                self._set_score(path, None, float(log_score) * ratio)
+        return True
+
+    def _set_score(self, path: str, old: float | None, new: float) -> None:
+        """Update a folder's score and its position in the parent index."""
+        children = self._children.setdefault(os.path.dirname(path), [])
+        if old is not None:
+            del children[bisect_left(children, (-old, path))]
+        insort(children, (-new, path))
+        self._scores[path] = new
+
+    def _remove(self, path: str) -> None:
+        """Drop a folder from the scores and the parent index."""
+        score = self._scores.pop(path)
+        parent = os.path.dirname(path)
+        children = self._children[parent]
+        del children[bisect_left(children, (-score, path))]
+        if not children:
+            del self._children[parent]
+
+    def _evict(self) -> None:
+        """Drop the least frecent folders down to 90% of the cap."""
+        # 毎回削除しないよう、上限の9割まで減らす
+        target = self._max_entries * 9 // 10
+        self._drop_least(len(self._scores) - target)
+
+    def _drop_least(self, count: int) -> None:
+        """Drop the count least frecent folders."""
+        if count <= 0:
+            return
+        doomed = sorted(self._scores, key=self._scores.__getitem__)[:count]
+        for path in doomed:
+            self._remove(path)
+        self._logger.debug(f"Frecency store trimmed: dropped {len(doomed)} folders")
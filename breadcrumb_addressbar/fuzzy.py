@@ -0,0 +1,621 @@
+"""
+Fuzzy Path Matching
+
+Subsequence matching and ranking of folder paths for the jump popup, so
+typing "prjbuild" finds "/srv/projects/alpha/build".
+"""
+
+import heapq
+import operator
+import re
+import sys
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator
+from functools import cache
+from itertools import repeat
+
+# スコアの配点
+SCORE_MATCH = 16  # 一致した1文字ごと
+BONUS_BOUNDARY = 10  # 区切り文字の直後（単語の先頭）
+BONUS_CAMEL = 8  # 小文字から大文字に変わる位置
+BONUS_CONSECUTIVE = 6  # 直前の文字に続けて一致
+BONUS_WORD_END = 8  # 続けて一致した文字が単語の末尾
+BONUS_CASE = 1  # 大文字小文字まで一致
+BONUS_BASENAME = 12  # 末尾のフォルダ名の単語の先頭から2文字以上続けて一致
+PENALTY_GAP = 1  # 一致の間の読み飛ばし1文字ごと
+MAX_GAP_PENALTY = 8
+# 候補の長さ8文字ごとの減点（同点なら短いパスを優先）
+LENGTH_DIVISOR = 8
+
+# 1回の問い合わせで採点する候補数の上限（上界の高い候補から採点する）
+MAX_SCORED = 256
+# 部分列として含むかを調べる候補数の上限（採点の上限の倍数）
+CHECKS_PER_SCORED = 8
+# patch()で作り直さずに反映できる追加・削除の上限（超えたら作り直す）
+MAX_PATCHED = 4096
+# 上界に見込む長さの減点の上限（これより長い候補の上界は少し甘くなる）
+MAX_LENGTH_PENALTY = 31
+
+_BOUNDARY_CHARS = frozenset("/\\_-. ")
+_BINARY_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+# 索引はLatin-1のバイト列で作り、表せない文字は「?」になる（それらの文字は索引を使わない）
+_UNINDEXED = ord("?")
+_UNREACHABLE = -(1 << 30)
+
+
+def _mark(chars: str) -> bytes:
+    """Get a bytes.translate() table mapping chars to 1 and every other byte to 0."""
+    return bytes(1 if chr(byte) in chars else 0 for byte in range(256))
+
+
+_SEPARATOR_MARK = _mark("".join(_BOUNDARY_CHARS))
+_SLASH_MARK = _mark("/\\")
+_UPPER_MARK = _mark("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+
+
+@cache
+def _byte_mark(byte: int) -> bytes:
+    """Get a bytes.translate() table mapping byte to 1 and every other byte to 0."""
+    return _mark(chr(byte))
+
+
+def _lower(text: str) -> str:
+    """Lowercase text without changing its length, so positions stay aligned."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # 「İ」のように小文字化で長さが変わる文字は先頭の1文字だけを使う
+    return "".join(ch.lower()[0] for ch in text)
+
+
+def _indexed(text: str) -> bool:
+    """Check whether every character of text has its own entry in the bitset index."""
+    return all(ord(ch) < 256 and ord(ch) != _UNINDEXED for ch in text)
+
+
+def _head_bonus(candidate: str, position: int) -> int:
+    """Get the bonus for a match at position (a word start or a camelCase hump)."""
+    if position == 0 or candidate[position - 1] in _BOUNDARY_CHARS:
+        return BONUS_BOUNDARY
+    # 索引で見込めるよう、camelCaseはASCIIの英字だけを見る
+    if "a" <= candidate[position - 1] <= "z" and "A" <= candidate[position] <= "Z":
+        return BONUS_CAMEL
+    return 0
+
+
+def fuzzy_score(
+    query: str, candidate: str, candidate_lower: str | None = None, query_lower: str | None = None
+) -> int | None:
+    """
+    Score candidate against query.
+
+    Every way of matching the query characters in order is considered and
+    the best one is scored. A match earns bonuses for word boundaries,
+    camelCase humps, consecutive characters (more when a run reaches the
+    end of a word) and exact case, and loses points for skipped
+    characters. A run of at least two characters (or the whole query)
+    starting at a word inside the last path component earns the basename
+    bonus, so "prjbuild" prefers "/srv/projects/alpha/build" over
+    "/projects1/build2/docs4".
+
+    Args:
+        query: Typed text
+        candidate: Candidate path
+        candidate_lower: Precomputed lowercase candidate
+        query_lower: Precomputed lowercase query
+
+    Returns:
+        Score (higher is better), or None if query is not a subsequence
+    """
+    if not query:
+        return 0
+    lower = _lower(candidate) if candidate_lower is None else candidate_lower
+    if query_lower is None:
+        query_lower = _lower(query)
+
+    # 各文字が一致できる範囲（前から詰めた位置〜後ろから詰めた位置）
+    first: list[int] = []
+    position = -1
+    for ch in query_lower:
+        position = lower.find(ch, position + 1)
+        if position < 0:
+            return None
+        first.append(position)
+    last = first[:]
+    position = len(lower)
+    for i in range(len(query_lower) - 1, -1, -1):
+        position = lower.rfind(query_lower[i], 0, position)
+        last[i] = position
+
+    length = len(lower)
+    basename = max(candidate.rfind("/"), candidate.rfind("\\")) + 1
+    # 一致位置ごとの最高点を、末尾フォルダ名の加点について3つの状態で持つ
+    # （加点前、その位置から新しい連続が始まる加点前、加点済み）
+    previous: list[tuple[int, int, int, int]] = []
+    for i, ch in enumerate(query_lower):
+        states: list[tuple[int, int, int, int]] = []
+        position = first[i]
+        while 0 <= position <= last[i]:
+            gain = SCORE_MATCH + _head_bonus(candidate, position)
+            if candidate[position] == query[i]:
+                gain += BONUS_CASE
+            if i == 0:
+                states.append((position, _UNREACHABLE, gain, _UNREACHABLE))
+                position = lower.find(ch, position + 1)
+                continue
+            run = start = earned = _UNREACHABLE
+            for before, before_run, before_start, before_earned in previous:
+                if before >= position:
+                    break
+                if before == position - 1:
+                    bonus = BONUS_CONSECUTIVE
+                    if position + 1 == length or lower[position + 1] in _BOUNDARY_CHARS:
+                        bonus += BONUS_WORD_END
+                    run = max(run, before_run + bonus)
+                    if before >= basename and _head_bonus(candidate, before):
+                        earned = max(earned, before_start + bonus + BONUS_BASENAME)
+                    else:
+                        run = max(run, before_start + bonus)
+                    earned = max(earned, before_earned + bonus)
+                else:
+                    penalty = min(MAX_GAP_PENALTY, (position - before - 1) * PENALTY_GAP)
+                    start = max(start, before_run - penalty, before_start - penalty)
+                    earned = max(earned, before_earned - penalty)
+            states.append((position, run + gain, start + gain, earned + gain))
+            position = lower.find(ch, position + 1)
+        previous = states
+
+    best = _UNREACHABLE
+    for position, run, start, earned in previous:
+        if len(query_lower) == 1 and position >= basename and _head_bonus(candidate, position):
+            start += BONUS_BASENAME
+        best = max(best, run, start, earned)
+    return best - length // LENGTH_DIVISOR
+
+
+class FuzzyMatcher:
+    """
+    Ranks a fixed set of candidate paths against fuzzy queries.
+
+    Candidates are kept sorted by length with lowercase copies built once.
+    An index of bitsets over the candidates (bit i is candidate i) records
+    which candidates contain each character, each pair of adjacent
+    characters, and each character at a word start, at a word end and at a
+    word start in the last component. It is built by warm_up() or on the
+    first query.
+
+    A query ANDs the character bitsets into the survivors and adds, per
+    query character, the most that character can earn given the index
+    into an upper bound on every candidate's score, kept as bit-sliced
+    counters (plane k holds bit k of each candidate's bound). Survivors
+    are then scored best bound first, shortest first within a bound, into
+    a bounded heap of the best k, and scoring stops as soon as no
+    remaining bound can reach the heap, so the result does not depend on
+    the candidate order or on a length cutoff. Survivors not containing
+    the query as a subsequence are skipped by a regular expression before
+    scoring. On heavily tied sets scoring also stops after max_scored
+    candidates (or CHECKS_PER_SCORED times as many checked); the unscored
+    ones then all have bounds no higher than the last one scored.
+
+    A query extending the previous one (typing one more letter) starts
+    from the previous survivors and bounds, minus the survivors that
+    failed to match, and only adds the new characters.
+
+    Small changes are applied with patch() instead of rebuilding: removed
+    folders are skipped when scoring survivors and added paths are
+    scored separately.
+    """
+
+    def __init__(self, candidates: Iterable[str], max_scored: int = MAX_SCORED):
+        """
+        Initialize the matcher.
+
+        Args:
+            candidates: Candidate paths (duplicates are dropped; on equal
+                        scores and lengths earlier ones rank first)
+            max_scored: Maximum number of candidates scored per query
+        """
+        # sortedは安定なので、同じ長さの候補は渡した順に並ぶ
+        self._candidates = sorted((c for c in dict.fromkeys(candidates) if c), key=len)
+        self._lowers = [_lower(c) for c in self._candidates]
+        self._everyone = (1 << len(self._candidates)) - 1
+        # (種類, 文字) -> 候補のビット集合（warm_up()か最初の問い合わせで作る）
+        self._index: dict[tuple[str, str], int] | None = None
+        self._length_planes: list[int] = []
+        # 索引にない文字（Latin-1で表せない文字）を含む候補のビット集合
+        self._bitsets: dict[str, int] = {}
+        self._max_scored = max(1, max_scored)
+        # patch()による差分（作り直すまで保持する）
+        self._added: dict[str, str] = {}
+        self._removed: set[str] = set()
+        self._removed_prefixes: tuple[str, ...] = ()
+
+        self._last_query = ""
+        self._last_mask: int | None = None
+        self._last_planes: list[int] = []
+        self._last_runs = 0
+        self._stats = {"queries": 0, "narrowed": 0, "survivors": 0, "checked": 0, "scored": 0, "truncated": 0}
+
+    def __len__(self) -> int:
+        return len(self._candidates) + len(self._added)
+
+    def query(self, text: str, k: int = 20) -> list[str]:
+        """
+        Get the best matching candidates.
+
+        Args:
+            text: Typed text
+            k: Maximum number of results
+
+        Returns:
+            Candidate paths, best first
+        """
+        return [candidate for _, candidate in self.ranked(text, k)]
+
+    def ranked(self, text: str, k: int = 20) -> list[tuple[int, str]]:
+        """
+        Get the best matching candidates with their scores.
+
+        Args:
+            text: Typed text
+            k: Maximum number of results
+
+        Returns:
+            List of (score, path), best first; ties prefer shorter paths
+        """
+        query = text.strip()
+        if not query or k <= 0:
+            self._last_query, self._last_mask = "", None
+            return []
+
+        query_lower = _lower(query)
+        mask, planes = self._bound(query_lower)
+        self._stats["queries"] += 1
+        self._stats["survivors"] = mask.bit_count()
+
+        candidates, lowers = self._candidates, self._lowers
+        # 上位k件だけを保持する最小ヒープ（patch()で追加した候補は、同点なら元の候補の後に並ぶ）
+        heap: list[tuple[int, int, int, str]] = []
+
+        def push(score: int, candidate: str, order: int) -> None:
+            entry = (score, -len(candidate), -order, candidate)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+        for order, (candidate, lower) in enumerate(self._added.items(), len(candidates)):
+            score = fuzzy_score(query, candidate, lower, query_lower)
+            if score is not None:
+                push(score, candidate, order)
+
+        # 上界 = planesの値 + offset
+        offset = (SCORE_MATCH + BONUS_CASE) * len(query_lower) - (len(query_lower) - 1) - MAX_LENGTH_PENALTY
+        # 「a[^b]*b[^c]*c」の形にすると、後戻りなしで1回の走査で判定できる
+        pattern = re.escape(query_lower[0]) + "".join(f"[^{re.escape(ch)}]*{re.escape(ch)}" for ch in query_lower[1:])
+        search = re.compile(pattern).search
+        removed = self._removed_prefixes
+        checked = scored = 0
+        failed: list[int] = []
+        remaining = mask
+        while remaining:
+            level, members = _top(planes, remaining)
+            remaining ^= members
+            bound = level + offset
+            if len(heap) >= k and bound < heap[0][0]:
+                break
+            for index in _bit_indexes(members):
+                candidate = candidates[index]
+                # 同じ上界の中では後の候補ほど長いので、届かなくなったら残りも届かない
+                if len(heap) >= k and (bound, -len(candidate), -index) < heap[0][:3]:
+                    break
+                if scored >= self._max_scored or checked >= self._max_scored * CHECKS_PER_SCORED:
+                    self._stats["truncated"] += 1
+                    remaining = 0
+                    break
+                if removed and self._is_removed(candidate):
+                    continue
+                checked += 1
+                if not search(lowers[index]):
+                    failed.append(index)
+                    continue
+                scored += 1
+                score = fuzzy_score(query, candidate, lowers[index], query_lower)
+                if score is not None:
+                    push(score, candidate, index)
+        if failed and self._last_mask is not None:
+            # 一致しなかった候補は、入力を延長しても一致しないので前回の候補から外す
+            self._last_mask ^= self._last_mask & _bits_of(failed, len(candidates))
+        self._stats["checked"] = checked
+        self._stats["scored"] = scored + len(self._added)
+        heap.sort(reverse=True)
+        return [(score, candidate) for score, _, _, candidate in heap]
+
+    def warm_up(self) -> None:
+        """
+        Build the bitset index ahead of the first query.
+
+        Meant to run on a worker thread before the matcher is handed over;
+        this takes a few times as long as building the matcher. Otherwise
+        the first query builds it.
+        """
+        if self._index is None:
+            self._build_index()
+
+    def patch(self, added: Iterable[str] = (), removed: Iterable[str] = ()) -> bool:
+        """
+        Apply folders added to and removed from the candidates.
+
+        Removed candidates are skipped by queries but still counted by
+        len() until the matcher is rebuilt.
+
+        Args:
+            added: Added paths
+            removed: Removed folder paths (their sub folders go too)
+
+        Returns:
+            False if the changes no longer fit in the matcher and it should
+            be rebuilt (the matcher is left unchanged)
+        """
+        added = [path for path in added if path]
+        removed = [path.rstrip("/\\") or path for path in removed]
+        if len(self._added) + len(added) + len(self._removed) + len(removed) > MAX_PATCHED:
+            return False
+        if removed:
+            self._removed.update(removed)
+            self._removed_prefixes = tuple(prefix + separator for prefix in self._removed for separator in ("/", "\\"))
+            for path in [path for path in self._added if self._is_removed(path)]:
+                del self._added[path]
+        for path in added:
+            self._added[path] = _lower(path)
+        # 削除された候補を前回の候補に残さない
+        self._last_query, self._last_mask = "", None
+        return True
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get matcher statistics.
+
+        Returns:
+            Dictionary with candidate count, queries, narrowed queries,
+            truncated queries (stopped by max_scored), patched paths, and
+            the survivors (containing every query character), survivors
+            checked for the query as a subsequence and scored candidates of
+            the last query
+        """
+        stats = dict(self._stats)
+        stats["candidates"] = len(self)
+        stats["patched"] = len(self._added) + len(self._removed)
+        return stats
+
+    def _is_removed(self, path: str) -> bool:
+        """Check whether path is a removed folder or below one."""
+        return path in self._removed or path.startswith(self._removed_prefixes)
+
+    def _bound(self, query_lower: str) -> tuple[int, list[int]]:
+        """Get the survivors for query_lower and the bit-sliced upper bounds on their scores."""
+        if self._index is None:
+            self._build_index()
+        if self._last_mask is not None and query_lower.startswith(self._last_query):
+            # 前回の問い合わせを延長した場合は、前回の候補と上界に新しい文字だけを加える
+            mask, planes, runs = self._last_mask, self._last_planes, self._last_runs
+            start = len(self._last_query)
+            self._stats["narrowed"] += 1
+        else:
+            mask, planes, runs = self._everyone, self._length_planes, 0
+            start = 0
+        for i in range(start, len(query_lower)):
+            mask &= self._bitset(query_lower[i])
+            if not mask:
+                # 候補が残らなければ、延長しても残らないので上界は要らない
+                break
+            planes = _add(planes, self._char_bound(query_lower, i))
+            if i:
+                # 末尾フォルダ名の単語の先頭から2文字続けて一致できる候補
+                pair = query_lower[i - 1 : i + 1]
+                runs |= self._feature("basename", pair[0]) & self._feature("pair", pair)
+        self._last_query, self._last_mask = query_lower, mask
+        self._last_planes, self._last_runs = planes, runs
+        basename = self._feature("basename", query_lower) if len(query_lower) == 1 else runs
+        return mask, _add(planes, [0, 0, basename, basename])
+
+    def _char_bound(self, query_lower: str, i: int) -> list[int]:
+        """
+        Get the bit-sliced bound on what query character i can earn, plus one.
+
+        A new run earns at most a word start bonus and loses at least one
+        for the gap; continuing a run needs the character pair in the
+        candidate and earns the consecutive bonus, the word end bonus if
+        the character ends a word, and a word start bonus only after a
+        separator or on an uppercase letter.
+        """
+        ch = query_lower[i]
+        head = self._feature("head", ch)
+        if i == 0:
+            return [0, head, 0, head]
+        pair = self._feature("pair", query_lower[i - 1 : i + 1])
+        # 値ごとの集合: 15 = 続けて単語の末尾まで、10 = 単語の先頭、7 = 続けて一致
+        ends = pair & self._feature("end", ch)
+        continued = pair ^ ends
+        ten = head ^ (head & ends)
+        seven = continued ^ (continued & head)
+        low = ends | seven
+        planes = [low, low | ten, low, ends | ten]
+        if query_lower[i - 1] in _BOUNDARY_CHARS:
+            hump, hump_bonus = pair, BONUS_BOUNDARY
+        else:
+            hump, hump_bonus = pair & self._feature("upper", ch), BONUS_CAMEL
+        if hump:
+            planes = _add(planes, [hump if hump_bonus >> bit & 1 else 0 for bit in range(hump_bonus.bit_length())])
+        return planes
+
+    def _feature(self, kind: str, text: str) -> int:
+        """Get the index bitset of kind for text (every candidate if the index cannot tell)."""
+        assert self._index is not None
+        if not _indexed(text) or (kind == "pair" and not _BOUNDARY_CHARS.isdisjoint(text)):
+            return self._everyone
+        return self._index.get((kind, text), 0)
+
+    def _bitset(self, ch: str) -> int:
+        """Get the bitset of candidates containing ch."""
+        if self._index is not None and _indexed(ch):
+            return self._index.get(("char", ch), 0)
+        bitset = self._bitsets.get(ch)
+        if bitset is None:
+            flags = bytes(map(operator.contains, self._lowers, repeat(ch)))
+            bitset = _bits_from_flags(flags)
+            self._bitsets[ch] = bitset
+        return bitset
+
+    def _build_index(self) -> None:
+        """Build the bitset index and the length penalty planes."""
+        lowers = self._lowers
+        lengths = list(map(len, lowers))
+        index: dict[tuple[str, str], int] = {}
+        # 同じ長さの候補ごとに、位置ごとの列をバイト列として取り出して調べる
+        start = 0
+        while start < len(lowers):
+            end = bisect_right(lengths, lengths[start], start)
+            lanes = _index_group(self._candidates[start:end], lowers[start:end], lengths[start])
+            for key, lane in lanes.items():
+                bits = _bits_from_flags(lane.to_bytes(end - start, "little")) << start
+                index[key] = index.get(key, 0) | bits
+            start = end
+
+        # 上界に使う長さの減点は MAX_LENGTH_PENALTY - 減点 として持つ
+        planes = [0] * MAX_LENGTH_PENALTY.bit_length()
+        start = 0
+        while start < len(lowers):
+            penalty = min(lengths[start] // LENGTH_DIVISOR, MAX_LENGTH_PENALTY)
+            end = len(lowers)
+            if penalty < MAX_LENGTH_PENALTY:
+                end = bisect_right(lengths, (penalty + 1) * LENGTH_DIVISOR - 1, start)
+            members = ((1 << end) - 1) ^ ((1 << start) - 1)
+            for bit in range(len(planes)):
+                if (MAX_LENGTH_PENALTY - penalty) >> bit & 1:
+                    planes[bit] |= members
+            start = end
+        self._index = index
+        self._length_planes = planes
+
+
+def _index_group(candidates: list[str], lowers: list[str], length: int) -> dict[tuple[str, str], int]:
+    """
+    Index candidates of one length.
+
+    Returns:
+        (kind, text) -> flags as an integer with one byte per candidate
+        (the first candidate in the lowest byte, 1 if it has the feature)
+    """
+    count = len(lowers)
+    blob = b"".join(map(str.encode, lowers, repeat("latin-1"), repeat("replace")))
+    columns = [blob[position::length] for position in range(length)]
+    ones = int.from_bytes(b"\x01" * count, "little")
+
+    def lane(column: bytes, table: bytes) -> int:
+        return int.from_bytes(column.translate(table), "little")
+
+    separators = [lane(column, _SEPARATOR_MARK) for column in columns]
+    uppers = [0] * length
+    if candidates != lowers:
+        originals = b"".join(map(str.encode, candidates, repeat("latin-1"), repeat("replace")))
+        uppers = [lane(originals[position::length], _UPPER_MARK) for position in range(length)]
+    # 末尾のフォルダ名の中か（その位置以降に「/」も「\」もない）
+    basenames = [0] * length
+    after = 0
+    for position in range(length - 1, -1, -1):
+        after |= lane(columns[position], _SLASH_MARK)
+        basenames[position] = ones ^ after
+
+    lanes: dict[tuple[str, str], int] = {}
+    get = lanes.get
+    previous: dict[int, int] = {}
+    for position, column in enumerate(columns):
+        heads = ones if position == 0 else separators[position - 1] | uppers[position]
+        ends = ones if position == length - 1 else separators[position + 1]
+        basename_heads = heads & basenames[position]
+        upper = uppers[position]
+        current: dict[int, int] = {}
+        for byte in set(column):
+            if byte == _UNINDEXED:
+                continue
+            flags = current[byte] = lane(column, _byte_mark(byte))
+            ch = chr(byte)
+            lanes["char", ch] = get(("char", ch), 0) | flags
+            # 位置ごとの条件に当てはまる候補がなければ、ビット演算を省く
+            if heads and (found := flags & heads):
+                lanes["head", ch] = get(("head", ch), 0) | found
+                if basename_heads and (found := flags & basename_heads):
+                    lanes["basename", ch] = get(("basename", ch), 0) | found
+            if ends and (found := flags & ends):
+                lanes["end", ch] = get(("end", ch), 0) | found
+            if upper and (found := flags & upper):
+                lanes["upper", ch] = get(("upper", ch), 0) | found
+        if position:
+            # 前の位置と組にした2バイトの値で、現れる文字の組を列挙する
+            pairs = bytearray(2 * count)
+            pairs[0::2] = columns[position - 1]
+            pairs[1::2] = column
+            for code in set(memoryview(pairs).cast("H")):
+                first, second = (code & 0xFF, code >> 8) if sys.byteorder == "little" else (code >> 8, code & 0xFF)
+                if first in previous and second in current and not _SEPARATOR_MARK[first] | _SEPARATOR_MARK[second]:
+                    key = ("pair", chr(first) + chr(second))
+                    lanes[key] = get(key, 0) | (previous[first] & current[second])
+        previous = current
+    return lanes
+
+
+def _bits_from_flags(flags: bytes) -> int:
+    """Turn one 0/1 byte per candidate into a bitset (the first candidate is bit 0)."""
+    return int(b"0" + flags.translate(_BINARY_DIGITS)[::-1], 2)
+
+
+def _bits_of(indexes: list[int], count: int) -> int:
+    """Get the bitset with the given bits set."""
+    packed = bytearray((count + 7) // 8)
+    for index in indexes:
+        packed[index >> 3] |= 1 << (index & 7)
+    return int.from_bytes(packed, "little")
+
+
+def _add(planes: list[int], term: list[int]) -> list[int]:
+    """Add two bit-sliced counters (plane k holds bit k of every candidate's value)."""
+    result: list[int] = []
+    carry = 0
+    for bit in range(max(len(planes), len(term))):
+        a = planes[bit] if bit < len(planes) else 0
+        if bit >= len(term) and not carry:
+            result.extend(planes[bit:])
+            return result
+        b = term[bit] if bit < len(term) else 0
+        half = a ^ b
+        result.append(half ^ carry)
+        carry = (a & b) | (carry & half)
+    if carry:
+        result.append(carry)
+    return result
+
+
+def _top(planes: list[int], mask: int) -> tuple[int, int]:
+    """Get the highest value among the candidates in mask and the candidates having it."""
+    value = 0
+    for bit in range(len(planes) - 1, -1, -1):
+        high = mask & planes[bit]
+        if high:
+            mask = high
+            value |= 1 << bit
+    return value, mask
+
+
+def _bit_indexes(bits: int, offset: int = 0) -> Iterator[int]:
+    """Iterate over the set bits of bits, lowest first, without touching the whole int per bit."""
+    if bits.bit_length() <= 1024:
+        while bits:
+            low = bits & -bits
+            yield offset + low.bit_length() - 1
+            bits ^= low
+        return
+    # 半分に分けて、下位の半分から調べる
+    half = bits.bit_length() >> 1
+    yield from _bit_indexes(bits & ((1 << half) - 1), offset)
+    yield from _bit_indexes(bits >> half, offset + half)
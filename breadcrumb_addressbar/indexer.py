@@ -0,0 +1,828 @@
+"""
+Folder Indexer
+
+Background crawler that indexes every folder under configured roots into
+a compact structure, so folders can be found by name without navigating.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from PySide6.QtCore import QFileSystemWatcher, QObject, QRunnable, QThread, QThreadPool, Signal
+
+from .budget import request_memory_check
+from .filters import DEFAULT_FILTER, FolderFilter
+from .logger_setup import get_logger
+
+# 監視するディレクトリ数の上限（浅い階層から順に監視する）
+MAX_WATCHED_DIRS = 4096
+# この数以上の直下フォルダを持つルートだけをプロセスプールで分割する
+SHARD_MIN_CHILDREN = 4
+
+_NO_PARENT = -1
+# 名前の区切り（ファイル名に含まれないので検索が名前をまたがない）
+_SEPARATOR = b"\0"
+
+
+class FolderIndex:
+    """
+    Compact index of folders.
+
+    Folder i is stored as its parent id (parents[i]) and its name, a slice
+    of one UTF-8 blob delimited by offsets[i] and offsets[i + 1]. Paths are
+    rebuilt on demand by walking up the parents. Children are linked from
+    their parent (first_child[i], then next_sibling[child]), so listing or
+    removing the folders below one folder does not scan the whole index.
+    Removed folders are only marked dead; a new crawl builds a fresh,
+    dense index.
+    """
+
+    __slots__ = (
+        "_dead",
+        "_dead_count",
+        "_first_child",
+        "_lower",
+        "_names",
+        "_next_sibling",
+        "_offsets",
+        "_parents",
+        "_roots",
+    )
+
+    def __init__(self) -> None:
+        self._parents = array("i")
+        # 最後に追加した子と、その子の1つ前に追加された兄弟（なければ-1）
+        self._first_child = array("i")
+        self._next_sibling = array("i")
+        self._offsets = array("I", [0])
+        self._names = bytearray()
+        self._dead = bytearray()
+        self._dead_count = 0
+        self._lower: bytes | None = None
+        # ルートのIDと絶対パス
+        self._roots: dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._parents) - self._dead_count
+
+    def id_range(self) -> range:
+        """Get the range of assigned folder ids, including removed folders."""
+        return range(len(self._parents))
+
+    def add_root(self, path: str) -> int:
+        """
+        Add a crawl root.
+
+        Args:
+            path: Absolute root directory
+
+        Returns:
+            Folder id of the root
+        """
+        folder_id = self.add(_NO_PARENT, os.path.basename(path.rstrip(os.sep)) or path)
+        self._roots[folder_id] = path
+        return folder_id
+
+    def copy(self) -> FolderIndex:
+        """
+        Copy the index, so another thread can read it while this one is patched.
+
+        Returns:
+            Independent copy (the search cache is not copied)
+        """
+        index = FolderIndex()
+        index._parents = array("i", self._parents)
+        index._first_child = array("i", self._first_child)
+        index._next_sibling = array("i", self._next_sibling)
+        index._offsets = array("I", self._offsets)
+        index._names = bytearray(self._names)
+        index._dead = bytearray(self._dead)
+        index._dead_count = self._dead_count
+        index._roots = dict(self._roots)
+        return index
+
+    def add(self, parent: int, name: str | bytes) -> int:
+        """
+        Add a folder.
+
+        Args:
+            parent: Folder id of the parent
+            name: Folder name
+
+        Returns:
+            Folder id of the new folder
+        """
+        self._names += name if isinstance(name, bytes) else os.fsencode(name)
+        self._names += _SEPARATOR
+        self._offsets.append(len(self._names))
+        folder_id = len(self._parents)
+        self._parents.append(parent)
+        self._first_child.append(_NO_PARENT)
+        if parent == _NO_PARENT:
+            self._next_sibling.append(_NO_PARENT)
+        else:
+            self._next_sibling.append(self._first_child[parent])
+            self._first_child[parent] = folder_id
+        self._dead.append(0)
+        self._lower = None
+        return folder_id
+
+    def extend(self, base: int, parents: array[int], names: list[bytes]) -> None:
+        """
+        Merge folders crawled by crawl_folders() below an indexed folder.
+
+        Args:
+            base: Folder id the crawl started from
+            parents: Parent of each crawled folder (index into names, or -1 for base)
+            names: Encoded names of the crawled folders
+        """
+        start = len(self._parents)
+        for parent, name in zip(parents, names, strict=True):
+            self.add(base if parent == _NO_PARENT else start + parent, name)
+
+    def name(self, folder_id: int) -> str:
+        """Get the name of a folder."""
+        return os.fsdecode(bytes(self._names[self._offsets[folder_id] : self._offsets[folder_id + 1] - 1]))
+
+    def parent(self, folder_id: int) -> int:
+        """Get the parent id of a folder (-1 for roots)."""
+        return self._parents[folder_id]
+
+    def is_alive(self, folder_id: int) -> bool:
+        """Check whether a folder has not been removed."""
+        return 0 <= folder_id < len(self._dead) and not self._dead[folder_id]
+
+    def path(self, folder_id: int) -> str:
+        """
+        Rebuild the absolute path of a folder.
+
+        Args:
+            folder_id: Folder id
+
+        Returns:
+            Absolute path
+        """
+        names = []
+        while self._parents[folder_id] != _NO_PARENT:
+            names.append(self.name(folder_id))
+            folder_id = self._parents[folder_id]
+        names.append(self._roots[folder_id])
+        return os.path.join(*reversed(names))
+
+    def paths(self) -> list[str]:
+        """
+        Rebuild the paths of all live folders in one pass.
+
+        Returns:
+            Absolute paths in id order (shallow folders first)
+        """
+        # 親は子より先に追加されているので、親のパスを使い回せる
+        all_paths: list[str] = []
+        parents, dead = self._parents, self._dead
+        for folder_id in range(len(parents)):
+            parent = parents[folder_id]
+            if parent == _NO_PARENT:
+                all_paths.append(self._roots[folder_id])
+            else:
+                all_paths.append(os.path.join(all_paths[parent], self.name(folder_id)))
+        return [path for path, is_dead in zip(all_paths, dead, strict=True) if not is_dead]
+
+    def depth(self, folder_id: int) -> int:
+        """Get the number of levels between a folder and its root."""
+        depth = 0
+        while self._parents[folder_id] != _NO_PARENT:
+            folder_id = self._parents[folder_id]
+            depth += 1
+        return depth
+
+    def children(self, folder_id: int) -> list[int]:
+        """
+        Get the live direct children of a folder.
+
+        Args:
+            folder_id: Folder id
+
+        Returns:
+            Folder ids of the children
+        """
+        if not self.is_alive(folder_id):
+            return []
+        children = []
+        child, next_sibling = self._first_child[folder_id], self._next_sibling
+        while child != _NO_PARENT:
+            children.append(child)
+            child = next_sibling[child]
+        # 兄弟は新しい順につながっているので、追加順に戻す
+        children.reverse()
+        return children
+
+    def remove_subtree(self, folder_id: int) -> int:
+        """
+        Mark a folder and everything below it as removed.
+
+        Args:
+            folder_id: Folder id
+
+        Returns:
+            Number of folders removed
+        """
+        if not self.is_alive(folder_id):
+            return 0
+        first_child, next_sibling, dead = self._first_child, self._next_sibling, self._dead
+        # 親の子のつながりから外す（削除済みの兄弟を children() が辿らないように）
+        parent = self._parents[folder_id]
+        if parent != _NO_PARENT:
+            if first_child[parent] == folder_id:
+                first_child[parent] = next_sibling[folder_id]
+            else:
+                sibling = first_child[parent]
+                while next_sibling[sibling] != folder_id:
+                    sibling = next_sibling[sibling]
+                next_sibling[sibling] = next_sibling[folder_id]
+        removed = 0
+        stack = [folder_id]
+        while stack:
+            current = stack.pop()
+            # 削除済みのフォルダの下は、削除したときに印を付けてある
+            if dead[current]:
+                continue
+            dead[current] = 1
+            removed += 1
+            child = first_child[current]
+            while child != _NO_PARENT:
+                stack.append(child)
+                child = next_sibling[child]
+        self._dead_count += removed
+        return removed
+
+    def search(self, text: str, limit: int = 50) -> list[int]:
+        """
+        Find live folders whose name contains text (ASCII case-insensitive).
+
+        Args:
+            text: Text to look for
+            limit: Maximum number of results
+
+        Returns:
+            Folder ids in index order
+        """
+        needle = os.fsencode(text).lower()
+        if not needle or _SEPARATOR in needle or limit <= 0:
+            return []
+        if self._lower is None:
+            self._lower = bytes(self._names).lower()
+        blob, offsets, dead = self._lower, self._offsets, self._dead
+
+        found: list[int] = []
+        position = blob.find(needle)
+        while position != -1 and len(found) < limit:
+            folder_id = bisect_right(offsets, position) - 1
+            if not dead[folder_id]:
+                found.append(folder_id)
+            # 同じ名前の中の2回目以降の一致は飛ばす
+            position = blob.find(needle, offsets[folder_id + 1])
+        return found
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get index statistics.
+
+        Returns:
+            Dictionary with live and dead entries and the bytes used by the arrays
+        """
+        size = (
+            len(self._names)
+            + self._parents.itemsize * len(self._parents) * 3
+            + self._offsets.itemsize * len(self._offsets)
+            + len(self._dead)
+        )
+        return {"entries": len(self), "dead": self._dead_count, "roots": len(self._roots), "bytes": size}
+
+    def memory_size(self) -> int:
+        """
+        Get the bytes used by the arrays and the search copy of the names.
+
+        Returns:
+            Size in bytes
+        """
+        return self.stats()["bytes"] + (len(self._lower) if self._lower is not None else 0)
+
+    def release_search_cache(self) -> int:
+        """
+        Drop the lowercase copy of the names; the next search rebuilds it.
+
+        Returns:
+            Bytes released
+        """
+        size = len(self._lower) if self._lower is not None else 0
+        self._lower = None
+        return size
+
+
+def crawl_folders(
+    path: str,
+    folder_filter: FolderFilter = DEFAULT_FILTER,
+    max_depth: int | None = None,
+    visited: set[tuple[int, int]] | None = None,
+    cancelled: threading.Event | None = None,
+) -> tuple[array[int], list[bytes]]:
+    """
+    Crawl the folders below path breadth-first.
+
+    Symbolic links are followed, but a directory whose (st_dev, st_ino) was
+    already seen is not entered again, so link cycles terminate.
+
+    Args:
+        path: Directory to crawl (not included in the result)
+        folder_filter: Name rules; hidden folders are not entered
+        max_depth: Maximum number of levels below path (None for unlimited)
+        visited: (st_dev, st_ino) of directories already crawled, updated in place
+        cancelled: Event that stops the crawl when set
+
+    Returns:
+        Tuple of (parents, names) in the format accepted by FolderIndex.extend()
+    """
+    visited = set() if visited is None else visited
+    parents = array("i")
+    names: list[bytes] = []
+    try:
+        st = os.stat(path)
+        visited.add((st.st_dev, st.st_ino))
+    except OSError:
+        return parents, names
+
+    queue: deque[tuple[int, str, int]] = deque([(_NO_PARENT, path, 0)])
+    while queue:
+        if cancelled is not None and cancelled.is_set():
+            break
+        parent, directory, depth = queue.popleft()
+        if max_depth is not None and depth >= max_depth:
+            continue
+        try:
+            with os.scandir(directory) as it:
+                entries = [entry for entry in it if folder_filter.is_visible(entry.name)]
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if not entry.is_dir():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            key = (st.st_dev, st.st_ino)
+            if key in visited:
+                continue
+            visited.add(key)
+            parents.append(parent)
+            names.append(os.fsencode(entry.name))
+            queue.append((len(names) - 1, entry.path, depth + 1))
+    return parents, names
+
+
+def _crawl_shard(
+    path: str, rules: tuple[tuple[str, ...], tuple[str, ...], bool], max_depth: int | None, root_key: tuple[int, int]
+) -> tuple[array[int], list[bytes]]:
+    """Crawl one subtree in a worker process."""
+    exclude, include, show_hidden = rules
+    folder_filter = FolderFilter(exclude, include, show_hidden)
+    return crawl_folders(path, folder_filter, max_depth, visited={root_key})
+
+
+def _build_index(
+    roots: list[str],
+    folder_filter: FolderFilter,
+    max_depth: int | None,
+    processes: int,
+    cancelled: threading.Event,
+) -> FolderIndex:
+    """Build a new index of roots (called on the crawl thread)."""
+    index = FolderIndex()
+    visited: set[tuple[int, int]] = set()
+    for root in roots:
+        if cancelled.is_set():
+            break
+        root_id = index.add_root(root)
+        if processes > 1:
+            _crawl_sharded(index, root_id, root, folder_filter, max_depth, processes, visited, cancelled)
+        else:
+            parents, names = crawl_folders(root, folder_filter, max_depth, visited, cancelled)
+            index.extend(root_id, parents, names)
+    return index
+
+
+def _crawl_sharded(
+    index: FolderIndex,
+    root_id: int,
+    root: str,
+    folder_filter: FolderFilter,
+    max_depth: int | None,
+    processes: int,
+    visited: set[tuple[int, int]],
+    cancelled: threading.Event,
+) -> None:
+    """Crawl the top-level folders of root in worker processes."""
+    parents, names = crawl_folders(root, folder_filter, 1, visited, cancelled)
+    index.extend(root_id, parents, names)
+    if max_depth is not None and max_depth <= 1:
+        return
+    shard_ids = list(index.id_range()[len(index.id_range()) - len(names) :])
+    sub_depth = None if max_depth is None else max_depth - 1
+    if len(shard_ids) < SHARD_MIN_CHILDREN:
+        for child_id in shard_ids:
+            parents, names = crawl_folders(index.path(child_id), folder_filter, sub_depth, visited, cancelled)
+            index.extend(child_id, parents, names)
+        return
+
+    rules = (folder_filter.exclude, folder_filter.include, folder_filter.show_hidden)
+    st = os.stat(root)
+    root_key = (st.st_dev, st.st_ino)
+    # Qtのスレッドを抱えたプロセスをforkしないよう、spawnで起動する
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+        futures = [
+            (child_id, executor.submit(_crawl_shard, index.path(child_id), rules, sub_depth, root_key))
+            for child_id in shard_ids
+        ]
+        for child_id, future in futures:
+            if cancelled.is_set():
+                executor.shutdown(cancel_futures=True)
+                break
+            try:
+                parents, names = future.result()
+            except Exception as e:
+                get_logger("breadcrumb_addressbar.indexer").warning(
+                    f"Folder index shard failed: {index.path(child_id)}: {e}"
+                )
+                continue
+            index.extend(child_id, parents, names)
+
+
+def _relist_folder(
+    path: str, known: frozenset[str], depth: int, folder_filter: FolderFilter, max_depth: int | None
+) -> tuple[set[str] | None, dict[str, tuple[array[int], list[bytes]]]]:
+    """
+    Re-list a changed directory and crawl its new sub folders (called on the crawl thread).
+
+    Returns:
+        Tuple of (visible sub folder names, or None if path is gone, and
+        the crawl of each new sub folder within max_depth)
+    """
+    crawled: dict[str, tuple[array[int], list[bytes]]] = {}
+    if not os.path.isdir(path):
+        return None, crawled
+    try:
+        with os.scandir(path) as it:
+            current = {e.name for e in it if folder_filter.is_visible(e.name) and e.is_dir()}
+    except OSError:
+        # 一覧できなければ索引は変えない
+        return set(known), crawled
+    if max_depth is None or depth <= max_depth:
+        sub_depth = None if max_depth is None else max_depth - depth
+        for name in current - known:
+            crawled[name] = crawl_folders(os.path.join(path, name), folder_filter, sub_depth)
+    return current, crawled
+
+
+class _TaskRelay(QObject):
+    """
+    Carries the results of the indexer's tasks to the main thread.
+
+    Tasks hold this child object instead of the indexer, so the indexer
+    (and the thread pool it owns) is never released from one of the
+    pool's own threads.
+    """
+
+    crawled = Signal(object, int, float)  # 新しい索引、世代、所要秒数
+    relisted = Signal(str, int, object, object)  # 変更されたフォルダ、世代、直下のフォルダ名、新しいフォルダの巡回結果
+
+
+class FolderIndexer(QObject):
+    """
+    Low-priority background indexer of the folders under a set of roots.
+
+    A crawl builds a new FolderIndex off the main thread and swaps it in
+    when done. Afterwards the shallowest directories are watched with
+    QFileSystemWatcher; a changed directory is re-listed (and its new sub
+    folders crawled) on the crawl thread, and the result is patched into
+    the index on the main thread. Large roots
+    can be crawled by a process pool, one top-level folder per task.
+    """
+
+    # シグナル
+    indexUpdated = Signal()  # 索引の差し替え・更新通知
+    folderChanged = Signal(str)  # 監視中のフォルダの変更通知（索引に反映した後に発行）
+    foldersPatched = Signal(list, list)  # 変更の反映で追加・削除されたフォルダのパス（indexUpdatedの直前に発行）
+
+    def __init__(
+        self,
+        roots: list[str] | tuple[str, ...] = (),
+        folder_filter: FolderFilter = DEFAULT_FILTER,
+        max_depth: int | None = None,
+        processes: int = 0,
+        max_watched: int = MAX_WATCHED_DIRS,
+        parent: QObject | None = None,
+    ):
+        """
+        Initialize the indexer without starting a crawl.
+
+        Args:
+            roots: Directories to index
+            folder_filter: Name rules for indexed folders
+            max_depth: Maximum number of levels below each root (None for unlimited)
+            processes: Worker processes for sharded crawls (0 or 1 crawls in one thread)
+            max_watched: Maximum number of directories watched for changes
+            parent: Parent object
+        """
+        super().__init__(parent)
+        self._logger = get_logger("breadcrumb_addressbar.indexer")
+        self._roots = [os.path.abspath(root) for root in roots]
+        self._filter = folder_filter
+        self._max_depth = max_depth
+        self._processes = max(0, processes)
+        self._max_watched = max(0, max_watched)
+
+        self._index = FolderIndex()
+        self._generation = 0
+        self._crawling = False
+        self._cancelled = threading.Event()
+        self._last_crawl_seconds = 0.0
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._pool.setThreadPriority(QThread.Priority.LowestPriority)
+        # スレッドプールより後に作り、破棄時にプールが実行中のタスクを待つ間も残す
+        self._relay = _TaskRelay(self)
+        self._relay.crawled.connect(self._on_crawled)
+        self._relay.relisted.connect(self._on_patched)
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._watched: dict[str, int] = {}
+        # 再一覧を待っている監視フォルダと、その間に再び変更されたかどうか
+        self._patching: dict[str, bool] = {}
+
+    def roots(self) -> list[str]:
+        """Get the indexed root directories."""
+        return list(self._roots)
+
+    def set_roots(self, roots: list[str] | tuple[str, ...]) -> None:
+        """
+        Set the directories to index (takes effect on the next start()).
+
+        Args:
+            roots: Directories to index
+        """
+        self._roots = [os.path.abspath(root) for root in roots]
+
+    def set_folder_filter(self, folder_filter: FolderFilter) -> None:
+        """
+        Set the name rules for indexed folders (takes effect on the next start()).
+
+        Args:
+            folder_filter: Name rules
+        """
+        self._filter = folder_filter
+
+    def start(self) -> None:
+        """Start a full crawl of the roots, cancelling a crawl in progress."""
+        self.cancel()
+        self._generation += 1
+        self._cancelled = threading.Event()
+        self._crawling = True
+        self._patching.clear()
+        task = _CrawlTask(
+            self._relay,
+            self._generation,
+            list(self._roots),
+            self._filter,
+            self._max_depth,
+            self._processes,
+            self._cancelled,
+        )
+        self._pool.start(task)
+        self._logger.debug(f"Folder index crawl started: {self._roots}")
+
+    def cancel(self) -> None:
+        """Cancel the crawl in progress; the current index is kept."""
+        self._cancelled.set()
+        self._crawling = False
+
+    def is_crawling(self) -> bool:
+        """Get whether a crawl is in progress."""
+        return self._crawling
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """
+        Wait for the crawl thread to finish.
+
+        The new index is swapped in once the event loop delivers the result.
+
+        Args:
+            msecs: Timeout in milliseconds (-1 waits forever)
+
+        Returns:
+            True if the crawl finished in time
+        """
+        return self._pool.waitForDone(msecs)
+
+    def index(self) -> FolderIndex:
+        """Get the current index."""
+        return self._index
+
+    def search(self, text: str, limit: int = 50) -> list[str]:
+        """
+        Find indexed folders whose name contains text.
+
+        Args:
+            text: Text to look for
+            limit: Maximum number of results
+
+        Returns:
+            Absolute folder paths
+        """
+        return [self._index.path(folder_id) for folder_id in self._index.search(text, limit)]
+
+    def memory_usage(self) -> int:
+        """
+        Get the bytes held by the current index.
+
+        Returns:
+            Size in bytes
+        """
+        return self._index.memory_size()
+
+    def evict(self, nbytes: int) -> int:
+        """
+        Release the index's search cache (see MemoryBudget); the index
+        itself is kept.
+
+        Args:
+            nbytes: Bytes to free
+
+        Returns:
+            Bytes freed
+        """
+        return self._index.release_search_cache()
+
+    def stats(self) -> dict[str, float]:
+        """
+        Get indexer statistics.
+
+        Returns:
+            Dictionary with the index statistics, watched directories and
+            the duration of the last crawl
+        """
+        stats: dict[str, float] = dict(self._index.stats())
+        stats["watched"] = len(self._watched)
+        stats["last_crawl_seconds"] = self._last_crawl_seconds
+        return stats
+
+    def _on_crawled(self, index: FolderIndex, generation: int, seconds: float) -> None:
+        """Swap in a finished index and start watching it (main thread)."""
+        if generation != self._generation:
+            return
+        self._crawling = False
+        self._index = index
+        self._last_crawl_seconds = seconds
+        self._watch_index()
+        request_memory_check()
+        self._logger.info(f"Folder index ready: {len(index)} folders in {seconds:.2f}s")
+        self.indexUpdated.emit()
+
+    def _watch_index(self) -> None:
+        """Watch the shallowest indexed directories."""
+        if self._watched:
+            self._watcher.removePaths(list(self._watched))
+        self._watched = {}
+        # 幅優先で追加しているので、IDの小さい順が浅い順になる
+        for folder_id in self._index.id_range()[: self._max_watched]:
+            if self._index.is_alive(folder_id):
+                self._watched[self._index.path(folder_id)] = folder_id
+        if self._watched:
+            self._watcher.addPaths(list(self._watched))
+
+    def _on_directory_changed(self, path: str) -> None:
+        """Queue a re-listing of a changed directory on the crawl thread."""
+        folder_id = self._watched.get(path)
+        if folder_id is None or not self._index.is_alive(folder_id):
+            return
+        if path in self._patching:
+            # 一覧の作成中に届いた変更は、結果を反映した後にもう一度調べる
+            self._patching[path] = True
+            return
+        self._patching[path] = False
+        index = self._index
+        known = frozenset(index.name(child) for child in index.children(folder_id))
+        depth = index.depth(folder_id) + 1
+        task = _PatchTask(self._relay, self._generation, path, known, depth, self._filter, self._max_depth)
+        self._pool.start(task)
+
+    def _on_patched(
+        self,
+        path: str,
+        generation: int,
+        current: set[str] | None,
+        crawled: dict[str, tuple[array[int], list[bytes]]],
+    ) -> None:
+        """Patch the re-listed children of a changed directory into the index (main thread)."""
+        if generation != self._generation:
+            return
+        rerun = self._patching.pop(path, False)
+        folder_id = self._watched.get(path)
+        index = self._index
+        if folder_id is None or not index.is_alive(folder_id):
+            return
+        if current is None:
+            index.remove_subtree(folder_id)
+            del self._watched[path]
+            self.foldersPatched.emit([], [path])
+            self.indexUpdated.emit()
+            self.folderChanged.emit(path)
+            return
+
+        known = {index.name(child): child for child in index.children(folder_id)}
+        removed = [os.path.join(path, name) for name in known.keys() - current]
+        for name in known.keys() - current:
+            index.remove_subtree(known[name])
+        added: list[str] = []
+        for name in sorted(current - known.keys()):
+            # 深さの上限を超えたフォルダと、一覧の作成後に現れたフォルダは巡回していない
+            if name not in crawled:
+                continue
+            child_id = index.add(folder_id, name)
+            index.extend(child_id, *crawled[name])
+            # 巡回結果は末尾に追加されるので、child_id以降が新しいフォルダ
+            added += [index.path(new_id) for new_id in index.id_range()[child_id:]]
+            child_path = os.path.join(path, name)
+            if len(self._watched) < self._max_watched:
+                self._watched[child_path] = child_id
+                self._watcher.addPath(child_path)
+        self._logger.debug(f"Folder index patched: {path}")
+        self.foldersPatched.emit(added, removed)
+        self.indexUpdated.emit()
+        self.folderChanged.emit(path)
+        if rerun:
+            self._on_directory_changed(path)
+
+
+class _CrawlTask(QRunnable):
+    """Runnable that builds a new folder index."""
+
+    def __init__(
+        self,
+        relay: _TaskRelay,
+        generation: int,
+        roots: list[str],
+        folder_filter: FolderFilter,
+        max_depth: int | None,
+        processes: int,
+        cancelled: threading.Event,
+    ):
+        super().__init__()
+        self._relay = relay
+        self._generation = generation
+        self._roots = roots
+        self._filter = folder_filter
+        self._max_depth = max_depth
+        self._processes = processes
+        self._cancelled = cancelled
+
+    def run(self) -> None:
+        start = time.perf_counter()
+        index = _build_index(self._roots, self._filter, self._max_depth, self._processes, self._cancelled)
+        if not self._cancelled.is_set():
+            self._relay.crawled.emit(index, self._generation, time.perf_counter() - start)
+
+
+class _PatchTask(QRunnable):
+    """Runnable that re-lists a changed directory and crawls its new sub folders."""
+
+    def __init__(
+        self,
+        relay: _TaskRelay,
+        generation: int,
+        path: str,
+        known: frozenset[str],
+        depth: int,
+        folder_filter: FolderFilter,
+        max_depth: int | None,
+    ):
+        super().__init__()
+        self._relay = relay
+        self._generation = generation
+        self._path = path
+        self._known = known
+        self._depth = depth
+        self._filter = folder_filter
+        self._max_depth = max_depth
+
+    def run(self) -> None:
+        current, crawled = _relist_folder(self._path, self._known, self._depth, self._filter, self._max_depth)
+        self._relay.relisted.emit(self._path, self._generation, current, crawled)
@@ -0,0 +1,292 @@
+"""
+Mount Latency Tracking
+
+Rolling stat and scan latencies per mounted file system (st_dev), used to
+recognise slow mounts (sshfs, NFS over VPN) and degrade gracefully on
+them: no speculative prefetch, no metadata columns, fewer concurrent
+probes and an immediate loading entry.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable
+from typing import Any
+
+# 1回のstatの中央値がこれ以上なら遅いマウントとみなす（秒）
+SLOW_STAT_SECONDS = 0.02
+# 1回のスキャンの中央値がこれ以上なら遅いマウントとみなす（秒）
+SLOW_SCAN_SECONDS = 1.0
+# 判定に必要な最小サンプル数
+MIN_SAMPLES = 3
+# マウント・操作ごとに保持するサンプル数
+LATENCY_WINDOW = 128
+# 遅いマウントで同時に実行する判定・再スキャンの上限
+SLOW_MOUNT_CONCURRENCY = 1
+
+# 操作の種類
+OP_STAT = "stat"
+OP_SCAN = "scan"
+
+# 統計で報告するパーセンタイル
+_PERCENTILES = (50, 90, 99)
+
+
+def _percentile(ordered: list[float], percent: int) -> float:
+    """Nearest-rank percentile of an ascending, non-empty list."""
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[rank - 1]
+
+
+class MountLatencyTracker:
+    """
+    Thread-safe rolling latency percentiles per mount.
+
+    Samples are grouped by the st_dev of the stat'ed or scanned directory.
+    Paths whose device is not known yet are attributed to their nearest
+    known ancestor, so failures (e.g. a timed-out stat) still count
+    towards the right mount.
+
+    A mount is slow when the median stat or scan latency of its recent
+    samples reaches the thresholds; since only a rolling window is kept,
+    it recovers as soon as fast samples come in again.
+    """
+
+    def __init__(
+        self,
+        window: int = LATENCY_WINDOW,
+        slow_stat_seconds: float = SLOW_STAT_SECONDS,
+        slow_scan_seconds: float = SLOW_SCAN_SECONDS,
+        min_samples: int = MIN_SAMPLES,
+        max_paths: int = 4096,
+    ):
+        """
+        Initialize the tracker.
+
+        Args:
+            window: Number of recent samples kept per mount and operation
+            slow_stat_seconds: Median stat latency from which a mount is slow
+            slow_scan_seconds: Median scan latency from which a mount is slow
+            min_samples: Samples needed before a mount can be judged slow
+            max_paths: Maximum number of directory → device mappings kept
+        """
+        self._window = max(1, window)
+        self._slow_stat = slow_stat_seconds
+        self._slow_scan = slow_scan_seconds
+        self._min_samples = max(1, min_samples)
+        self._max_paths = max(1, max_paths)
+        self._lock = threading.Lock()
+        self._samples: dict[tuple[int, str], deque[float]] = {}
+        self._counts: dict[int, int] = {}
+        self._devices: OrderedDict[str, int] = OrderedDict()
+        # マウントごとに記録された最も短いパス（マウントポイントの目安）
+        self._mount_paths: dict[int, str] = {}
+        # 判定結果（サンプルが追加されたマウントは再計算する）
+        self._slow: dict[int, bool] = {}
+
+    def set_slow_thresholds(self, stat_seconds: float, scan_seconds: float) -> None:
+        """
+        Set the median latencies from which a mount is slow.
+
+        Args:
+            stat_seconds: Median stat latency in seconds
+            scan_seconds: Median scan latency in seconds
+        """
+        with self._lock:
+            self._slow_stat = stat_seconds
+            self._slow_scan = scan_seconds
+            self._slow.clear()
+
+    def record(self, op: str, seconds: float, device: int | None = None, path: str | None = None) -> None:
+        """
+        Record the latency of a stat or scan.
+
+        Args:
+            op: OP_STAT or OP_SCAN
+            seconds: Duration of the operation
+            device: st_dev of the directory, or None to look it up from path
+            path: Directory the operation touched; remembered with device
+                  so later samples of the folders below find their mount
+        """
+        with self._lock:
+            if device is None:
+                device = self._device_of(path) if path else None
+                if device is None:
+                    return
+            elif path:
+                self._remember(path, device)
+            self._add(device, op, seconds)
+
+    def record_batch(self, op: str, samples: list[tuple[int, float]]) -> None:
+        """
+        Record several latencies at once.
+
+        Args:
+            op: OP_STAT or OP_SCAN
+            samples: List of (st_dev, seconds)
+        """
+        with self._lock:
+            for device, seconds in samples:
+                self._add(device, op, seconds)
+
+    def stat(self, path: str, stat_function: Callable[[str], os.stat_result] | None = None) -> os.stat_result:
+        """
+        Stat a directory, recording the latency.
+
+        Args:
+            path: Directory path
+            stat_function: Function performing the stat instead of os.stat
+                           (e.g. a ScanProcessPool's, which may time out)
+
+        Returns:
+            Stat result
+
+        Raises:
+            OSError: If the stat fails (the latency is recorded as well,
+                     except for a BlockingIOError of a busy stat_function)
+        """
+        started = time.perf_counter()
+        try:
+            st = (stat_function or os.stat)(path)
+        except BlockingIOError:
+            # スキャンプロセスの空きを待っただけで、フォルダの応答時間ではない
+            raise
+        except OSError:
+            self.record(OP_STAT, time.perf_counter() - started, path=path)
+            raise
+        self.record(OP_STAT, time.perf_counter() - started, st.st_dev, path)
+        return st
+
+    def device_of(self, path: str) -> int | None:
+        """
+        Get the device of a directory from the paths seen so far.
+
+        Args:
+            path: Directory path
+
+        Returns:
+            st_dev of the path or its nearest known ancestor, or None
+        """
+        with self._lock:
+            return self._device_of(path)
+
+    def is_slow(self, path: str) -> bool:
+        """
+        Check whether a directory is on a slow mount.
+
+        Args:
+            path: Directory path
+
+        Returns:
+            True if the mount of the path (as far as known) is slow
+        """
+        with self._lock:
+            device = self._device_of(path)
+            return device is not None and self._is_slow(device)
+
+    def concurrency(self, path: str, default: int) -> int:
+        """
+        Get the number of parallel operations to use on a directory's mount.
+
+        Args:
+            path: Directory path
+            default: Concurrency on mounts that are not slow
+
+        Returns:
+            SLOW_MOUNT_CONCURRENCY on slow mounts, otherwise default
+        """
+        return min(default, SLOW_MOUNT_CONCURRENCY) if self.is_slow(path) else default
+
+    def stats(self) -> dict[int, dict[str, Any]]:
+        """
+        Get latency statistics per mount.
+
+        Returns:
+            Dictionary keyed by st_dev with the shortest path seen on the
+            mount ("path"), the number of operations recorded, whether the
+            mount is slow, and the p50/p90/p99 latencies in seconds plus
+            the sample count of each operation (e.g. "stat_p90",
+            "scan_samples")
+        """
+        with self._lock:
+            result: dict[int, dict[str, Any]] = {}
+            for device, count in self._counts.items():
+                entry: dict[str, Any] = {
+                    "path": self._mount_paths.get(device, ""),
+                    "operations": count,
+                    "slow": self._is_slow(device),
+                }
+                for op in (OP_STAT, OP_SCAN):
+                    samples = sorted(self._samples.get((device, op), ()))
+                    entry[f"{op}_samples"] = len(samples)
+                    for percent in _PERCENTILES:
+                        entry[f"{op}_p{percent}"] = _percentile(samples, percent) if samples else 0.0
+                result[device] = entry
+            return result
+
+    def clear(self) -> None:
+        """Forget every sample and directory mapping."""
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._devices.clear()
+            self._mount_paths.clear()
+            self._slow.clear()
+
+    def _add(self, device: int, op: str, seconds: float) -> None:
+        """Add a sample (lock held)."""
+        samples = self._samples.get((device, op))
+        if samples is None:
+            samples = self._samples[(device, op)] = deque(maxlen=self._window)
+        samples.append(max(0.0, seconds))
+        self._counts[device] = self._counts.get(device, 0) + 1
+        self._slow.pop(device, None)
+
+    def _remember(self, path: str, device: int) -> None:
+        """Remember the device of a directory (lock held)."""
+        self._devices[path] = device
+        self._devices.move_to_end(path)
+        while len(self._devices) > self._max_paths:
+            self._devices.popitem(last=False)
+        known = self._mount_paths.get(device)
+        if known is None or len(path) < len(known):
+            self._mount_paths[device] = path
+
+    def _device_of(self, path: str) -> int | None:
+        """Get the device of path or its nearest known ancestor (lock held)."""
+        while True:
+            device = self._devices.get(path)
+            if device is not None:
+                return device
+            parent = os.path.dirname(path)
+            if not parent or parent == path:
+                return None
+            path = parent
+
+    def _is_slow(self, device: int) -> bool:
+        """Judge a mount from the medians of its samples (lock held)."""
+        slow = self._slow.get(device)
+        if slow is None:
+            slow = False
+            for op, threshold in ((OP_STAT, self._slow_stat), (OP_SCAN, self._slow_scan)):
+                samples = self._samples.get((device, op))
+                if samples and len(samples) >= self._min_samples and _percentile(sorted(samples), 50) >= threshold:
+                    slow = True
+                    break
+            self._slow[device] = slow
+        return slow
+
+
+# グローバルインスタンス
+_latency_tracker = MountLatencyTracker()
+
+
+def get_latency_tracker() -> MountLatencyTracker:
+    """
+    Get the process-wide mount latency tracker.
+
+    Returns:
+        Latency tracker instance
+    """
+    return _latency_tracker
@@ -0,0 +1,630 @@
+"""
+Folder List Popup
+
+List-view based folder popup with optional per-folder metadata columns
+(item count and modification time) that are loaded lazily for the rows
+currently on screen.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+from PySide6.QtCore import (
+    QAbstractTableModel,
+    QModelIndex,
+    QObject,
+    QPersistentModelIndex,
+    QPoint,
+    QRunnable,
+    Qt,
+    QThread,
+    QThreadPool,
+    QTimer,
+    Signal,
+)
+from PySide6.QtWidgets import QAbstractItemView, QFrame, QLabel, QTreeView, QVBoxLayout, QWidget
+
+from .budget import request_memory_check
+from .columnar import ColumnarListing
+from .listing import FolderListingCache, ListingPrefetcher, read_folder_metadata
+from .logger_setup import get_logger
+from .popup import LOADING_TEXT, NO_FOLDERS_TEXT, SCAN_ERROR_TEXTS
+from .sorting import FolderMetadata, SortedListing
+
+# 列
+COLUMN_NAME = 0
+COLUMN_ITEMS = 1
+COLUMN_MODIFIED = 2
+
+# 表示中の行のメタデータ要求をまとめる待ち時間（ミリ秒）
+METADATA_REQUEST_DELAY_MS = 16
+# 1回のバックグラウンド要求で読むフォルダ数の上限
+METADATA_BATCH_SIZE = 64
+# 記憶したメタデータ1件あたりの推定バイト数（パスの長さは別に加算）
+_METADATA_ENTRY_BYTES = 200
+
+# 読めなかったフォルダを再要求しないための印
+_UNREADABLE = FolderMetadata(-1, -1)
+
+
+class MetadataLoader(QObject):
+    """
+    Background loader and bounded cache of per-folder metadata.
+
+    Requests are read in batches on a small low-priority thread pool;
+    results are remembered so scrolling back never reads a folder twice.
+    With a listing cache the reads go through its scan pool and skip its
+    remembered failures (see FolderListingCache.read_metadata()).
+    """
+
+    # シグナル
+    loaded = Signal(list)  # 読み込んだフォルダのパス一覧（ワーカースレッドから発行）
+
+    def __init__(
+        self,
+        max_threads: int = 2,
+        max_entries: int = 8192,
+        parent: QObject | None = None,
+        cache: FolderListingCache | None = None,
+    ):
+        """
+        Initialize the loader.
+
+        Args:
+            max_threads: Maximum number of concurrent batches
+            max_entries: Maximum number of remembered folders
+            parent: Parent object
+            cache: Listing cache reading the folders, or None to read them
+                in the worker thread
+        """
+        super().__init__(parent)
+        self._cache = cache
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max(1, max_threads))
+        self._pool.setThreadPriority(QThread.Priority.LowPriority)
+        self._max_entries = max(1, max_entries)
+        self._values: OrderedDict[str, FolderMetadata] = OrderedDict()
+        self._bytes = 0
+        self._in_flight: set[str] = set()
+        self._lock = threading.Lock()
+        self._batches = 0
+
+    def get(self, path: str) -> FolderMetadata | None:
+        """
+        Get remembered metadata.
+
+        Args:
+            path: Folder path
+
+        Returns:
+            Metadata, or None if it has not been loaded
+        """
+        with self._lock:
+            value = self._values.get(path)
+            if value is not None:
+                self._values.move_to_end(path)
+            return value
+
+    def prime(self, metadata: dict[str, FolderMetadata]) -> None:
+        """
+        Remember metadata collected elsewhere (e.g. for metadata sorting).
+
+        Args:
+            metadata: Metadata keyed by folder path
+        """
+        with self._lock:
+            for path, value in metadata.items():
+                if value.item_count >= 0:
+                    self._remember(path, value)
+            self._trim()
+        request_memory_check()
+
+    def request(self, paths: list[str]) -> int:
+        """
+        Load the metadata of folders in the background.
+
+        Folders that are remembered or already being read are skipped.
+
+        Args:
+            paths: Folder paths
+
+        Returns:
+            Number of folders scheduled
+        """
+        with self._lock:
+            wanted = [p for p in dict.fromkeys(paths) if p not in self._values and p not in self._in_flight]
+            self._in_flight.update(wanted)
+        for start in range(0, len(wanted), METADATA_BATCH_SIZE):
+            self._batches += 1
+            self._pool.start(_MetadataBatchTask(self, wanted[start : start + METADATA_BATCH_SIZE]))
+        return len(wanted)
+
+    def invalidate(self, path: str | None = None) -> None:
+        """
+        Forget remembered metadata.
+
+        Args:
+            path: Folder to forget, or None for all
+        """
+        with self._lock:
+            if path is None:
+                self._values.clear()
+                self._bytes = 0
+            elif self._values.pop(path, None) is not None:
+                self._bytes -= _METADATA_ENTRY_BYTES + len(path)
+
+    def memory_usage(self) -> int:
+        """
+        Get the estimated number of bytes held by the remembered metadata.
+
+        Returns:
+            Estimated size in bytes
+        """
+        return self._bytes
+
+    def evict(self, nbytes: int) -> int:
+        """
+        Forget least recently used metadata (see MemoryBudget).
+
+        Args:
+            nbytes: Bytes to free
+
+        Returns:
+            Estimated bytes freed
+        """
+        with self._lock:
+            before = self._bytes
+            while self._values and before - self._bytes < nbytes:
+                self._forget_oldest()
+            return before - self._bytes
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """
+        Wait for all running batches to finish.
+
+        Args:
+            msecs: Timeout in milliseconds (-1 waits forever)
+
+        Returns:
+            True if all batches finished in time
+        """
+        return self._pool.waitForDone(msecs)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get loader statistics.
+
+        Returns:
+            Dictionary with remembered entries, folders in flight and
+            batches started
+        """
+        with self._lock:
+            return {"entries": len(self._values), "in_flight": len(self._in_flight), "batches": self._batches}
+
+    def read(self, paths: list[str]) -> list[FolderMetadata | None]:
+        """Read the metadata of a batch of folders (called on the worker thread)."""
+        if self._cache is None:
+            return [read_folder_metadata(path) for path in paths]
+        return self._cache.read_metadata(paths)
+
+    def store_results(self, results: list[tuple[str, FolderMetadata]]) -> None:
+        """
+        Remember the results of a batch (called on the worker thread).
+
+        Args:
+            results: (folder path, metadata) pairs read by the batch
+        """
+        with self._lock:
+            for path, value in results:
+                self._in_flight.discard(path)
+                self._remember(path, value)
+            self._trim()
+        request_memory_check()
+
+    def _remember(self, path: str, value: FolderMetadata) -> None:
+        """Remember one folder's metadata (lock held)."""
+        if path not in self._values:
+            self._bytes += _METADATA_ENTRY_BYTES + len(path)
+        self._values[path] = value
+
+    def _forget_oldest(self) -> None:
+        """Forget the least recently used entry (lock held)."""
+        path, _ = self._values.popitem(last=False)
+        self._bytes -= _METADATA_ENTRY_BYTES + len(path)
+
+    def _trim(self) -> None:
+        while len(self._values) > self._max_entries:
+            self._forget_oldest()
+
+
+class _MetadataBatchTask(QRunnable):
+    """Runnable that reads the metadata of a batch of folders."""
+
+    def __init__(self, loader: MetadataLoader, paths: list[str]):
+        super().__init__()
+        self._loader = loader
+        self._paths = paths
+
+    def run(self) -> None:
+        values = self._loader.read(self._paths)
+        results = [(path, value or _UNREADABLE) for path, value in zip(self._paths, values, strict=True)]
+        self._loader.store_results(results)
+        self._loader.loaded.emit(self._paths)
+
+
+class FolderListModel(QAbstractTableModel):
+    """
+    Table model of a folder listing with lazily loaded metadata columns.
+
+    Metadata is only requested from data(), which views call for the rows
+    they paint, so off-screen rows cost nothing. Requests made while
+    painting are sent as one batch, and finished batches are reported as
+    a few contiguous dataChanged ranges rather than one signal per cell.
+    """
+
+    def __init__(self, loader: MetadataLoader, parent: QObject | None = None):
+        """
+        Initialize the model.
+
+        Args:
+            loader: Metadata loader (shared between popups)
+            parent: Parent object
+        """
+        super().__init__(parent)
+        self._loader = loader
+        self._folders: Sequence[tuple[str, str]] = []
+        self._rows: dict[str, int] = {}
+        # メタデータを列として持つ一覧（ローダーを経由せずに表示する）
+        self._listing_metadata: ColumnarListing | None = None
+        self._metadata_columns = False
+        self._wanted: list[str] = []
+        self._data_changed_ranges = 0
+
+        self._request_timer = QTimer(self)
+        self._request_timer.setSingleShot(True)
+        self._request_timer.setInterval(METADATA_REQUEST_DELAY_MS)
+        self._request_timer.timeout.connect(self._flush_requests)
+        self._loader.loaded.connect(self._on_loaded)
+
+    def setFolders(self, folders: Sequence[tuple[str, str]]) -> None:
+        """
+        Replace the listed folders.
+
+        A ColumnarListing is shown as is, without copying it; its metadata
+        columns are used when collected.
+
+        Args:
+            folders: Sorted folder list
+        """
+        self.beginResetModel()
+        if isinstance(folders, ColumnarListing):
+            # 列形式の一覧はコピーも逆引き表も作らず、行の位置はindex_of()で引く
+            self._folders = folders
+            self._rows = {}
+            self._listing_metadata = folders if folders.has_metadata(item_counts=True) else None
+        else:
+            self._folders = list(folders)
+            self._rows = {folder_path: row for row, (_, folder_path) in enumerate(self._folders)}
+            self._listing_metadata = None
+        self._wanted.clear()
+        self.endResetModel()
+        if isinstance(folders, SortedListing) and folders.has_metadata(item_counts=True):
+            self._loader.prime(folders.metadata or {})
+
+    def setMetadataColumns(self, enabled: bool) -> None:
+        """
+        Set whether the item count and modification time columns are shown.
+
+        Args:
+            enabled: True to show the metadata columns
+        """
+        if enabled == self._metadata_columns:
+            return
+        self.beginResetModel()
+        self._metadata_columns = enabled
+        self.endResetModel()
+
+    def metadataColumns(self) -> bool:
+        """Get whether the metadata columns are shown."""
+        return self._metadata_columns
+
+    def folderPath(self, row: int) -> str:
+        """
+        Get the folder path of a row.
+
+        Args:
+            row: Row number
+
+        Returns:
+            Folder path
+        """
+        return self._folders[row][1]
+
+    def dataChangedRanges(self) -> int:
+        """Get the number of dataChanged ranges emitted for loaded metadata."""
+        return self._data_changed_ranges
+
+    def rowCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:  # noqa: B008
+        return 0 if parent.isValid() else len(self._folders)
+
+    def columnCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:  # noqa: B008
+        if parent.isValid():
+            return 0
+        return 3 if self._metadata_columns else 1
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation != Qt.Orientation.Horizontal or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        return {COLUMN_NAME: "名前", COLUMN_ITEMS: "項目数", COLUMN_MODIFIED: "更新日時"}.get(section)
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid() or index.row() >= len(self._folders):
+            return None
+        name, folder_path = self._folders[index.row()]
+        if role == Qt.ItemDataRole.UserRole:
+            return folder_path
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if index.column() == COLUMN_NAME:
+            return name
+
+        listing = self._listing_metadata
+        metadata = listing.metadata_at(index.row()) if listing is not None else None
+        if metadata is None:
+            metadata = self._loader.get(folder_path)
+        if metadata is None:
+            # 描画された行だけを要求し、まとめてバックグラウンドで読む
+            self._wanted.append(folder_path)
+            if not self._request_timer.isActive():
+                self._request_timer.start()
+            return ""
+        if index.column() == COLUMN_ITEMS:
+            return str(metadata.item_count) if metadata.item_count >= 0 else ""
+        if metadata.mtime_ns < 0:
+            return ""
+        return datetime.fromtimestamp(metadata.mtime_ns / 1e9).strftime("%Y-%m-%d %H:%M")
+
+    def _flush_requests(self) -> None:
+        """Send the metadata requests collected while painting as one batch."""
+        wanted, self._wanted = self._wanted, []
+        self._loader.request(wanted)
+
+    def _row_of(self, folder_path: str) -> int:
+        """Get the row of a folder path (-1 if not listed)."""
+        if isinstance(self._folders, ColumnarListing):
+            return self._folders.index_of(folder_path)
+        return self._rows.get(folder_path, -1)
+
+    def _on_loaded(self, paths: list[str]) -> None:
+        """Report loaded rows as contiguous dataChanged ranges."""
+        if not self._metadata_columns:
+            return
+        ranges: list[tuple[int, int]] = []
+        for row in sorted(row for row in map(self._row_of, paths) if row >= 0):
+            if ranges and row <= ranges[-1][1] + 1:
+                ranges[-1] = (ranges[-1][0], row)
+            else:
+                ranges.append((row, row))
+        for first, last in ranges:
+            self._data_changed_ranges += 1
+            self.dataChanged.emit(
+                self.index(first, COLUMN_ITEMS),
+                self.index(last, COLUMN_MODIFIED),
+                [Qt.ItemDataRole.DisplayRole],
+            )
+
+
+class FolderListPopup(QFrame):
+    """
+    List-view based folder selection popup.
+
+    An alternative to the QMenu popup for large folders: rows are painted
+    by a view, and the optional metadata columns are filled lazily. Like
+    FolderSelectionPopup.populateForPathAsync(), the directory is scanned
+    in the background and never on the caller's thread.
+    """
+
+    # シグナル
+    folderSelected = Signal(str)  # 選択されたフォルダのパス
+
+    def __init__(
+        self,
+        parent: QWidget | None = None,
+        cache: FolderListingCache | None = None,
+        loader: MetadataLoader | None = None,
+        prefetcher: ListingPrefetcher | None = None,
+    ):
+        """
+        Initialize the popup.
+
+        Args:
+            parent: Parent widget
+            cache: Listing cache (defaults to the prefetcher's cache, or the
+                   global cache)
+            loader: Metadata loader (a private one is created if omitted)
+            prefetcher: Background scanner (a private one is created if
+                        omitted)
+        """
+        super().__init__(parent, Qt.WindowType.Popup)
+        self._logger = get_logger("breadcrumb_addressbar.list_popup")
+        if prefetcher is None:
+            prefetcher = ListingPrefetcher(cache=cache, parent=self)
+        self._prefetcher = prefetcher
+        self._cache = cache if cache is not None else prefetcher.cache
+        self._loader = loader if loader is not None else MetadataLoader(parent=self, cache=self._cache)
+        self._current_path = ""
+        # 現在のパスを一覧できなかった理由（SCAN_ERROR_*）
+        self._failure_kind: str | None = None
+        self._prefetcher.listingReady.connect(self._on_listing_ready)
+        self._prefetcher.prefetchFinished.connect(self._on_prefetch_finished)
+        # 要求された列の表示（遅いマウントのフォルダでは一時的に隠す）
+        self._metadata_columns = False
+
+        self._model = FolderListModel(self._loader, self)
+        self._view = QTreeView(self)
+        self._view.setModel(self._model)
+        self._view.setRootIsDecorated(False)
+        # 行の高さを固定し、ビューが表示範囲外の行を問い合わせないようにする
+        self._view.setUniformRowHeights(True)
+        self._view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self._view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self._view.activated.connect(self._on_activated)
+        self._view.clicked.connect(self._on_activated)
+
+        # 一覧の代わりに表示する、一覧できなかった理由など
+        self._placeholder = QLabel(self)
+        self._placeholder.setEnabled(False)
+        self._placeholder.setContentsMargins(8, 4, 8, 4)
+        self._placeholder.hide()
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self._placeholder)
+        layout.addWidget(self._view)
+        self.setMinimumWidth(300)
+        self.setMaximumHeight(400)
+        self._apply_header()
+
+    def model(self) -> FolderListModel:
+        """Get the model backing the list."""
+        return self._model
+
+    def view(self) -> QTreeView:
+        """Get the list view."""
+        return self._view
+
+    def setMetadataColumns(self, enabled: bool) -> None:
+        """
+        Set whether item count and modification time columns are shown.
+
+        The columns stay hidden for folders on slow mounts (see
+        MountLatencyTracker), where reading the metadata would stall.
+
+        Args:
+            enabled: True to show the metadata columns
+        """
+        self._metadata_columns = enabled
+        self._model.setMetadataColumns(enabled)
+        self._apply_header()
+
+    def populateForPath(self, path: str) -> None:
+        """
+        Fill the list with the folders of path without showing the popup.
+
+        The directory is not scanned here: a cached listing is shown at
+        once and validated in the background, otherwise a loading entry is
+        shown and the list is filled when the background scan finishes. A folder that cannot be listed
+        shows the reason instead of the list; one that recently failed (see
+        FolderListingCache.failure()) shows it without touching the file
+        system again.
+
+        Args:
+            path: Directory to list
+        """
+        self._current_path = path
+        self._failure_kind = None
+        failure = self._cache.failure(path)
+        if failure is not None:
+            self._show_failure(failure.kind)
+            return
+        folders = self._cache.peek(path)
+        if folders is None:
+            self._show_placeholder(LOADING_TEXT)
+        else:
+            self._apply_folders(path, folders)
+        self._prefetcher.prefetch(path, priority=0)
+
+    def failureKind(self) -> str | None:
+        """
+        Get why the current folder could not be listed.
+
+        Returns:
+            One of the SCAN_ERROR_* kinds of breadcrumb_addressbar.listing,
+            or None if the folder is listed (or still loading)
+        """
+        return self._failure_kind
+
+    def placeholderText(self) -> str:
+        """Get the text shown instead of the list ("" while the list is shown)."""
+        return self._placeholder.text() if not self._placeholder.isHidden() else ""
+
+    def showForPath(self, path: str, position: QPoint) -> None:
+        """
+        Populate and show the popup.
+
+        Args:
+            path: Directory to list
+            position: Global position of the popup's top-left corner
+        """
+        self.populateForPath(path)
+        self.move(position)
+        self.show()
+        self._view.setFocus()
+
+    def _apply_folders(self, path: str, folders: Sequence[tuple[str, str]]) -> None:
+        """Show folders as the list of path."""
+        self._placeholder.hide()
+        self._view.show()
+        columns = self._metadata_columns and not self._cache.latency_tracker.is_slow(path)
+        if columns != self._model.metadataColumns():
+            self._model.setMetadataColumns(columns)
+            self._apply_header()
+        self._model.setFolders(folders)
+
+    def _show_failure(self, kind: str) -> None:
+        """Show why the current folder could not be listed."""
+        self._failure_kind = kind
+        self._show_placeholder(SCAN_ERROR_TEXTS.get(kind, NO_FOLDERS_TEXT))
+
+    def _show_placeholder(self, text: str) -> None:
+        """Show text instead of the list."""
+        self._model.setFolders([])
+        self._view.hide()
+        self._placeholder.setText(text)
+        self._placeholder.show()
+
+    def _apply_header(self) -> None:
+        """Show the header only when there are several columns."""
+        self._view.setHeaderHidden(not self._model.metadataColumns())
+        if self._model.metadataColumns():
+            self.setMinimumWidth(480)
+            self._view.setColumnWidth(COLUMN_NAME, 260)
+            self._view.setColumnWidth(COLUMN_ITEMS, 70)
+
+    def _on_activated(self, index: QModelIndex) -> None:
+        """Emit the chosen folder and close."""
+        if not index.isValid():
+            return
+        folder_path = self._model.folderPath(index.row())
+        self.hide()
+        self.folderSelected.emit(folder_path)
+
+    def _on_listing_ready(self, path: str) -> None:
+        """Show a fresh background scan of the current folder."""
+        if path != self._current_path:
+            return
+        folders = self._cache.peek(path)
+        if folders is not None:
+            self._failure_kind = None
+            self._apply_folders(path, folders)
+
+    def _on_prefetch_finished(self, path: str, ok: bool, seconds: float) -> None:
+        """Show why a background scan of the current folder failed, or fill a list still loading."""
+        if path != self._current_path:
+            return
+        loading = self.placeholderText() == LOADING_TEXT
+        if ok:
+            # 一覧がキャッシュ済みでlistingReadyが来なかった場合
+            folders = self._cache.peek(path) if loading else None
+            if folders is not None:
+                self._apply_folders(path, folders)
+            return
+        failure = self._cache.failure(path)
+        if failure is not None:
+            if self._failure_kind != failure.kind:
+                self._show_failure(failure.kind)
+        elif loading:
+            self._show_placeholder(NO_FOLDERS_TEXT)
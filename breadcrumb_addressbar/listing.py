@@ -0,0 +1,1392 @@
+"""
+Folder Listing Cache
+
+Shared folder listing cache and low-priority background prefetcher
+used by the breadcrumb popup.
+"""
+
+import errno
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from PySide6.QtCore import QObject, QRunnable, QThread, QThreadPool, Signal
+
+from .budget import request_memory_check
+from .columnar import COLUMNAR_MIN_ENTRIES, ColumnarListing, FolderListing
+from .filters import DEFAULT_FILTER, FolderFilter
+from .latency import OP_SCAN, OP_STAT, SLOW_MOUNT_CONCURRENCY, MountLatencyTracker, get_latency_tracker
+from .logger_setup import get_logger
+from .scanpool import ScanProcessPool, folder_metadata, has_subdirectory, list_folder_names
+from .sorting import SORT_NATURAL, FolderMetadata, SortedListing, get_sort_key
+from .store import PersistentListingStore
+
+# プリフェッチはクリック時のスキャンより後回しにする
+PREFETCH_PRIORITY = -1
+# メタデータ収集で並列化する最小エントリ数
+_PARALLEL_METADATA_MIN = 64
+# スキャンプロセスでメタデータを読む1回の要求のフォルダ数（要求ごとに期限がある）
+POOL_METADATA_BATCH = 256
+# キャッシュの1エントリあたりの推定バイト数（一覧自体を除く）
+_ENTRY_OVERHEAD_BYTES = 256
+# サブフォルダ有無の判定結果1件あたりの推定バイト数（パスの長さは別に加算）
+_PROBE_RESULT_BYTES = 160
+# 一覧できなかったフォルダを覚えておく既定の秒数
+NEGATIVE_TTL_SECONDS = 10.0
+
+# スキャン失敗の種類
+SCAN_ERROR_NOT_FOUND = "not_found"  # フォルダが存在しない
+SCAN_ERROR_NOT_A_DIRECTORY = "not_a_directory"  # フォルダではない
+SCAN_ERROR_PERMISSION = "permission"  # アクセスが拒否された
+SCAN_ERROR_TIMEOUT = "timeout"  # 応答がない（停止したネットワークドライブ等）
+SCAN_ERROR_OTHER = "error"  # その他（一時的な失敗の可能性があるため覚えない）
+
+# 覚えておく失敗の種類
+_NEGATIVE_ERROR_KINDS = frozenset(
+    {SCAN_ERROR_NOT_FOUND, SCAN_ERROR_NOT_A_DIRECTORY, SCAN_ERROR_PERMISSION, SCAN_ERROR_TIMEOUT}
+)
+# 応答がないことを示すerrno（プラットフォームにないものは除く）
+_TIMEOUT_ERRNOS = frozenset(
+    getattr(errno, name) for name in ("ETIMEDOUT", "EHOSTDOWN", "EHOSTUNREACH", "ESTALE") if hasattr(errno, name)
+)
+
+
+class ScanFailure(NamedTuple):
+    """A remembered failure to list a directory."""
+
+    kind: str  # SCAN_ERROR_*のいずれか
+    errno: int | None
+    message: str
+    expires: float  # time.monotonic()での期限
+
+    def to_error(self, path: str) -> OSError:
+        """
+        Build an exception equivalent to the original failure.
+
+        Args:
+            path: Directory that could not be listed
+
+        Returns:
+            OSError of the original subclass (e.g. PermissionError)
+        """
+        if self.errno is not None:
+            # errnoを渡すとOSErrorは対応するサブクラスになる
+            return OSError(self.errno, self.message, path)
+        return (TimeoutError if self.kind == SCAN_ERROR_TIMEOUT else OSError)(self.message)
+
+
+def classify_scan_error(error: OSError) -> str:
+    """
+    Get the kind of a failure to list a directory.
+
+    Args:
+        error: Exception raised by the scan
+
+    Returns:
+        One of the SCAN_ERROR_* kinds
+    """
+    if isinstance(error, FileNotFoundError):
+        return SCAN_ERROR_NOT_FOUND
+    if isinstance(error, NotADirectoryError):
+        return SCAN_ERROR_NOT_A_DIRECTORY
+    if isinstance(error, PermissionError):
+        return SCAN_ERROR_PERMISSION
+    if isinstance(error, TimeoutError) or error.errno in _TIMEOUT_ERRNOS:
+        return SCAN_ERROR_TIMEOUT
+    return SCAN_ERROR_OTHER
+
+
+def scan_folders(
+    path: str,
+    sort_mode: str = SORT_NATURAL,
+    folder_filter: FolderFilter = DEFAULT_FILTER,
+    columnar_min_entries: int = COLUMNAR_MIN_ENTRIES,
+) -> FolderListing:
+    """
+    Scan a directory for visible sub folders.
+
+    Args:
+        path: Directory to scan
+        sort_mode: Sort mode (see breadcrumb_addressbar.sorting)
+        folder_filter: Name rules deciding which folders are visible
+        columnar_min_entries: Number of folders from which the listing is
+            stored column-wise (see ColumnarListing)
+
+    Returns:
+        Sequence of tuples (folder_name, folder_path) sorted by name: a
+        SortedListing keeping the sort keys alongside, or a
+        ColumnarListing for large directories
+
+    Raises:
+        OSError: If the directory cannot be listed
+    """
+    return _listing_from_names(path, list_folder_names(path, folder_filter), sort_mode, columnar_min_entries)
+
+
+def _listing_from_names(path: str, names: list[str], sort_mode: str, columnar_min_entries: int) -> FolderListing:
+    """Build the sorted listing of the sub folder names of path."""
+    # 大きな一覧は名前だけを列形式で保持し、パスは読み出し時に組み立てる
+    if len(names) >= columnar_min_entries:
+        return ColumnarListing(path, names, sort_mode)
+    # 名前順にソート（キーは一覧と一緒に保持して再計算しない）
+    return SortedListing(((item, os.path.join(path, item)) for item in names), sort_mode)
+
+
+def read_folder_metadata(path: str) -> FolderMetadata | None:
+    """
+    Read the modification time and item count of a single folder.
+
+    Args:
+        path: Folder path
+
+    Returns:
+        Metadata (item_count is -1 if the folder cannot be listed), or
+        None if the folder cannot be stat'ed
+    """
+    return folder_metadata(path, stat_function=get_latency_tracker().stat)
+
+
+def collect_folder_metadata(
+    path: str,
+    folders: Sequence[tuple[str, str]],
+    item_counts: bool = False,
+    max_workers: int = 4,
+    latency_tracker: MountLatencyTracker | None = None,
+) -> dict[str, FolderMetadata]:
+    """
+    Collect modification times (and optionally item counts) of folders.
+
+    The directory is listed once with os.scandir() and each entry's
+    DirEntry.stat() result is used, which needs no extra system call on
+    Windows. Large batches are spread over a small thread pool so that
+    high-latency mounts are queried in parallel.
+
+    Args:
+        path: Directory containing the folders
+        folders: Folder list as returned by scan_folders()
+        item_counts: Whether to count the entries inside each folder
+        max_workers: Maximum number of worker threads
+        latency_tracker: Tracker receiving the stat latencies (defaults
+            to the process-wide tracker)
+
+    Returns:
+        Metadata keyed by folder path; folders that cannot be stat'ed are
+        left out
+    """
+    wanted = {folder_path for _, folder_path in folders}
+    try:
+        with os.scandir(path) as it:
+            entries = [entry for entry in it if os.path.join(path, entry.name) in wanted]
+    except OSError:
+        return {}
+
+    tracker = latency_tracker or get_latency_tracker()
+
+    def gather(batch: list[os.DirEntry[str]]) -> list[tuple[str, FolderMetadata]]:
+        results = []
+        latencies = []
+        for entry in batch:
+            started = time.perf_counter()
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            mtime_ns = st.st_mtime_ns
+            latencies.append((st.st_dev, time.perf_counter() - started))
+            count = -1
+            if item_counts:
+                try:
+                    with os.scandir(entry.path) as children:
+                        count = sum(1 for _ in children)
+                except OSError:
+                    pass
+            results.append((os.path.join(path, entry.name), FolderMetadata(mtime_ns, count)))
+        # ロックはバッチごとに1回だけ取る
+        tracker.record_batch(OP_STAT, latencies)
+        return results
+
+    workers = max(1, max_workers)
+    if workers == 1 or len(entries) < _PARALLEL_METADATA_MIN:
+        return dict(gather(entries))
+
+    # エントリごとではなくバッチ単位でワーカーに渡す
+    batch_size = max(1, -(-len(entries) // (workers * 4)))
+    batches = [entries[i : i + batch_size] for i in range(0, len(entries), batch_size)]
+    metadata: dict[str, FolderMetadata] = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for results in executor.map(gather, batches):
+            metadata.update(results)
+    return metadata
+
+
+def estimate_subdirectory_count(path: str) -> int | None:
+    """
+    Estimate the number of sub folders of a directory from a single stat.
+
+    On POSIX file systems that keep classic link counts (ext4, XFS, tmpfs)
+    a directory has two links plus one per sub folder. Hidden folders are
+    included in the estimate.
+
+    Args:
+        path: Directory to estimate
+
+    Returns:
+        Estimated sub folder count, or None if the file system does not
+        report usable link counts (Windows, btrfs) or on error
+    """
+    if sys.platform == "win32":
+        return None
+    try:
+        st = get_latency_tracker().stat(path)
+    except OSError:
+        return None
+    if st.st_nlink < 2:
+        return None
+    return st.st_nlink - 2
+
+
+class FolderListingCache:
+    """
+    Thread-safe LRU cache of folder listings.
+
+    Entries are validated against the directory mtime on every lookup,
+    so a folder that changed since it was scanned is treated as a miss.
+    Returned lists are shared and must not be modified by callers.
+
+    Entries are keyed by directory and folder filter fingerprint, so
+    listings scanned under different rule sets never mix.
+
+    An optional PersistentListingStore backs the cache: misses are served
+    from disk when the stored snapshot still matches the directory, and
+    every scan is written through to the store.
+
+    Directories that could not be listed (missing, access denied, timed
+    out) are remembered for a short time: lookups within that time raise
+    the remembered error without touching the file system, so a dead
+    network path does not block every click. invalidate() and
+    invalidate_failures() forget them early.
+
+    With a ScanProcessPool set, the stats, directory listings, sub folder
+    probes and metadata reads of the cache run in helper processes with a
+    deadline, so a hung network
+    mount fails with TimeoutError (remembered like any other timeout)
+    instead of blocking the calling thread indefinitely.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        sort_mode: str = SORT_NATURAL,
+        folder_filter: FolderFilter = DEFAULT_FILTER,
+        columnar_min_entries: int = COLUMNAR_MIN_ENTRIES,
+        negative_ttl: float = NEGATIVE_TTL_SECONDS,
+        latency_tracker: MountLatencyTracker | None = None,
+        scan_pool: ScanProcessPool | None = None,
+    ):
+        """
+        Initialize the listing cache.
+
+        Args:
+            max_entries: Maximum number of cached directories
+            sort_mode: Order of cached listings (see breadcrumb_addressbar.sorting)
+            folder_filter: Name rules applied while scanning
+            columnar_min_entries: Number of folders from which listings are
+                stored column-wise (see ColumnarListing)
+            negative_ttl: Seconds a failure to list a directory is
+                remembered (0 disables the negative cache)
+            latency_tracker: Tracker receiving the stat and scan latencies
+                (defaults to the process-wide tracker)
+            scan_pool: Helper processes running the stats and scans with a
+                deadline, or None to run them in the calling thread
+        """
+        get_sort_key(sort_mode)
+        self._max_entries = max(1, max_entries)
+        self._columnar_min_entries = max(1, columnar_min_entries)
+        self._sort_mode = sort_mode
+        self._filter = folder_filter
+        self._entries: OrderedDict[tuple[str, str], tuple[int, FolderListing]] = OrderedDict()
+        # エントリごとの推定バイト数とその合計
+        self._costs: dict[tuple[str, str], int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._store: PersistentListingStore | None = None
+        self._unverified: set[tuple[str, str]] = set()
+        # 一覧できなかったフォルダ（フォルダフィルタに依存しないためパスで引く）
+        self._negative_ttl = max(0.0, negative_ttl)
+        self._failures: OrderedDict[str, ScanFailure] = OrderedDict()
+        self._failure_hits = 0
+        self._latency = latency_tracker or get_latency_tracker()
+        self._scan_pool = scan_pool
+
+    def set_store(self, store: PersistentListingStore | None) -> None:
+        """
+        Set the on-disk store backing this cache.
+
+        Args:
+            store: Persistent store, or None to use memory only
+        """
+        with self._lock:
+            self._store = store
+            self._unverified.clear()
+
+    @property
+    def store(self) -> PersistentListingStore | None:
+        """Get the on-disk store backing this cache."""
+        return self._store
+
+    @property
+    def sort_mode(self) -> str:
+        """Get the order of cached listings."""
+        return self._sort_mode
+
+    def set_sort_mode(self, mode: str) -> None:
+        """
+        Set the order of cached listings, re-sorting the cached entries.
+
+        Args:
+            mode: Sort mode (see breadcrumb_addressbar.sorting)
+
+        Raises:
+            ValueError: If the mode is unknown
+        """
+        get_sort_key(mode)
+        with self._lock:
+            self._sort_mode = mode
+            for key, (mtime_ns, listing) in self._entries.items():
+                listing = listing.with_mode(mode)
+                self._entries[key] = (mtime_ns, listing)
+                self._set_cost(key, listing)
+        request_memory_check()
+
+    @property
+    def latency_tracker(self) -> MountLatencyTracker:
+        """Get the tracker receiving this cache's stat and scan latencies."""
+        return self._latency
+
+    @property
+    def scan_pool(self) -> ScanProcessPool | None:
+        """Get the helper processes running this cache's stats and scans."""
+        return self._scan_pool
+
+    def set_scan_pool(self, pool: ScanProcessPool | None) -> None:
+        """
+        Set the helper processes running this cache's stats and scans.
+
+        The pool is not owned by the cache; close it when it is no longer
+        used by any cache.
+
+        Args:
+            pool: Scan process pool, or None to scan in the calling thread
+        """
+        self._scan_pool = pool
+
+    @property
+    def negative_ttl(self) -> float:
+        """Get the number of seconds a failure to list a directory is remembered."""
+        return self._negative_ttl
+
+    def set_negative_ttl(self, seconds: float) -> None:
+        """
+        Set the number of seconds a failure to list a directory is remembered.
+
+        Args:
+            seconds: Time to live of a failure (0 disables the negative
+                     cache and forgets the current failures)
+        """
+        with self._lock:
+            self._negative_ttl = max(0.0, seconds)
+            if not self._negative_ttl:
+                self._failures.clear()
+
+    def failure(self, path: str) -> ScanFailure | None:
+        """
+        Get the remembered failure to list a directory.
+
+        Args:
+            path: Directory path
+
+        Returns:
+            Failure that has not expired yet, or None
+        """
+        with self._lock:
+            return self._active_failure(path)
+
+    def invalidate_failures(self, path: str | None = None) -> None:
+        """
+        Forget remembered failures so the next lookup retries the file system.
+
+        Args:
+            path: Directory whose failure, and those of the folders below
+                  it, are forgotten, or None to forget every failure
+        """
+        with self._lock:
+            if path is None:
+                self._failures.clear()
+                return
+            prefix = os.path.join(path, "")
+            for failed in [p for p in self._failures if p == path or p.startswith(prefix)]:
+                del self._failures[failed]
+
+    @property
+    def folder_filter(self) -> FolderFilter:
+        """Get the name rules applied while scanning."""
+        return self._filter
+
+    def set_folder_filter(self, folder_filter: FolderFilter) -> None:
+        """
+        Set the name rules applied while scanning.
+
+        Listings scanned under other rules stay cached under their own
+        key and are reused if those rules are set again.
+
+        Args:
+            folder_filter: Name rules
+        """
+        self._filter = folder_filter
+
+    def get(self, path: str, record_stats: bool = True) -> FolderListing | None:
+        """
+        Get a cached listing if it is still valid.
+
+        Args:
+            path: Directory path
+            record_stats: Whether the lookup counts towards hit/miss statistics
+
+        Returns:
+            Cached folder list, or None on a miss
+        """
+        # 一覧できなかったフォルダにはstatも発行しない
+        if self.failure(path) is not None:
+            mtime_ns = None
+        else:
+            try:
+                mtime_ns = self.stat(path).st_mtime_ns
+            except OSError as e:
+                if classify_scan_error(e) == SCAN_ERROR_TIMEOUT:
+                    # 応答しないフォルダは、続くスキャンでもう一度待たないよう覚えておく
+                    self._remember_failure(path, e)
+                mtime_ns = None
+
+        key = self._key(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            # 古いエントリはpeek()用に残し、次のスキャンで置き換える
+            if entry is None or entry[0] != mtime_ns:
+                if record_stats:
+                    self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if record_stats:
+                self._hits += 1
+            return entry[1]
+
+    def peek(self, path: str) -> Sequence[tuple[str, str]] | None:
+        """
+        Get a cached listing without validating it.
+
+        The result may be stale; it is meant to be shown immediately while
+        a fresh scan runs in the background. The directory is not stat'ed,
+        so this never blocks on a hung mount; a stored snapshot is counted
+        as stale by the store.
+
+        Args:
+            path: Directory path
+
+        Returns:
+            Cached (possibly stale) folder list, or None if nothing is cached
+        """
+        with self._lock:
+            entry = self._entries.get(self._key(path))
+        if entry is not None:
+            return entry[1]
+
+        store = self._store
+        if store is None or self.failure(path) is not None:
+            return None
+        return store.load(path, None, allow_stale=True, variant=self._variant())
+
+    def stat(self, path: str) -> os.stat_result:
+        """
+        Stat a directory the way the cache does, recording the latency.
+
+        Args:
+            path: Directory path
+
+        Returns:
+            Stat result
+
+        Raises:
+            OSError: If the stat fails, or TimeoutError if it runs in the
+                     scan pool and misses its deadline
+        """
+        pool = self._scan_pool
+        if pool is None:
+            return self._latency.stat(path)
+        return self._latency.stat(path, pool.stat)
+
+    def has_subdirectory(self, path: str, folder_filter: FolderFilter | None = None) -> bool:
+        """
+        Check whether a directory has a visible sub folder the way the cache scans.
+
+        A folder remembered as failing is not touched. With a scan pool the
+        probe runs in a helper process, and a probe that times out is
+        remembered like a failed scan.
+
+        Args:
+            path: Directory to probe
+            folder_filter: Name rules deciding which folders are visible
+                (defaults to the cache's)
+
+        Returns:
+            True if a visible sub folder exists; False otherwise or on error
+        """
+        if self.failure(path) is not None:
+            return False
+        folder_filter = folder_filter or self._filter
+        pool = self._scan_pool
+        if pool is None:
+            return has_subdirectory(path, folder_filter)
+        try:
+            return pool.has_subdirectory(path, folder_filter)
+        except OSError as e:
+            self._remember_failure(path, e)
+            return False
+
+    def read_metadata(self, paths: list[str]) -> list[FolderMetadata | None]:
+        """
+        Read the modification times and item counts of folders the way the cache stats.
+
+        Folders remembered as failing are not touched. With a scan pool
+        the folders are read in helper processes, POOL_METADATA_BATCH per
+        request, so a hung mount costs one deadline per batch.
+
+        Args:
+            paths: Folder paths
+
+        Returns:
+            Metadata in the order of paths (None for folders that cannot
+            be stat'ed or are remembered as failing)
+        """
+        wanted = [folder_path for folder_path in paths if self.failure(folder_path) is None]
+        pool = self._scan_pool
+        if pool is None:
+            values = [folder_metadata(folder_path, stat_function=self._latency.stat) for folder_path in wanted]
+        else:
+            values = []
+            for start in range(0, len(wanted), POOL_METADATA_BATCH):
+                batch = wanted[start : start + POOL_METADATA_BATCH]
+                try:
+                    values += pool.folder_metadata(batch)
+                except OSError:
+                    values += [None] * len(batch)
+        found = dict(zip(wanted, values, strict=True))
+        return [found.get(folder_path) for folder_path in paths]
+
+    def put(self, path: str, folders: Sequence[tuple[str, str]], mtime_ns: int) -> FolderListing:
+        """
+        Store a listing.
+
+        Args:
+            path: Directory path
+            folders: Folder list as returned by scan_folders() with the
+                     cache's folder filter
+            mtime_ns: Directory mtime observed before the scan started
+
+        Returns:
+            Stored listing (sorted in the cache's sort mode)
+        """
+        return self._put(self._key(path), folders, mtime_ns)
+
+    def get_or_scan(self, path: str, record_stats: bool = True) -> FolderListing:
+        """
+        Get a valid cached listing, scanning the directory on a miss.
+
+        Args:
+            path: Directory path
+            record_stats: Whether the lookup counts towards hit/miss statistics
+
+        Returns:
+            Folder list
+
+        Raises:
+            OSError: If the directory cannot be scanned, or a failure to
+                scan it is remembered (see failure())
+        """
+        folders = self.get(path, record_stats)
+        if folders is not None:
+            return folders
+
+        self._raise_failure(path)
+        try:
+            # スキャン中の変更を取りこぼさないよう、statはスキャン前に取得する
+            st = self.stat(path)
+            store = self._store
+            if store is not None:
+                stored = store.load(path, st, variant=self._variant())
+                if stored is not None:
+                    # ディスク上のスナップショットはバックグラウンドで再検証する
+                    listing = self.put(path, stored, st.st_mtime_ns)
+                    with self._lock:
+                        self._unverified.add(self._key(path))
+                    return listing
+
+            return self._scan_into_cache(path, st)
+        except OSError as e:
+            self._remember_failure(path, e)
+            raise
+
+    def rescan(self, path: str) -> FolderListing:
+        """
+        Scan a directory unconditionally and replace its cached listing.
+
+        A remembered failure is retried as well.
+
+        Args:
+            path: Directory path
+
+        Returns:
+            Folder list
+
+        Raises:
+            OSError: If the directory cannot be scanned
+        """
+        try:
+            return self._scan_into_cache(path, self.stat(path))
+        except OSError as e:
+            self._remember_failure(path, e)
+            raise
+
+    def collect_metadata(self, path: str, item_counts: bool = False, max_workers: int = 4) -> FolderListing:
+        """
+        Get a valid listing with folder metadata attached, collecting it if needed.
+
+        The metadata is stored with the cached listing, so switching
+        between sort modes afterwards needs neither a rescan nor new stats.
+
+        With a scan pool the folders are stat'ed in helper processes,
+        POOL_METADATA_BATCH per request.
+
+        Args:
+            path: Directory path
+            item_counts: Whether item counts are required as well
+            max_workers: Maximum number of worker threads for the stat pass
+                (unused with a scan pool)
+
+        Returns:
+            Folder list with metadata
+
+        Raises:
+            OSError: If the directory cannot be scanned, or its folders
+                     cannot be stat'ed within the pool's deadline
+        """
+        listing = self.get_or_scan(path, record_stats=False)
+        if not listing.has_metadata(item_counts):
+            pool = self._scan_pool
+            if pool is None:
+                # 遅いマウントでは並列度を下げる
+                max_workers = self._latency.concurrency(path, max_workers)
+                metadata = collect_folder_metadata(path, listing, item_counts, max_workers, self._latency)
+            else:
+                metadata = self._collect_metadata_in_pool(pool, listing, item_counts)
+            listing.set_metadata(metadata, item_counts)
+            with self._lock:
+                key = self._key(path)
+                if key in self._entries:
+                    self._set_cost(key, listing)
+            request_memory_check()
+        return listing
+
+    def _collect_metadata_in_pool(
+        self, pool: ScanProcessPool, folders: Sequence[tuple[str, str]], item_counts: bool
+    ) -> dict[str, FolderMetadata]:
+        """Collect folder metadata in the scan pool, POOL_METADATA_BATCH folders per request."""
+        paths = [folder_path for _, folder_path in folders]
+        metadata: dict[str, FolderMetadata] = {}
+        for start in range(0, len(paths), POOL_METADATA_BATCH):
+            batch = paths[start : start + POOL_METADATA_BATCH]
+            for folder_path, value in zip(batch, pool.folder_metadata(batch, item_counts), strict=True):
+                if value is not None:
+                    metadata[folder_path] = value
+        return metadata
+
+    def needs_revalidation(self, path: str) -> bool:
+        """
+        Return True if the cached listing was loaded from disk and has not
+        been confirmed by a fresh scan yet.
+
+        Args:
+            path: Directory path
+        """
+        with self._lock:
+            return self._key(path) in self._unverified
+
+    def _key(self, path: str, folder_filter: FolderFilter | None = None) -> tuple[str, str]:
+        """Get the entry key of path under a folder filter (the current one by default)."""
+        return ((folder_filter or self._filter).fingerprint, path)
+
+    def _variant(self, folder_filter: FolderFilter | None = None) -> str:
+        """Get the store variant of a folder filter ("" for the default rules)."""
+        folder_filter = folder_filter or self._filter
+        return "" if folder_filter == DEFAULT_FILTER else folder_filter.fingerprint
+
+    def _put(self, key: tuple[str, str], folders: Sequence[tuple[str, str]], mtime_ns: int) -> FolderListing:
+        """Store a listing under an entry key."""
+        if isinstance(folders, FolderListing):
+            listing = folders.with_mode(self._sort_mode)
+        elif len(folders) >= self._columnar_min_entries:
+            listing = ColumnarListing.from_entries(folders, key[1], self._sort_mode)
+        else:
+            listing = SortedListing(folders, self._sort_mode)
+        with self._lock:
+            self._entries[key] = (mtime_ns, listing)
+            self._entries.move_to_end(key)
+            self._set_cost(key, listing)
+            while len(self._entries) > self._max_entries:
+                self._drop(next(iter(self._entries)))
+        request_memory_check()
+        return listing
+
+    def _set_cost(self, key: tuple[str, str], listing: FolderListing) -> None:
+        """Update the estimated size of an entry (lock held)."""
+        cost = listing.memory_size() + _ENTRY_OVERHEAD_BYTES
+        self._bytes += cost - self._costs.get(key, 0)
+        self._costs[key] = cost
+
+    def _drop(self, key: tuple[str, str]) -> int:
+        """Remove an entry and return its estimated size (lock held)."""
+        del self._entries[key]
+        self._unverified.discard(key)
+        cost = self._costs.pop(key, 0)
+        self._bytes -= cost
+        return cost
+
+    def _scan_into_cache(self, path: str, st: os.stat_result) -> FolderListing:
+        """Scan path and store the result in memory and on disk."""
+        # スキャン中にルールが変わっても、スキャンに使ったルールのキーで保存する
+        folder_filter = self._filter
+        key = self._key(path, folder_filter)
+        pool = self._scan_pool
+        started = time.perf_counter()
+        try:
+            if pool is None:
+                scanned = scan_folders(path, self._sort_mode, folder_filter, self._columnar_min_entries)
+            else:
+                names = pool.list_folders(path, folder_filter)
+                scanned = _listing_from_names(path, names, self._sort_mode, self._columnar_min_entries)
+        finally:
+            self._latency.record(OP_SCAN, time.perf_counter() - started, st.st_dev, path)
+        folders = self._put(key, scanned, st.st_mtime_ns)
+        with self._lock:
+            self._unverified.discard(key)
+            self._failures.pop(path, None)
+        store = self._store
+        if store is not None:
+            store.save(path, folders, st, variant=self._variant(folder_filter))
+        return folders
+
+    def _active_failure(self, path: str) -> ScanFailure | None:
+        """Get the unexpired failure of path, dropping an expired one (lock held)."""
+        failure = self._failures.get(path)
+        if failure is not None and failure.expires <= time.monotonic():
+            del self._failures[path]
+            return None
+        return failure
+
+    def _raise_failure(self, path: str) -> None:
+        """Raise the remembered failure of path, if any, without touching the file system."""
+        with self._lock:
+            failure = self._active_failure(path)
+            if failure is None:
+                return
+            self._failure_hits += 1
+        raise failure.to_error(path)
+
+    def _remember_failure(self, path: str, error: OSError) -> None:
+        """Remember a failure to list path if its kind is worth remembering."""
+        kind = classify_scan_error(error)
+        if kind not in _NEGATIVE_ERROR_KINDS or not self._negative_ttl:
+            return
+        failure = ScanFailure(kind, error.errno, error.strerror or str(error), time.monotonic() + self._negative_ttl)
+        with self._lock:
+            # 一覧できなくなったフォルダの古い一覧は表示しない
+            for key in [key for key in self._entries if key[1] == path]:
+                self._drop(key)
+            self._failures[path] = failure
+            self._failures.move_to_end(path)
+            while len(self._failures) > self._max_entries:
+                self._failures.popitem(last=False)
+
+    def invalidate(self, path: str | None = None) -> None:
+        """
+        Drop a cached listing.
+
+        Remembered failures of the directory and the folders below it are
+        forgotten as well (see invalidate_failures()).
+
+        Args:
+            path: Directory path (under every folder filter), or None to
+                  clear the whole cache
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._unverified.clear()
+                self._costs.clear()
+                self._bytes = 0
+            else:
+                for key in [key for key in self._entries if key[1] == path]:
+                    self._drop(key)
+                self._unverified = {key for key in self._unverified if key[1] != path}
+        self.invalidate_failures(path)
+
+    def memory_usage(self) -> int:
+        """
+        Get the estimated number of bytes held by the cached listings.
+
+        Returns:
+            Estimated size in bytes
+        """
+        return self._bytes
+
+    def evict(self, nbytes: int) -> int:
+        """
+        Drop least recently used listings (see MemoryBudget).
+
+        Args:
+            nbytes: Bytes to free
+
+        Returns:
+            Estimated bytes freed
+        """
+        freed = 0
+        with self._lock:
+            while self._entries and freed < nbytes:
+                freed += self._drop(next(iter(self._entries)))
+        return freed
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with entries, hits and misses counts
+        """
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self._hits, "misses": self._misses}
+
+    def failure_stats(self) -> dict[str, int]:
+        """
+        Get negative cache statistics.
+
+        Returns:
+            Dictionary with the number of remembered failures per kind
+            (expired ones included until looked up), their total and the
+            number of lookups answered from them
+        """
+        with self._lock:
+            stats = {"failures": len(self._failures), "hits": self._failure_hits}
+            for failure in self._failures.values():
+                stats[failure.kind] = stats.get(failure.kind, 0) + 1
+            return stats
+
+
+# グローバルキャッシュインスタンス
+_listing_cache = FolderListingCache()
+
+
+def get_listing_cache() -> FolderListingCache:
+    """
+    Get the global folder listing cache instance.
+
+    Returns:
+        Listing cache instance
+    """
+    return _listing_cache
+
+
+class ListingPrefetcher(QObject):
+    """
+    Background prefetcher that warms the listing cache.
+
+    Scans run on a small dedicated thread pool with low thread priority,
+    so they never compete with the UI thread for long.
+
+    On slow mounts (see MountLatencyTracker) speculative prefetches and
+    metadata collection are skipped, and only one background rescan runs
+    at a time.
+    """
+
+    # シグナル
+    listingReady = Signal(str)  # キャッシュ準備完了通知（ワーカースレッドから発行）
+    listingCached = Signal(str)  # 有効な一覧がキャッシュ済みでスキャン不要だった（ワーカースレッドから発行）
+    prefetchFinished = Signal(str, bool, float)  # パス、成功可否、所要秒数（キャンセル時も発行）
+
+    def __init__(
+        self,
+        cache: FolderListingCache | None = None,
+        max_threads: int = 2,
+        parent: QObject | None = None,
+    ):
+        """
+        Initialize the prefetcher.
+
+        Args:
+            cache: Listing cache to warm (defaults to the global cache)
+            max_threads: Maximum number of concurrent scans
+            parent: Parent object
+        """
+        super().__init__(parent)
+        self._logger = get_logger("breadcrumb_addressbar.listing")
+        self._cache = cache if cache is not None else get_listing_cache()
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max(1, max_threads))
+        self._pool.setThreadPriority(QThread.Priority.LowPriority)
+        self._tasks: dict[str, _PrefetchTask] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self) -> FolderListingCache:
+        """Get the cache this prefetcher warms."""
+        return self._cache
+
+    def set_cache(self, cache: FolderListingCache) -> None:
+        """
+        Switch the cache this prefetcher warms, cancelling queued scans.
+
+        Args:
+            cache: Listing cache to warm
+        """
+        self.cancel_all()
+        self._cache = cache
+
+    def prefetch(self, path: str, priority: int = PREFETCH_PRIORITY) -> bool:
+        """
+        Schedule a background scan of path unless it is already pending or
+        remembered as failing.
+
+        Whether a cached listing is still valid is checked on the worker
+        thread (listingCached is emitted instead of scanning), so this
+        never touches the file system on the caller's thread.
+
+        Scans below priority 0 are speculative (hover, prediction,
+        warm-up) and are not scheduled on slow mounts.
+
+        Args:
+            path: Directory to prefetch
+            priority: Thread pool queue priority
+
+        Returns:
+            True if a scan was scheduled
+        """
+        if not path or self._cache.failure(path) is not None:
+            return False
+        if priority < 0 and self._cache.latency_tracker.is_slow(path):
+            self._logger.debug(f"Prefetch skipped on slow mount: {path}")
+            return False
+
+        with self._lock:
+            if path in self._tasks:
+                return False
+            task = _PrefetchTask(self, path)
+            self._tasks[path] = task
+
+        self._pool.start(task, priority)
+        self._logger.debug(f"Prefetch scheduled: {path}")
+        return True
+
+    def prefetch_metadata(self, path: str, item_counts: bool = False, priority: int = 0) -> bool:
+        """
+        Schedule background collection of folder metadata for path.
+
+        listingReady is emitted once the metadata is attached to the
+        cached listing. Whether it already is, is checked on the worker
+        thread. Nothing is collected on slow mounts.
+
+        Args:
+            path: Directory whose folders should be stat'ed
+            item_counts: Whether item counts are required as well
+            priority: Thread pool queue priority
+
+        Returns:
+            True if the collection was scheduled
+        """
+        if not path or self._cache.latency_tracker.is_slow(path):
+            return False
+
+        with self._lock:
+            if path in self._tasks:
+                return False
+            task = _PrefetchTask(self, path, item_counts=item_counts)
+            self._tasks[path] = task
+
+        self._pool.start(task, priority)
+        self._logger.debug(f"Metadata collection scheduled: {path}")
+        return True
+
+    def refresh(self, path: str, priority: int = PREFETCH_PRIORITY) -> bool:
+        """
+        Schedule a background rescan of path even if it is cached.
+
+        On a slow mount the rescan is skipped while another scan of that
+        mount is pending.
+
+        Args:
+            path: Directory to rescan
+            priority: Thread pool queue priority
+
+        Returns:
+            True if a rescan was scheduled
+        """
+        if not path:
+            return False
+        tracker = self._cache.latency_tracker
+        device = tracker.device_of(path) if tracker.is_slow(path) else None
+
+        with self._lock:
+            if path in self._tasks:
+                return False
+            if device is not None:
+                busy = sum(1 for pending in self._tasks if tracker.device_of(pending) == device)
+                if busy >= SLOW_MOUNT_CONCURRENCY:
+                    return False
+            task = _PrefetchTask(self, path, force=True)
+            self._tasks[path] = task
+
+        self._pool.start(task, priority)
+        self._logger.debug(f"Background rescan scheduled: {path}")
+        return True
+
+    def cancel(self, path: str) -> None:
+        """
+        Cancel a pending prefetch.
+
+        Args:
+            path: Directory whose prefetch should be cancelled
+        """
+        with self._lock:
+            task = self._tasks.get(path)
+        if task is None:
+            return
+        task.cancel()
+        if self._pool.tryTake(task):
+            self.task_finished(path, task)
+            self.prefetchFinished.emit(path, False, 0.0)
+            self._logger.debug(f"Prefetch cancelled: {path}")
+
+    def cancel_all(self) -> None:
+        """Cancel every pending prefetch."""
+        with self._lock:
+            paths = list(self._tasks)
+        for path in paths:
+            self.cancel(path)
+
+    def is_pending(self, path: str) -> bool:
+        """Return True if a prefetch for path is queued or running."""
+        with self._lock:
+            return path in self._tasks
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """
+        Wait for all running scans to finish.
+
+        Args:
+            msecs: Timeout in milliseconds (-1 waits forever)
+
+        Returns:
+            True if all scans finished in time
+        """
+        return self._pool.waitForDone(msecs)
+
+    def scan(self, path: str, force: bool = False, item_counts: bool | None = None) -> bool:
+        """
+        Scan path into the cache (called on the worker thread).
+
+        Args:
+            path: Directory to scan
+            force: Whether to rescan even if a valid listing is cached
+            item_counts: Whether item counts are required as well, or None
+                to collect no metadata
+
+        Returns:
+            True on success
+        """
+        try:
+            if item_counts is not None:
+                self._cache.collect_metadata(path, item_counts)
+            elif force:
+                self._cache.rescan(path)
+            elif self._cache.get(path, record_stats=False) is not None:
+                self.listingCached.emit(path)
+            else:
+                self._cache.get_or_scan(path, record_stats=False)
+        except OSError as e:
+            self._logger.debug(f"Prefetch failed for {path}: {e}")
+            return False
+        return True
+
+    def task_finished(self, path: str, task: _PrefetchTask) -> None:
+        """Forget a finished or cancelled task (called on any thread)."""
+        with self._lock:
+            if self._tasks.get(path) is task:
+                del self._tasks[path]
+
+
+class _PrefetchTask(QRunnable):
+    """Runnable that warms the listing cache for a single path."""
+
+    def __init__(self, prefetcher: ListingPrefetcher, path: str, force: bool = False, item_counts: bool | None = None):
+        super().__init__()
+        self.setAutoDelete(False)
+        self._prefetcher = prefetcher
+        self._path = path
+        self._force = force
+        self._item_counts = item_counts  # Noneでなければメタデータも収集する
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Request cancellation; takes effect if the scan has not started yet."""
+        self._cancelled.set()
+
+    def run(self) -> None:
+        ok = False
+        started = time.perf_counter()
+        try:
+            if self._cancelled.is_set():
+                return
+            ok = self._prefetcher.scan(self._path, self._force, self._item_counts)
+        finally:
+            # 通知を受けた側がすぐに次のスキャンを予約できるよう、先にタスクを忘れる
+            self._prefetcher.task_finished(self._path, self)
+            if ok and not self._cancelled.is_set():
+                self._prefetcher.listingReady.emit(self._path)
+            self._prefetcher.prefetchFinished.emit(self._path, ok, time.perf_counter() - started)
+
+
+class SubdirProber(QObject):
+    """
+    Bounded-concurrency "has any sub folder" prober.
+
+    Probes run on a small low-priority thread pool and their results are
+    remembered, so expand indicators can be shown without listing the
+    children of every entry. On slow mounts (see MountLatencyTracker) at
+    most SLOW_MOUNT_CONCURRENCY probes run at once; the others wait in
+    order.
+    """
+
+    # シグナル
+    probed = Signal(str, bool)  # パスとサブフォルダ有無（ワーカースレッドから発行）
+
+    def __init__(
+        self,
+        max_threads: int = 4,
+        max_results: int = 4096,
+        latency_tracker: MountLatencyTracker | None = None,
+        parent: QObject | None = None,
+        cache: FolderListingCache | None = None,
+    ):
+        """
+        Initialize the prober.
+
+        Args:
+            max_threads: Maximum number of concurrent probes
+            max_results: Maximum number of remembered results
+            latency_tracker: Tracker deciding which mounts are slow
+                (defaults to the cache's tracker, or the process-wide one)
+            parent: Parent object
+            cache: Listing cache whose scan pool and remembered failures
+                the probes use (see FolderListingCache.has_subdirectory());
+                None probes in the worker thread
+        """
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max(1, max_threads))
+        self._pool.setThreadPriority(QThread.Priority.LowPriority)
+        self._max_results = max(1, max_results)
+        self._results: OrderedDict[str, bool] = OrderedDict()
+        self._bytes = 0
+        self._tasks: dict[str, _ProbeTask] = {}
+        self._lock = threading.Lock()
+        self._filter = DEFAULT_FILTER
+        self._cache = cache
+        # 遅いマウントの判定（実行中の数と順番待ち）
+        if latency_tracker is None:
+            latency_tracker = cache.latency_tracker if cache is not None else get_latency_tracker()
+        self._latency = latency_tracker
+        self._slow_running: dict[int, int] = {}
+        self._deferred: deque[_ProbeTask] = deque()
+
+    def set_folder_filter(self, folder_filter: FolderFilter) -> None:
+        """
+        Set the name rules deciding which sub folders count, forgetting
+        remembered results.
+
+        Args:
+            folder_filter: Name rules
+        """
+        self.cancel_all()
+        with self._lock:
+            self._filter = folder_filter
+            self._results.clear()
+            self._bytes = 0
+
+    def probe(self, path: str) -> bool | None:
+        """
+        Get the probe result for path, scheduling a probe if unknown.
+
+        Args:
+            path: Directory to probe
+
+        Returns:
+            Remembered result, or None if a probe was scheduled (the result
+            is delivered through the probed signal)
+        """
+        device = self._latency.device_of(path) if self._latency.is_slow(path) else None
+        with self._lock:
+            result = self._results.get(path)
+            if result is not None:
+                self._results.move_to_end(path)
+                return result
+            if path in self._tasks:
+                return None
+            task = _ProbeTask(self, path, self._filter, device)
+            self._tasks[path] = task
+            if device is not None:
+                if self._slow_running.get(device, 0) >= SLOW_MOUNT_CONCURRENCY:
+                    # 遅いマウントでは前の判定が終わるまで順番待ちにする
+                    self._deferred.append(task)
+                    return None
+                self._slow_running[device] = self._slow_running.get(device, 0) + 1
+
+        self._pool.start(task, PREFETCH_PRIORITY)
+        return None
+
+    def has_subdirectory(self, path: str, folder_filter: FolderFilter) -> bool:
+        """Probe path for a visible sub folder (called on the worker thread)."""
+        if self._cache is None:
+            return has_subdirectory(path, folder_filter)
+        return self._cache.has_subdirectory(path, folder_filter)
+
+    def cancel_all(self) -> None:
+        """Cancel every probe that has not started yet."""
+        with self._lock:
+            for task in self._deferred:
+                del self._tasks[task.path]
+            self._deferred.clear()
+            tasks = list(self._tasks.items())
+        for path, task in tasks:
+            task.cancel()
+            if self._pool.tryTake(task):
+                self.task_finished(path, task, None)
+
+    def invalidate(self, path: str | None = None) -> None:
+        """
+        Forget remembered results.
+
+        Args:
+            path: Directory to forget, or None for all
+        """
+        with self._lock:
+            if path is None:
+                self._results.clear()
+                self._bytes = 0
+            elif self._results.pop(path, None) is not None:
+                self._bytes -= _PROBE_RESULT_BYTES + len(path)
+
+    def memory_usage(self) -> int:
+        """
+        Get the estimated number of bytes held by the remembered results.
+
+        Returns:
+            Estimated size in bytes
+        """
+        return self._bytes
+
+    def evict(self, nbytes: int) -> int:
+        """
+        Forget least recently used results (see MemoryBudget).
+
+        Args:
+            nbytes: Bytes to free
+
+        Returns:
+            Estimated bytes freed
+        """
+        freed = 0
+        with self._lock:
+            while self._results and freed < nbytes:
+                path, _ = self._results.popitem(last=False)
+                freed += _PROBE_RESULT_BYTES + len(path)
+            self._bytes -= freed
+        return freed
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """
+        Wait for all running probes to finish.
+
+        Args:
+            msecs: Timeout in milliseconds (-1 waits forever)
+
+        Returns:
+            True if all probes finished in time
+        """
+        return self._pool.waitForDone(msecs)
+
+    def task_finished(self, path: str, task: _ProbeTask, result: bool | None) -> None:
+        """Forget a finished task and remember its result (called from worker threads)."""
+        with self._lock:
+            if self._tasks.get(path) is task:
+                del self._tasks[path]
+            if task.device is not None:
+                self._slow_running[task.device] -= 1
+            # ルール変更前に始まったプローブの結果は覚えない
+            if result is not None and task.folder_filter == self._filter:
+                if path not in self._results:
+                    self._bytes += _PROBE_RESULT_BYTES + len(path)
+                self._results[path] = result
+                while len(self._results) > self._max_results:
+                    dropped, _ = self._results.popitem(last=False)
+                    self._bytes -= _PROBE_RESULT_BYTES + len(dropped)
+        if task.device is not None:
+            self._start_deferred(task.device)
+
+    def _start_deferred(self, device: int) -> None:
+        """Start the next probe waiting for a slow mount."""
+        with self._lock:
+            task = next((waiting for waiting in self._deferred if waiting.device == device), None)
+            if task is None:
+                return
+            self._deferred.remove(task)
+            self._slow_running[device] = self._slow_running.get(device, 0) + 1
+        self._pool.start(task, PREFETCH_PRIORITY)
+
+
+class _ProbeTask(QRunnable):
+    """Runnable that probes a single directory for sub folders."""
+
+    def __init__(self, prober: SubdirProber, path: str, folder_filter: FolderFilter, device: int | None = None):
+        super().__init__()
+        self.setAutoDelete(False)
+        self._prober = prober
+        self.path = path
+        self.folder_filter = folder_filter
+        self.device = device  # 遅いマウントならそのst_dev
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Request cancellation; takes effect if the probe has not started yet."""
+        self._cancelled.set()
+
+    def run(self) -> None:
+        if self._cancelled.is_set():
+            self._prober.task_finished(self.path, self, None)
+            return
+        result = self._prober.has_subdirectory(self.path, self.folder_filter)
+        self._prober.task_finished(self.path, self, result)
+        self._prober.probed.emit(self.path, result)
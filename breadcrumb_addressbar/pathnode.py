@@ -0,0 +1,233 @@
+"""
+Path Nodes
+
+Interned path trees: a path is a node holding its parent node and its last
+segment name, so paths sharing a prefix share its nodes, equal paths are
+the same object, and full path strings are built only when asked for.
+"""
+
+import ntpath
+import os
+import sys
+import threading
+import weakref
+from collections.abc import Callable
+
+_SEPARATORS = "/\\"
+
+
+# (親ノード, 名前) → ノードへの弱参照（ノードが解放されると項目も消える）
+_interned: dict[tuple[PathNode | None, str], weakref.KeyedRef[tuple[PathNode | None, str], PathNode]] = {}
+# ノードの作成と削除だけを直列化する（解放時のコールバックは同じスレッドで再入しうる）
+_intern_lock = threading.RLock()
+
+
+def _forget(ref: weakref.KeyedRef[tuple[PathNode | None, str], PathNode]) -> None:
+    """Remove the table entry of a released node unless it was replaced."""
+    with _intern_lock:
+        if _interned.get(ref.key) is ref:
+            del _interned[ref.key]
+
+
+class PathNode:
+    """
+    One path in a process-wide tree of interned paths.
+
+    Nodes are canonical: PathNode(parent, name) returns the existing node
+    for that parent and name while any reference to it is alive, so equal
+    paths compare and hash by identity and every extra reference costs one
+    pointer instead of another copy of the string. The intern table holds
+    nodes weakly; a node and its unused ancestors disappear with the last
+    reference. Top-level nodes hold the anchor ("/", "C:\\") or the first
+    segment of a relative path.
+
+    Nodes can be passed to os functions directly (os.PathLike).
+    """
+
+    __slots__ = ("__weakref__", "_name", "_parent")
+
+    def __new__(cls, parent: PathNode | None, name: str) -> PathNode:
+        """
+        Get the interned node for a child of parent.
+
+        Args:
+            parent: Parent node (None for a top-level node)
+            name: Segment name, or the anchor for a top-level node
+
+        Returns:
+            Canonical node
+        """
+        key = (parent, name)
+        ref = _interned.get(key)
+        node = ref() if ref is not None else None
+        if node is not None:
+            return node
+        with _intern_lock:
+            ref = _interned.get(key)
+            node = ref() if ref is not None else None
+            if node is None:
+                node = object.__new__(cls)
+                # よく現れるフォルダ名（src、build等）は文字列も共有する
+                node._name = sys.intern(name)
+                node._parent = parent
+                key = (parent, node._name)
+                _interned[key] = weakref.KeyedRef(node, _forget, key)
+        return node
+
+    @property
+    def name(self) -> str:
+        """Get the last segment (the anchor for a top-level node)."""
+        return self._name
+
+    @property
+    def parent(self) -> PathNode | None:
+        """Get the parent node (None for a top-level node)."""
+        return self._parent
+
+    @property
+    def depth(self) -> int:
+        """Get the number of ancestors."""
+        depth = 0
+        node = self._parent
+        while node is not None:
+            depth += 1
+            node = node._parent
+        return depth
+
+    def child(self, name: str) -> PathNode:
+        """
+        Get the interned node of a sub folder.
+
+        Args:
+            name: Sub folder name
+
+        Returns:
+            Canonical child node
+        """
+        return PathNode(self, name)
+
+    def ancestors(self) -> list[PathNode]:
+        """
+        Get the nodes from the top-level node down to this one.
+
+        Returns:
+            Nodes, top-level first, ending with this node
+        """
+        nodes = []
+        node: PathNode | None = self
+        while node is not None:
+            nodes.append(node)
+            node = node._parent
+        nodes.reverse()
+        return nodes
+
+    def is_relative_to(self, other: PathNode) -> bool:
+        """
+        Check whether this node is other or lies below it.
+
+        Args:
+            other: Possible ancestor
+
+        Returns:
+            True if other is this node or one of its ancestors
+        """
+        node: PathNode | None = self
+        while node is not None:
+            if node is other:
+                return True
+            node = node._parent
+        return False
+
+    def path(self) -> str:
+        """
+        Build the full path string.
+
+        Returns:
+            Path joined with the separator of the top-level node
+        """
+        names = []
+        node: PathNode | None = self
+        while node is not None:
+            names.append(node._name)
+            node = node._parent
+        top = names.pop()
+        if not names:
+            return top
+        names.reverse()
+        if top[-1] in _SEPARATORS:
+            return top + top[-1].join(names)
+        if top.endswith(":"):
+            # ドライブ相対パス（"C:foo"）
+            return top + "\\".join(names)
+        return os.sep.join([top, *names])
+
+    def __fspath__(self) -> str:
+        return self.path()
+
+    def __str__(self) -> str:
+        return self.path()
+
+    def __repr__(self) -> str:
+        return f"PathNode({self.path()!r})"
+
+    def __reduce__(self) -> tuple[Callable[[str], PathNode | None], tuple[str]]:
+        # 別プロセスでも同じ表現に復元する（インターンは復元側で行われる）
+        return intern_path, (self.path(),)
+
+
+def split_path(path: str) -> tuple[str, list[str]]:
+    """
+    Split a path into its anchor and segment names.
+
+    Windows paths (containing a backslash, or any path on Windows) keep
+    their drive or UNC share in the anchor. Repeated and trailing
+    separators are dropped; "." and ".." are kept as written.
+
+    Args:
+        path: Absolute or relative path
+
+    Returns:
+        Tuple of (anchor, names); the anchor is "" for relative paths
+    """
+    if "\\" in path or os.name == "nt":
+        separator = "\\" if "\\" in path else "/"
+        drive, rest = ntpath.splitdrive(path)
+    else:
+        separator = "/"
+        drive, rest = "", path
+    names = [name for name in rest.replace("\\", separator).split(separator) if name]
+    if rest and rest[0] in _SEPARATORS:
+        return drive + separator, names
+    return drive, names
+
+
+def intern_path(path: str) -> PathNode | None:
+    """
+    Get the interned node of a path.
+
+    Args:
+        path: Absolute or relative path
+
+    Returns:
+        Canonical node, or None for an empty path
+    """
+    anchor, names = split_path(path)
+    if anchor:
+        node = PathNode(None, anchor)
+    elif names:
+        node = PathNode(None, names.pop(0))
+    else:
+        return None
+    for name in names:
+        node = PathNode(node, name)
+    return node
+
+
+def interned_count() -> int:
+    """
+    Get the number of live interned nodes.
+
+    Returns:
+        Number of nodes in the process-wide intern table
+    """
+    return len(_interned)
@@ -5,12 +5,74 @@ Popup menu for folder selection in the breadcrumb address bar.
 """
 
 import os
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
 
-from PySide6.QtCore import QPoint, Signal
+from PySide6.QtCore import QPoint, QTimer, Signal
 from PySide6.QtGui import QAction, QFont
 from PySide6.QtWidgets import QMenu, QWidget
 
+from .budget import request_memory_check
+from .columnar import FolderListing
+from .frecency import FrecencyStore
+from .listing import (
+    SCAN_ERROR_NOT_A_DIRECTORY,
+    SCAN_ERROR_NOT_FOUND,
+    SCAN_ERROR_OTHER,
+    SCAN_ERROR_PERMISSION,
+    SCAN_ERROR_TIMEOUT,
+    FolderListingCache,
+    ListingPrefetcher,
+    SubdirProber,
+    classify_scan_error,
+    estimate_subdirectory_count,
+)
 from .logger_setup import get_logger
+from .pathnode import PathNode, intern_path
+from .search import SubtreeSearch
+from .sorting import ALL_SORT_MODES, METADATA_SORT_MODES, SORT_ITEM_COUNT
+
+# 同期的に追加する最初の1画面分のエントリ数
+FIRST_SCREEN_ITEMS = 40
+# 残りのエントリを追加する1スライスあたりの時間予算（ミリ秒）
+SLICE_BUDGET_MS = 8.0
+# 時間予算を確認する間隔（エントリ数）
+_SLICE_CHECK_INTERVAL = 32
+# 再利用のために保持するアクション数の上限
+MAX_POOLED_ACTIONS = 4096
+# カスケード表示でサブフォルダの有無を調べるエントリ数の上限（ポップアップごと）
+MAX_CASCADE_PROBES = 256
+
+# 推定したエントリ数に応じた表示方式
+STRATEGY_PLAIN = "plain"  # すべて同期的に追加する
+STRATEGY_CHUNKED = "chunked"  # 最初の1画面分以外を時間分割で追加する
+STRATEGY_ASYNC = "async"  # スキャンを待たずに読み込み中を表示する
+# この件数以下ならすべて同期的に追加する
+PLAIN_MAX_ITEMS = 200
+# この件数以上ならスキャン自体をバックグラウンドで行う
+ASYNC_MIN_ITEMS = 5000
+# 部分木検索で表示する結果数の上限
+MAX_SEARCH_RESULTS = 2000
+# 構築済みポップアップの推定バイト数（メニュー本体とフォルダ1項目あたり）
+_MENU_BYTES = 16 * 1024
+_ACTION_BYTES = 1024
+
+NO_FOLDERS_TEXT = "フォルダが見つかりません"
+LOADING_TEXT = "読み込み中..."
+_OPEN_FOLDER_TEXT = "このフォルダを開く"
+_FRECENT_SECTION_TEXT = "よく使うフォルダ"
+_SEARCH_ACTION_TEXT = "このフォルダ以下を検索..."
+_SEARCHING_TEXT = "検索中..."
+_NO_MATCHES_TEXT = "一致するフォルダはありません"
+# 一覧できなかった理由ごとの表示
+SCAN_ERROR_TEXTS = {
+    SCAN_ERROR_NOT_FOUND: "フォルダが存在しません",
+    SCAN_ERROR_NOT_A_DIRECTORY: "フォルダではありません",
+    SCAN_ERROR_PERMISSION: "アクセスが拒否されました",
+    SCAN_ERROR_TIMEOUT: "応答がありません（タイムアウト）",
+    SCAN_ERROR_OTHER: "フォルダを読み込めません",
+}
 
 
 class FolderSelectionPopup(QMenu):
@@ -22,17 +84,100 @@ class FolderSelectionPopup(QMenu):
 
     # シグナル
     folderSelected = Signal(str)  # フォルダ選択通知
+    searchRequested = Signal(str)  # 「このフォルダ以下を検索」が選ばれたフォルダ
 
-    def __init__(self, parent: QWidget | None = None):
+    def __init__(
+        self,
+        parent: QWidget | None = None,
+        cache: FolderListingCache | None = None,
+        prefetcher: ListingPrefetcher | None = None,
+    ):
         """
         Initialize the folder selection popup.
 
         Args:
             parent: Parent widget
+            cache: Listing cache to read from (defaults to the prefetcher's
+                   cache, or the global cache)
+            prefetcher: Background scanner used for revalidation (a private
+                        one is created if omitted)
         """
         super().__init__(parent)
         self._logger = get_logger("breadcrumb_addressbar.popup")
+        if prefetcher is None:
+            prefetcher = ListingPrefetcher(cache=cache, parent=self)
+        self._prefetcher = prefetcher
+        self._cache = cache if cache is not None else prefetcher.cache
         self._current_path = ""
+        # 表示中のフォルダのノード（アクションのデータはその子ノードで、バーのノードと共有される）
+        self._path_node: PathNode | None = None
+        self._folder_actions: dict[str, QAction] = {}
+        # 現在のパスを一覧できなかった理由（SCAN_ERROR_*）
+        self._failure_kind: str | None = None
+        self._prefetcher.listingReady.connect(self._on_listing_ready)
+        self._prefetcher.prefetchFinished.connect(self._on_prefetch_finished)
+
+        # アクションは再利用し、選択はメニューのtriggeredシグナル1本で受ける
+        self._action_pool: list[QAction] = []
+        self._placeholder_action = QAction(NO_FOLDERS_TEXT, self)
+        self._placeholder_action.setEnabled(False)
+        self._placeholder_shown = False
+        self.triggered.connect(self._on_action_triggered)
+
+        # 大きな一覧の段階的な追加
+        self._first_screen_items = FIRST_SCREEN_ITEMS
+        self._slice_budget_ms = SLICE_BUDGET_MS
+        self._pending_folders: Sequence[tuple[str, str]] = []
+        self._pending_index = 0
+        self._populate_timer = QTimer(self)
+        self._populate_timer.setInterval(0)
+        self._populate_timer.timeout.connect(self._populate_next_slice)
+
+        # カスケード表示（サブフォルダを持つエントリをサブメニューとして遅延展開）
+        self._cascading = False
+        self._prober: SubdirProber | None = None
+        self._probed_count = 0
+        self._lazy_path = ""
+        # サブフォルダを持つエントリのサブメニュー（フォルダのパスごと）
+        self._submenus: dict[str, FolderSelectionPopup] = {}
+        self._open_action: QAction | None = None
+        self.aboutToShow.connect(self._on_about_to_show)
+
+        # よく使うフォルダを先頭に固定表示する
+        self._frecency: FrecencyStore | None = None
+        self._pinned_count = 0
+        self._pinned_actions: list[QAction] = []
+
+        # このフォルダ以下の検索（結果は検索中も少しずつ追加する）
+        self._search_enabled = False
+        self._search_action: QAction | None = None
+        self._searcher: SubtreeSearch | None = None
+        self._search_id = 0
+        self._search_root = ""
+        self._search_results = 0
+        self.aboutToHide.connect(self.cancelSearch)
+
+        # 表示順（Noneならキャッシュの並び順）
+        self._sort_mode: str | None = None
+
+        # スキャン前の規模推定による表示方式の選択
+        self._size_estimator: Callable[[str], int | None] = estimate_subdirectory_count
+        self._plain_max_items = PLAIN_MAX_ITEMS
+        self._async_min_items = ASYNC_MIN_ITEMS
+        self._strategy = STRATEGY_CHUNKED
+        self._pending_estimate: tuple[str, int] | None = None
+        self._strategy_stats: dict[str, int] = {
+            STRATEGY_PLAIN: 0,
+            STRATEGY_CHUNKED: 0,
+            STRATEGY_ASYNC: 0,
+            "estimated": 0,
+            "unestimated": 0,
+            "compared": 0,
+            "abs_error": 0,
+            "slow_mount": 0,
+            "isolated": 0,
+        }
+
         self._setup_ui()
 
     def _setup_ui(self) -> None:
@@ -64,30 +209,290 @@ class FolderSelectionPopup(QMenu):
     def populateForPath(self, path: str) -> None:
         """Populate actions for the given path without showing the menu.
 
+        A cached listing is shown immediately even if it may be stale; in
+        that case the directory is rescanned in the background and the
+        differences are patched into the menu when the scan finishes.
+
+        A folder that recently failed to list (see
+        FolderListingCache.failure()) shows the reason without touching
+        the file system again.
+
+        With the asynchronous strategy (huge folders, slow mounts, scans
+        isolated in helper processes) the directory is not even stat'ed
+        here: the cached listing or the loading entry is shown at once and
+        the worker validates it against the directory mtime.
+
         Args:
             path: Path to prepare folder actions for
         """
         self._current_path = path
         self._logger.debug(f"Populating popup for path: {path}")
 
-        # 既存のアクションをクリア
-        self.clear()
+        failure = self._cache.failure(path)
+        if failure is not None:
+            self._reset_actions(path)
+            self._show_failure(failure.kind)
+            return
 
-        # フォルダ一覧を取得
-        folders: list[tuple[str, str]] = self._get_folders(path)
+        # 巨大なフォルダ・遅いマウントはスキャンもmtimeの確認も待たない
+        self._choose_strategy(path)
+        if self._strategy == STRATEGY_ASYNC:
+            self._start_async_population(path)
+            return
 
-        if not folders:
-            # フォルダが見つからない場合
-            no_folders_action = QAction("フォルダが見つかりません", self)
-            no_folders_action.setEnabled(False)
-            self.addAction(no_folders_action)
+        self._reset_actions(path)
+
+        # フォルダ一覧を取得（古い可能性がある一覧は表示後に裏で再検証する）
+        revalidate = False
+        folders = self._cache.get(path)
+        if folders is not None:
+            revalidate = self._cache.needs_revalidation(path)
         else:
-            # フォルダ一覧を表示
-            for folder_name, folder_path in folders:
-                action = QAction(folder_name, self)
-                action.setData(folder_path)
-                action.triggered.connect(lambda checked, p=folder_path: self._on_folder_selected(p))
-                self.addAction(action)
+            folders = self._cache.peek(path)
+            if folders is not None:
+                revalidate = True
+            else:
+                folders = self._get_folders(path, record_stats=False)
+
+        self._apply_folders(self._display_order(path, folders, request_metadata=not revalidate))
+        if self._failure_kind is not None:
+            self._show_failure(self._failure_kind)
+
+        if revalidate:
+            self._logger.debug(f"Showing cached listing, revalidating in background: {path}")
+            self._prefetcher.refresh(path)
+
+    def populateForPathAsync(self, path: str) -> None:
+        """Populate actions for the given path without blocking on a scan.
+
+        A cached listing is shown at once and validated in the background;
+        otherwise a loading entry is shown and the listing is filled in
+        when the background scan finishes.
+
+        Args:
+            path: Path to prepare folder actions for
+        """
+        if self._cache.failure(path) is not None:
+            self.populateForPath(path)
+            return
+
+        self._current_path = path
+        self._logger.debug(f"Populating popup asynchronously for path: {path}")
+        self._choose_strategy(path)
+        self._start_async_population(path)
+
+    def setSortMode(self, mode: str | None) -> None:
+        """
+        Set the order of the folder entries.
+
+        Metadata modes (modification time, item count) show the name order
+        until the metadata has been collected in the background; it is kept
+        with the cached listing, so switching modes never rescans.
+
+        Args:
+            mode: One of the modes in breadcrumb_addressbar.sorting, or None
+                  to keep the listing cache's order
+
+        Raises:
+            ValueError: If the mode is unknown
+        """
+        if mode is not None and mode not in ALL_SORT_MODES:
+            raise ValueError(f"Unknown sort mode: {mode}")
+        self._sort_mode = mode
+
+    def sortMode(self) -> str | None:
+        """
+        Get the order of the folder entries.
+
+        Returns:
+            Sort mode, or None if the listing cache's order is used
+        """
+        return self._sort_mode
+
+    def setStrategyThresholds(self, plain_max_items: int, async_min_items: int) -> None:
+        """
+        Set the estimated sizes at which the population strategy changes.
+
+        Directories estimated at up to plain_max_items folders are added
+        in one go, those from async_min_items folders on are scanned in the
+        background, and everything in between is added in time slices.
+
+        Args:
+            plain_max_items: Largest estimate populated synchronously
+            async_min_items: Smallest estimate scanned in the background
+        """
+        self._plain_max_items = max(0, plain_max_items)
+        self._async_min_items = max(self._plain_max_items + 1, async_min_items)
+
+    def setSizeEstimator(self, estimator: Callable[[str], int | None] | None) -> None:
+        """
+        Set the function estimating a directory's folder count before a scan.
+
+        When the estimator returns None, the length of a cached listing is
+        used instead; without either the time-sliced strategy is used.
+
+        Args:
+            estimator: Function returning an estimate or None, or None to
+                       restore the link count based default
+        """
+        self._size_estimator = estimator or estimate_subdirectory_count
+
+    def currentStrategy(self) -> str:
+        """
+        Get the strategy chosen for the current path.
+
+        Returns:
+            One of STRATEGY_PLAIN, STRATEGY_CHUNKED and STRATEGY_ASYNC
+        """
+        return self._strategy
+
+    def strategyStats(self) -> dict[str, float]:
+        """
+        Get statistics of the strategy decisions and estimate accuracy.
+
+        Returns:
+            Dictionary with the thresholds, the number of populations per
+            strategy, how often an estimate was available, how often a
+            slow mount or a scan process pool ("isolated") forced the
+            asynchronous strategy, and the mean absolute error of
+            estimates compared with the scanned listing
+        """
+        stats: dict[str, float] = dict(self._strategy_stats)
+        compared = stats.pop("compared")
+        abs_error = stats.pop("abs_error")
+        stats["compared"] = compared
+        stats["mean_abs_error"] = abs_error / compared if compared else 0.0
+        stats["plain_max_items"] = self._plain_max_items
+        stats["async_min_items"] = self._async_min_items
+        return stats
+
+    def setCascading(self, enabled: bool, prober: SubdirProber | None = None) -> None:
+        """
+        Set whether folders with sub folders open as lazily filled submenus.
+
+        Expand indicators come from cheap "has any sub folder" probes; a
+        submenu lists its folder only when it is about to be shown.
+
+        Args:
+            enabled: True to enable cascading submenus
+            prober: Shared prober (a private one is created if omitted)
+        """
+        self._cascading = enabled
+        if not enabled:
+            return
+        if prober is None:
+            prober = self._prober if self._prober is not None else SubdirProber(parent=self, cache=self._cache)
+        if prober is not self._prober:
+            if self._prober is not None:
+                self._prober.probed.disconnect(self._on_probed)
+            self._prober = prober
+            self._prober.probed.connect(self._on_probed)
+
+    def isCascading(self) -> bool:
+        """
+        Get whether cascading submenus are enabled.
+
+        Returns:
+            True if folders with sub folders open as submenus
+        """
+        return self._cascading
+
+    def setFrecencyStore(self, store: FrecencyStore | None, count: int = 3) -> None:
+        """
+        Pin the most frecent sub folders above the listing.
+
+        Args:
+            store: Frecency store to rank folders with (None disables pinning)
+            count: Maximum number of pinned folders
+        """
+        self._frecency = store
+        self._pinned_count = max(0, count)
+
+    def frecencyStore(self) -> FrecencyStore | None:
+        """
+        Get the frecency store used for pinned folders.
+
+        Returns:
+            Frecency store, or None if pinning is disabled
+        """
+        return self._frecency
+
+    def pinnedFolders(self) -> list[str]:
+        """
+        Get the folders currently pinned at the top of the popup.
+
+        Returns:
+            Pinned folder paths, most frecent first
+        """
+        return [str(action.data()) for action in self._pinned_actions]
+
+    def setSearchEnabled(self, enabled: bool) -> None:
+        """
+        Set whether the menu offers searching below its folder.
+
+        The entry emits searchRequested with the folder; the caller asks for
+        a query and calls searchBelow().
+
+        Args:
+            enabled: True to add the search entry at the top of the menu
+        """
+        self._search_enabled = enabled
+
+    def isSearchEnabled(self) -> bool:
+        """
+        Get whether the menu offers searching below its folder.
+
+        Returns:
+            True if the search entry is shown
+        """
+        return self._search_enabled
+
+    def searchBelow(self, path: str, query: str, max_depth: int | None = None) -> int:
+        """
+        List the folders below path whose name matches query.
+
+        The walk runs in the background, honours the listing cache's folder
+        filter, and its matches are appended as they are found. It stops
+        when the menu is hidden, repopulated or another search starts.
+
+        Args:
+            path: Folder to search below
+            query: Folder name query (substring, glob, or "re:" regex)
+            max_depth: Maximum number of levels below path (None for unlimited)
+
+        Returns:
+            Id of the search
+
+        Raises:
+            re.error: If the query is an invalid regular expression
+        """
+        if self._searcher is None:
+            self._searcher = SubtreeSearch(parent=self)
+            self._searcher.resultsFound.connect(self._on_search_results)
+            self._searcher.searchFinished.connect(self._on_search_finished)
+        self._current_path = path
+        self._reset_actions(path, pinned=False)
+        self._search_root = path
+        self._search_results = 0
+        self._search_id = self._searcher.start(path, query, self._cache.folder_filter, max_depth)
+        self._show_placeholder(_SEARCHING_TEXT)
+        self._logger.debug(f"Searching below {path}: {query!r}")
+        return self._search_id
+
+    def isSearching(self) -> bool:
+        """
+        Get whether a search below the folder is still running.
+
+        Returns:
+            True while matches may still be added
+        """
+        return self._searcher is not None and self._searcher.is_running()
+
+    def cancelSearch(self) -> None:
+        """Stop the search in progress, keeping the matches found so far."""
+        if self._searcher is not None and self._searcher.is_running():
+            self._searcher.cancel()
+            self._logger.debug(f"Search cancelled below {self._search_root}")
 
     def showForPath(self, path: str, position: tuple[int, int] | None = None) -> None:
         """
@@ -107,48 +512,538 @@ class FolderSelectionPopup(QMenu):
         else:
             self.exec_()
 
-    def _get_folders(self, path: str) -> list[tuple[str, str]]:
+    def listingCache(self) -> FolderListingCache:
+        """
+        Get the listing cache the popup reads from.
+
+        Returns:
+            Listing cache
+        """
+        return self._cache
+
+    def folderCount(self) -> int:
+        """
+        Get the number of folder entries in the menu.
+
+        Returns:
+            Number of folder actions currently in the menu
+        """
+        return len(self._folder_actions)
+
+    def failureKind(self) -> str | None:
+        """
+        Get why the current folder could not be listed.
+
+        Returns:
+            One of the SCAN_ERROR_* kinds of breadcrumb_addressbar.listing,
+            or None if the folder was listed
+        """
+        return self._failure_kind
+
+    def isPopulating(self) -> bool:
+        """
+        Get whether folder actions are still being added in the background.
+
+        Returns:
+            True while a large listing is being appended in slices
+        """
+        return bool(self._pending_folders)
+
+    def setProgressivePopulation(self, first_screen_items: int, slice_budget_ms: float) -> None:
+        """
+        Configure time-sliced population of large listings.
+
+        Args:
+            first_screen_items: Number of entries added synchronously
+            slice_budget_ms: Time budget per event loop slice in milliseconds
+        """
+        self._first_screen_items = max(1, first_screen_items)
+        self._slice_budget_ms = max(0.1, slice_budget_ms)
+
+    def _get_folders(self, path: str, record_stats: bool = True) -> Sequence[tuple[str, str]]:
         """
         Get list of folders in the specified path.
 
         Args:
             path: Path to scan for folders
+            record_stats: Whether the cache lookup counts towards hit/miss statistics
 
         Returns:
-            List of tuples (folder_name, folder_path)
+            List of tuples (folder_name, folder_path); empty if the folder
+            cannot be listed (the reason is kept in failureKind())
         """
         folders = []
 
         try:
-            if not os.path.exists(path):
-                self._logger.warning(f"Path does not exist: {path}")
-                return folders
+            # キャッシュ済みならスキャンせずに再利用する（ホバー時のプリフェッチ等）
+            # 存在しない・権限がない等の失敗もキャッシュが覚え、しばらく再試行しない
+            folders = self._cache.get_or_scan(path, record_stats)
+
+            self._logger.debug(f"Found {len(folders)} folders in {path}")
 
-            if not os.path.isdir(path):
+        except OSError as e:
+            self._failure_kind = classify_scan_error(e)
+            if self._failure_kind == SCAN_ERROR_NOT_FOUND:
+                self._logger.warning(f"Path does not exist: {path}")
+            elif self._failure_kind == SCAN_ERROR_NOT_A_DIRECTORY:
                 self._logger.warning(f"Path is not a directory: {path}")
+            elif self._failure_kind == SCAN_ERROR_PERMISSION:
+                self._logger.error(f"Permission denied accessing path: {path}")
+            else:
+                self._logger.error(f"Error scanning path {path}: {e}")
+        except Exception as e:
+            self._logger.error(f"Error scanning path {path}: {e}")
+
+        return folders
+
+    def _apply_folders(self, folders: Sequence[tuple[str, str]]) -> None:
+        """
+        Make the folder actions match folders.
+
+        Existing actions are kept in place; only removed entries are taken
+        out and new entries are inserted at their sorted position, so the
+        scroll position and highlighted item of an open menu survive.
+        Entries past the first screenful are appended in time-sliced
+        batches from the event loop.
+
+        Args:
+            folders: Sorted folder list
+        """
+        if self._pending_estimate is not None and self._pending_estimate[0] == self._current_path:
+            self._strategy_stats["compared"] += 1
+            self._strategy_stats["abs_error"] += abs(self._pending_estimate[1] - len(folders))
+            self._pending_estimate = None
+
+        new_paths = {folder_path for _, folder_path in folders}
+        removed = [p for p in self._folder_actions if p not in new_paths]
+        for folder_path in removed:
+            action = self._folder_actions.pop(folder_path)
+            self.removeAction(action)
+            self._recycle_action(folder_path, action)
+
+        if folders and self._placeholder_shown:
+            self.removeAction(self._placeholder_action)
+            self._placeholder_shown = False
+
+        # 既に表示済みの最後のエントリまでを差分挿入し、それ以降は末尾に追加する
+        last_shown = -1
+        for i in range(len(folders) - 1 if self._folder_actions else -1, -1, -1):
+            if folders[i][1] in self._folder_actions:
+                last_shown = i
+                break
+
+        added = 0
+        next_action: QAction | None = None
+        for folder_name, folder_path in reversed(folders[: last_shown + 1]):
+            action = self._folder_actions.get(folder_path)
+            if action is None:
+                action = self._register_action(folder_name, folder_path)
+                if next_action is None:
+                    self.addAction(action)
+                else:
+                    self.insertAction(next_action, action)
+                added += 1
+            next_action = action
+
+        # 最初の1画面分だけ即座に追加し、残りはタイマーで少しずつ追加する
+        tail = folders[last_shown + 1 :]
+        first_screen = len(folders) if self._strategy == STRATEGY_PLAIN else self._first_screen_items
+        immediate = max(0, first_screen - len(self._folder_actions))
+        for folder_name, folder_path in tail[:immediate]:
+            self._append_folder_action(folder_name, folder_path)
+        added += min(immediate, len(tail))
+        self._pending_folders = tail[immediate:]
+        self._pending_index = 0
+        if self._pending_folders:
+            self._populate_timer.start()
+        else:
+            self._populate_timer.stop()
+
+        if not folders:
+            # フォルダが見つからない場合
+            self._show_placeholder(NO_FOLDERS_TEXT)
+
+        if removed or added:
+            self._logger.debug(f"Popup patched: +{added} -{len(removed)} ({self._current_path})")
+
+    def _append_folder_action(self, folder_name: str, folder_path: str) -> None:
+        """Append a folder action at the end of the menu."""
+        self.addAction(self._register_action(folder_name, folder_path))
+
+    def _register_action(self, folder_name: str, folder_path: str) -> QAction:
+        """Get an action for a folder and track it (and probe it when cascading)."""
+        action = self._acquire_action(folder_name, folder_path)
+        self._folder_actions[folder_path] = action
+        if self._cascading:
+            self._request_probe(folder_path)
+        return action
+
+    def _show_failure(self, kind: str) -> None:
+        """Show why the current folder could not be listed."""
+        self._failure_kind = kind
+        self._show_placeholder(SCAN_ERROR_TEXTS.get(kind, NO_FOLDERS_TEXT))
+
+    def _show_placeholder(self, text: str) -> None:
+        """Show the disabled placeholder entry with the given text."""
+        self._placeholder_action.setText(text)
+        if not self._placeholder_shown:
+            self.addAction(self._placeholder_action)
+            self._placeholder_shown = True
+
+    def _reset_actions(self, path: str, pinned: bool = True) -> None:
+        """Clear the menu for a new path, adding the submenu header if needed."""
+        # 既存のアクションをクリア（フォルダ用のアクションはプールに戻す）
+        self.cancelSearch()
+        self._search_root = ""
+        self._populate_timer.stop()
+        self._pending_folders = []
+        self._release_actions()
+        self._failure_kind = None
+        self._probed_count = 0
+        self._path_node = intern_path(path)
+
+        if self._lazy_path:
+            # サブメニュー自身のフォルダも選べるようにする
+            self._open_action = QAction(_OPEN_FOLDER_TEXT, self)
+            self._open_action.setData(self._path_node)
+            self.addAction(self._open_action)
+            self.addSeparator()
+
+        if self._search_enabled and pinned:
+            self._search_action = QAction(_SEARCH_ACTION_TEXT, self)
+            self._search_action.setData(self._path_node)
+            self.addAction(self._search_action)
+            self.addSeparator()
+
+        if pinned:
+            self._add_pinned_actions(path)
+
+    def _add_pinned_actions(self, path: str) -> None:
+        """Add the most frecent existing, visible sub folders of path."""
+        if self._frecency is None or self._pinned_count <= 0:
+            return
+        cache = self._cache
+        folder_filter = cache.folder_filter
+        # 遅いマウントやスキャンプロセスを使う場合はUIスレッドでstatせず、一覧できなかったフォルダだけを除く
+        check = cache.scan_pool is None and not cache.latency_tracker.is_slow(path)
+        pinned = []
+        # 履歴は削除・除外されたフォルダを含みうるので、少し多めに取り出して絞り込む
+        for folder_path in self._frecency.top(path, self._pinned_count * 2):
+            name = os.path.basename(folder_path)
+            if not folder_filter.is_visible(name) or cache.failure(folder_path) is not None:
+                continue
+            if not check or os.path.isdir(folder_path):
+                pinned.append((name, folder_path))
+                if len(pinned) >= self._pinned_count:
+                    break
+        if not pinned:
+            return
+        self.addSection(_FRECENT_SECTION_TEXT)
+        for name, folder_path in pinned:
+            action = QAction(name, self)
+            action.setData(self._folder_node(folder_path))
+            self.addAction(action)
+            self._pinned_actions.append(action)
+        self.addSeparator()
+
+    def _display_order(
+        self, path: str, folders: Sequence[tuple[str, str]], request_metadata: bool = True
+    ) -> Sequence[tuple[str, str]]:
+        """Order folders by the popup's sort mode, requesting metadata if missing."""
+        mode = self._sort_mode
+        if mode is None or not isinstance(folders, FolderListing):
+            return folders
+        if mode in METADATA_SORT_MODES:
+            item_counts = mode == SORT_ITEM_COUNT
+            if not folders.has_metadata(item_counts):
+                # 収集が終わるまでは名前順で表示し、listingReadyで並べ直す
+                if request_metadata:
+                    self._prefetcher.prefetch_metadata(path, item_counts)
                 return folders
+        return folders.with_mode(mode)
 
-            # ディレクトリ内のアイテムを取得
-            items = os.listdir(path)
+    def _choose_strategy(self, path: str) -> None:
+        """Pick the population strategy for path from a cheap size estimate."""
+        self._pending_estimate = None
+        if self._cache.scan_pool is not None:
+            # 分離されたスキャンは期限までUIスレッドを止めうるため、常に裏で待つ
+            forced = "isolated"
+        elif self._cache.latency_tracker.is_slow(path):
+            forced = "slow_mount"
+        else:
+            forced = None
+        if forced is not None:
+            # 推定のstatも待たずに読み込み中を表示する
+            self._strategy = STRATEGY_ASYNC
+            self._strategy_stats[forced] += 1
+            self._strategy_stats[self._strategy] += 1
+            self._logger.debug(f"Popup strategy for {path}: {self._strategy} ({forced})")
+            return
 
-            for item in items:
-                item_path = os.path.join(path, item)
+        estimate = self._size_estimator(path)
+        if estimate is not None:
+            # スキャン結果と比べて推定精度を記録する
+            self._pending_estimate = (path, estimate)
+        else:
+            cached = self._cache.peek(path)
+            estimate = len(cached) if cached is not None else None
 
-                # ディレクトリのみを対象とする（隠しフォルダを除外）
-                if os.path.isdir(item_path) and not item.startswith("."):
-                    folders.append((item, item_path))
+        if estimate is None:
+            self._strategy_stats["unestimated"] += 1
+            self._strategy = STRATEGY_CHUNKED
+        else:
+            self._strategy_stats["estimated"] += 1
+            if estimate <= self._plain_max_items:
+                self._strategy = STRATEGY_PLAIN
+            elif estimate >= self._async_min_items:
+                self._strategy = STRATEGY_ASYNC
+            else:
+                self._strategy = STRATEGY_CHUNKED
+            # 同期的に追加する分のアクションを先に確保しておく
+            synchronous = estimate if self._strategy == STRATEGY_PLAIN else self._first_screen_items
+            self._reserve_actions(min(estimate, synchronous))
+        self._strategy_stats[self._strategy] += 1
+        self._logger.debug(f"Popup strategy for {path}: {self._strategy} (estimate: {estimate})")
 
-            # 名前順にソート
-            folders.sort(key=lambda x: x[0].lower())
+    def _start_async_population(self, path: str) -> None:
+        """Show the cached listing or the loading entry, and validate or scan path in the background."""
+        self._reset_actions(path)
+        # 古い可能性がある一覧でも先に表示し、mtimeの確認はワーカーで行う（listingReadyで差し替える）
+        folders = self._cache.peek(path)
+        if folders is None:
+            self._show_placeholder(LOADING_TEXT)
+        else:
+            self._apply_folders(self._display_order(path, folders, request_metadata=False))
+        self._prefetcher.prefetch(path, priority=0)
 
-            self._logger.debug(f"Found {len(folders)} folders in {path}")
+    def revalidate(self) -> None:
+        """
+        Check the shown listing against the directory in the background.
 
-        except PermissionError:
-            self._logger.error(f"Permission denied accessing path: {path}")
-        except Exception as e:
-            self._logger.error(f"Error scanning path {path}: {e}")
+        The mtime is compared on the worker thread; a changed directory is
+        rescanned and the differences are patched into the menu.
+        """
+        if self._current_path and not self._search_root:
+            self._prefetcher.prefetch(self._current_path, priority=0)
 
-        return folders
+    def _reserve_actions(self, count: int) -> None:
+        """Grow the action pool so count folder actions need no allocation."""
+        count = min(count, MAX_POOLED_ACTIONS)
+        missing = count - len(self._action_pool) - len(self._folder_actions)
+        for _ in range(missing):
+            self._action_pool.append(QAction(self))
+
+    def _request_probe(self, folder_path: str) -> None:
+        """Probe a folder for sub folders, within the per-popup budget."""
+        if self._prober is None or self._probed_count >= MAX_CASCADE_PROBES:
+            return
+        self._probed_count += 1
+        if self._prober.probe(folder_path):
+            self._attach_submenu(folder_path)
+
+    def _on_probed(self, folder_path: str, has_children: bool) -> None:
+        """
+        Attach a submenu once a probe finds sub folders.
+
+        Args:
+            folder_path: Probed folder
+            has_children: Whether the folder has visible sub folders
+        """
+        if has_children and self._cascading:
+            self._attach_submenu(folder_path)
+
+    def _attach_submenu(self, folder_path: str) -> None:
+        """Attach a lazily populated submenu to a folder action."""
+        action = self._folder_actions.get(folder_path)
+        if action is None or folder_path in self._submenus:
+            return
+        submenu = FolderSelectionPopup(self, cache=self._cache, prefetcher=self._prefetcher)
+        submenu.setCascading(True, self._prober)
+        submenu.setFrecencyStore(self._frecency, self._pinned_count)
+        submenu.setSearchEnabled(self._search_enabled)
+        submenu._lazy_path = folder_path
+        submenu.folderSelected.connect(self.folderSelected)
+        submenu.searchRequested.connect(self.searchRequested)
+        action.setMenu(submenu)
+        self._submenus[folder_path] = submenu
+
+    def _on_about_to_show(self) -> None:
+        """Fill a lazy submenu right before it is shown."""
+        if self._lazy_path and self._current_path != self._lazy_path:
+            self.populateForPathAsync(self._lazy_path)
+
+    def _populate_next_slice(self) -> None:
+        """Append pending folder actions until the per-slice time budget is spent."""
+        deadline = time.perf_counter() + self._slice_budget_ms / 1000.0
+        pending = self._pending_folders
+        index = self._pending_index
+        while index < len(pending):
+            for folder_name, folder_path in pending[index : index + _SLICE_CHECK_INTERVAL]:
+                self._append_folder_action(folder_name, folder_path)
+            index += _SLICE_CHECK_INTERVAL
+            if time.perf_counter() >= deadline:
+                break
+
+        self._pending_index = index
+        if index >= len(pending):
+            self._populate_timer.stop()
+            self._pending_folders = []
+            self._pending_index = 0
+
+    def _acquire_action(self, folder_name: str, folder_path: str) -> QAction:
+        """Get a folder action, re-labelling a pooled one when available."""
+        if self._action_pool:
+            action = self._action_pool.pop()
+            action.setText(folder_name)
+        else:
+            action = QAction(folder_name, self)
+        action.setData(self._folder_node(folder_path))
+        return action
+
+    def _folder_node(self, folder_path: str) -> PathNode | None:
+        """Get the interned node of a folder, as a child of the shown folder's node when it is one."""
+        head, name = os.path.split(folder_path)
+        if self._path_node is not None and name and head == self._current_path:
+            return self._path_node.child(name)
+        return intern_path(folder_path)
+
+    def _recycle_action(self, folder_path: str, action: QAction) -> None:
+        """Return a folder action that was removed from the menu to the pool."""
+        submenu = self._submenus.pop(folder_path, None)
+        if submenu is not None:
+            # サブメニュー付きのアクションは再利用せず、サブメニューごと破棄する
+            submenu.deleteLater()
+            action.deleteLater()
+            return
+        if len(self._action_pool) < MAX_POOLED_ACTIONS:
+            self._action_pool.append(action)
+        else:
+            action.deleteLater()
+
+    def _release_actions(self) -> None:
+        """Remove every action from the menu, pooling the folder actions."""
+        for folder_path, action in self._folder_actions.items():
+            self.removeAction(action)
+            self._recycle_action(folder_path, action)
+        self._folder_actions.clear()
+        if self._placeholder_shown:
+            self.removeAction(self._placeholder_action)
+            self._placeholder_shown = False
+        # プール対象外のアクション（セパレーター等）は従来通り破棄する
+        self.clear()
+        self._open_action = None
+        self._search_action = None
+        self._pinned_actions = []
+
+    def _on_action_triggered(self, action: QAction) -> None:
+        """
+        Dispatch a triggered action to folder selection.
+
+        Args:
+            action: Triggered action; folder actions carry their interned path node as data
+        """
+        node = action.data()
+        if not isinstance(node, PathNode):
+            return
+        folder_path = node.path()
+        if action is self._search_action:
+            self.searchRequested.emit(folder_path)
+            return
+        # サブメニューのアクションは親メニューにも伝播するため、自分のものだけ扱う
+        if (
+            action is self._open_action
+            or action in self._pinned_actions
+            or self._folder_actions.get(folder_path) is action
+        ):
+            self._on_folder_selected(folder_path)
+
+    def _on_listing_ready(self, path: str) -> None:
+        """
+        Patch a fresh background scan into the menu.
+
+        Args:
+            path: Directory whose listing was refreshed
+        """
+        if path != self._current_path or self._search_root:
+            return
+        folders = self._cache.peek(path)
+        if folders is None:
+            return
+        if self._cache.needs_revalidation(path):
+            # ディスク上のスナップショットは表示したまま再スキャンする
+            self._prefetcher.refresh(path)
+        if self._sort_mode in METADATA_SORT_MODES:
+            # メタデータ順は既存エントリの位置も変わり得るため作り直す
+            self._reset_actions(path)
+        self._apply_folders(self._display_order(path, folders))
+
+    def _on_prefetch_finished(self, path: str, ok: bool, seconds: float) -> None:
+        """
+        Show why an asynchronous scan or revalidation failed.
+
+        The reason replaces the loading entry, or a cached listing that
+        turned out to be unlistable (e.g. a mount that stopped answering).
+
+        Args:
+            path: Scanned directory
+            ok: Whether the scan succeeded
+            seconds: Scan duration
+        """
+        if ok or path != self._current_path or self._search_root:
+            return
+        failure = self._cache.failure(path)
+        if failure is not None:
+            if self._failure_kind != failure.kind:
+                self._reset_actions(path)
+                self._show_failure(failure.kind)
+        elif self._placeholder_shown and self._placeholder_action.text() == LOADING_TEXT:
+            self._show_placeholder(NO_FOLDERS_TEXT)
+
+    def _on_search_results(self, search_id: int, batch: list[tuple[str, str]]) -> None:
+        """
+        Append a batch of search matches.
+
+        Args:
+            search_id: Search the matches belong to (stale searches are ignored)
+            batch: List of (path relative to the search root, path)
+        """
+        if search_id != self._search_id or not self._search_root:
+            return
+        batch = batch[: MAX_SEARCH_RESULTS - self._search_results]
+        if not batch:
+            return
+        if self._placeholder_shown:
+            self.removeAction(self._placeholder_action)
+            self._placeholder_shown = False
+        self._search_results += len(batch)
+        # 表示済みの分に続けて、時間分割で少しずつ追加する（検索中の追加待ちはリスト）
+        pending = self._pending_folders
+        if not isinstance(pending, list):
+            pending = list(pending)
+            self._pending_folders = pending
+        pending.extend(batch)
+        if not self._populate_timer.isActive():
+            self._populate_timer.start()
+        if self._search_results >= MAX_SEARCH_RESULTS:
+            self._logger.debug(f"Search below {self._search_root} stopped at {MAX_SEARCH_RESULTS} matches")
+            self.cancelSearch()
+
+    def _on_search_finished(self, search_id: int, completed: bool, visited: int) -> None:
+        """
+        Show the empty result entry when a search found nothing.
+
+        Args:
+            search_id: Finished search
+            completed: Whether the whole subtree was walked
+            visited: Number of folders walked
+        """
+        if search_id != self._search_id or not self._search_root:
+            return
+        self._logger.debug(
+            f"Search below {self._search_root} finished: {self._search_results} matches in {visited} folders"
+        )
+        if self._search_results == 0 and completed:
+            self._show_placeholder(_NO_MATCHES_TEXT)
 
     def _on_folder_selected(self, folder_path: str) -> None:
         """
@@ -159,3 +1054,138 @@ class FolderSelectionPopup(QMenu):
         """
         self._logger.info(f"Folder selected: {folder_path}")
         self.folderSelected.emit(folder_path)
+
+
+class PopupMenuCache:
+    """
+    LRU cache of fully built folder popups keyed by directory.
+
+    A cached popup is shown again at once and checked against the
+    directory mtime in the background (see FolderSelectionPopup.revalidate()),
+    so acquiring a popup never stats the directory on the UI thread; a
+    changed directory is patched into the open menu. The number of live
+    popups is strictly capped: when the cap is reached, the least recently
+    used popup is repopulated for the new directory instead of creating
+    another one.
+    """
+
+    def __init__(self, factory: Callable[[], FolderSelectionPopup], max_menus: int = 4):
+        """
+        Initialize the popup cache.
+
+        Args:
+            factory: Callable creating a new, connected popup
+            max_menus: Maximum number of live popups
+        """
+        self._logger = get_logger("breadcrumb_addressbar.popup")
+        self._factory = factory
+        self._max_menus = max(1, max_menus)
+        # パスごとの（無効化されていないか、ポップアップ）
+        self._menus: OrderedDict[str, tuple[bool, FolderSelectionPopup]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def acquire(self, path: str) -> FolderSelectionPopup:
+        """
+        Get a popup populated for path.
+
+        Args:
+            path: Directory to show
+
+        Returns:
+            Ready-to-show popup
+        """
+        entry = self._menus.get(path)
+        if entry is not None:
+            self._menus.move_to_end(path)
+            current, menu = entry
+            if menu.failureKind() is not None:
+                # 一覧できなかった理由を表示中のポップアップは、失敗を覚えている間そのまま使う
+                current = current and menu.listingCache().failure(path) is not None
+            elif current:
+                # 一覧が変わっていないかはワーカーでmtimeを比べ、変わっていれば表示中に差し替える
+                menu.revalidate()
+            if current:
+                self._hits += 1
+                return menu
+        elif len(self._menus) >= self._max_menus:
+            # 上限に達したら最も古いポップアップを別のパス用に作り直す
+            _, (_, menu) = self._menus.popitem(last=False)
+        else:
+            menu = self._factory()
+
+        self._misses += 1
+        menu.populateForPath(path)
+        self._menus[path] = (True, menu)
+        request_memory_check()
+        return menu
+
+    def clear(self) -> None:
+        """Delete every cached popup."""
+        while self._menus:
+            _, (_, menu) = self._menus.popitem(last=False)
+            menu.deleteLater()
+
+    def set_max_menus(self, count: int) -> None:
+        """
+        Set the maximum number of live popups, deleting surplus ones.
+
+        Args:
+            count: Maximum number of live popups
+        """
+        self._max_menus = max(1, count)
+        while len(self._menus) > self._max_menus:
+            _, (_, menu) = self._menus.popitem(last=False)
+            menu.deleteLater()
+
+    def memory_usage(self) -> int:
+        """
+        Get the estimated number of bytes held by the cached popups.
+
+        Returns:
+            Estimated size in bytes
+        """
+        return sum(_MENU_BYTES + _ACTION_BYTES * menu.folderCount() for _, menu in self._menus.values())
+
+    def evict(self, nbytes: int) -> int:
+        """
+        Delete least recently used popups that are not shown (see MemoryBudget).
+
+        Args:
+            nbytes: Bytes to free
+
+        Returns:
+            Estimated bytes freed
+        """
+        freed = 0
+        for path in list(self._menus):
+            if freed >= nbytes:
+                break
+            menu = self._menus[path][1]
+            if menu.isVisible():
+                continue
+            del self._menus[path]
+            freed += _MENU_BYTES + _ACTION_BYTES * menu.folderCount()
+            menu.deleteLater()
+        return freed
+
+    def invalidate(self, path: str | None = None) -> None:
+        """
+        Force popups to be repopulated on their next use.
+
+        Args:
+            path: Directory to invalidate, or None for all
+        """
+        for key in [path] if path is not None else list(self._menus):
+            entry = self._menus.get(key)
+            if entry is not None:
+                self._menus[key] = (False, entry[1])
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with live menu count, hits and misses
+        """
+        return {"menus": len(self._menus), "hits": self._hits, "misses": self._misses}
@@ -0,0 +1,229 @@
+"""
+Navigation Predictor
+
+First-order Markov model over directory transitions, used to decide
+which folders to prefetch speculatively.
+"""
+
+import heapq
+import json
+import os
+from collections import OrderedDict
+
+from .logger_setup import get_logger
+from .pathnode import PathNode, intern_path
+
+_FORMAT_VERSION = 1
+# 推定バイト数（遷移元1件と遷移先1件あたり、ノード自体は共有されるため含めない）
+_STATE_BYTES = 400
+_TRANSITION_BYTES = 100
+
+
+class NavigationPredictor:
+    """
+    Bounded-memory first-order Markov model of folder navigation.
+
+    Memory is bounded by keeping at most ``max_states`` source directories
+    (least recently used ones are dropped) and at most ``max_transitions``
+    destinations per source (the least frequent one is dropped).
+    Directories are kept as interned path nodes, so a folder that is the
+    destination of many sources is stored once.
+    """
+
+    def __init__(self, max_states: int = 512, max_transitions: int = 8):
+        """
+        Initialize the predictor.
+
+        Args:
+            max_states: Maximum number of source directories remembered
+            max_transitions: Maximum number of destinations per source
+        """
+        self._logger = get_logger("breadcrumb_addressbar.predictor")
+        self._max_states = max(1, max_states)
+        self._max_transitions = max(1, max_transitions)
+        self._transitions: OrderedDict[PathNode, dict[PathNode, int]] = OrderedDict()
+
+        # 予測の的中率計測用
+        self._pending_prediction: tuple[PathNode, list[PathNode]] | None = None
+        self._predictions = 0
+        self._hits = 0
+        self._recorded = 0
+
+    def record(self, source: str, target: str) -> None:
+        """
+        Record a navigation from source to target.
+
+        Args:
+            source: Directory navigated from
+            target: Directory navigated to
+        """
+        if not source or not target:
+            return
+        # 同じパスは同じノードになるので、遷移先を何度記録しても文字列は増えない
+        source_node, target_node = intern_path(source), intern_path(target)
+        if source_node is None or target_node is None or source_node is target_node:
+            return
+
+        # 直前の予測が当たったかを判定
+        if self._pending_prediction is not None and self._pending_prediction[0] is source_node:
+            if target_node in self._pending_prediction[1]:
+                self._hits += 1
+            self._pending_prediction = None
+
+        counts = self._transitions.get(source_node)
+        if counts is None:
+            counts = {}
+            self._transitions[source_node] = counts
+            while len(self._transitions) > self._max_states:
+                self._transitions.popitem(last=False)
+        else:
+            self._transitions.move_to_end(source_node)
+
+        if target_node not in counts and len(counts) >= self._max_transitions:
+            # 最も出現回数の少ない遷移先を捨てる
+            del counts[min(counts, key=counts.__getitem__)]
+        counts[target_node] = counts.get(target_node, 0) + 1
+        self._recorded += 1
+
+    def predict(self, path: str, k: int = 3) -> list[str]:
+        """
+        Predict the most likely next directories.
+
+        Calling this arms hit-rate tracking: the next record() from path
+        counts as a hit if its target is among the returned directories.
+
+        Args:
+            path: Current directory
+            k: Maximum number of predictions
+
+        Returns:
+            Up to k directories, most likely first
+        """
+        node = intern_path(path)
+        if node is None or k <= 0:
+            return []
+        counts = self._transitions.get(node)
+        if not counts:
+            return []
+
+        predicted = [target for target, _ in heapq.nlargest(k, counts.items(), key=lambda item: item[1])]
+        self._pending_prediction = (node, predicted)
+        self._predictions += 1
+        return [target.path() for target in predicted]
+
+    def memory_usage(self) -> int:
+        """
+        Get the estimated number of bytes held by the model.
+
+        Returns:
+            Estimated size in bytes
+        """
+        transitions = sum(len(counts) for counts in self._transitions.values())
+        return len(self._transitions) * _STATE_BYTES + transitions * _TRANSITION_BYTES
+
+    def evict(self, nbytes: int) -> int:
+        """
+        Forget the least recently used source directories (see MemoryBudget).
+
+        Args:
+            nbytes: Bytes to free
+
+        Returns:
+            Estimated bytes freed
+        """
+        freed = 0
+        while self._transitions and freed < nbytes:
+            _, counts = self._transitions.popitem(last=False)
+            freed += _STATE_BYTES + len(counts) * _TRANSITION_BYTES
+        return freed
+
+    def stats(self) -> dict[str, float]:
+        """
+        Get prediction statistics.
+
+        Returns:
+            Dictionary with the number of states, recorded transitions,
+            predictions made, hits and hit rate
+        """
+        return {
+            "states": len(self._transitions),
+            "transitions": self._recorded,
+            "predictions": self._predictions,
+            "hits": self._hits,
+            "hit_rate": self._hits / self._predictions if self._predictions else 0.0,
+        }
+
+    def clear(self) -> None:
+        """Forget all learned transitions and statistics."""
+        self._transitions.clear()
+        self._pending_prediction = None
+        self._predictions = 0
+        self._hits = 0
+        self._recorded = 0
+
+    def save(self, file_path: str) -> bool:
+        """
+        Persist the learned transitions to a JSON file.
+
+        Args:
+            file_path: Destination file
+
+        Returns:
+            True if the file was written
+        """
+        transitions = {
+            source.path(): {target.path(): count for target, count in counts.items()}
+            for source, counts in self._transitions.items()
+        }
+        data = {"version": _FORMAT_VERSION, "transitions": transitions}
+        tmp_path = f"{file_path}.tmp"
+        try:
+            directory = os.path.dirname(file_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, file_path)
+            return True
+        except OSError as e:
+            self._logger.error(f"Failed to save navigation model to {file_path}: {e}")
+            return False
+
+    def load(self, file_path: str) -> bool:
+        """
+        Load transitions saved by save(), replacing the current model.
+
+        Args:
+            file_path: Source file
+
+        Returns:
+            True if the file was loaded
+        """
+        try:
+            with open(file_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            self._logger.warning(f"Failed to load navigation model from {file_path}: {e}")
+            return False
+
+        transitions = data.get("transitions", {}) if isinstance(data, dict) else None
+        if not isinstance(transitions, dict) or data.get("version") != _FORMAT_VERSION:
+            self._logger.warning(f"Unsupported navigation model format: {file_path}")
+            return False
+
+        self.clear()
+        for source, counts in transitions.items():
+            source_node = intern_path(source)
+            if not isinstance(counts, dict) or source_node is None:
+                continue
+            # 回数が整数でない遷移先（手で編集されたファイル等）は読み飛ばす
+            valid = [(target, count) for target, count in counts.items() if isinstance(count, int)]
+            top = heapq.nlargest(self._max_transitions, valid, key=lambda item: item[1])
+            self._transitions[source_node] = {
+                node: count for node, count in ((intern_path(t), c) for t, c in top) if node is not None
+            }
+            while len(self._transitions) > self._max_states:
+                self._transitions.popitem(last=False)
+        return True
@@ -0,0 +1,510 @@
+"""
+Isolated Scan Processes
+
+A small pool of helper processes running the stat, listing, sub folder
+probe and metadata calls of folder scans with a deadline per request. A call stuck on a dead network
+mount (an NFS hard mount puts the calling thread into uninterruptible
+sleep) only blocks its helper: the caller gets TimeoutError once the
+deadline passes, and the helper is abandoned and replaced, instead of a
+thread pool worker leaking forever.
+"""
+
+import contextlib
+import errno
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from collections.abc import Callable
+from multiprocessing.process import BaseProcess
+from typing import Any, Protocol, cast
+
+from .filters import DEFAULT_FILTER, FolderFilter
+from .logger_setup import get_logger
+from .sorting import FolderMetadata
+
+# Pipe()の両端の型（WindowsではPipeConnection）
+if sys.platform == "win32":
+    from multiprocessing.connection import PipeConnection as _Connection
+else:
+    from multiprocessing.connection import Connection as _Connection
+
+# 1回の要求の既定の期限（秒）
+SCAN_TIMEOUT_SECONDS = 5.0
+# 既定のヘルパープロセス数
+SCAN_PROCESSES = 2
+# ヘルパーの起動を待つ秒数（インタプリタの起動は要求の期限に含めない）
+_START_SECONDS = 30.0
+# 終了を頼んだヘルパーを待つ秒数（過ぎたら強制終了する）
+_SHUTDOWN_SECONDS = 1.0
+
+# ヘルパーで実行できる操作
+_OPERATIONS = frozenset({"stat", "list_folders", "has_subdirectory", "folder_metadata"})
+
+
+def list_folder_names(path: str, folder_filter: FolderFilter = DEFAULT_FILTER) -> list[str]:
+    """
+    List the names of the visible sub folders of a directory, unsorted.
+
+    Args:
+        path: Directory to list
+        folder_filter: Name rules deciding which folders are visible
+
+    Returns:
+        Folder names in directory order
+
+    Raises:
+        OSError: If the directory cannot be listed
+    """
+    names: list[str] = []
+    is_visible = folder_filter.is_visible
+
+    for item in os.listdir(path):
+        # 名前だけで判定できる除外ルールはstatより前に適用する
+        if not is_visible(item):
+            continue
+
+        # ディレクトリのみを対象とする
+        if os.path.isdir(os.path.join(path, item)):
+            names.append(item)
+    return names
+
+
+def has_subdirectory(path: str, folder_filter: FolderFilter = DEFAULT_FILTER) -> bool:
+    """
+    Check whether a directory has at least one visible sub folder.
+
+    Stops at the first folder found, so it is cheap even for large
+    directories.
+
+    Args:
+        path: Directory to probe
+        folder_filter: Name rules deciding which folders are visible
+
+    Returns:
+        True if a visible sub folder exists; False otherwise or on error
+    """
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if folder_filter.is_visible(entry.name) and entry.is_dir():
+                    return True
+    except OSError:
+        pass
+    return False
+
+
+def folder_metadata(
+    path: str, item_count: bool = True, stat_function: Callable[[str], os.stat_result] = os.stat
+) -> FolderMetadata | None:
+    """
+    Read the modification time and item count of a single folder.
+
+    Args:
+        path: Folder path
+        item_count: Whether to count the entries inside the folder
+        stat_function: Function performing the stat
+
+    Returns:
+        Metadata (item_count is -1 if not counted or the folder cannot be
+        listed), or None if the folder cannot be stat'ed
+    """
+    try:
+        mtime_ns = stat_function(path).st_mtime_ns
+    except OSError:
+        return None
+    count = -1
+    if item_count:
+        try:
+            with os.scandir(path) as children:
+                count = sum(1 for _ in children)
+        except OSError:
+            pass
+    return FolderMetadata(mtime_ns, count)
+
+
+class FileSystemProvider:
+    """
+    File system calls executed inside the helper processes.
+
+    The provider is pickled into every helper, so subclasses (e.g. a
+    stand-in that blocks like a dead mount) must be defined at module
+    level.
+    """
+
+    def stat(self, path: str) -> os.stat_result:
+        """Stat a directory."""
+        return os.stat(path)
+
+    def list_folders(self, path: str, folder_filter: FolderFilter) -> list[str]:
+        """List the visible sub folders of a directory (see list_folder_names())."""
+        return list_folder_names(path, folder_filter)
+
+    def has_subdirectory(self, path: str, folder_filter: FolderFilter) -> bool:
+        """Check whether a directory has a visible sub folder (see has_subdirectory())."""
+        return has_subdirectory(path, folder_filter)
+
+    def folder_metadata(self, paths: list[str], item_counts: bool) -> list[FolderMetadata | None]:
+        """Read the metadata of folders (see folder_metadata())."""
+        return [folder_metadata(path, item_counts, self.stat) for path in paths]
+
+
+def _serve(conn: _Connection[Any, Any], provider: FileSystemProvider) -> None:
+    """Main loop of a helper process: answer (operation, args) requests until None."""
+    # Ctrl+Cは親プロセスが処理する
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # 起動が済んだことを知らせる
+    conn.send(True)
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        op, args = request
+        try:
+            if op not in _OPERATIONS:
+                raise OSError(errno.EINVAL, f"Unknown scan operation: {op}")
+            response = (True, getattr(provider, op)(*args))
+        except OSError as e:
+            response = (False, e)
+        except Exception as e:
+            response = (False, OSError(f"{type(e).__name__}: {e}"))
+        conn.send(response)
+
+
+def _timeout_error(path: str) -> TimeoutError:
+    """Build the error of a request that missed its deadline."""
+    # errnoを付けておくと、負のキャッシュから作り直した例外もTimeoutErrorになる
+    return TimeoutError(errno.ETIMEDOUT, "Scan timed out", path)
+
+
+def _busy_error(path: str) -> BlockingIOError:
+    """Build the error of a request that found no free helper before its deadline."""
+    # 空きを待っただけでフォルダは応答しないとは限らないので、タイムアウトとは区別する
+    return BlockingIOError(errno.EAGAIN, "Scan process pool is busy", path)
+
+
+class _ProcessContext(Protocol):
+    """The parts of a multiprocessing context used by the pool (BaseContext declares no Process)."""
+
+    Process: type[BaseProcess]
+
+    def Pipe(self, duplex: bool = True) -> tuple[_Connection[Any, Any], _Connection[Any, Any]]: ...  # noqa: N802
+
+
+class _Helper:
+    """A helper process and the parent's end of its pipe."""
+
+    __slots__ = ("conn", "process")
+
+    def __init__(self, process: BaseProcess, conn: _Connection[Any, Any]):
+        self.process = process
+        self.conn = conn
+
+
+class ScanProcessPool:
+    """
+    Thread-safe pool of helper processes with per-request deadlines.
+
+    Helpers are started on demand up to the process limit, and each
+    serves one request at a time. A request that is not answered within
+    its timeout raises TimeoutError (errno ETIMEDOUT, so a listing cache
+    remembers it as a timeout); its helper is killed and left behind,
+    and a new one is started for the next request. Waiting for a free
+    helper is bounded by the same timeout, and raises BlockingIOError
+    (errno EAGAIN, which a listing cache does not remember) when every
+    helper stays busy; starting one is not bounded.
+
+    Helpers are started with the "spawn" method by default, so they do
+    not inherit the Qt state of the application; as with any spawned
+    multiprocessing child, the application's main module must be
+    importable without side effects (an ``if __name__ == "__main__"``
+    guard).
+    """
+
+    def __init__(
+        self,
+        processes: int = SCAN_PROCESSES,
+        timeout: float = SCAN_TIMEOUT_SECONDS,
+        provider: FileSystemProvider | None = None,
+        start_method: str = "spawn",
+    ):
+        """
+        Initialize the pool; no process is started until the first request.
+
+        Args:
+            processes: Maximum number of live helper processes
+            timeout: Default deadline of a request in seconds
+            provider: File system calls run in the helpers (defaults to
+                      the real file system)
+            start_method: multiprocessing start method of the helpers
+        """
+        self._logger = get_logger("breadcrumb_addressbar.scanpool")
+        # 開始方式ごとの具象コンテキストはどれもProcessを持つ
+        self._context = cast(_ProcessContext, multiprocessing.get_context(start_method))
+        self._processes = max(1, processes)
+        self._timeout = max(0.0, timeout)
+        self._provider = provider or FileSystemProvider()
+        self._cond = threading.Condition()
+        self._idle: list[_Helper] = []
+        # 起動中・実行中を含む生きているヘルパーの数
+        self._live = 0
+        # 期限切れで見捨てたヘルパー（終了するまで回収を試みる）
+        self._abandoned: list[BaseProcess] = []
+        self._closed = False
+        self._requests = 0
+        self._timeouts = 0
+        self._rejected = 0
+        self._replaced = 0
+
+    @property
+    def timeout(self) -> float:
+        """Get the default deadline of a request in seconds."""
+        return self._timeout
+
+    def set_timeout(self, seconds: float) -> None:
+        """
+        Set the default deadline of a request.
+
+        Args:
+            seconds: Deadline in seconds
+        """
+        self._timeout = max(0.0, seconds)
+
+    def stat(self, path: str, timeout: float | None = None) -> os.stat_result:
+        """
+        Stat a directory in a helper process.
+
+        Args:
+            path: Directory path
+            timeout: Deadline in seconds (defaults to the pool's timeout)
+
+        Returns:
+            Stat result
+
+        Raises:
+            TimeoutError: If no answer arrived within the deadline
+            BlockingIOError: If no helper became free within the deadline
+            OSError: If the stat fails
+        """
+        return self._call("stat", (path,), path, timeout)
+
+    def list_folders(
+        self, path: str, folder_filter: FolderFilter = DEFAULT_FILTER, timeout: float | None = None
+    ) -> list[str]:
+        """
+        List the visible sub folders of a directory in a helper process.
+
+        Args:
+            path: Directory path
+            folder_filter: Name rules deciding which folders are visible
+            timeout: Deadline in seconds (defaults to the pool's timeout)
+
+        Returns:
+            Folder names in directory order
+
+        Raises:
+            TimeoutError: If no answer arrived within the deadline
+            BlockingIOError: If no helper became free within the deadline
+            OSError: If the directory cannot be listed
+        """
+        return self._call("list_folders", (path, folder_filter), path, timeout)
+
+    def has_subdirectory(
+        self, path: str, folder_filter: FolderFilter = DEFAULT_FILTER, timeout: float | None = None
+    ) -> bool:
+        """
+        Check in a helper process whether a directory has a visible sub folder.
+
+        Args:
+            path: Directory path
+            folder_filter: Name rules deciding which folders are visible
+            timeout: Deadline in seconds (defaults to the pool's timeout)
+
+        Returns:
+            True if a visible sub folder exists; False otherwise or if the
+            directory cannot be listed
+
+        Raises:
+            TimeoutError: If no answer arrived within the deadline
+            BlockingIOError: If no helper became free within the deadline
+        """
+        return self._call("has_subdirectory", (path, folder_filter), path, timeout)
+
+    def folder_metadata(
+        self, paths: list[str], item_counts: bool = True, timeout: float | None = None
+    ) -> list[FolderMetadata | None]:
+        """
+        Read the modification times and item counts of folders in a helper process.
+
+        The folders are read in one request, so the deadline covers them
+        all.
+
+        Args:
+            paths: Folder paths
+            item_counts: Whether to count the entries inside each folder
+            timeout: Deadline in seconds (defaults to the pool's timeout)
+
+        Returns:
+            Metadata in the order of paths (None for folders that cannot
+            be stat'ed)
+
+        Raises:
+            TimeoutError: If no answer arrived within the deadline
+            BlockingIOError: If no helper became free within the deadline
+        """
+        return self._call("folder_metadata", (paths, item_counts), paths[0] if paths else "", timeout)
+
+    def close(self) -> None:
+        """Stop the helper processes; requests still running are answered first."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._live -= len(idle)
+            self._cond.notify_all()
+        for helper in idle:
+            self._shutdown(helper)
+        self._reap()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get pool statistics.
+
+        Returns:
+            Dictionary with the live and busy helpers, the requests served,
+            the requests that timed out, the requests rejected because no
+            helper became free, the helpers replaced after a timeout or
+            crash and those of them still not exited
+        """
+        self._reap()
+        with self._cond:
+            return {
+                "processes": self._live,
+                "busy": self._live - len(self._idle),
+                "requests": self._requests,
+                "timeouts": self._timeouts,
+                "rejected": self._rejected,
+                "replaced": self._replaced,
+                "hung": len(self._abandoned),
+            }
+
+    def _call(self, op: str, args: tuple[Any, ...], path: str, timeout: float | None) -> Any:
+        """Run an operation in a free helper and wait for its answer until the deadline."""
+        timeout = self._timeout if timeout is None else max(0.0, timeout)
+        with self._cond:
+            self._requests += 1
+        helper = self._acquire(time.monotonic() + timeout, path)
+        ok, value = False, None
+        try:
+            helper.conn.send((op, args))
+            answered = helper.conn.poll(timeout)
+            if answered:
+                ok, value = helper.conn.recv()
+        except (EOFError, OSError) as e:
+            self._abandon(helper)
+            raise OSError(errno.EIO, f"Scan helper process failed: {e}", path) from e
+        except BaseException:
+            self._abandon(helper)
+            raise
+        if not answered:
+            self._abandon(helper, timed_out=True)
+            self._logger.warning(f"Scan of {path} timed out after {timeout:.1f}s; helper process replaced")
+            raise _timeout_error(path)
+        self._release(helper)
+        if ok:
+            return value
+        if not isinstance(value, BaseException):
+            raise OSError(errno.EIO, f"Scan helper process sent an invalid answer: {value!r}", path)
+        raise value
+
+    def _acquire(self, deadline: float, path: str) -> _Helper:
+        """Take an idle helper, start one below the limit, or wait for one until the deadline."""
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise OSError(errno.ESHUTDOWN, "Scan process pool is closed", path)
+                if self._idle:
+                    return self._idle.pop()
+                if self._live < self._processes:
+                    self._live += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._rejected += 1
+                    raise _busy_error(path)
+                self._cond.wait(remaining)
+        try:
+            return self._spawn()
+        except BaseException:
+            with self._cond:
+                self._live -= 1
+                self._cond.notify()
+            raise
+
+    def _spawn(self) -> _Helper:
+        """Start a helper process."""
+        conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_serve, args=(child_conn, self._provider), name="breadcrumb-scan", daemon=True
+        )
+        try:
+            process.start()
+        finally:
+            child_conn.close()
+        helper = _Helper(process, conn)
+        try:
+            if conn.poll(_START_SECONDS) and conn.recv():
+                return helper
+        except EOFError, OSError:
+            pass
+        conn.close()
+        process.kill()
+        with self._cond:
+            self._abandoned.append(process)
+        raise OSError(errno.ECHILD, "Scan helper process did not start")
+
+    def _release(self, helper: _Helper) -> None:
+        """Return a helper that answered to the pool."""
+        with self._cond:
+            if not self._closed:
+                self._idle.append(helper)
+                self._cond.notify()
+                return
+            self._live -= 1
+        self._shutdown(helper)
+
+    def _abandon(self, helper: _Helper, timed_out: bool = False) -> None:
+        """Kill a hung or broken helper and free its slot for a replacement."""
+        helper.conn.close()
+        # 中断できない待ちの間はSIGKILLも届かないため、終了は待たずに後で回収する
+        helper.process.kill()
+        with self._cond:
+            self._live -= 1
+            self._replaced += 1
+            if timed_out:
+                self._timeouts += 1
+            self._abandoned.append(helper.process)
+            self._cond.notify()
+        self._reap()
+
+    def _shutdown(self, helper: _Helper) -> None:
+        """Ask an idle helper to exit and wait for it briefly."""
+        # 既に終了したヘルパーへの送信は失敗してよい
+        with contextlib.suppress(OSError):
+            helper.conn.send(None)
+        helper.conn.close()
+        helper.process.join(_SHUTDOWN_SECONDS)
+        if helper.process.is_alive():
+            helper.process.kill()
+            with self._cond:
+                self._abandoned.append(helper.process)
+
+    def _reap(self) -> None:
+        """Collect abandoned helpers that have exited."""
+        with self._cond:
+            # is_alive()は終了したプロセスを回収する
+            self._abandoned = [process for process in self._abandoned if process.is_alive()]
@@ -0,0 +1,257 @@
+"""
+Subtree Search
+
+Cancellable parallel walk below a folder that streams the folders whose
+name matches a query, in batches, as they are found.
+"""
+
+import fnmatch
+import os
+import re
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+
+from PySide6.QtCore import QObject, QRunnable, QThread, QThreadPool, Signal
+
+from .filters import DEFAULT_FILTER, REGEX_PREFIX, FolderFilter
+from .logger_setup import get_logger
+
+# 結果をまとめて送る件数と間隔（ミリ秒）
+RESULT_BATCH_SIZE = 256
+RESULT_FLUSH_MS = 50
+
+_GLOB_CHARS = frozenset("*?[")
+
+
+def name_matcher(query: str) -> Callable[[str], bool]:
+    """
+    Compile a folder name query.
+
+    Args:
+        query: Case-insensitive substring, glob ("build*") or regular
+            expression with the "re:" prefix
+
+    Returns:
+        Function returning True for matching folder names
+
+    Raises:
+        re.error: If a regular expression is invalid
+    """
+    if query.startswith(REGEX_PREFIX):
+        search = re.compile(query[len(REGEX_PREFIX) :], re.IGNORECASE).search
+        return lambda name: search(name) is not None
+    if _GLOB_CHARS & set(query):
+        match = re.compile(fnmatch.translate(query), re.IGNORECASE).match
+        return lambda name: match(name) is not None
+    needle = query.casefold()
+    return lambda name: needle in name.casefold()
+
+
+class SubtreeSearch(QObject):
+    """
+    Streaming, cancellable search for folders below a root.
+
+    Directories are walked by a few low-priority worker threads sharing
+    one queue. Matches are delivered through resultsFound in batches of
+    at most RESULT_BATCH_SIZE, at least every RESULT_FLUSH_MS while
+    matches keep coming. Starting a new search cancels the previous one.
+    """
+
+    # シグナル（ワーカースレッドから発行）
+    resultsFound = Signal(int, list)  # 検索ID、[(表示名, パス)]
+    searchFinished = Signal(int, bool, int)  # 検索ID、最後まで調べたか、調べたフォルダ数
+
+    def __init__(self, max_threads: int = 4, parent: QObject | None = None):
+        """
+        Initialize the search.
+
+        Args:
+            max_threads: Number of directory walking threads
+            parent: Parent object
+        """
+        super().__init__(parent)
+        self._logger = get_logger("breadcrumb_addressbar.search")
+        self._max_threads = max(1, max_threads)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(self._max_threads)
+        self._pool.setThreadPriority(QThread.Priority.LowPriority)
+        self._walk: _Walk | None = None
+        self._next_id = 0
+
+    def start(
+        self,
+        root: str,
+        query: str,
+        folder_filter: FolderFilter = DEFAULT_FILTER,
+        max_depth: int | None = None,
+    ) -> int:
+        """
+        Start searching below root, cancelling a search in progress.
+
+        Args:
+            root: Folder to search below
+            query: Folder name query (see name_matcher())
+            folder_filter: Name rules; hidden folders are neither matched nor entered
+            max_depth: Maximum number of levels below root (None for unlimited)
+
+        Returns:
+            Search id passed with the signals of this search
+
+        Raises:
+            re.error: If the query is an invalid regular expression
+        """
+        matcher = name_matcher(query)
+        self.cancel()
+        self._next_id += 1
+        self._walk = _Walk(self, self._next_id, root, matcher, folder_filter, max_depth, self._max_threads)
+        for _ in range(self._max_threads):
+            self._pool.start(_WalkWorker(self._walk))
+        self._logger.debug(f"Subtree search {self._next_id} started: {query!r} below {root}")
+        return self._next_id
+
+    def cancel(self) -> None:
+        """Stop the search in progress; workers finish their current directory."""
+        if self._walk is not None:
+            self._walk.cancel()
+            self._walk = None
+
+    def is_running(self) -> bool:
+        """Get whether a search is in progress."""
+        return self._walk is not None and not self._walk.done
+
+    def current_id(self) -> int:
+        """Get the id of the latest search (0 if none was started)."""
+        return self._next_id
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """
+        Wait for the worker threads to finish.
+
+        Args:
+            msecs: Timeout in milliseconds (-1 waits forever)
+
+        Returns:
+            True if all workers finished in time
+        """
+        return self._pool.waitForDone(msecs)
+
+
+class _Walk:
+    """Shared state of one search: the directory queue and the result buffer."""
+
+    def __init__(
+        self,
+        search: SubtreeSearch,
+        search_id: int,
+        root: str,
+        matcher: Callable[[str], bool],
+        folder_filter: FolderFilter,
+        max_depth: int | None,
+        workers: int,
+    ):
+        self.search = search
+        self.search_id = search_id
+        self.root = root
+        self.matcher = matcher
+        self.folder_filter = folder_filter
+        self.max_depth = max_depth
+        self.done = False
+        self._prefix_length = len(os.path.join(root, ""))
+        self._cancelled = threading.Event()
+        self._condition = threading.Condition()
+        self._queue: deque[tuple[str, int]] = deque([(root, 0)])
+        self._active = 0
+        self._workers = workers
+        self._visited = 0
+        self._results: list[tuple[str, str]] = []
+        self._last_flush = time.perf_counter()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        with self._condition:
+            self._condition.notify_all()
+
+    def run_worker(self) -> None:
+        """Take directories from the queue until the walk is finished."""
+        while True:
+            with self._condition:
+                while not self._queue and self._active and not self._cancelled.is_set():
+                    self._condition.wait()
+                if not self._queue or self._cancelled.is_set():
+                    # キューが空で処理中のワーカーもいなければ探索は完了
+                    self._condition.notify_all()
+                    break
+                directory, depth = self._queue.popleft()
+                self._active += 1
+
+            children = self._visit(directory, depth)
+
+            with self._condition:
+                self._queue.extend(children)
+                self._active -= 1
+                self._visited += 1
+                self._condition.notify_all()
+            self._flush()
+
+        with self._condition:
+            self._workers -= 1
+            last = self._workers == 0
+        if last:
+            self._flush(force=True)
+            self.done = True
+            self.search.searchFinished.emit(self.search_id, not self._cancelled.is_set(), self._visited)
+
+    def _visit(self, directory: str, depth: int) -> list[tuple[str, int]]:
+        """List one directory, collecting matches and the sub folders to enter."""
+        children: list[tuple[str, int]] = []
+        matches: list[tuple[str, str]] = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if self._cancelled.is_set():
+                        break
+                    if not self.folder_filter.is_visible(entry.name):
+                        continue
+                    try:
+                        if not entry.is_dir():
+                            continue
+                        # リンク先には入らない（循環を避け、探索範囲をルート以下に限る）
+                        enter = not entry.is_symlink()
+                    except OSError:
+                        continue
+                    if self.matcher(entry.name):
+                        matches.append((entry.path[self._prefix_length :], entry.path))
+                    if enter and (self.max_depth is None or depth + 1 < self.max_depth):
+                        children.append((entry.path, depth + 1))
+        except OSError:
+            pass
+        if matches:
+            with self._condition:
+                self._results.extend(matches)
+        return children
+
+    def _flush(self, force: bool = False) -> None:
+        """Emit buffered matches when the batch is full or the interval has passed."""
+        with self._condition:
+            now = time.perf_counter()
+            due = now - self._last_flush >= RESULT_FLUSH_MS / 1000.0
+            if not self._results or not (force or due or len(self._results) >= RESULT_BATCH_SIZE):
+                return
+            batch = self._results[:RESULT_BATCH_SIZE] if not force else self._results
+            self._results = self._results[len(batch) :]
+            self._last_flush = now
+        if not self._cancelled.is_set():
+            self.search.resultsFound.emit(self.search_id, batch)
+
+
+class _WalkWorker(QRunnable):
+    """Runnable that walks directories of a shared search."""
+
+    def __init__(self, walk: _Walk):
+        super().__init__()
+        self._walk = walk
+
+    def run(self) -> None:
+        self._walk.run_worker()
@@ -0,0 +1,262 @@
+"""
+Folder Sorting
+
+Sort keys for folder names and a folder list that keeps one precomputed
+key per entry, so re-sorting, filtering and merging never recompute them.
+"""
+
+import locale
+import re
+from bisect import bisect_right
+from collections.abc import Callable, Iterable
+from typing import Any, NamedTuple
+
+# 並び順
+SORT_NATURAL = "natural"  # 数字を数値として比較する（build9 < build10）
+SORT_CASEFOLD = "casefold"  # 大文字小文字を区別しない
+SORT_LOCALE = "locale"  # 現在のLC_COLLATEに従う
+SORT_MODES = (SORT_NATURAL, SORT_CASEFOLD, SORT_LOCALE)
+# メタデータによる並び順（同じ値の中では自然順）
+SORT_MTIME = "mtime"  # 更新日時の新しい順
+SORT_ITEM_COUNT = "items"  # 項目数の多い順
+METADATA_SORT_MODES = (SORT_MTIME, SORT_ITEM_COUNT)
+ALL_SORT_MODES = SORT_MODES + METADATA_SORT_MODES
+
+_DIGITS = re.compile(r"(\d+)")
+# 1エントリあたりの推定バイト数（タプル・名前とパスの文字列・ソートキー、名前とパスの長さは別に加算）
+_ENTRY_BYTES = 360
+# メタデータ1件あたりの推定バイト数
+_METADATA_BYTES = 200
+
+
+def natural_key(name: str) -> tuple[Any, ...]:
+    """
+    Get a numeric-aware, case-insensitive sort key.
+
+    Args:
+        name: Folder name
+
+    Returns:
+        Sort key ordering "build9" before "build10"
+    """
+    parts: list[Any] = _DIGITS.split(name.casefold())
+    # 分割結果は奇数番目が必ず数字列なので、同じ位置同士で比較される
+    parts[1::2] = [int(digits) for digits in parts[1::2]]
+    return (tuple(parts), name)
+
+
+def casefold_key(name: str) -> tuple[str, str]:
+    """
+    Get a case-insensitive sort key.
+
+    Args:
+        name: Folder name
+
+    Returns:
+        Sort key
+    """
+    return (name.casefold(), name)
+
+
+def locale_key(name: str) -> tuple[str, str]:
+    """
+    Get a sort key following the current LC_COLLATE locale.
+
+    The application is expected to have called locale.setlocale().
+
+    Args:
+        name: Folder name
+
+    Returns:
+        Sort key
+    """
+    return (locale.strxfrm(name), name)
+
+
+class FolderMetadata(NamedTuple):
+    """Per-folder metadata used by the metadata sort modes."""
+
+    mtime_ns: int
+    item_count: int  # 未収集なら-1
+
+
+_KEY_FUNCTIONS: dict[str, Callable[[str], Any]] = {
+    SORT_NATURAL: natural_key,
+    SORT_CASEFOLD: casefold_key,
+    SORT_LOCALE: locale_key,
+}
+
+
+def get_sort_key(mode: str) -> Callable[[str], Any]:
+    """
+    Get the key function of a sort mode.
+
+    Args:
+        mode: One of SORT_MODES
+
+    Returns:
+        Function mapping a folder name to its sort key
+
+    Raises:
+        ValueError: If the mode is unknown
+    """
+    try:
+        return _KEY_FUNCTIONS[mode]
+    except KeyError:
+        raise ValueError(f"Unknown sort mode: {mode}") from None
+
+
+def _entry_key_function(mode: str, metadata: dict[str, FolderMetadata] | None) -> Callable[[str, str], Any]:
+    """Get a function mapping (name, path) to the sort key of mode."""
+    if mode not in METADATA_SORT_MODES:
+        key = get_sort_key(mode)
+        return lambda name, path: key(name)
+
+    field = 0 if mode == SORT_MTIME else 1
+    known = metadata or {}
+
+    def metadata_key(name: str, path: str) -> tuple[Any, ...]:
+        value = known.get(path)
+        if value is None or value[field] < 0:
+            # メタデータのないエントリは末尾に回す
+            return (1, 0, natural_key(name))
+        return (0, -value[field], natural_key(name))
+
+    return metadata_key
+
+
+class SortedListing(list[tuple[str, str]]):
+    """
+    Sorted list of (folder_name, folder_path) tuples with precomputed keys.
+
+    It is a plain list for readers; the keys live in a parallel list and
+    are computed once per entry. Use merge() to add entries so the keys
+    stay in sync.
+
+    Folder metadata (see set_metadata()) travels with the listing, and
+    orderings derived by with_mode() are remembered until it changes.
+    """
+
+    __slots__ = ("_derived", "_item_counts", "keys", "metadata", "mode")
+
+    def __init__(
+        self,
+        folders: Iterable[tuple[str, str]] = (),
+        mode: str = SORT_NATURAL,
+        metadata: dict[str, FolderMetadata] | None = None,
+        item_counts: bool = False,
+    ):
+        """
+        Initialize the listing, sorting folders by mode.
+
+        Args:
+            folders: Folder entries in any order
+            mode: One of SORT_MODES or METADATA_SORT_MODES
+            metadata: Folder metadata keyed by folder path
+            item_counts: Whether metadata includes item counts
+        """
+        key = _entry_key_function(mode, metadata)
+        decorated = sorted((key(name, path), name, path) for name, path in folders)
+        super().__init__((name, path) for _, name, path in decorated)
+        self.keys: list[Any] = [k for k, _, _ in decorated]
+        self.mode = mode
+        self.metadata = metadata
+        self._item_counts = item_counts
+        self._derived: dict[str, SortedListing] = {}
+
+    def _from_sorted(self, folders: list[tuple[str, str]], keys: list[Any]) -> SortedListing:
+        """Build a listing of this mode and metadata from entries already sorted by keys."""
+        listing = SortedListing((), self.mode, self.metadata, self._item_counts)
+        listing.extend(folders)
+        listing.keys = keys
+        return listing
+
+    def has_metadata(self, item_counts: bool = False) -> bool:
+        """
+        Check whether folder metadata has been collected.
+
+        Args:
+            item_counts: Whether item counts are required as well
+
+        Returns:
+            True if the metadata is available
+        """
+        return self.metadata is not None and (self._item_counts or not item_counts)
+
+    def set_metadata(self, metadata: dict[str, FolderMetadata], item_counts: bool = False) -> None:
+        """
+        Attach folder metadata, forgetting orderings derived from older data.
+
+        Args:
+            metadata: Folder metadata keyed by folder path
+            item_counts: Whether metadata includes item counts
+        """
+        self.metadata = metadata
+        self._item_counts = item_counts
+        self._derived = {}
+
+    def merge(self, batch: Iterable[tuple[str, str]]) -> list[int]:
+        """
+        Insert a batch of entries at their sorted positions.
+
+        Args:
+            batch: New folder entries in any order
+
+        Returns:
+            Positions at which the entries were inserted, in insertion order
+        """
+        key = _entry_key_function(self.mode, self.metadata)
+        positions: list[int] = []
+        for name, path in batch:
+            entry_key = key(name, path)
+            index = bisect_right(self.keys, entry_key)
+            self.keys.insert(index, entry_key)
+            self.insert(index, (name, path))
+            positions.append(index)
+        return positions
+
+    def filtered(self, predicate: Callable[[tuple[str, str]], bool]) -> SortedListing:
+        """
+        Get the entries matching predicate, reusing their keys.
+
+        Args:
+            predicate: Function returning True for entries to keep
+
+        Returns:
+            New sorted listing
+        """
+        kept = [i for i, entry in enumerate(self) if predicate(entry)]
+        return self._from_sorted([self[i] for i in kept], [self.keys[i] for i in kept])
+
+    def memory_size(self) -> int:
+        """
+        Estimate the number of bytes held by the entries, keys and metadata.
+
+        Returns:
+            Estimated size in bytes
+        """
+        size = sum(_ENTRY_BYTES + len(name) + len(path) for name, path in self)
+        if self.metadata is not None:
+            size += _METADATA_BYTES * len(self.metadata)
+        return size
+
+    def with_mode(self, mode: str) -> SortedListing:
+        """
+        Get the listing ordered by another sort mode.
+
+        Re-sorted copies are remembered, so switching back and forth does
+        not sort again. Metadata modes order entries without metadata last.
+
+        Args:
+            mode: One of SORT_MODES or METADATA_SORT_MODES
+
+        Returns:
+            This listing if already in mode, otherwise a re-sorted copy
+        """
+        if mode == self.mode:
+            return self
+        derived = self._derived.get(mode)
+        if derived is None:
+            derived = SortedListing(self, mode, self.metadata, self._item_counts)
+            self._derived[mode] = derived
+        return derived
@@ -0,0 +1,240 @@
+"""
+Persistent Listing Store
+
+SQLite-backed on-disk store of folder listing snapshots, so popups can be
+served from disk after an application restart.
+"""
+
+import contextlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections.abc import Sequence
+
+from .columnar import COLUMNAR_MIN_ENTRIES, ColumnarListing
+from .logger_setup import get_logger
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    device INTEGER NOT NULL,
+    names BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+)
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS listings_accessed ON listings (accessed)"
+
+# 名前はNULを含まないため区切り文字として使う
+_NAME_SEPARATOR = "\x00"
+# UTF-8として不正な名前（POSIXのsurrogateescape）も保存できるよう、名前はバイト列で持つ
+_NAME_SEPARATOR_BYTES = b"\x00"
+
+
+def _row_key(path: str, variant: str) -> str:
+    """Get the row key of a directory's snapshot for a listing variant."""
+    # 既定の一覧は従来通りパスそのものをキーにする
+    return f"{path}{_NAME_SEPARATOR}{variant}" if variant else path
+
+
+def default_store_path() -> str:
+    """
+    Get the default location of the listing store in the user cache directory.
+
+    Returns:
+        Database file path
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "breadcrumb_addressbar", "listings.sqlite3")
+
+
+class PersistentListingStore:
+    """
+    On-disk store of folder listing snapshots keyed by directory path.
+
+    Snapshots are validated against the directory mtime, inode and device
+    on load. The store is capped by entry count and total name bytes;
+    least recently used snapshots are dropped when a cap is exceeded.
+    """
+
+    def __init__(
+        self,
+        db_path: str | None = None,
+        max_entries: int = 4096,
+        max_bytes: int = 16 * 1024 * 1024,
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            db_path: Database file (defaults to default_store_path());
+                     ":memory:" keeps the store in memory
+            max_entries: Maximum number of stored directories
+            max_bytes: Maximum total size of stored folder names in bytes
+        """
+        self._logger = get_logger("breadcrumb_addressbar.store")
+        self._db_path = db_path or default_store_path()
+        self._max_entries = max(1, max_entries)
+        self._max_bytes = max(1, max_bytes)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._stale = 0
+        self._misses = 0
+
+        if self._db_path != ":memory:":
+            os.makedirs(os.path.dirname(self._db_path) or ".", exist_ok=True)
+        # ワーカースレッドからも使うため、ロックで直列化して共有する
+        self._conn = sqlite3.connect(self._db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(_SCHEMA)
+            self._conn.execute(_INDEX)
+
+    @property
+    def path(self) -> str:
+        """Get the database file path."""
+        return self._db_path
+
+    def load(
+        self, path: str, st: os.stat_result | None, allow_stale: bool = False, variant: str = ""
+    ) -> Sequence[tuple[str, str]] | None:
+        """
+        Load a snapshot if it matches the directory's current state.
+
+        Args:
+            path: Directory path
+            st: Current os.stat() result of the directory, or None if it is
+                not known (the snapshot is then treated as stale)
+            allow_stale: Return the snapshot even if the directory changed
+            variant: Listing variant (e.g. a folder filter fingerprint)
+
+        Returns:
+            Folder list (a ColumnarListing for large directories), or None
+            if missing (or stale and not allowed)
+        """
+        key = _row_key(path, variant)
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT mtime_ns, inode, device, names FROM listings WHERE path = ?", (key,)
+                ).fetchone()
+            except UnicodeError:
+                # UTF-8にできないパスは保存されていない
+                row = None
+            if row is None:
+                self._misses += 1
+                return None
+            if st is None or (row[0], row[1], row[2]) != (st.st_mtime_ns, st.st_ino, st.st_dev):
+                self._stale += 1
+                if not allow_stale:
+                    return None
+            else:
+                self._hits += 1
+            with self._conn:
+                self._conn.execute("UPDATE listings SET accessed = ? WHERE path = ?", (time.time(), key))
+
+        stored = row[3]
+        if isinstance(stored, bytes):
+            names = [os.fsdecode(name) for name in stored.split(_NAME_SEPARATOR_BYTES)] if stored else []
+        else:
+            # 名前をTEXTで保存していた以前のデータベース
+            names = stored.split(_NAME_SEPARATOR) if stored else []
+        if len(names) >= COLUMNAR_MIN_ENTRIES:
+            return ColumnarListing(path, names)
+        return [(name, os.path.join(path, name)) for name in names]
+
+    def save(self, path: str, folders: Sequence[tuple[str, str]], st: os.stat_result, variant: str = "") -> None:
+        """
+        Store a snapshot.
+
+        Args:
+            path: Directory path
+            folders: Folder list as returned by scan_folders()
+            st: os.stat() result of the directory taken before the scan
+            variant: Listing variant (e.g. a folder filter fingerprint)
+        """
+        if isinstance(folders, ColumnarListing):
+            names = folders.names()
+        else:
+            names = [name for name, _ in folders]
+        try:
+            blob = _NAME_SEPARATOR_BYTES.join(os.fsencode(name) for name in names)
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO listings VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (_row_key(path, variant), st.st_mtime_ns, st.st_ino, st.st_dev, blob, len(blob), time.time()),
+                )
+                self._enforce_caps()
+        except UnicodeError as e:
+            # UTF-8にできないパスはキーにできないため保存しない（一覧はメモリ上に残る）
+            self._logger.debug(f"Listing for {path!r} not persisted: {e}")
+        except sqlite3.Error as e:
+            self._logger.error(f"Failed to persist listing for {path}: {e}")
+
+    def remove(self, path: str, variant: str = "") -> None:
+        """
+        Remove a snapshot.
+
+        Args:
+            path: Directory path
+            variant: Listing variant (e.g. a folder filter fingerprint)
+        """
+        with self._lock, self._conn, contextlib.suppress(UnicodeError):
+            self._conn.execute("DELETE FROM listings WHERE path = ?", (_row_key(path, variant),))
+
+    def compact(self) -> None:
+        """Enforce the size caps and reclaim free space in the database file."""
+        with self._lock:
+            with self._conn:
+                self._enforce_caps()
+            self._conn.execute("VACUUM")
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get store statistics.
+
+        Returns:
+            Dictionary with entries, stored name bytes, hits, stale and
+            misses counts
+        """
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM listings").fetchone()
+            return {
+                "entries": entries,
+                "bytes": size,
+                "hits": self._hits,
+                "stale": self._stale,
+                "misses": self._misses,
+            }
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _enforce_caps(self) -> None:
+        """Drop least recently used snapshots until both caps are met (lock held)."""
+        entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM listings").fetchone()
+        if entries <= self._max_entries and size <= self._max_bytes:
+            return
+
+        # 毎回削除しないよう、上限の9割まで減らす
+        target_entries = self._max_entries * 9 // 10
+        target_bytes = self._max_bytes * 9 // 10
+        doomed: list[str] = []
+        for path, row_size in self._conn.execute("SELECT path, size FROM listings ORDER BY accessed"):
+            if entries <= target_entries and size <= target_bytes:
+                break
+            doomed.append(path)
+            entries -= 1
+            size -= row_size
+        self._conn.executemany("DELETE FROM listings WHERE path = ?", [(p,) for p in doomed])
+        self._logger.debug(f"Listing store compacted: dropped {len(doomed)} snapshots")
@@ -0,0 +1,158 @@
+"""
+Ancestor Warm-up
+
+Background warm-up of the folder listings behind each breadcrumb segment.
+"""
+
+from PySide6.QtCore import QObject
+
+from .listing import PREFETCH_PRIORITY, ListingPrefetcher
+from .logger_setup import get_logger
+
+# ホバー時のプリフェッチよりさらに後回しにする
+WARMUP_PRIORITY = PREFETCH_PRIORITY - 1
+
+
+class AncestorWarmup(QObject):
+    """
+    Warms the listing cache for the ancestors of the current path.
+
+    Directories are handed to the prefetcher in small batches: the next
+    directory is only queued once one of the outstanding scans finishes.
+    Starting a new warm-up aborts the previous one. Directories on slow
+    mounts are skipped (see MountLatencyTracker).
+    """
+
+    def __init__(
+        self,
+        prefetcher: ListingPrefetcher,
+        batch_size: int = 2,
+        max_directories: int = 8,
+        parent: QObject | None = None,
+    ):
+        """
+        Initialize the warm-up scheduler.
+
+        Args:
+            prefetcher: Prefetcher used to run the scans
+            batch_size: Maximum number of scans in flight at once
+            max_directories: Maximum number of directories warmed per path
+            parent: Parent object
+        """
+        super().__init__(parent)
+        self._logger = get_logger("breadcrumb_addressbar.warmup")
+        self._prefetcher = prefetcher
+        self._batch_size = max(1, batch_size)
+        self._max_directories = max(1, max_directories)
+
+        self._queue: list[str] = []
+        self._outstanding: set[str] = set()
+        # 走査中のうち、有効な一覧がキャッシュ済みだったもの
+        self._cached: set[str] = set()
+        self._warmed: set[str] = set()
+
+        self._stats: dict[str, float] = {
+            "runs": 0,
+            "aborted": 0,
+            "scanned": 0,
+            "already_cached": 0,
+            "slow_mount": 0,
+            "failed": 0,
+            "scan_seconds": 0.0,
+            "popup_opens": 0,
+            "popup_opens_warmed": 0,
+        }
+
+        self._prefetcher.listingCached.connect(self._on_listing_cached)
+        self._prefetcher.prefetchFinished.connect(self._on_prefetch_finished)
+
+    def start(self, paths: list[str]) -> None:
+        """
+        Start warming the given directories, aborting any previous run.
+
+        Args:
+            paths: Directories in warm-up order (current directory first,
+                   then its parent and further ancestors)
+        """
+        self.cancel()
+
+        self._queue = [p for p in paths if p][: self._max_directories]
+        self._queue.reverse()  # 末尾からpopするため逆順で保持
+        self._warmed.clear()
+        self._stats["runs"] += 1
+        self._logger.debug(f"Ancestor warm-up started for {len(self._queue)} directories")
+        self._schedule_next()
+
+    def cancel(self) -> None:
+        """Abort the running warm-up, cancelling scans that have not started."""
+        if self._queue or self._outstanding:
+            self._stats["aborted"] += 1
+        self._queue.clear()
+        outstanding = list(self._outstanding)
+        self._outstanding.clear()
+        self._cached.clear()
+        for path in outstanding:
+            self._prefetcher.cancel(path)
+
+    def is_running(self) -> bool:
+        """Return True while directories are queued or being scanned."""
+        return bool(self._queue or self._outstanding)
+
+    def note_popup_opened(self, path: str) -> None:
+        """
+        Record that a popup was opened, to measure how often warm-up pays off.
+
+        Args:
+            path: Directory the popup was opened for
+        """
+        self._stats["popup_opens"] += 1
+        if path in self._warmed:
+            self._stats["popup_opens_warmed"] += 1
+
+    def stats(self) -> dict[str, float]:
+        """
+        Get warm-up statistics.
+
+        Returns:
+            Dictionary with run counts, scan counts, directories skipped on
+            slow mounts, total scan time in seconds and the share of popup
+            opens served by warmed directories
+        """
+        stats = dict(self._stats)
+        opens = stats["popup_opens"]
+        stats["warmed_hit_rate"] = stats["popup_opens_warmed"] / opens if opens else 0.0
+        return stats
+
+    def _schedule_next(self) -> None:
+        """Queue directories until the batch is full."""
+        while self._queue and len(self._outstanding) < self._batch_size:
+            path = self._queue.pop()
+            if self._prefetcher.prefetch(path, WARMUP_PRIORITY):
+                self._outstanding.add(path)
+            elif self._prefetcher.cache.latency_tracker.is_slow(path):
+                # 遅いマウントでは先読みもキャッシュの検証（stat）もしない
+                self._stats["slow_mount"] += 1
+
+    def _on_listing_cached(self, path: str) -> None:
+        """Note that a queued directory turned out to be cached already."""
+        if path in self._outstanding:
+            self._cached.add(path)
+
+    def _on_prefetch_finished(self, path: str, ok: bool, seconds: float) -> None:
+        """Account for a finished scan and queue the next directory."""
+        if path not in self._outstanding:
+            return
+        self._outstanding.discard(path)
+        if path in self._cached:
+            # キャッシュの検証はワーカーで行い、その結果で数える
+            self._cached.discard(path)
+            self._stats["already_cached"] += 1
+            self._warmed.add(path)
+        else:
+            self._stats["scan_seconds"] += seconds
+            if ok:
+                self._stats["scanned"] += 1
+                self._warmed.add(path)
+            else:
+                self._stats["failed"] += 1
+        self._schedule_next()
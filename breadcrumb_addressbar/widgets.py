@@ -1,14 +1,24 @@
 """
 Breadcrumb Item Widget
 
-Individual breadcrumb button widget for the address bar.
+Individual breadcrumb button widget for the address bar, and the jump box
+for going to a folder by name.
 """
 
-from PySide6.QtCore import QSize, Qt, Signal
-from PySide6.QtGui import QFont, QKeyEvent
-from PySide6.QtWidgets import QToolButton, QWidget
+import os
+from collections.abc import Callable
+
+from PySide6.QtCore import QEvent, QModelIndex, QObject, QPoint, QSize, QStringListModel, Qt, QTimer, Signal
+from PySide6.QtGui import QEnterEvent, QFont, QKeyEvent
+from PySide6.QtWidgets import QCompleter, QFrame, QLineEdit, QListView, QToolButton, QVBoxLayout, QWidget
 
 from .logger_setup import get_logger
+from .pathnode import PathNode, intern_path
+
+# ホバー意図とみなすまでの待ち時間（ミリ秒）
+HOVER_INTENT_DELAY_MS = 150
+# ジャンプボックスに表示する候補数
+JUMP_BOX_RESULTS = 20
 
 
 class BreadcrumbItem(QToolButton):
@@ -21,11 +31,13 @@ class BreadcrumbItem(QToolButton):
     # シグナル
     clicked_with_path = Signal(str)  # パス付きクリックシグナル
     clicked_with_info = Signal(str, bool)  # パスと最下層フラグ付きクリックシグナル
+    hover_intent = Signal(str)  # 一定時間ホバーが続いた時のパス通知
+    hover_left = Signal(str)  # ホバー終了時のパス通知
 
     def __init__(
         self,
         text: str,
-        path: str,
+        path: str | PathNode,
         is_current: bool = False,
         parent: QWidget | None = None,
     ):
@@ -34,18 +46,26 @@ class BreadcrumbItem(QToolButton):
 
         Args:
             text: Display text for the button
-            path: Full path this button represents
+            path: Full path this button represents, as a string or an
+                  interned node shared with the other buttons of the bar
             is_current: Whether this is the current folder
             parent: Parent widget
         """
         super().__init__(parent)
         self.setText(text)
-        self._path = path
+        # パス文字列は持たず、必要なときにノードから組み立てる
+        self._node = path if isinstance(path, PathNode) else intern_path(path)
         self._is_current = is_current
         self._logger = get_logger("breadcrumb_addressbar.widgets")
+
+        # ホバー意図判定用タイマー
+        self._hover_timer = QTimer(self)
+        self._hover_timer.setSingleShot(True)
+        self._hover_timer.setInterval(HOVER_INTENT_DELAY_MS)
+
         self._setup_ui()
         self._setup_connections()
-        self._logger.debug(f"BreadcrumbItem created: {text} -> {path}")
+        self._logger.debug(f"BreadcrumbItem created: {text} -> {self.path}")
 
     def _setup_ui(self) -> None:
         """Setup the UI appearance."""
@@ -69,6 +89,25 @@ class BreadcrumbItem(QToolButton):
     def _setup_connections(self) -> None:
         """Setup signal connections."""
         self.clicked.connect(self._on_clicked)
+        self._hover_timer.timeout.connect(self._on_hover_intent)
+
+    def enterEvent(self, event: QEnterEvent) -> None:
+        """Start the hover-intent timer when the pointer enters."""
+        if self._node is not None:
+            self._hover_timer.start()
+        super().enterEvent(event)
+
+    def leaveEvent(self, event: QEvent) -> None:
+        """Cancel a pending hover intent when the pointer leaves."""
+        self._hover_timer.stop()
+        if self._node is not None:
+            self.hover_left.emit(self.path)
+        super().leaveEvent(event)
+
+    def _on_hover_intent(self) -> None:
+        """Handle the hover-intent timeout."""
+        if self._node is not None:
+            self.hover_intent.emit(self.path)
 
     def keyPressEvent(self, event: QKeyEvent) -> None:
         """Handle key press events."""
@@ -87,9 +126,10 @@ class BreadcrumbItem(QToolButton):
 
     def _on_clicked(self) -> None:
         """Handle button click."""
-        self.clicked_with_path.emit(self._path)
-        self.clicked_with_info.emit(self._path, self._is_current)
-        self._logger.debug(f"Button clicked: path='{self._path}', is_current={self._is_current}")
+        path = self.path
+        self.clicked_with_path.emit(path)
+        self.clicked_with_info.emit(path, self._is_current)
+        self._logger.debug(f"Button clicked: path='{path}', is_current={self._is_current}")
 
     def _update_style(self) -> None:
         """Update the button style based on current state."""
@@ -122,7 +162,12 @@ class BreadcrumbItem(QToolButton):
     @property
     def path(self) -> str:
         """Get the path this button represents."""
-        return self._path
+        return "" if self._node is None else self._node.path()
+
+    @property
+    def node(self) -> PathNode | None:
+        """Get the interned node of the path (None for the ellipsis button)."""
+        return self._node
 
     @property
     def is_current(self) -> bool:
@@ -139,12 +184,213 @@ class BreadcrumbItem(QToolButton):
         """Set the display text."""
         self.setText(text)
 
-    def set_path(self, path: str) -> None:
+    def set_path(self, path: str | PathNode) -> None:
         """Set the path this button represents."""
-        self._path = path
+        self._node = path if isinstance(path, PathNode) else intern_path(path)
+
+    def set_hover_intent_delay(self, msecs: int) -> None:
+        """Set how long the pointer must rest on the button before hover_intent is emitted."""
+        self._hover_timer.setInterval(max(0, msecs))
 
     def sizeHint(self) -> QSize:
         """Get the recommended size for this widget."""
         # テキストに応じて適切なサイズを計算
         text_width = self.fontMetrics().horizontalAdvance(self.text())
         return QSize(text_width + 20, 32)  # パディングを考慮
+
+
+class JumpBox(QLineEdit):
+    """
+    Line edit that finds folders by name and jumps to the chosen one.
+
+    Candidates come from a search function (typically an index query) and
+    are shown in a completer popup as the user types.
+    """
+
+    # シグナル
+    folder_chosen = Signal(str)  # 選択されたフォルダのパス
+
+    def __init__(self, parent: QWidget | None = None):
+        """
+        Initialize the jump box.
+
+        Args:
+            parent: Parent widget
+        """
+        super().__init__(parent)
+        self._logger = get_logger("breadcrumb_addressbar.widgets")
+        self._search: Callable[[str, int], list[str]] | None = None
+        self._model = QStringListModel(self)
+        self._completer = QCompleter(self._model, self)
+        # 候補の絞り込みは検索関数が行うので、QCompleterには絞り込ませない
+        self._completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.setCompleter(self._completer)
+        # QLineEditが候補を入力欄に設定した後に受け取り、入力欄を空にする
+        self._completer.activated.connect(self._on_candidate_activated)
+        self.setPlaceholderText("フォルダへジャンプ...")
+        self.setClearButtonEnabled(True)
+        self.textEdited.connect(self._on_text_edited)
+        self.returnPressed.connect(self._on_return_pressed)
+
+    def set_search(self, search: Callable[[str, int], list[str]] | None) -> None:
+        """
+        Set the function producing candidates.
+
+        Args:
+            search: Function mapping (text, limit) to folder paths, or None
+        """
+        self._search = search
+        self._model.setStringList([])
+
+    def candidates(self) -> list[str]:
+        """Get the candidates currently offered."""
+        return self._model.stringList()
+
+    def refresh(self) -> None:
+        """Search again for the current text, e.g. after the candidate sources changed."""
+        if self.text().strip():
+            self._on_text_edited(self.text())
+
+    def _on_text_edited(self, text: str) -> None:
+        """Refresh the candidates for the typed text."""
+        text = text.strip()
+        results = self._search(text, JUMP_BOX_RESULTS) if self._search is not None and text else []
+        self._model.setStringList(results)
+        if results:
+            self._completer.complete()
+
+    def _on_candidate_activated(self, path: str) -> None:
+        """Jump to a candidate picked from the completer."""
+        self._choose(path)
+
+    def _on_return_pressed(self) -> None:
+        """Jump to a typed path, or to the best candidate."""
+        text = self.text().strip()
+        if os.path.isdir(text):
+            self._choose(text)
+        elif self.candidates():
+            self._choose(self.candidates()[0])
+
+    def _choose(self, path: str) -> None:
+        """Emit a chosen folder and reset the box."""
+        self._logger.info(f"Jump to folder: {path}")
+        self._model.setStringList([])
+        self.clear()
+        self.folder_chosen.emit(path)
+
+
+class JumpPopup(QFrame):
+    """
+    Popup with a query field and a live ranked list of matching folders.
+
+    The list is refreshed on every keystroke; Up/Down move the selection
+    and Enter jumps to the selected folder (or to a typed path).
+    """
+
+    # シグナル
+    folder_chosen = Signal(str)  # 選択されたフォルダのパス
+
+    def __init__(self, parent: QWidget | None = None):
+        """
+        Initialize the popup.
+
+        Args:
+            parent: Parent widget
+        """
+        super().__init__(parent, Qt.WindowType.Popup)
+        self._logger = get_logger("breadcrumb_addressbar.widgets")
+        self._search: Callable[[str, int], list[str]] | None = None
+
+        self._edit = QLineEdit(self)
+        self._edit.setPlaceholderText("フォルダ名の一部を入力...")
+        self._edit.textEdited.connect(self._on_text_edited)
+        self._edit.returnPressed.connect(self._on_return_pressed)
+        self._edit.installEventFilter(self)
+
+        self._model = QStringListModel(self)
+        self._list = QListView(self)
+        self._list.setModel(self._model)
+        self._list.setUniformItemSizes(True)
+        self._list.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self._list.clicked.connect(self._on_clicked)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+        layout.addWidget(self._edit)
+        layout.addWidget(self._list)
+        self.setMinimumWidth(400)
+        self.setMaximumHeight(400)
+
+    def set_search(self, search: Callable[[str, int], list[str]] | None) -> None:
+        """
+        Set the function producing candidates.
+
+        Args:
+            search: Function mapping (text, limit) to ranked folder paths, or None
+        """
+        self._search = search
+
+    def line_edit(self) -> QLineEdit:
+        """Get the query field."""
+        return self._edit
+
+    def candidates(self) -> list[str]:
+        """Get the candidates currently listed."""
+        return self._model.stringList()
+
+    def refresh(self) -> None:
+        """Search again for the current query, e.g. after the candidate sources changed."""
+        if self._edit.text().strip():
+            self._on_text_edited(self._edit.text())
+
+    def show_at(self, position: QPoint) -> None:
+        """
+        Clear the query and show the popup.
+
+        Args:
+            position: Global position of the top-left corner
+        """
+        self._edit.clear()
+        self._model.setStringList([])
+        self.move(position)
+        self.show()
+        self._edit.setFocus()
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        """Move the list selection with Up/Down while typing."""
+        if watched is self._edit and event.type() == QEvent.Type.KeyPress:
+            key = event.key()  # type: ignore[attr-defined]
+            if key in (Qt.Key.Key_Down, Qt.Key.Key_Up) and self._model.rowCount():
+                row = self._list.currentIndex().row()
+                step = 1 if key == Qt.Key.Key_Down else -1
+                row = max(0, min(self._model.rowCount() - 1, row + step))
+                self._list.setCurrentIndex(self._model.index(row, 0))
+                return True
+        return super().eventFilter(watched, event)
+
+    def _on_text_edited(self, text: str) -> None:
+        """Refresh the ranked candidates for the typed text."""
+        text = text.strip()
+        results = self._search(text, JUMP_BOX_RESULTS) if self._search is not None and text else []
+        self._model.setStringList(results)
+        if results:
+            self._list.setCurrentIndex(self._model.index(0, 0))
+
+    def _on_clicked(self, index: QModelIndex) -> None:
+        """Jump to a clicked candidate."""
+        self._choose(index.data())
+
+    def _on_return_pressed(self) -> None:
+        """Jump to the selected candidate, or to a typed path."""
+        text = self._edit.text().strip()
+        current = self._list.currentIndex()
+        if current.isValid():
+            self._choose(current.data())
+        elif os.path.isdir(text):
+            self._choose(text)
+
+    def _choose(self, path: str) -> None:
+        """Emit a chosen folder and close the popup."""
+        self._logger.info(f"Jump to folder: {path}")
+        self.hide()
+        self.folder_chosen.emit(path)
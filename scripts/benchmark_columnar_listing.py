@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+列形式の一覧（ColumnarListing）とタプルのリスト（SortedListing）のメモリ使用量を比較するベンチマーク
+使用方法: python scripts/benchmark_columnar_listing.py [エントリ数]
+例: python scripts/benchmark_columnar_listing.py 100000
+
+同じフォルダ名の集合から両方の一覧を作り、tracemallocで計測した
+エントリ1件あたりのバイト数と、行の読み出し・逆引きにかかる時間を表示する。
+"""
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+from breadcrumb_addressbar.columnar import ColumnarListing
+from breadcrumb_addressbar.sorting import SortedListing
+
+_DIRECTORY = os.path.join(os.sep, "srv", "data", "projects", "archive", "2024")
+
+
+def _measure(build) -> tuple[object, int, float]:
+    """build()が確保したメモリ（バイト）と所要時間（秒）を計測する"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def _time_per_call(function, calls: int) -> float:
+    """functionの1回あたりの所要時間（マイクロ秒）"""
+    started = time.perf_counter()
+    for i in range(calls):
+        function(i)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    # スキャナーがos.listdir()から受け取る名前に相当する（計測対象には含めない）
+    names = [f"run_{i:07d}_result" for i in range(count)]
+    print(f"エントリ数: {count:,}  名前の平均長: {sum(map(len, names)) / count:.1f} 文字")
+
+    tuples, tuple_bytes, tuple_seconds = _measure(
+        lambda: SortedListing((name, os.path.join(_DIRECTORY, name)) for name in names)
+    )
+    columnar, columnar_bytes, columnar_seconds = _measure(lambda: ColumnarListing(_DIRECTORY, names))
+    assert columnar == tuples
+
+    step = max(1, count // 1000)
+    row_us = _time_per_call(lambda i: columnar[i * step % count], 100_000)
+    paths = [columnar[i * step % count][1] for i in range(1000)]
+    lookup_us = _time_per_call(lambda i: columnar.index_of(paths[i % 1000]), 10_000)
+
+    # 時間はtracemallocで計測中のもの（通常の実行より遅い）
+    print(f"  SortedListing:    {tuple_bytes / count:8.1f} バイト/エントリ  ({tuple_seconds:.2f} 秒)")
+    print(f"  ColumnarListing:  {columnar_bytes / count:8.1f} バイト/エントリ  ({columnar_seconds:.2f} 秒)")
+    print(f"  列のサイズ:       {columnar.memory_size() / count:8.1f} バイト/エントリ")
+    print(f"  削減率: {tuple_bytes / max(1, columnar_bytes):.1f} 倍")
+    print(f"  行の読み出し: {row_us:.2f} マイクロ秒/回  逆引き: {lookup_us:.1f} マイクロ秒/回")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
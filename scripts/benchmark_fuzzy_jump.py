@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+あいまい検索（ジャンプ）の応答時間を計測するベンチマーク
+使用方法: python scripts/benchmark_fuzzy_jump.py [候補数] [クエリ]
+例: python scripts/benchmark_fuzzy_jump.py 1000000 prjbuild
+
+クエリを1文字ずつ入力したときの各問い合わせ時間を、索引を最初の
+問い合わせで作る場合と、warm_up()で事前に作った後で比較する。
+探すフォルダは候補の最後に置き、上位5件での順位も表示する。
+"""
+
+import random
+import sys
+import time
+
+from breadcrumb_addressbar.fuzzy import FuzzyMatcher
+
+TARGET = "/srv/projects/alpha/build"
+_WORDS = ["src", "lib", "build", "docs", "projects", "alpha", "beta", "node", "cache", "assets", "test", "release"]
+
+
+def _make_paths(count: int) -> list[str]:
+    """深さ3〜7のランダムなパスを生成する"""
+    rng = random.Random(1)  # noqa: S311 - 再現性のある計測用データ
+    paths = []
+    for _ in range(count - 1):
+        depth = rng.randint(3, 7)
+        paths.append("/" + "/".join(f"{rng.choice(_WORDS)}{rng.randint(0, 50)}" for _ in range(depth)))
+    # 渡した順に依存しないことを確かめるため、探すフォルダは最後に置く
+    paths.append(TARGET)
+    return paths
+
+
+def _type_query(matcher: FuzzyMatcher, query: str) -> None:
+    """クエリを1文字ずつ入力し、問い合わせごとの時間を表示する"""
+    for end in range(1, len(query) + 1):
+        truncated = matcher.stats()["truncated"]
+        started = time.perf_counter()
+        results = matcher.query(query[:end], 5)
+        elapsed = (time.perf_counter() - started) * 1000
+        stats = matcher.stats()
+        cut = "あり" if stats["truncated"] > truncated else "なし"
+        print(
+            f"  {query[:end]:<12} {elapsed:8.2f} ms  候補 {stats['survivors']:>8}  照合 {stats['checked']:>8}  "
+            f"採点 {stats['scored']:>5}  打ち切り {cut}  先頭 {results[0] if results else '-'}"
+        )
+    rank = results.index(TARGET) + 1 if TARGET in results else None
+    print(f"  {TARGET}: {f'{rank}位' if rank else '上位5件に入らない'}")
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    query = sys.argv[2] if len(sys.argv) > 2 else "prjbuild"
+    paths = _make_paths(count)
+
+    started = time.perf_counter()
+    matcher = FuzzyMatcher(paths)
+    print(f"候補数: {len(matcher)}, 構築 {time.perf_counter() - started:.2f} s")
+
+    print("warm_up前（最初の問い合わせで索引を作る）:")
+    _type_query(matcher, query)
+
+    matcher = FuzzyMatcher(paths)
+    started = time.perf_counter()
+    matcher.warm_up()
+    print(f"warm_up {time.perf_counter() - started:.2f} s")
+    print("warm_up後:")
+    _type_query(matcher, query)
+
+
+if __name__ == "__main__":
+    main()
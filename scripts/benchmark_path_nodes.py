@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+パスノード（PathNode）と文字列のメモリ使用量を比較するベンチマーク
+使用方法: python scripts/benchmark_path_nodes.py [パス数] [参照箇所数]
+例: python scripts/benchmark_path_nodes.py 1000000 3
+
+同じフォルダ構成のパスを、(1) 文字列として各参照箇所がそれぞれ持つ場合と、
+(2) インターンしたPathNodeを各参照箇所が共有する場合で、tracemallocで
+計測したパス1件あたりのバイト数を表示する。参照箇所はパンくず・キャッシュ・
+履歴など、同じパスを別々に組み立てて保持するサブシステムを想定している。
+"""
+
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+from breadcrumb_addressbar.pathnode import intern_path, interned_count
+
+_WORDS = ["src", "lib", "build", "docs", "projects", "alpha", "beta", "node", "cache", "assets", "test", "release"]
+
+
+def _make_paths(count: int) -> list[str]:
+    """フォルダ1つあたり平均20個の子を持つ、深さ6前後の木のパスを生成する"""
+    rng = random.Random(1)  # noqa: S311 - 再現性のある計測用データ
+    paths = []
+    parents = ["/home/user"]
+    while len(paths) < count:
+        parent = parents[rng.randrange(len(parents))]
+        path = f"{parent}/{rng.choice(_WORDS)}_{len(paths)}"
+        paths.append(path)
+        if rng.random() < 0.05:
+            parents.append(path)
+    return paths
+
+
+def _measure(build) -> tuple[object, int, float]:
+    """build()が確保したメモリ（バイト）と所要時間（秒）を計測する"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    references = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    source = [path.encode() for path in _make_paths(count)]
+    average_length = sum(map(len, source)) / count
+    print(f"パス数: {count:,}  平均長: {average_length:.1f} 文字  参照箇所: {references}")
+
+    # 各参照箇所が別々に組み立てた文字列を持つ（同じ内容でも別オブジェクト）
+    strings, string_bytes, string_seconds = _measure(
+        lambda: [[path.decode() for path in source] for _ in range(references)]
+    )
+    del strings
+
+    # 参照箇所はインターンされた同じノードを指す
+    def build_nodes():
+        return [[intern_path(path.decode()) for path in source] for _ in range(references)]
+
+    nodes, node_bytes, node_seconds = _measure(build_nodes)
+    live_nodes = interned_count()
+
+    # 1箇所だけが持つ場合（共有による節約がない最悪のケース）
+    del nodes
+    gc.collect()
+    strings1, string1_bytes, _ = _measure(lambda: [path.decode() for path in source])
+    del strings1
+    nodes1, node1_bytes, _ = _measure(lambda: [intern_path(path.decode()) for path in source])
+
+    sample = nodes1[count // 2]
+    started = time.perf_counter()
+    for _ in range(100_000):
+        sample.path()
+    materialize_us = (time.perf_counter() - started) * 10
+
+    # 時間はtracemallocで計測中のもの（通常の実行より大幅に遅い）
+    print(f"  文字列   x{references}: {string_bytes / count:8.1f} バイト/パス  ({string_seconds:.2f} 秒)")
+    print(
+        f"  PathNode x{references}: {node_bytes / count:8.1f} バイト/パス  "
+        f"({node_seconds:.2f} 秒, ノード {live_nodes:,})"
+    )
+    print(f"  文字列   x1: {string1_bytes / count:8.1f} バイト/パス")
+    print(f"  PathNode x1: {node1_bytes / count:8.1f} バイト/パス")
+    print(f"  パス文字列の復元: {materialize_us:.2f} マイクロ秒/回（深さ {sample.depth}）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
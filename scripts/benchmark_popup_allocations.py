@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+ポップアップを開くたびに発生するオブジェクト生成量を計測するベンチマーク
+使用方法: python scripts/benchmark_popup_allocations.py [フォルダ数] [オープン回数]
+例: python scripts/benchmark_popup_allocations.py 2000 20
+
+アクションを毎回作り直す従来方式（clear + QAction + ラムダ接続）と、
+アクションを再利用して triggered シグナル1本で受ける現行方式を比較する。
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtGui import QAction  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+from breadcrumb_addressbar import popup as popup_mod  # noqa: E402
+from breadcrumb_addressbar.listing import FolderListingCache  # noqa: E402
+from breadcrumb_addressbar.popup import FolderSelectionPopup  # noqa: E402
+
+_counts = {"qaction": 0, "closure": 0}
+
+
+class _CountingAction(QAction):
+    """生成数を数えるQAction"""
+
+    def __init__(self, *args: object) -> None:
+        super().__init__(*args)
+        _counts["qaction"] += 1
+
+
+def _legacy_populate(popup: FolderSelectionPopup, folders: list[tuple[str, str]]) -> None:
+    """従来方式: 毎回clearし、アクションとラムダを作り直す"""
+    popup.clear()
+    for folder_name, folder_path in folders:
+        action = _CountingAction(folder_name, popup)
+        action.setData(folder_path)
+        action.triggered.connect(lambda checked, p=folder_path: popup._on_folder_selected(p))
+        _counts["closure"] += 1
+        popup.addAction(action)
+
+
+def _measure(label: str, open_popup, opens: int) -> None:
+    """オープン1回あたりの生成量と時間を表示する"""
+    app = QApplication.instance()
+    open_popup()  # ウォームアップ
+    _counts.update(qaction=0, closure=0)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    for _ in range(opens):
+        open_popup()
+        app.processEvents()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{label:>8}: QAction生成 {_counts['qaction'] / opens:8.1f}/回  "
+        f"クロージャ生成 {_counts['closure'] / opens:8.1f}/回  "
+        f"Pythonピークメモリ {peak / 1024:8.1f} KiB  "
+        f"時間 {elapsed / opens * 1000:7.2f} ms/回"
+    )
+
+
+def main() -> None:
+    folder_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    opens = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        folders = [(f"folder{i:05d}", os.path.join(directory, f"folder{i:05d}")) for i in range(folder_count)]
+        cache = FolderListingCache()
+        cache.put(directory, folders, os.stat(directory).st_mtime_ns)
+
+        # 現行方式のQAction生成も数えるため、モジュール内のQActionを差し替える
+        popup_mod.QAction = _CountingAction  # type: ignore[misc]
+        popup = FolderSelectionPopup(cache=cache)
+        popup.setProgressivePopulation(first_screen_items=folder_count, slice_budget_ms=8.0)
+
+        print(f"フォルダ数: {folder_count}, オープン回数: {opens}")
+        _measure("従来方式", lambda: _legacy_populate(popup, folders), opens)
+        _measure("現行方式", lambda: popup.populateForPath(directory), opens)
+
+        popup.deleteLater()
+        app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
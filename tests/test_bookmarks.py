@@ -0,0 +1,122 @@
+"""
+Tests for `breadcrumb_addressbar.bookmarks` and `breadcrumb_addressbar.bookmark_popup`.
+"""
+
+import json
+import os
+
+import pytest
+
+from breadcrumb_addressbar.bookmarks import BookmarkStore
+
+# Headless 対応
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def _is_pytest_qt_enabled() -> bool:
+    try:
+        import pytestqt  # type: ignore  # noqa: F401
+
+        return True
+    except Exception:
+        return False
+
+
+PYTEST_QT_ENABLED = _is_pytest_qt_enabled()
+
+try:
+    from breadcrumb_addressbar.bookmark_popup import BookmarkPopup
+
+    POPUP_AVAILABLE = True
+except Exception:  # pragma: no cover - import guard only
+    POPUP_AVAILABLE = False
+
+
+def _p(*parts: str) -> str:
+    return os.path.join(os.sep, *parts)
+
+
+def test_add_remove_and_list():
+    store = BookmarkStore()
+    assert store.add(_p("work", "proj"))
+    assert store.add(_p("home", "music"), name="Music")
+    assert not store.add(_p("home", "music"), name="Music")  # 変更なし
+    assert store.add(_p("home", "music") + os.sep, name="Songs")  # 正規化して名前を変更
+
+    assert store.bookmarks() == [("Songs", _p("home", "music")), ("proj", _p("work", "proj"))]
+    assert store.contains(_p("work", "proj")) and len(store) == 2
+
+    assert store.remove(_p("work", "proj"))
+    assert not store.remove(_p("work", "proj"))
+    assert not store.add("")
+    assert store.bookmarks() == [("Songs", _p("home", "music"))]
+
+
+def test_under_uses_prefix_lookup():
+    store = BookmarkStore()
+    for path in (_p("a"), _p("a", "b"), _p("a", "b", "c"), _p("a-b"), _p("ab"), _p("b", "a")):
+        store.add(path)
+
+    # 「/a-b」「/ab」は /a の中ではない
+    assert [path for _, path in store.under(_p("a"))] == [_p("a", "b"), _p("a", "b", "c")]
+    assert [path for _, path in store.under(_p("a"), limit=1)] == [_p("a", "b")]
+    assert len(store.under(os.sep)) == 6
+    assert store.under(_p("missing")) == []
+
+
+def test_file_is_loaded_lazily_and_saved(tmp_path):
+    file_path = tmp_path / "bookmarks.json"
+    data = {"version": 1, "bookmarks": [{"path": _p("x", str(i)), "name": f"x{i}"} for i in range(1000)]}
+    file_path.write_text(json.dumps(data), encoding="utf-8")
+
+    store = BookmarkStore(str(file_path))
+    assert not store.is_loaded()
+    assert len(store.under(_p("x"))) == 1000
+    assert store.is_loaded()
+
+    store.add(_p("y"), name="Y")  # 自動保存
+    reloaded = BookmarkStore(str(file_path))
+    assert ("Y", _p("y")) in reloaded.bookmarks()
+    assert len(reloaded) == 1001
+
+
+def test_invalid_file_is_ignored(tmp_path):
+    file_path = tmp_path / "bookmarks.json"
+    file_path.write_text("{broken", encoding="utf-8")
+    store = BookmarkStore(str(file_path), autosave=False)
+    assert store.bookmarks() == []
+    assert not BookmarkStore(str(tmp_path / "missing.json")).load()
+
+
+@pytest.mark.skipif((not POPUP_AVAILABLE) or (not PYTEST_QT_ENABLED), reason="PySide6/pytest-qt not available")
+class TestBookmarkPopup:
+    def test_lists_bookmarks_under_current_folder_first(self, qtbot):
+        store = BookmarkStore()
+        store.add(_p("a", "b"))
+        store.add(_p("c"))
+        popup = BookmarkPopup(store)
+
+        popup.populateForPath(_p("a"))
+        texts = [action.text() for action in popup.actions()]
+        assert texts[0] == "このフォルダをブックマーク"
+        assert texts[1:] == ["このフォルダ以下", "b", "すべてのブックマーク", "b", "c"]
+
+        selected: list[str] = []
+        popup.folderSelected.connect(selected.append)
+        popup.actions()[2].trigger()
+        assert selected == [_p("a", "b")]
+
+    def test_toggle_current_folder(self, qtbot):
+        store = BookmarkStore()
+        popup = BookmarkPopup(store)
+        popup.populateForPath(_p("a"))
+        assert [action.text() for action in popup.actions()][-1] == "ブックマークはありません"
+
+        with qtbot.waitSignal(popup.bookmarksChanged, timeout=1000):
+            popup.actions()[0].trigger()
+        assert store.contains(_p("a"))
+
+        popup.populateForPath(_p("a"))
+        assert popup.actions()[0].text() == "このフォルダのブックマークを削除"
+        popup.actions()[0].trigger()
+        assert not store.contains(_p("a"))
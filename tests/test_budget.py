@@ -0,0 +1,145 @@
+"""
+Tests for `breadcrumb_addressbar.budget` (MemoryBudget).
+"""
+
+import gc
+import os
+
+import pytest
+
+# Headless 対応
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def _is_pytest_qt_enabled() -> bool:
+    try:
+        import pytestqt  # type: ignore  # noqa: F401
+
+        return True
+    except Exception:
+        return False
+
+
+PYTEST_QT_ENABLED = _is_pytest_qt_enabled()
+
+try:
+    from breadcrumb_addressbar.budget import MemoryBudget
+    from breadcrumb_addressbar.frecency import FrecencyStore
+    from breadcrumb_addressbar.listing import FolderListingCache
+    from breadcrumb_addressbar.predictor import NavigationPredictor
+
+    BUDGET_AVAILABLE = True
+except Exception:  # pragma: no cover - import guard only
+    BUDGET_AVAILABLE = False
+
+
+class _FakeCache:
+    """Cache of fixed-size blocks."""
+
+    def __init__(self, blocks: int, block_size: int = 100, evictable: bool = True):
+        self.blocks = blocks
+        self.block_size = block_size
+        self.evictable = evictable
+
+    def memory_usage(self) -> int:
+        return self.blocks * self.block_size
+
+    def evict(self, nbytes: int) -> int:
+        if not self.evictable:
+            return 0
+        count = min(self.blocks, -(-nbytes // self.block_size))
+        self.blocks -= count
+        return count * self.block_size
+
+
+@pytest.mark.skipif(not BUDGET_AVAILABLE, reason="budget module not available")
+class TestMemoryBudget:
+    def test_eviction_is_shared_by_weight(self):
+        budget = MemoryBudget(limit_bytes=10_000)
+        small, heavy, light = _FakeCache(10), _FakeCache(100), _FakeCache(100)
+        budget.register("small", small)
+        budget.register("heavy", heavy, weight=3.0)
+        budget.register("light", light, weight=1.0)
+        assert budget.usage() == 21_000
+
+        freed = budget.enforce()
+        # 重みあたりの使用量が少ないキャッシュはそのまま残り、残りを重みで分け合う
+        assert small.blocks == 10
+        assert (heavy.blocks, light.blocks) == (67, 22)
+        assert freed == 11_100
+        assert budget.usage() <= budget.limit()
+
+        stats = budget.cache_stats()
+        assert stats["heavy"] == {"caches": 1, "bytes": 6700, "weight": 3.0, "evicted": 3300}
+        assert stats["light"]["evicted"] == 7800
+
+    def test_trim_and_unevictable_caches(self):
+        budget = MemoryBudget(limit_bytes=100_000)
+        pinned, cache = _FakeCache(50, evictable=False), _FakeCache(50)
+        budget.register("pinned", pinned)
+        budget.register("cache", cache)
+        assert budget.enforce() == 0
+
+        # 予算内でも低メモリ通知で減らし、手放せないキャッシュはそのまま
+        assert budget.trim() == 5000
+        assert (pinned.blocks, cache.blocks) == (50, 0)
+        assert budget.trim(0.0) == 0
+        assert budget.stats() == {
+            "limit": 100_000,
+            "usage": 5000,
+            "caches": 2,
+            "enforcements": 2,
+            "trims": 2,
+            "evicted": 5000,
+        }
+
+    def test_caches_are_held_weakly(self):
+        budget = MemoryBudget()
+        cache = _FakeCache(10)
+        budget.register("cache", cache)
+        budget.register("cache", cache)
+        assert budget.stats()["caches"] == 1
+
+        del cache
+        gc.collect()
+        assert budget.stats()["caches"] == 0
+        budget.unregister(_FakeCache(1))
+
+    @pytest.mark.skipif(not PYTEST_QT_ENABLED, reason="pytest-qt not available")
+    def test_check_requests_are_served_from_the_event_loop(self, qtbot):
+        budget = MemoryBudget(limit_bytes=1000)
+        cache = _FakeCache(5)
+        budget.register("cache", cache)
+        cache.blocks = 50
+
+        budget.request_check()
+        budget.request_check()
+        assert cache.blocks == 50
+        qtbot.waitUntil(lambda: cache.blocks == 10, timeout=2000)
+        assert budget.stats()["enforcements"] == 1
+
+    def test_real_caches_report_and_evict(self, tmp_path):
+        for name in ("a", "b", "c"):
+            (tmp_path / name).mkdir()
+        listings = FolderListingCache()
+        for name in ("a", "b", "c"):
+            listings.get_or_scan(str(tmp_path / name))
+        listings.get_or_scan(str(tmp_path))
+        frecency = FrecencyStore()
+        predictor = NavigationPredictor()
+        for i in range(20):
+            frecency.record(f"/p/{i}", timestamp=float(i))
+            predictor.record(f"/p/{i}", f"/p/{i + 1}")
+
+        budget = MemoryBudget(limit_bytes=0)
+        budget.register("listings", listings)
+        budget.register("frecency", frecency)
+        budget.register("predictor", predictor)
+        usage = budget.usage()
+        assert listings.memory_usage() > 0 and frecency.memory_usage() > 0 and predictor.memory_usage() > 0
+
+        assert budget.enforce() == usage
+        assert listings.stats()["entries"] == 0
+        assert frecency.paths() == []
+        assert predictor.stats()["states"] == 0
+        assert budget.usage() == 0
@@ -0,0 +1,128 @@
+"""
+Tests for `breadcrumb_addressbar.columnar` (ColumnarListing).
+"""
+
+import os
+
+from breadcrumb_addressbar import columnar
+from breadcrumb_addressbar.columnar import FLAG_HIDDEN, FLAG_ITEM_COUNT, FLAG_MTIME, ColumnarListing
+from breadcrumb_addressbar.sorting import (
+    SORT_CASEFOLD,
+    SORT_ITEM_COUNT,
+    SORT_MTIME,
+    SORT_NATURAL,
+    FolderMetadata,
+    SortedListing,
+)
+
+BASE = os.path.join(os.sep, "base")
+
+
+def _entries(*names: str) -> list[tuple[str, str]]:
+    return [(name, os.path.join(BASE, name)) for name in names]
+
+
+class TestColumnarListing:
+    def test_reads_like_sorted_listing(self):
+        names = ["v10", "V2", "v1", ".cache", "日本語", "bad\udcff"]
+        listing = ColumnarListing(BASE, names)
+
+        assert listing == SortedListing(_entries(*names))
+        assert len(listing) == len(names)
+        assert listing[0] == (".cache", os.path.join(BASE, ".cache"))
+        assert listing[-1] == listing[len(names) - 1]
+        assert listing.names() == [name for name, _ in SortedListing(_entries(*names))]
+        assert listing.flags(0) == FLAG_HIDDEN
+
+    def test_slices_are_columnar(self):
+        listing = ColumnarListing(BASE, [f"d{i}" for i in range(10)])
+
+        tail = listing[3:]
+        assert isinstance(tail, ColumnarListing)
+        assert tail == _entries(*[f"d{i}" for i in range(3, 10)])
+        assert tail[2:4] == _entries("d5", "d6")
+        assert listing[8:3] == []
+        assert listing[::3] == _entries("d0", "d3", "d6", "d9")
+
+    def test_index_of(self):
+        listing = ColumnarListing(BASE, ["ab", "a", "b", "abc"])
+
+        for row, (_, path) in enumerate(listing):
+            assert listing.index_of(path) == row
+        assert listing.index_of(os.path.join(BASE, "ac")) == -1
+        assert listing.index_of(os.path.join(BASE, "a", "b")) == -1
+        assert listing.index_of(os.path.join(os.sep, "other", "a")) == -1
+
+    def test_metadata_columns_and_modes(self):
+        listing = ColumnarListing(BASE, ["old", "new", "unknown"])
+        assert not listing.has_metadata()
+        assert listing.with_mode(SORT_MTIME) == listing
+
+        listing.set_metadata(
+            {
+                os.path.join(BASE, "old"): FolderMetadata(100, 5),
+                os.path.join(BASE, "new"): FolderMetadata(200, 1),
+            },
+            item_counts=True,
+        )
+        assert listing.has_metadata(item_counts=True)
+        assert listing.metadata_at(listing.index_of(os.path.join(BASE, "old"))) == FolderMetadata(100, 5)
+        assert listing.metadata_at(listing.index_of(os.path.join(BASE, "unknown"))) is None
+        assert listing.flags(listing.index_of(os.path.join(BASE, "new"))) == FLAG_MTIME | FLAG_ITEM_COUNT
+        assert listing.metadata == {
+            os.path.join(BASE, "new"): FolderMetadata(200, 1),
+            os.path.join(BASE, "old"): FolderMetadata(100, 5),
+        }
+
+        by_mtime = listing.with_mode(SORT_MTIME)
+        assert by_mtime.names() == ["new", "old", "unknown"]
+        assert by_mtime.metadata_at(0) == FolderMetadata(200, 1)
+        assert listing.with_mode(SORT_MTIME) is by_mtime
+        assert listing.with_mode(SORT_ITEM_COUNT).names() == ["old", "new", "unknown"]
+        assert listing.with_mode(SORT_CASEFOLD).names() == ["new", "old", "unknown"]
+
+    def test_memory_is_a_fraction_of_tuples(self):
+        names = [f"folder_{i:06d}" for i in range(1000)]
+        listing = ColumnarListing(BASE, names)
+
+        # 名前13バイト + 区切り1バイト + オフセット4バイト + フラグ1バイト
+        assert listing.memory_size() < 20 * len(names) + 16
+
+    def test_modes_reuse_rank_columns(self, monkeypatch):
+        listing = ColumnarListing(BASE, ["b10", "B2", "a", "c1"])
+        by_case = listing.with_mode(SORT_CASEFOLD)
+        listing.set_metadata({os.path.join(BASE, "c1"): FolderMetadata(5, -1)})
+
+        # 一度並べた順位を使い、キーは作り直さない
+        def fail(*args):
+            raise AssertionError("sort key recomputed")
+
+        monkeypatch.setattr(columnar, "get_sort_key", fail)
+        monkeypatch.setattr(columnar, "natural_key", fail)
+        assert listing.with_mode(SORT_CASEFOLD).names() == by_case.names() == ["a", "b10", "B2", "c1"]
+        assert by_case.with_mode(SORT_NATURAL).names() == listing.names() == ["a", "B2", "b10", "c1"]
+        assert listing.with_mode(SORT_MTIME).names() == ["c1", "a", "B2", "b10"]
+
+    def test_merge_and_filtered_match_sorted_listing(self):
+        names = [f"d{i}" for i in range(0, 40, 3)] + ["D6", ".hidden"]
+        listing = ColumnarListing(BASE, names)
+        listing.set_metadata({os.path.join(BASE, "d3"): FolderMetadata(7, 2)}, item_counts=True)
+        expected = SortedListing(_entries(*names))
+
+        batch = _entries("d10", "d1", "D10", "d10x", "d99", ".a")
+        assert listing.merge(batch) == expected.merge(batch)
+        assert listing == expected
+        assert listing.merge([]) == []
+        for row, (_, path) in enumerate(listing):
+            assert listing.index_of(path) == row
+        # 既存の行のメタデータとフラグは残り、新しい行は未収集
+        assert listing.metadata_at(listing.index_of(os.path.join(BASE, "d3"))) == FolderMetadata(7, 2)
+        assert listing.metadata_at(listing.index_of(os.path.join(BASE, "d10"))) is None
+        assert listing.flags(listing.index_of(os.path.join(BASE, ".a"))) == FLAG_HIDDEN
+
+        filtered = listing.filtered(lambda entry: entry[0].startswith("d1"))
+        assert isinstance(filtered, ColumnarListing)
+        assert filtered == expected.filtered(lambda entry: entry[0].startswith("d1"))
+        assert filtered.with_mode(SORT_CASEFOLD) == expected.filtered(
+            lambda entry: entry[0].startswith("d1")
+        ).with_mode(SORT_CASEFOLD)
@@ -114,6 +114,26 @@ class TestBreadcrumbAddressBar:
         assert win[0] == ("C:\\", "C:\\")
         assert win[-1][1] == "C:\\Users\\Test"
 
+    def test_buttons_share_interned_path_nodes(self):
+        self.widget.setMaxItems(10)
+        self.widget.setPath("/data/projects/alpha")
+        items = self.widget._breadcrumb_items
+        assert [item.path for item in items] == ["/", "/data", "/data/projects", "/data/projects/alpha"]
+        # 各ボタンは親のボタンのノードを親に持つ
+        for parent, child in zip(items, items[1:], strict=False):
+            assert child.node.parent is parent.node
+
+    def test_caches_are_registered_with_the_memory_budget(self):
+        from breadcrumb_addressbar.budget import get_memory_budget
+        from breadcrumb_addressbar.frecency import FrecencyStore
+
+        store = FrecencyStore()
+        self.widget.setFrecencyStore(store)
+        stats = get_memory_budget().cache_stats()
+        assert {"listings", "menus", "frecency"} <= set(stats)
+        store.record("/data/projects")
+        assert get_memory_budget().cache_stats()["frecency"]["bytes"] >= store.memory_usage()
+
     def test_toggle_popup_settings(self):
         assert self.widget.getShowPopupForAllButtons() is True
         self.widget.setShowPopupForAllButtons(False)
@@ -160,3 +180,334 @@ class TestBreadcrumbAddressBar:
         self.widget._clear_items()
         assert self.widget._layout.count() == 0
         assert prev_count >= 0
+
+    def test_hover_intent_prefetches_listing(self, monkeypatch):
+        calls = {"prefetch": [], "cancel": []}
+        monkeypatch.setattr(self.widget._prefetcher, "prefetch", lambda p: calls["prefetch"].append(p) or True)
+        monkeypatch.setattr(self.widget._prefetcher, "cancel", lambda p: calls["cancel"].append(p))
+
+        self.widget.setPath("/a/b")
+        item = self.widget._breadcrumb_items[-1]
+        item.hover_intent.emit(item.path)
+        item.hover_left.emit(item.path)
+        assert calls == {"prefetch": ["/a/b"], "cancel": ["/a/b"]}
+
+        # 無効化するとプリフェッチしない
+        self.widget.setHoverPrefetchEnabled(False)
+        assert self.widget.getHoverPrefetchEnabled() is False
+        item.hover_intent.emit(item.path)
+        assert calls["prefetch"] == ["/a/b"]
+
+        self.widget.setHoverPrefetchDelay(50)
+        assert item._hover_timer.interval() == 50
+
+    def test_ancestor_warmup_after_set_path(self, qtbot, tmp_path):
+        target = tmp_path / "a" / "b"
+        target.mkdir(parents=True)
+
+        assert self.widget.getAncestorWarmupEnabled() is False
+        self.widget.setAncestorWarmupEnabled(True)
+        self.widget.setPath(str(target))
+        qtbot.waitUntil(lambda: not self.widget._warmup.is_running(), timeout=2000)
+
+        cache = self.widget._prefetcher.cache
+        assert cache.get(str(target), record_stats=False) is not None
+        assert cache.get(str(target.parent), record_stats=False) is not None
+
+        stats = self.widget.warmupStats()
+        assert stats["runs"] >= 1
+        assert "cache_hit_rate" in stats
+
+    def test_navigation_predictor_prefetches_likely_targets(self, monkeypatch):
+        from breadcrumb_addressbar.predictor import NavigationPredictor
+
+        prefetched: list[str] = []
+        monkeypatch.setattr(self.widget._prefetcher, "prefetch", lambda p: prefetched.append(p) or True)
+
+        assert self.widget.predictionStats() == {}
+        predictor = NavigationPredictor()
+        self.widget.setNavigationPredictor(predictor, top_k=1)
+        assert self.widget.getNavigationPredictor() is predictor
+
+        self.widget.setPath("/p")
+        self.widget.setPath("/p/build")
+        self.widget.setPath("/p")
+        assert prefetched == ["/p/build"]
+
+        self.widget.setPath("/p/build")
+        stats = self.widget.predictionStats()
+        assert stats["hits"] == 1
+        assert stats["prefetches"] == len(prefetched)
+
+    def test_persistent_listing_store_attaches_to_cache(self):
+        from breadcrumb_addressbar.store import PersistentListingStore
+
+        store = PersistentListingStore(":memory:")
+        self.widget.setPersistentListingStore(store)
+        try:
+            assert self.widget.getPersistentListingStore() is store
+        finally:
+            self.widget.setPersistentListingStore(None)
+        assert self.widget.getPersistentListingStore() is None
+
+    def test_show_folder_popup_reuses_cached_menu(self, tmp_path, monkeypatch):
+        from breadcrumb_addressbar.popup import FolderSelectionPopup
+
+        (tmp_path / "child").mkdir()
+        monkeypatch.setattr(FolderSelectionPopup, "popup", lambda self, pos: None)
+        self.widget.setPath(str(tmp_path))
+
+        self.widget._show_folder_popup(str(tmp_path))
+        first = self.widget._popup
+        self.widget._show_folder_popup(str(tmp_path))
+        assert self.widget._popup is first
+        assert self.widget.popupCacheStats()["hits"] == 1
+
+        self.widget.setPopupCacheSize(1)
+        assert self.widget.popupCacheStats()["menus"] == 1
+
+    def test_folder_filter_is_per_bar(self, tmp_path, monkeypatch):
+        from breadcrumb_addressbar.filters import COMMON_EXCLUDES, FolderFilter
+        from breadcrumb_addressbar.listing import get_listing_cache
+        from breadcrumb_addressbar.popup import FolderSelectionPopup
+
+        for name in ("src", "node_modules", ".git", ".github"):
+            (tmp_path / name).mkdir()
+        monkeypatch.setattr(FolderSelectionPopup, "popup", lambda self, pos: None)
+        self.widget.setPath(str(tmp_path))
+
+        self.widget.setFolderFilter(FolderFilter(exclude=COMMON_EXCLUDES, include=[".github"]))
+        self.widget._show_folder_popup(str(tmp_path))
+        assert [a.text() for a in self.widget._popup.actions()] == [".github", "src"]
+        # 共有キャッシュのルールは変わらない
+        assert self.widget.getFolderFilter() is not get_listing_cache().folder_filter
+        assert get_listing_cache().folder_filter == FolderFilter()
+
+        self.widget.setFolderFilter(None)
+        self.widget._show_folder_popup(str(tmp_path))
+        assert [a.text() for a in self.widget._popup.actions()] == ["node_modules", "src"]
+
+    def test_list_popup_with_metadata_columns(self, qtbot, tmp_path, monkeypatch):
+        from breadcrumb_addressbar.list_popup import FolderListPopup
+
+        (tmp_path / "child").mkdir()
+        monkeypatch.setattr(FolderListPopup, "show", lambda self: None)
+        self.widget.setPath(str(tmp_path))
+        self.widget.setUseListPopup(True)
+        self.widget.setListPopupMetadataColumns(True)
+        assert self.widget.getUseListPopup() and self.widget.getListPopupMetadataColumns()
+
+        self.widget._show_folder_popup(str(tmp_path))
+        model = self.widget._list_popup.model()
+        qtbot.waitUntil(lambda: model.rowCount() == 1, timeout=2000)
+        assert model.columnCount() == 3
+
+    def test_frecent_folders_are_recorded_and_pinned(self, tmp_path, monkeypatch):
+        from breadcrumb_addressbar.frecency import FrecencyStore
+        from breadcrumb_addressbar.popup import FolderSelectionPopup
+
+        for name in ("alpha", "beta"):
+            (tmp_path / name).mkdir()
+        monkeypatch.setattr(FolderSelectionPopup, "popup", lambda self, pos: None)
+        store = FrecencyStore()
+        self.widget.setFrecencyStore(store, pinned_count=1)
+        assert self.widget.getFrecencyStore() is store
+
+        self.widget.setPath(str(tmp_path))
+        self.widget._show_folder_popup(str(tmp_path))
+        assert self.widget._popup.pinnedFolders() == []
+
+        self.widget._on_folder_selected(str(tmp_path / "beta"))
+        assert store.top(str(tmp_path)) == [str(tmp_path / "beta")]
+        # 親フォルダのポップアップは固定表示を反映して作り直される
+        self.widget._show_folder_popup(str(tmp_path))
+        assert self.widget._popup.pinnedFolders() == [str(tmp_path / "beta")]
+
+    def test_subtree_search(self, qtbot, tmp_path, monkeypatch):
+        from breadcrumb_addressbar.popup import FolderSelectionPopup
+
+        (tmp_path / "src" / "build").mkdir(parents=True)
+        monkeypatch.setattr(FolderSelectionPopup, "popup", lambda self, pos: None)
+        self.widget.setSubtreeSearchEnabled(True, max_depth=3)
+        assert self.widget.getSubtreeSearchEnabled()
+        self.widget.setPath(str(tmp_path))
+        self.widget._show_folder_popup(str(tmp_path))
+        assert self.widget._popup.isSearchEnabled()
+
+        popup = self.widget.searchBelow(str(tmp_path), "build")
+        assert popup is not self.widget._popup
+        qtbot.waitUntil(lambda: str(tmp_path / "src" / "build") in popup._folder_actions, timeout=5000)
+        popup._folder_actions[str(tmp_path / "src" / "build")].trigger()
+        assert self.widget.getPath() == str(tmp_path / "src" / "build")
+
+    def test_bookmarks(self, tmp_path, monkeypatch):
+        from breadcrumb_addressbar.bookmark_popup import BookmarkPopup
+        from breadcrumb_addressbar.bookmarks import BookmarkStore
+
+        store = BookmarkStore(str(tmp_path / "bookmarks.json"))
+        self.widget.setBookmarkStore(store)
+        self.widget.setPath(str(tmp_path))
+        self.widget.enableBookmarks(True)
+        assert self.widget.isBookmarksEnabled()
+        # バーの構築・表示だけではファイルを読まない
+        assert not store.is_loaded()
+        assert self.widget._layout.indexOf(self.widget._bookmark_button) == self.widget._layout.count() - 1
+
+        child = str(tmp_path / "child")
+        assert self.widget.addBookmark(child)
+        assert self.widget.addBookmark()
+        assert self.widget.getBookmarks(under=str(tmp_path)) == [("child", child)]
+        assert self.widget.removeBookmark()
+        assert self.widget.getBookmarks() == [("child", child)]
+
+        # ボタンは表示更新をまたいで再利用される
+        self.widget.setPath(child)
+        assert self.widget._layout.indexOf(self.widget._bookmark_button) == self.widget._layout.count() - 1
+
+        monkeypatch.setattr(BookmarkPopup, "popup", lambda self, pos: None)
+        self.widget._bookmark_button.click()
+        selected: list[str] = []
+        self.widget.folderSelected.connect(selected.append)
+        self.widget.setPath(str(tmp_path))
+        self.widget.showBookmarksPopup()
+        self.widget._bookmark_popup.actions()[2].trigger()
+        assert selected == [child] and self.widget.getPath() == child
+
+    def test_jump_box_queries_folder_index(self, qtbot, tmp_path):
+        from breadcrumb_addressbar.indexer import FolderIndexer
+
+        (tmp_path / "alpha" / "target").mkdir(parents=True)
+        indexer = FolderIndexer([str(tmp_path)])
+        with qtbot.waitSignal(indexer.indexUpdated, timeout=5000):
+            indexer.start()
+
+        self.widget.setPath(str(tmp_path))
+        self.widget.setJumpBoxEnabled(True)
+        self.widget.setFolderIndexer(indexer)
+        assert self.widget.isJumpBoxEnabled() and self.widget.getFolderIndexer() is indexer
+        box = self.widget._jump_box
+        assert self.widget._layout.indexOf(box) == self.widget._layout.count() - 1
+
+        box.setText("targ")
+        box.textEdited.emit("targ")
+        # 索引の照合器はワーカースレッドで作られ、できたら候補が更新される
+        qtbot.waitUntil(lambda: box.candidates() == [str(tmp_path / "alpha" / "target")], timeout=5000)
+        box.returnPressed.emit()
+        assert self.widget.getPath() == str(tmp_path / "alpha" / "target")
+        assert self.widget._layout.indexOf(box) == self.widget._layout.count() - 1
+
+        self.widget.setJumpBoxEnabled(False)
+        assert not self.widget.isJumpBoxEnabled()
+
+    def test_index_changes_patch_the_jump_matcher(self, qtbot, tmp_path):
+        from breadcrumb_addressbar.indexer import FolderIndexer
+
+        (tmp_path / "projects" / "old").mkdir(parents=True)
+        indexer = FolderIndexer([str(tmp_path)])
+        with qtbot.waitSignal(indexer.indexUpdated, timeout=5000):
+            indexer.start()
+        self.widget.setFolderIndexer(indexer)
+        old = str(tmp_path / "projects" / "old")
+        qtbot.waitUntil(lambda: old in self.widget.jumpCandidates("old"), timeout=5000)
+        matcher = self.widget._index_matcher
+
+        # 監視による追加・削除は作り直さずに反映する
+        (tmp_path / "projects" / "old").rmdir()
+        (tmp_path / "projects" / "fresh" / "deep").mkdir(parents=True)
+        with qtbot.waitSignal(indexer.folderChanged, timeout=5000):
+            indexer._on_directory_changed(str(tmp_path / "projects"))
+        assert self.widget.jumpCandidates("freshdeep")[0] == str(tmp_path / "projects" / "fresh" / "deep")
+        assert old not in self.widget.jumpCandidates("old")
+        assert self.widget._index_matcher is matcher
+
+    def test_mount_latency_stats(self, tmp_path):
+        (tmp_path / "a").mkdir()
+        self.widget._prefetcher.cache.get_or_scan(str(tmp_path))
+
+        stats = self.widget.mountLatencyStats()
+        device = os.stat(tmp_path).st_dev
+        assert stats[device]["scan_samples"] >= 1
+        assert stats[device]["stat_p50"] >= 0.0
+        assert stats[device]["slow"] is False
+
+    def test_scan_process_pool(self, tmp_path):
+        from breadcrumb_addressbar.filters import FolderFilter
+        from breadcrumb_addressbar.listing import get_listing_cache
+        from breadcrumb_addressbar.scanpool import ScanProcessPool
+
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        pool = ScanProcessPool(processes=1)
+        try:
+            self.widget.setScanProcessPool(pool)
+            assert get_listing_cache().scan_pool is pool
+            # 専用キャッシュに切り替えてもプールは引き継ぐ
+            self.widget.setFolderFilter(FolderFilter(exclude=["b*"]))
+            assert self.widget.getScanProcessPool() is pool
+            assert [name for name, _ in self.widget._prefetcher.cache.get_or_scan(str(tmp_path))] == ["a"]
+            assert pool.stats()["requests"] >= 2
+
+            self.widget.setScanProcessPool(None)
+            assert self.widget.getScanProcessPool() is None
+        finally:
+            get_listing_cache().set_scan_pool(None)
+            pool.close()
+
+    def test_refresh_and_watcher_forget_failed_folders(self, qtbot, tmp_path):
+        from breadcrumb_addressbar.indexer import FolderIndexer
+
+        cache = self.widget._prefetcher.cache
+        missing = str(tmp_path / "gone")
+        with pytest.raises(FileNotFoundError):
+            cache.get_or_scan(missing)
+        assert cache.failure(missing) is not None
+
+        self.widget.refreshFolder(missing)
+        assert cache.failure(missing) is None
+
+        indexer = FolderIndexer([str(tmp_path)])
+        with qtbot.waitSignal(indexer.indexUpdated, timeout=5000):
+            indexer.start()
+        self.widget.setFolderIndexer(indexer)
+        with pytest.raises(FileNotFoundError):
+            cache.get_or_scan(missing)
+
+        # 監視中の親フォルダが変わると、その下の失敗は忘れる
+        (tmp_path / "gone").mkdir()
+        with qtbot.waitSignal(indexer.folderChanged, timeout=5000):
+            indexer._on_directory_changed(str(tmp_path))
+        assert cache.failure(missing) is None
+        assert cache.get_or_scan(missing) == []
+
+    def test_jump_candidates_rank_history_bookmarks_and_index(self, qtbot, tmp_path):
+        from breadcrumb_addressbar.bookmarks import BookmarkStore
+        from breadcrumb_addressbar.frecency import FrecencyStore
+        from breadcrumb_addressbar.indexer import FolderIndexer
+
+        (tmp_path / "projects" / "alpha" / "build").mkdir(parents=True)
+        (tmp_path / "misc").mkdir()
+        indexer = FolderIndexer([str(tmp_path)])
+        with qtbot.waitSignal(indexer.indexUpdated, timeout=5000):
+            indexer.start()
+
+        self.widget.setFolderIndexer(indexer)
+        build = str(tmp_path / "projects" / "alpha" / "build")
+        qtbot.waitUntil(lambda: self.widget.jumpCandidates("prjbuild") == [build], timeout=5000)
+
+        self.widget.setFrecencyStore(FrecencyStore())
+        self.widget.setBookmarkStore(BookmarkStore())
+        self.widget.addBookmark("/elsewhere/prj-build")
+        results = self.widget.jumpCandidates("prjbuild")
+        assert set(results) == {build, "/elsewhere/prj-build"}
+
+        # 選択したフォルダは履歴の候補にも入る
+        self.widget._on_folder_selected(str(tmp_path / "misc"))
+        assert self.widget.jumpCandidates("misc")[0] == str(tmp_path / "misc")
+
+        self.widget.showJumpPopup()
+        popup = self.widget._jump_popup
+        popup.line_edit().textEdited.emit("prjbuild")
+        assert build in popup.candidates()
+        best = popup.candidates()[0]
+        popup.line_edit().returnPressed.emit()
+        assert self.widget.getPath() == best
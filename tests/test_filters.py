@@ -0,0 +1,51 @@
+"""
+Tests for `breadcrumb_addressbar.filters` (FolderFilter).
+"""
+
+import re
+
+import pytest
+
+from breadcrumb_addressbar.filters import COMMON_EXCLUDES, DEFAULT_FILTER, FolderFilter
+
+
+class TestFolderFilter:
+    def test_default_hides_dot_folders_only(self):
+        assert DEFAULT_FILTER.is_visible("src")
+        assert DEFAULT_FILTER.is_visible("node_modules")
+        assert not DEFAULT_FILTER.is_visible(".git")
+
+    def test_excludes_includes_and_hidden(self):
+        rules = FolderFilter(exclude=[*COMMON_EXCLUDES, "build*", r"re:tmp\d+"], include=[".github", "build-keep"])
+
+        assert not rules.is_visible("node_modules")
+        assert not rules.is_visible("__pycache__")
+        assert not rules.is_visible(".git")
+        assert not rules.is_visible(".cache")
+        assert not rules.is_visible("build-output")
+        assert not rules.is_visible("tmp42")
+        # パターンは名前全体に一致させる
+        assert rules.is_visible("tmp42x")
+        assert rules.is_visible("rebuild")
+        # includeは除外や隠しフォルダより優先する
+        assert rules.is_visible(".github")
+        assert rules.is_visible("build-keep")
+
+    def test_show_hidden(self):
+        rules = FolderFilter(exclude=[".git"], show_hidden=True)
+        assert rules.is_visible(".cache")
+        assert not rules.is_visible(".git")
+        assert FolderFilter(show_hidden=True).is_visible(".anything")
+
+    def test_fingerprint_identifies_rules(self):
+        a = FolderFilter(exclude=["node_modules"])
+        b = FolderFilter(exclude=["node_modules"])
+        c = FolderFilter(exclude=["node_modules"], show_hidden=True)
+
+        assert a == b and hash(a) == hash(b)
+        assert a.fingerprint == b.fingerprint != c.fingerprint
+        assert a != DEFAULT_FILTER
+
+    def test_invalid_regex(self):
+        with pytest.raises(re.error):
+            FolderFilter(exclude=["re:("])
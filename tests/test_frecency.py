@@ -0,0 +1,93 @@
+"""
+Tests for `breadcrumb_addressbar.frecency` (FrecencyStore).
+"""
+
+from breadcrumb_addressbar.frecency import FrecencyStore
+
+DAY = 24 * 3600.0
+
+
+def test_top_orders_by_frequency_and_recency():
+    store = FrecencyStore(half_life=DAY)
+    for _ in range(3):
+        store.record("/p/build", timestamp=0.0)
+    store.record("/p/docs", timestamp=0.0)
+    assert store.top("/p", k=2) == ["/p/build", "/p/docs"]
+    assert store.top("/p", k=1) == ["/p/build"]
+    assert store.top("/unknown") == []
+
+    # 4日後の1回の訪問は、減衰した過去3回（合計3/16）より重い
+    store.record("/p/docs", timestamp=4 * DAY)
+    assert store.top("/p", k=2) == ["/p/docs", "/p/build"]
+
+
+def test_score_decays_with_half_life():
+    store = FrecencyStore(half_life=DAY)
+    store.record("/p/a", timestamp=0.0)
+    store.record("/p/a", timestamp=0.0)
+    assert abs(store.score("/p/a", now=0.0) - 2.0) < 1e-9
+    assert abs(store.score("/p/a", now=DAY) - 1.0) < 1e-9
+    assert store.score("/p/missing") == 0.0
+
+
+def test_memory_is_bounded():
+    store = FrecencyStore(max_entries=10, max_children=2, half_life=DAY)
+    store.record("/a/1", timestamp=0.0)
+    store.record("/a/1", timestamp=0.0)
+    store.record("/a/2", timestamp=0.0)
+    store.record("/a/3", timestamp=0.0)  # 今記録した /a/3 は残し、/a/2 が捨てられる
+    assert store.top("/a", k=5) == ["/a/1", "/a/3"]
+
+    for i in range(20):
+        store.record(f"/b{i}/x", timestamp=float(i))
+    stats = store.stats()
+    assert stats["entries"] <= 10
+    assert stats["records"] == 24
+    # 最近のフォルダが残る
+    assert store.top("/b19") == ["/b19/x"]
+
+
+def test_remove_and_clear():
+    store = FrecencyStore()
+    store.record("/p/a")
+    store.record("/p/b")
+    store.remove("/p/a")
+    store.remove("/p/unknown")
+    assert store.top("/p") == ["/p/b"]
+
+    store.clear()
+    assert store.top("/p") == []
+    assert store.stats() == {"entries": 0, "parents": 0, "records": 0}
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    store = FrecencyStore(half_life=DAY)
+    store.record("/p/a", timestamp=0.0)
+    store.record("/p/b", timestamp=DAY)
+    file_path = str(tmp_path / "sub" / "frecency.json")
+    assert store.save(file_path)
+
+    loaded = FrecencyStore(half_life=DAY)
+    assert loaded.load(file_path)
+    assert loaded.top("/p") == ["/p/b", "/p/a"]
+    assert abs(loaded.score("/p/a", now=DAY) - 0.5) < 1e-9
+
+    # 半減期が異なるストアでも減衰量は保存時の半減期に従う
+    rescaled = FrecencyStore(half_life=2 * DAY)
+    assert rescaled.load(file_path)
+    assert abs(rescaled.score("/p/a", now=0.0) - 1.0) < 1e-9
+
+
+def test_load_rejects_missing_or_invalid_files(tmp_path):
+    store = FrecencyStore()
+    store.record("/p/a")
+    assert not store.load(str(tmp_path / "missing.json"))
+
+    broken = tmp_path / "broken.json"
+    broken.write_text("{not json", encoding="utf-8")
+    assert not store.load(str(broken))
+
+    other = tmp_path / "other.json"
+    other.write_text('{"version": 99}', encoding="utf-8")
+    assert not store.load(str(other))
+    assert store.top("/p") == ["/p/a"]
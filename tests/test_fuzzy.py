@@ -0,0 +1,124 @@
+"""
+Tests for `breadcrumb_addressbar.fuzzy` (fuzzy_score, FuzzyMatcher).
+"""
+
+from breadcrumb_addressbar.fuzzy import FuzzyMatcher, fuzzy_score
+
+
+def test_score_requires_subsequence():
+    assert fuzzy_score("prjbuild", "/srv/projects/alpha/build") is not None
+    assert fuzzy_score("build", "/srv/bild") is None
+    assert fuzzy_score("", "/anything") == 0
+
+
+def test_score_prefers_boundaries_case_and_basename():
+    # 単語の先頭に一致するほうが高い
+    assert fuzzy_score("pb", "/x/proj/build") > fuzzy_score("pb", "/x/xpxb")
+    # 大文字小文字まで一致するほうが高い
+    assert fuzzy_score("Docs", "/a/Docs") > fuzzy_score("Docs", "/a/docs")
+    # camelCaseの山
+    assert fuzzy_score("mf", "/src/myFolder") > fuzzy_score("mf", "/src/mxfolder")
+    # 末尾のフォルダ名に一致するほうが高い
+    assert fuzzy_score("build", "/build/src") < fuzzy_score("build", "/src/build")
+    # 末尾のフォルダ名でも、単語の途中に一致するだけでは加点しない
+    assert fuzzy_score("build", "/srv/rebuild") < fuzzy_score("build", "/build/srv")
+
+
+def test_score_uses_the_best_alignment():
+    # 右から貪欲に合わせると「build」の「b」を末尾の「b」に取ってしまう
+    assert fuzzy_score("pb", "/proj/build/b") > fuzzy_score("pb", "/proj/xbuild/b")
+    # 要望の例: 「prjbuild」は紛らわしい候補より上に来る
+    target = "/srv/projects/alpha/build"
+    noise = ["/projects1/build2/docs4", "/lib3/projects12/build7", "/src0/projects0/build0", "/srv/xprxj/rebuild"]
+    assert all(fuzzy_score("prjbuild", target) > fuzzy_score("prjbuild", path) for path in noise)
+
+
+def test_matcher_ranks_top_k():
+    paths = [
+        "/srv/projects/alpha/build",
+        "/srv/projects/alpha/build/logs",
+        "/srv/xprxj/rebuild",
+        "/home/user/pictures",
+        "/srv/projects/alpha/build",  # 重複は除かれる
+    ]
+    matcher = FuzzyMatcher(paths)
+    assert len(matcher) == 4
+    assert matcher.query("prjbuild", k=1) == ["/srv/projects/alpha/build"]
+    assert len(matcher.query("prjbuild", k=10)) == 3
+    assert matcher.query("pictures") == ["/home/user/pictures"]
+    assert matcher.query("zzz") == [] and matcher.query("") == []
+
+
+def test_matcher_narrows_incrementally():
+    matcher = FuzzyMatcher([f"/data/set{i}/build{i % 7}" for i in range(500)] + ["/srv/projects/alpha/build"])
+    for end in range(1, len("prjbuild") + 1):
+        results = matcher.query("prjbuild"[:end], k=3)
+    assert results == ["/srv/projects/alpha/build"]
+    stats = matcher.stats()
+    assert stats["queries"] == 8 and stats["narrowed"] == 7
+    assert stats["survivors"] == 1
+
+    # 前回の延長でない問い合わせは最初から絞り込む
+    matcher.query("set1")
+    assert matcher.stats()["narrowed"] == 7
+
+
+def test_scoring_is_bounded():
+    matcher = FuzzyMatcher([f"/root/dir{i}" for i in range(100)], max_scored=10)
+    assert len(matcher.query("dir", k=5)) == 5
+    stats = matcher.stats()
+    assert stats["scored"] == 10 and stats["truncated"] == 1
+    # 採点は短い候補から（同じ長さなら先に渡した候補が上位）
+    assert matcher.query("dir", k=1) == ["/root/dir0"]
+
+
+def test_truncation_does_not_depend_on_candidate_order():
+    # 上限を超える長い一致の後ろに、最も良い短い候補を置く
+    noise = [f"/srv/misc/proj{i}/deep/tree/of/build{i}" for i in range(500)]
+    noise += [f"/opt/{i}/nothing" for i in range(500)]
+    target = "/srv/projects/build"
+    matcher = FuzzyMatcher([*noise, target], max_scored=10)
+    assert matcher.query("prjbuild", k=1) == [target]
+    # 上界が最も高い候補から採点するので、最初の1件で足りる
+    stats = matcher.stats()
+    assert stats["scored"] == 1 and stats["truncated"] == 0
+
+
+def test_truncated_ranking_keeps_the_best_match():
+    # 同点の多い紛らわしい候補で上限に達しても、要望の例は先頭に来る
+    target = "/srv/projects/alpha/build"
+    shapes = [("projects", "build", "docs"), ("lib", "projects", "build"), ("src", "projects", "build")]
+    noise = [f"/{a}{i}/{b}{j}/{c}{i % 9}" for i in range(300) for a, b, c in shapes for j in range(3)]
+    matcher = FuzzyMatcher([*noise, "/srv/xprxj/rebuild", target], max_scored=16)
+    assert matcher.query("prjbuild", k=3)[0] == target
+    stats = matcher.stats()
+    assert stats["scored"] == 16 and stats["truncated"] == 1
+
+
+def test_extending_a_query_only_checks_previous_matches():
+    # 「a」と「b」を含むが「ab」の順には含まない候補
+    matcher = FuzzyMatcher([f"/b{i}/a" for i in range(200)] + ["/ab/c"])
+    assert matcher.query("ab") == ["/ab/c"]
+    assert matcher.stats()["checked"] == 201
+    assert matcher.query("abc") == ["/ab/c"]
+    assert matcher.stats()["checked"] == 1
+
+
+def test_warm_up_builds_every_candidate_character():
+    matcher = FuzzyMatcher(["/a/Ab", "/b/c"])
+    matcher.warm_up()
+    assert matcher.query("ab") == ["/a/Ab"]
+    assert matcher.query("z") == [] and matcher.query("/bc") == ["/b/c"]
+
+
+def test_patch_applies_added_and_removed_folders():
+    matcher = FuzzyMatcher(["/srv/projects", "/srv/projects/build", "/srv/other/build"])
+    assert matcher.patch(added=["/srv/new/build"], removed=["/srv/projects/"])
+    assert len(matcher) == 4 and matcher.stats()["patched"] == 2
+    assert sorted(matcher.query("build")) == ["/srv/new/build", "/srv/other/build"]
+    # 追加した後に削除されたフォルダも除く
+    assert matcher.patch(removed=["/srv/new"])
+    assert matcher.query("build") == ["/srv/other/build"]
+    # 上限を超える差分は反映せず、作り直しを求める
+    assert not matcher.patch(added=[f"/x/{i}" for i in range(5000)])
+    assert matcher.query("x") == []
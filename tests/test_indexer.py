@@ -0,0 +1,157 @@
+"""
+Tests for `breadcrumb_addressbar.indexer` (FolderIndex, crawl_folders, FolderIndexer).
+"""
+
+import os
+
+import pytest
+
+# Headless 対応
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def _is_pytest_qt_enabled() -> bool:
+    try:
+        import pytestqt  # type: ignore  # noqa: F401
+
+        return True
+    except Exception:
+        return False
+
+
+PYTEST_QT_ENABLED = _is_pytest_qt_enabled()
+
+try:
+    from breadcrumb_addressbar.filters import FolderFilter
+    from breadcrumb_addressbar.indexer import FolderIndex, FolderIndexer, crawl_folders
+
+    INDEXER_AVAILABLE = True
+except Exception:  # pragma: no cover - import guard only
+    INDEXER_AVAILABLE = False
+
+
+def _make_tree(base) -> None:
+    for rel in ("src/app/views", "src/lib", "docs/guide", "build1", "build2", ".cache/x", "node_modules/pkg"):
+        (base / rel).mkdir(parents=True)
+    (base / "src" / "README.txt").write_text("x")
+
+
+pytestmark = pytest.mark.skipif(not INDEXER_AVAILABLE, reason="PySide6/indexer not available")
+
+
+class TestFolderIndex:
+    def test_paths_are_rebuilt_from_parents(self):
+        index = FolderIndex()
+        root = index.add_root(os.path.join(os.sep, "data"))
+        a = index.add(root, "a")
+        b = index.add(a, "bé")
+        assert index.path(b) == os.path.join(os.sep, "data", "a", "bé")
+        assert index.name(b) == "bé" and index.parent(b) == a
+        assert index.depth(b) == 2 and index.children(root) == [a]
+        assert len(index) == 3
+
+    def test_search_is_case_insensitive_and_skips_removed(self):
+        index = FolderIndex()
+        root = index.add_root(os.path.join(os.sep, "r"))
+        build = index.add(root, "Build")
+        index.add(build, "build-build")
+        other = index.add(root, "docs")
+        rebuild = index.add(other, "rebuild")
+
+        assert index.search("BUILD") == [build, build + 1, rebuild]
+        assert index.search("build", limit=1) == [build]
+        assert index.search("") == [] and index.search("a\0b") == []
+
+        assert index.remove_subtree(build) == 2
+        assert index.search("build") == [rebuild]
+        assert index.stats()["dead"] == 2 and len(index) == 3
+
+    def test_children_follow_additions_and_removals(self):
+        index = FolderIndex()
+        root = index.add_root(os.path.join(os.sep, "r"))
+        a, b, c = (index.add(root, name) for name in "abc")
+        index.add(b, "inner")
+        snapshot = index.copy()
+
+        assert index.remove_subtree(b) == 2
+        d = index.add(root, "d")
+        assert index.children(root) == [a, c, d]
+        assert index.children(b) == []
+        assert index.remove_subtree(a) == 1 and index.remove_subtree(d) == 1
+        assert index.children(root) == [c]
+        # 複製は元の索引の変更の影響を受けない
+        assert snapshot.children(root) == [a, b, c] and len(snapshot) == 5
+
+
+class TestCrawlFolders:
+    def test_filter_and_depth(self, tmp_path):
+        _make_tree(tmp_path)
+        folder_filter = FolderFilter(exclude=["node_modules"])
+        index = FolderIndex()
+        root = index.add_root(str(tmp_path))
+        index.extend(root, *crawl_folders(str(tmp_path), folder_filter))
+        paths = {os.path.relpath(index.path(i), tmp_path) for i in index.id_range()} - {"."}
+        assert paths == {"src", "src/app", "src/app/views", "src/lib", "docs", "docs/guide", "build1", "build2"}
+
+        parents, names = crawl_folders(str(tmp_path), folder_filter, max_depth=1)
+        assert sorted(names) == [b"build1", b"build2", b"docs", b"src"]
+        assert set(parents) == {-1}
+
+    @pytest.mark.skipif(not hasattr(os, "symlink"), reason="symlinks not supported")
+    def test_symlink_cycles_terminate(self, tmp_path):
+        (tmp_path / "a" / "b").mkdir(parents=True)
+        try:
+            os.symlink(tmp_path / "a", tmp_path / "a" / "b" / "loop")
+            os.symlink(tmp_path / "a" / "b", tmp_path / "alias")
+        except OSError:
+            pytest.skip("cannot create symlinks")
+        parents, names = crawl_folders(str(tmp_path))
+        # 同じディレクトリは一度だけ（幅優先で先に見つかった浅い名前で）索引される
+        assert sorted(names) == [b"a", b"alias"]
+
+
+@pytest.mark.skipif(not PYTEST_QT_ENABLED, reason="pytest-qt not available")
+class TestFolderIndexer:
+    def test_background_crawl_and_search(self, qtbot, tmp_path):
+        _make_tree(tmp_path)
+        indexer = FolderIndexer([str(tmp_path)])
+        with qtbot.waitSignal(indexer.indexUpdated, timeout=5000):
+            indexer.start()
+        assert indexer.search("build") == [str(tmp_path / "build1"), str(tmp_path / "build2")]
+        assert indexer.search("VIEWS") == [str(tmp_path / "src" / "app" / "views")]
+        stats = indexer.stats()
+        assert stats["entries"] == 11 and stats["watched"] == 11
+
+    def test_changes_are_patched_into_the_index(self, qtbot, tmp_path):
+        _make_tree(tmp_path)
+        indexer = FolderIndexer([str(tmp_path)], max_depth=2)
+        with qtbot.waitSignal(indexer.indexUpdated, timeout=5000):
+            indexer.start()
+
+        (tmp_path / "new" / "deep" / "er").mkdir(parents=True)
+        (tmp_path / "docs" / "guide").rmdir()
+        # 再一覧はクロール用のスレッドで行い、結果だけをメインスレッドで反映する
+        for path in (tmp_path, tmp_path / "docs"):
+            with qtbot.waitSignal(indexer.folderChanged, timeout=5000):
+                indexer._on_directory_changed(str(path))
+        assert indexer.search("guide") == []
+        # 深さの上限は追加分にも適用される
+        assert indexer.search("deep") == [str(tmp_path / "new" / "deep")]
+        assert indexer.search("er") == []
+
+    def test_sharded_crawl_matches_single_thread(self, qtbot, tmp_path):
+        _make_tree(tmp_path)
+        for i in range(4):
+            (tmp_path / f"extra{i}" / "inner").mkdir(parents=True)
+        single = FolderIndexer([str(tmp_path)])
+        sharded = FolderIndexer([str(tmp_path)], processes=2)
+        for indexer in (single, sharded):
+            with qtbot.waitSignal(indexer.indexUpdated, timeout=30000):
+                indexer.start()
+
+        def all_paths(indexer):
+            index = indexer.index()
+            return sorted(index.path(i) for i in index.id_range())
+
+        assert all_paths(sharded) == all_paths(single)
+        assert len(sharded.index()) == 19
@@ -0,0 +1,74 @@
+"""
+Tests for `breadcrumb_addressbar.latency` (MountLatencyTracker).
+"""
+
+import os
+
+import pytest
+
+from breadcrumb_addressbar.latency import OP_SCAN, OP_STAT, MountLatencyTracker
+
+MOUNT = os.path.join(os.sep, "mnt", "nfs")
+
+
+def test_percentiles_per_mount():
+    tracker = MountLatencyTracker()
+    for i in range(1, 101):
+        tracker.record(OP_STAT, i / 1000, device=7, path=MOUNT)
+    tracker.record(OP_SCAN, 0.5, device=7)
+    tracker.record(OP_STAT, 0.0001, device=1, path=os.sep)
+
+    stats = tracker.stats()
+    assert set(stats) == {1, 7}
+    nfs = stats[7]
+    assert nfs["path"] == MOUNT
+    assert nfs["operations"] == 101
+    assert nfs["stat_samples"] == 100
+    assert nfs["stat_p50"] == pytest.approx(0.050)
+    assert nfs["stat_p90"] == pytest.approx(0.090)
+    assert nfs["stat_p99"] == pytest.approx(0.099)
+    assert nfs["scan_p50"] == pytest.approx(0.5)
+    assert nfs["slow"] is True
+    assert stats[1]["slow"] is False
+
+
+def test_paths_resolve_to_the_nearest_known_mount():
+    tracker = MountLatencyTracker(min_samples=2)
+    tracker.record(OP_STAT, 0.0001, device=1, path=os.sep)
+    tracker.record(OP_STAT, 0.2, device=7, path=MOUNT)
+
+    assert tracker.device_of(os.path.join(MOUNT, "a", "b")) == 7
+    assert tracker.device_of(os.path.join(os.sep, "home")) == 1
+    # 親のマウントが分からない失敗（タイムアウト等）も同じマウントに数える
+    tracker.record(OP_STAT, 0.3, path=os.path.join(MOUNT, "gone"))
+    assert tracker.is_slow(os.path.join(MOUNT, "a"))
+    assert not tracker.is_slow(os.path.join(os.sep, "home"))
+    assert tracker.concurrency(os.path.join(MOUNT, "a"), 4) == 1
+    assert tracker.concurrency(os.path.join(os.sep, "home"), 4) == 4
+
+
+def test_slow_mount_recovers_within_the_window():
+    tracker = MountLatencyTracker(window=4, min_samples=2)
+    for _ in range(4):
+        tracker.record(OP_STAT, 0.5, device=7, path=MOUNT)
+    assert tracker.is_slow(MOUNT)
+
+    for _ in range(3):
+        tracker.record(OP_STAT, 0.0001, device=7)
+    assert not tracker.is_slow(MOUNT)
+
+    tracker.set_slow_thresholds(0.0, 1.0)
+    assert tracker.is_slow(MOUNT)
+    tracker.clear()
+    assert not tracker.is_slow(MOUNT)
+    assert tracker.stats() == {}
+
+
+def test_stat_records_successes_and_failures(tmp_path):
+    tracker = MountLatencyTracker()
+    st = tracker.stat(str(tmp_path))
+    with pytest.raises(FileNotFoundError):
+        tracker.stat(str(tmp_path / "missing"))
+
+    assert tracker.device_of(str(tmp_path)) == st.st_dev
+    assert tracker.stats()[st.st_dev]["stat_samples"] == 2
@@ -0,0 +1,210 @@
+"""
+Tests for `breadcrumb_addressbar.list_popup` (FolderListModel / FolderListPopup).
+"""
+
+import os
+import threading
+
+import pytest
+
+# Headless 対応
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def _is_pytest_qt_enabled() -> bool:
+    try:
+        import pytestqt  # type: ignore  # noqa: F401
+
+        return True
+    except Exception:
+        return False
+
+
+PYTEST_QT_ENABLED = _is_pytest_qt_enabled()
+
+try:
+    from PySide6.QtCore import QPoint, Qt
+
+    from breadcrumb_addressbar.list_popup import (
+        COLUMN_ITEMS,
+        COLUMN_MODIFIED,
+        COLUMN_NAME,
+        FolderListModel,
+        FolderListPopup,
+        MetadataLoader,
+    )
+    from breadcrumb_addressbar.listing import SCAN_ERROR_NOT_FOUND, FolderListingCache
+    from breadcrumb_addressbar.popup import LOADING_TEXT, SCAN_ERROR_TEXTS
+
+    LIST_POPUP_AVAILABLE = True
+except Exception:  # pragma: no cover - import guard only
+    LIST_POPUP_AVAILABLE = False
+
+
+def _make_folders(base, count: int) -> list[tuple[str, str]]:
+    folders = []
+    for i in range(count):
+        folder = base / f"dir{i:03d}"
+        folder.mkdir()
+        (folder / "item").touch()
+        folders.append((folder.name, str(folder)))
+    return folders
+
+
+@pytest.mark.skipif(
+    (not LIST_POPUP_AVAILABLE) or (not PYTEST_QT_ENABLED),
+    reason="list popup/pytest-qt not available",
+)
+class TestFolderListModel:
+    @pytest.fixture(autouse=True)
+    def setup(self, qtbot):
+        self.loader = MetadataLoader()
+        self.model = FolderListModel(self.loader)
+        self.model.setMetadataColumns(True)
+        yield
+        self.loader.wait_for_done(2000)
+
+    def test_metadata_is_loaded_only_for_requested_rows(self, qtbot, tmp_path):
+        folders = _make_folders(tmp_path, 50)
+        self.model.setFolders(folders)
+        assert self.model.columnCount() == 3
+
+        # ビューが描画する行（ここでは先頭の3行）だけdata()が呼ばれる
+        for row in range(3):
+            assert self.model.data(self.model.index(row, COLUMN_ITEMS)) == ""
+            self.model.data(self.model.index(row, COLUMN_MODIFIED))
+
+        with qtbot.waitSignal(self.model.dataChanged, timeout=2000) as blocker:
+            pass
+        top_left, bottom_right = blocker.args[0], blocker.args[1]
+        assert (top_left.row(), bottom_right.row()) == (0, 2)
+        assert self.model.dataChangedRanges() == 1
+        assert self.loader.stats()["entries"] == 3
+        assert self.model.data(self.model.index(1, COLUMN_ITEMS)) == "1"
+        assert self.model.data(self.model.index(1, COLUMN_MODIFIED)) != ""
+        assert self.model.data(self.model.index(1, COLUMN_NAME)) == "dir001"
+
+    def test_loaded_rows_are_coalesced_into_ranges(self, tmp_path):
+        folders = _make_folders(tmp_path, 8)
+        self.model.setFolders(folders)
+
+        ranges: list[tuple[int, int]] = []
+        self.model.dataChanged.connect(lambda tl, br, roles: ranges.append((tl.row(), br.row())))
+        self.model._on_loaded([folders[i][1] for i in (5, 0, 1, 2, 7, 6)])
+        assert ranges == [(0, 2), (5, 7)]
+
+    def test_columnar_listing_is_used_without_copying(self, tmp_path):
+        from breadcrumb_addressbar.columnar import ColumnarListing
+        from breadcrumb_addressbar.sorting import FolderMetadata
+
+        folders = _make_folders(tmp_path, 8)
+        listing = ColumnarListing(str(tmp_path), [name for name, _ in folders])
+        self.model.setFolders(listing)
+        assert self.model._folders is listing
+        assert self.model.folderPath(3) == folders[3][1]
+
+        ranges: list[tuple[int, int]] = []
+        self.model.dataChanged.connect(lambda tl, br, roles: ranges.append((tl.row(), br.row())))
+        self.model._on_loaded([folders[i][1] for i in (1, 2, 6)] + [str(tmp_path / "gone")])
+        assert ranges == [(1, 2), (6, 6)]
+
+        # 一覧が持つメタデータ列はローダーを経由せずに表示する
+        listing.set_metadata({folders[0][1]: FolderMetadata(0, 7)}, item_counts=True)
+        self.model.setFolders(listing)
+        assert self.model.data(self.model.index(0, COLUMN_ITEMS)) == "7"
+        assert self.loader.stats()["entries"] == 0
+
+    def test_name_only_model(self, tmp_path):
+        folders = _make_folders(tmp_path, 2)
+        self.model.setMetadataColumns(False)
+        self.model.setFolders(folders)
+        assert self.model.columnCount() == 1
+        assert self.model.data(self.model.index(0, 0), Qt.ItemDataRole.UserRole) == folders[0][1]
+
+
+@pytest.mark.skipif(
+    (not LIST_POPUP_AVAILABLE) or (not PYTEST_QT_ENABLED),
+    reason="list popup/pytest-qt not available",
+)
+class TestFolderListPopup:
+    def test_populate_and_select(self, qtbot, tmp_path):
+        folders = _make_folders(tmp_path, 3)
+        popup = FolderListPopup(cache=FolderListingCache())
+        qtbot.addWidget(popup)
+
+        popup.showForPath(str(tmp_path), QPoint(0, 0))
+        # スキャンが終わるまでは読み込み中を表示し、終わったら一覧を入れる
+        assert popup.placeholderText() == LOADING_TEXT and popup.model().rowCount() == 0
+        qtbot.waitUntil(lambda: popup.model().rowCount() == 3, timeout=2000)
+        assert popup.placeholderText() == ""
+
+        with qtbot.waitSignal(popup.folderSelected, timeout=1000) as blocker:
+            popup.view().activated.emit(popup.model().index(2, 0))
+        assert blocker.args == [folders[2][1]]
+        assert not popup.isVisible()
+
+    def test_missing_directory_shows_the_reason(self, qtbot):
+        popup = FolderListPopup(cache=FolderListingCache())
+        qtbot.addWidget(popup)
+        popup.populateForPath("/nonexistent/path/for/list")
+        qtbot.waitUntil(lambda: popup.failureKind() == SCAN_ERROR_NOT_FOUND, timeout=2000)
+        assert popup.placeholderText() == SCAN_ERROR_TEXTS[SCAN_ERROR_NOT_FOUND]
+        assert popup.model().rowCount() == 0
+
+    def test_remembered_failure_shows_the_reason_at_once(self, qtbot, tmp_path):
+        cache = FolderListingCache()
+        missing = tmp_path / "missing"
+        with pytest.raises(OSError):
+            cache.get_or_scan(str(missing))
+        popup = FolderListPopup(cache=cache)
+        qtbot.addWidget(popup)
+
+        # 失敗を覚えているフォルダは、スキャンを待たずに理由を表示する
+        popup.populateForPath(str(missing))
+        assert popup.failureKind() == SCAN_ERROR_NOT_FOUND
+        assert popup.placeholderText() == SCAN_ERROR_TEXTS[SCAN_ERROR_NOT_FOUND]
+        assert not popup._prefetcher.is_pending(str(missing))
+
+    def test_populate_does_not_scan_on_the_calling_thread(self, qtbot, tmp_path, monkeypatch):
+        _make_folders(tmp_path, 2)
+        cache = FolderListingCache()
+        popup = FolderListPopup(cache=cache)
+        qtbot.addWidget(popup)
+        # ディレクトリに触れる呼び出し（mtimeの確認とスキャン）をしたスレッド
+        threads = []
+        for name in ("get", "get_or_scan"):
+            original = getattr(cache, name)
+
+            def record(*args, original=original, **kwargs):
+                threads.append(threading.get_ident())
+                return original(*args, **kwargs)
+
+            monkeypatch.setattr(cache, name, record)
+
+        popup.populateForPath(str(tmp_path))
+        qtbot.waitUntil(lambda: popup.model().rowCount() == 2, timeout=2000)
+        assert threads and threading.get_ident() not in threads
+
+    def test_metadata_columns_are_hidden_on_slow_mounts(self, qtbot, tmp_path):
+        from breadcrumb_addressbar.latency import MountLatencyTracker
+
+        _make_folders(tmp_path, 2)
+        tracker = MountLatencyTracker(min_samples=1)
+        popup = FolderListPopup(cache=FolderListingCache(latency_tracker=tracker))
+        qtbot.addWidget(popup)
+        popup.setMetadataColumns(True)
+
+        popup.populateForPath(str(tmp_path))
+        qtbot.waitUntil(lambda: popup.model().rowCount() == 2, timeout=2000)
+        assert popup.model().metadataColumns()
+
+        # 遅いマウントでは一時的に隠し、速くなれば元に戻す（キャッシュ済みの一覧はすぐに表示する）
+        tracker.set_slow_thresholds(0.0, 0.0)
+        popup.populateForPath(str(tmp_path))
+        assert not popup.model().metadataColumns()
+        assert popup.model().rowCount() == 2
+
+        tracker.set_slow_thresholds(60.0, 60.0)
+        popup.populateForPath(str(tmp_path))
+        assert popup.model().metadataColumns()
+        popup._prefetcher.wait_for_done(2000)
@@ -0,0 +1,486 @@
+"""
+Tests for `breadcrumb_addressbar.listing` (FolderListingCache / ListingPrefetcher).
+"""
+
+import os
+import threading
+
+import pytest
+
+# Headless 対応
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def _is_pytest_qt_enabled() -> bool:
+    try:
+        import pytestqt  # type: ignore  # noqa: F401
+
+        return True
+    except Exception:
+        return False
+
+
+PYTEST_QT_ENABLED = _is_pytest_qt_enabled()
+
+try:
+    from breadcrumb_addressbar import listing as listing_mod
+    from breadcrumb_addressbar.listing import (
+        FolderListingCache,
+        ListingPrefetcher,
+        SubdirProber,
+        collect_folder_metadata,
+        estimate_subdirectory_count,
+        has_subdirectory,
+        scan_folders,
+    )
+
+    LISTING_AVAILABLE = True
+except Exception:  # pragma: no cover - import guard only
+    LISTING_AVAILABLE = False
+
+
+@pytest.mark.skipif(not LISTING_AVAILABLE, reason="listing module not available")
+class TestFolderListingCache:
+    def test_scan_folders_skips_files_and_hidden(self, tmp_path):
+        (tmp_path / "beta").mkdir()
+        (tmp_path / "Alpha").mkdir()
+        (tmp_path / ".hidden").mkdir()
+        (tmp_path / "file.txt").touch()
+
+        folders = scan_folders(str(tmp_path))
+        assert [name for name, _ in folders] == ["Alpha", "beta"]
+        assert folders[0][1] == os.path.join(str(tmp_path), "Alpha")
+
+    def test_get_or_scan_hits_after_first_scan(self, tmp_path):
+        (tmp_path / "a").mkdir()
+        cache = FolderListingCache()
+
+        first = cache.get_or_scan(str(tmp_path))
+        second = cache.get_or_scan(str(tmp_path))
+
+        assert first is second
+        assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+    def test_changed_directory_is_a_miss(self, tmp_path):
+        (tmp_path / "a").mkdir()
+        cache = FolderListingCache()
+        cache.get_or_scan(str(tmp_path))
+
+        (tmp_path / "b").mkdir()
+        os.utime(tmp_path, ns=(0, 1))
+
+        assert cache.get(str(tmp_path)) is None
+        assert [name for name, _ in cache.get_or_scan(str(tmp_path))] == ["a", "b"]
+
+    def test_lru_eviction_and_invalidate(self, tmp_path):
+        dirs = []
+        for name in ("one", "two", "three"):
+            d = tmp_path / name
+            d.mkdir()
+            dirs.append(str(d))
+
+        cache = FolderListingCache(max_entries=2)
+        for d in dirs:
+            cache.get_or_scan(d)
+
+        assert cache.get(dirs[0]) is None
+        assert cache.get(dirs[2]) is not None
+
+        cache.invalidate(dirs[2])
+        assert cache.get(dirs[2]) is None
+        cache.invalidate()
+        assert cache.stats()["entries"] == 0
+
+    def test_persistent_store_serves_cold_cache(self, tmp_path, monkeypatch):
+        from breadcrumb_addressbar.store import PersistentListingStore
+
+        (tmp_path / "child").mkdir()
+        store = PersistentListingStore(":memory:")
+        warm = FolderListingCache()
+        warm.set_store(store)
+        expected = warm.get_or_scan(str(tmp_path))
+        assert not warm.needs_revalidation(str(tmp_path))
+
+        # 再起動後の空のキャッシュはスキャンせずにディスクから返す
+        def fail_scan(path: str, *args):
+            raise AssertionError("unexpected scan")
+
+        monkeypatch.setattr(listing_mod, "scan_folders", fail_scan)
+        cold = FolderListingCache()
+        cold.set_store(store)
+        assert cold.get_or_scan(str(tmp_path)) == expected
+        assert cold.needs_revalidation(str(tmp_path))
+
+        # peek()はディレクトリをstatせずにスナップショットを返す
+        peeking = FolderListingCache()
+        peeking.set_store(store)
+        monkeypatch.setattr(peeking, "stat", fail_scan)
+        assert peeking.peek(str(tmp_path)) == expected
+
+        monkeypatch.undo()
+        cold.rescan(str(tmp_path))
+        assert not cold.needs_revalidation(str(tmp_path))
+
+    def test_large_directories_are_stored_columnar(self, tmp_path):
+        from breadcrumb_addressbar.columnar import ColumnarListing
+
+        for name in ("build10", "build9", "alpha"):
+            (tmp_path / name).mkdir()
+        cache = FolderListingCache(columnar_min_entries=3)
+
+        listing = cache.get_or_scan(str(tmp_path))
+        assert isinstance(listing, ColumnarListing)
+        assert [name for name, _ in listing] == ["alpha", "build9", "build10"]
+        assert listing[1] == ("build9", os.path.join(str(tmp_path), "build9"))
+
+        cache.set_sort_mode("casefold")
+        assert cache.get(str(tmp_path)).names() == ["alpha", "build10", "build9"]
+        collected = cache.collect_metadata(str(tmp_path), item_counts=True)
+        assert collected.metadata_at(0).item_count == 0
+
+        # 少ないエントリのリストもしきい値を超えれば列形式で保持する
+        assert isinstance(cache.put(str(tmp_path), listing[:], 1), ColumnarListing)
+        assert not isinstance(FolderListingCache().put(str(tmp_path), list(listing), 1), ColumnarListing)
+
+    def test_listing_keeps_sort_keys_and_mode(self, tmp_path):
+        for name in ("build10", "build9"):
+            (tmp_path / name).mkdir()
+        cache = FolderListingCache()
+
+        listing = cache.get_or_scan(str(tmp_path))
+        assert [name for name, _ in listing] == ["build9", "build10"]
+        assert len(listing.keys) == 2
+
+        cache.set_sort_mode("casefold")
+        assert [name for name, _ in cache.get(str(tmp_path))] == ["build10", "build9"]
+        with pytest.raises(ValueError):
+            cache.set_sort_mode("random")
+
+    def test_folder_filter_is_part_of_cache_key(self, tmp_path):
+        from breadcrumb_addressbar.filters import FolderFilter
+        from breadcrumb_addressbar.store import PersistentListingStore
+
+        for name in ("src", "node_modules"):
+            (tmp_path / name).mkdir()
+        store = PersistentListingStore(":memory:")
+        cache = FolderListingCache()
+        cache.set_store(store)
+        assert [name for name, _ in cache.get_or_scan(str(tmp_path))] == ["node_modules", "src"]
+
+        cache.set_folder_filter(FolderFilter(exclude=["node_modules"]))
+        assert cache.get(str(tmp_path)) is None
+        assert [name for name, _ in cache.get_or_scan(str(tmp_path))] == ["src"]
+
+        # ディスク上のスナップショットもルールごとに分かれる
+        cold = FolderListingCache()
+        cold.set_store(store)
+        assert [name for name, _ in cold.get_or_scan(str(tmp_path))] == ["node_modules", "src"]
+        assert store.stats()["entries"] == 2
+
+    def test_collect_metadata_is_kept_with_listing(self, tmp_path, monkeypatch):
+        for i, name in enumerate(("a", "b", "c")):
+            folder = tmp_path / name
+            folder.mkdir()
+            for j in range(i):
+                (folder / f"item{j}").touch()
+            os.utime(folder, ns=(0, (3 - i) * 1_000_000_000))
+        cache = FolderListingCache()
+
+        listing = cache.collect_metadata(str(tmp_path), item_counts=True)
+        assert listing is cache.get(str(tmp_path))
+        assert listing.metadata[str(tmp_path / "c")] == (1_000_000_000, 2)
+        assert [name for name, _ in listing.with_mode("mtime")] == ["a", "b", "c"]
+        assert [name for name, _ in listing.with_mode("items")] == ["c", "b", "a"]
+
+        # 収集済みなら並び順を切り替えても再スキャンもstatもしない
+        def fail(*args, **kwargs):
+            raise AssertionError("unexpected scan")
+
+        monkeypatch.setattr(listing_mod, "scan_folders", fail)
+        monkeypatch.setattr(listing_mod, "collect_folder_metadata", fail)
+        assert cache.collect_metadata(str(tmp_path), item_counts=True) is listing
+
+    def test_collect_folder_metadata_in_parallel(self, tmp_path):
+        folders = []
+        for i in range(100):
+            (tmp_path / f"d{i}").mkdir()
+            folders.append((f"d{i}", str(tmp_path / f"d{i}")))
+
+        metadata = collect_folder_metadata(str(tmp_path), folders, max_workers=4)
+        assert set(metadata) == {path for _, path in folders}
+        assert all(value.item_count == -1 for value in metadata.values())
+
+    def test_has_subdirectory(self, tmp_path):
+        (tmp_path / "file.txt").touch()
+        (tmp_path / ".hidden").mkdir()
+        assert not has_subdirectory(str(tmp_path))
+        (tmp_path / "sub").mkdir()
+        assert has_subdirectory(str(tmp_path))
+        assert not has_subdirectory("/nonexistent/path/for/probe")
+
+    def test_estimate_subdirectory_count(self, tmp_path):
+        for name in ("a", "b", ".hidden"):
+            (tmp_path / name).mkdir()
+        (tmp_path / "file.txt").touch()
+
+        estimate = estimate_subdirectory_count(str(tmp_path))
+        if estimate is None:
+            pytest.skip("file system does not report directory link counts")
+        # 隠しフォルダも推定に含まれる
+        assert estimate == 3
+        assert estimate_subdirectory_count("/nonexistent/path/for/estimate") is None
+
+    def test_get_or_scan_raises_for_missing_path(self):
+        cache = FolderListingCache()
+        with pytest.raises(OSError):
+            cache.get_or_scan("/nonexistent/path/for/cache")
+
+    def test_failures_are_remembered_without_syscalls(self, tmp_path, monkeypatch):
+        missing = str(tmp_path / "gone")
+        cache = FolderListingCache()
+        with pytest.raises(FileNotFoundError):
+            cache.get_or_scan(missing)
+        assert cache.failure(missing).kind == listing_mod.SCAN_ERROR_NOT_FOUND
+
+        def forbidden(*args, **kwargs):
+            raise AssertionError("file system touched")
+
+        with monkeypatch.context() as m:
+            m.setattr(listing_mod.os, "stat", forbidden)
+            m.setattr(listing_mod.os, "listdir", forbidden)
+            with pytest.raises(FileNotFoundError):
+                cache.get_or_scan(missing)
+            assert cache.get(missing) is None
+            assert cache.peek(missing) is None
+        assert cache.failure_stats() == {"failures": 1, "hits": 1, listing_mod.SCAN_ERROR_NOT_FOUND: 1}
+
+        # 作成されても覚えている間は失敗のまま、無効化すれば再試行する
+        (tmp_path / "gone" / "child").mkdir(parents=True)
+        with pytest.raises(FileNotFoundError):
+            cache.get_or_scan(missing)
+        cache.invalidate_failures(str(tmp_path))
+        assert [name for name, _ in cache.get_or_scan(missing)] == ["child"]
+        assert cache.failure(missing) is None
+
+    def test_failure_kinds_and_expiry(self, tmp_path, monkeypatch):
+        cache = FolderListingCache(negative_ttl=5.0)
+        path = str(tmp_path)
+        errors = {
+            listing_mod.SCAN_ERROR_PERMISSION: PermissionError(13, "Permission denied"),
+            listing_mod.SCAN_ERROR_TIMEOUT: TimeoutError("no response"),
+            listing_mod.SCAN_ERROR_NOT_A_DIRECTORY: NotADirectoryError(20, "Not a directory"),
+        }
+        for kind, error in errors.items():
+            monkeypatch.setattr(listing_mod.os, "listdir", lambda p, error=error: (_ for _ in ()).throw(error))
+            with pytest.raises(type(error)):
+                cache.rescan(path)
+            assert cache.failure(path).kind == kind
+            with pytest.raises(type(error)):
+                cache.get_or_scan(path)
+
+        # 一時的な可能性がある失敗は覚えない
+        cache.invalidate(path)
+        monkeypatch.setattr(listing_mod.os, "listdir", lambda p: (_ for _ in ()).throw(OSError(24, "Too many files")))
+        with pytest.raises(OSError):
+            cache.get_or_scan(path)
+        assert cache.failure(path) is None
+
+        monkeypatch.setattr(listing_mod.os, "listdir", lambda p: (_ for _ in ()).throw(PermissionError(13, "denied")))
+        with pytest.raises(PermissionError):
+            cache.get_or_scan(path)
+        now = listing_mod.time.monotonic()
+        monkeypatch.setattr(listing_mod.time, "monotonic", lambda: now + 10.0)
+        assert cache.failure(path) is None
+
+    def test_failure_drops_cached_listing(self, tmp_path, monkeypatch):
+        (tmp_path / "a").mkdir()
+        cache = FolderListingCache()
+        cache.get_or_scan(str(tmp_path))
+
+        monkeypatch.setattr(listing_mod.os, "listdir", lambda p: (_ for _ in ()).throw(PermissionError(13, "denied")))
+        with pytest.raises(PermissionError):
+            cache.rescan(str(tmp_path))
+        assert cache.peek(str(tmp_path)) is None
+        assert cache.failure(str(tmp_path)).kind == listing_mod.SCAN_ERROR_PERMISSION
+
+        monkeypatch.undo()
+        assert [name for name, _ in cache.rescan(str(tmp_path))] == ["a"]
+        assert cache.failure(str(tmp_path)) is None
+
+
+@pytest.mark.skipif(
+    (not LISTING_AVAILABLE) or (not PYTEST_QT_ENABLED),
+    reason="listing/pytest-qt not available",
+)
+class TestListingPrefetcher:
+    def test_prefetch_warms_cache(self, qtbot, tmp_path):
+        (tmp_path / "child").mkdir()
+        cache = FolderListingCache()
+        prefetcher = ListingPrefetcher(cache=cache)
+
+        with qtbot.waitSignal(prefetcher.listingReady, timeout=2000) as blocker:
+            assert prefetcher.prefetch(str(tmp_path))
+
+        assert blocker.args == [str(tmp_path)]
+        assert cache.get(str(tmp_path)) == [("child", os.path.join(str(tmp_path), "child"))]
+        assert prefetcher.wait_for_done(2000)
+        # 待ち中のパスは重複してスケジュールしない
+        with qtbot.waitSignal(prefetcher.prefetchFinished, timeout=2000):
+            assert prefetcher.prefetch(str(tmp_path))
+            assert not prefetcher.prefetch(str(tmp_path))
+
+    def test_prefetch_does_not_stat_on_the_calling_thread(self, qtbot, tmp_path, monkeypatch):
+        (tmp_path / "child").mkdir()
+        cache = FolderListingCache()
+        prefetcher = ListingPrefetcher(cache=cache)
+        cache.get_or_scan(str(tmp_path))
+
+        caller = threading.get_ident()
+        real_stat = cache.stat
+        stat_threads = []
+
+        def recording_stat(path: str):
+            stat_threads.append(threading.get_ident())
+            return real_stat(path)
+
+        monkeypatch.setattr(cache, "stat", recording_stat)
+        # キャッシュの検証はワーカーで行い、有効ならスキャンしない
+        with qtbot.waitSignal(prefetcher.listingCached, timeout=2000) as blocker:
+            assert prefetcher.prefetch(str(tmp_path))
+        assert blocker.args == [str(tmp_path)]
+        assert stat_threads and caller not in stat_threads
+        assert prefetcher.wait_for_done(2000)
+
+    def test_cancel_pending_prefetch(self, qtbot, tmp_path, monkeypatch):
+        busy = tmp_path / "busy"
+        idle = tmp_path / "idle"
+        busy.mkdir()
+        idle.mkdir()
+
+        started = threading.Event()
+        release = threading.Event()
+        real_scan = listing_mod.scan_folders
+
+        def blocking_scan(path: str, *args):
+            if path == str(busy):
+                started.set()
+                release.wait(2)
+            return real_scan(path, *args)
+
+        monkeypatch.setattr(listing_mod, "scan_folders", blocking_scan)
+
+        cache = FolderListingCache()
+        prefetcher = ListingPrefetcher(cache=cache, max_threads=1)
+        prefetcher.prefetch(str(busy))
+        assert started.wait(2)
+
+        # ワーカーが埋まっている間にキューされたタスクはキャンセルできる
+        prefetcher.prefetch(str(idle))
+        assert prefetcher.is_pending(str(idle))
+        prefetcher.cancel(str(idle))
+        assert not prefetcher.is_pending(str(idle))
+
+        release.set()
+        assert prefetcher.wait_for_done(2000)
+        assert cache.get(str(idle)) is None
+        assert cache.get(str(busy)) is not None
+
+    def test_refresh_rescans_cached_path(self, qtbot, tmp_path):
+        cache = FolderListingCache()
+        prefetcher = ListingPrefetcher(cache=cache)
+        cache.get_or_scan(str(tmp_path))
+        (tmp_path / "late").mkdir()
+        # mtimeが変わらない（粗い精度のFS）場合でも再スキャンで追従する
+        os.utime(tmp_path, ns=(0, 0))
+        cache.put(str(tmp_path), [], 0)
+
+        with qtbot.waitSignal(prefetcher.listingReady, timeout=2000):
+            assert prefetcher.refresh(str(tmp_path))
+        assert [name for name, _ in cache.get(str(tmp_path))] == ["late"]
+
+    def test_slow_mounts_skip_speculative_work(self, qtbot, tmp_path):
+        from breadcrumb_addressbar.latency import MountLatencyTracker
+
+        (tmp_path / "child").mkdir()
+        tracker = MountLatencyTracker(min_samples=1)
+        cache = FolderListingCache(latency_tracker=tracker)
+        prefetcher = ListingPrefetcher(cache=cache, max_threads=1)
+
+        cache.get_or_scan(str(tmp_path))
+        assert tracker.stats()[tracker.device_of(str(tmp_path))]["scan_samples"] == 1
+        assert not tracker.is_slow(str(tmp_path / "child"))
+        # どのマウントも遅いとみなす
+        tracker.set_slow_thresholds(0.0, 0.0)
+        assert tracker.is_slow(str(tmp_path / "child"))
+
+        # ホバー・先読み等の投機的なプリフェッチとメタデータ収集はしない
+        assert not prefetcher.prefetch(str(tmp_path / "child"))
+        assert not prefetcher.prefetch_metadata(str(tmp_path))
+        # 必要なスキャンは行うが、同じマウントの再スキャンは1つずつ
+        with qtbot.waitSignal(prefetcher.prefetchFinished, timeout=2000):
+            assert prefetcher.prefetch(str(tmp_path / "child"), priority=0)
+            assert not prefetcher.refresh(str(tmp_path))
+        assert prefetcher.wait_for_done(2000)
+        assert prefetcher.refresh(str(tmp_path))
+        assert prefetcher.wait_for_done(2000)
+
+
+@pytest.mark.skipif(
+    (not LISTING_AVAILABLE) or (not PYTEST_QT_ENABLED),
+    reason="listing/pytest-qt not available",
+)
+class TestSubdirProber:
+    def test_probe_result_is_remembered(self, qtbot, tmp_path):
+        (tmp_path / "sub").mkdir()
+        prober = SubdirProber(max_threads=1)
+
+        with qtbot.waitSignal(prober.probed, timeout=2000) as blocker:
+            assert prober.probe(str(tmp_path)) is None
+        assert blocker.args == [str(tmp_path), True]
+        assert prober.probe(str(tmp_path)) is True
+
+        prober.invalidate(str(tmp_path))
+        assert prober.probe(str(tmp_path)) is None
+        assert prober.wait_for_done(2000)
+
+    def test_slow_mount_probes_run_one_at_a_time(self, qtbot, tmp_path, monkeypatch):
+        import threading
+
+        from breadcrumb_addressbar.latency import MountLatencyTracker
+
+        tracker = MountLatencyTracker(slow_stat_seconds=0.0, min_samples=1)
+        tracker.stat(str(tmp_path))
+        prober = SubdirProber(max_threads=4, latency_tracker=tracker)
+
+        in_flight = {"now": 0, "max": 0}
+        lock = threading.Lock()
+        real_probe = listing_mod.has_subdirectory
+
+        def counting_probe(path, folder_filter):
+            with lock:
+                in_flight["now"] += 1
+                in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            try:
+                threading.Event().wait(0.01)
+                return real_probe(path, folder_filter)
+            finally:
+                with lock:
+                    in_flight["now"] -= 1
+
+        monkeypatch.setattr(listing_mod, "has_subdirectory", counting_probe)
+        names = ("a", "b", "c", "d")
+        for name in names:
+            (tmp_path / name).mkdir()
+            assert prober.probe(str(tmp_path / name)) is None
+
+        qtbot.waitUntil(lambda: all(prober.probe(str(tmp_path / n)) is False for n in names), timeout=2000)
+        assert in_flight["max"] == 1
+
+    def test_results_are_bounded(self, qtbot, tmp_path):
+        prober = SubdirProber(max_threads=1, max_results=2)
+        for name in ("a", "b", "c"):
+            (tmp_path / name).mkdir()
+            prober.probe(str(tmp_path / name))
+        assert prober.wait_for_done(2000)
+        assert prober.probe(str(tmp_path / "a")) is None
+        assert prober.probe(str(tmp_path / "c")) is False
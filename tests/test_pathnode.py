@@ -0,0 +1,54 @@
+"""
+Tests for `breadcrumb_addressbar.pathnode` (PathNode, intern_path, split_path).
+"""
+
+import gc
+import os
+import pickle
+
+from breadcrumb_addressbar.pathnode import PathNode, intern_path, interned_count, split_path
+
+
+def test_split_path_anchors():
+    assert split_path("/a//b/") == ("/", ["a", "b"])
+    assert split_path("C:\\Users\\Test") == ("C:\\", ["Users", "Test"])
+    assert split_path("\\\\srv\\share\\dir") == ("\\\\srv\\share\\", ["dir"])
+    assert split_path("rel/x") == ("", ["rel", "x"])
+    assert split_path("") == ("", [])
+
+
+def test_paths_round_trip():
+    for path in ("/", "/a/b/c", "C:\\", "C:\\Users\\Test", "\\\\srv\\share\\dir"):
+        assert intern_path(path).path() == path
+    assert intern_path("/a//b/").path() == "/a/b"
+    assert intern_path("rel").path() == "rel"
+    assert intern_path("") is None
+
+
+def test_nodes_are_interned_and_share_prefixes():
+    a = intern_path("/data/projects/alpha")
+    b = intern_path("/data/projects/beta")
+    assert intern_path("/data/projects/alpha/") is a
+    assert a is not b and a.parent is b.parent
+    assert a.parent.child("alpha") is a and PathNode(a.parent, "alpha") is a
+    assert a.name == "alpha" and a.depth == 3
+    assert [node.name for node in a.ancestors()] == ["/", "data", "projects", "alpha"]
+    assert a.is_relative_to(a.parent) and not a.is_relative_to(b)
+    assert str(a) == os.fspath(a) == "/data/projects/alpha"
+    assert {a: 1}[intern_path("/data/projects/alpha")] == 1
+
+
+def test_unused_nodes_are_released():
+    gc.collect()
+    before = interned_count()
+    # 他のテストと共有しないように相対パスの木を使う
+    node = intern_path("released/one/two")
+    assert interned_count() == before + 3
+    del node
+    gc.collect()
+    assert interned_count() == before
+
+
+def test_pickle_restores_the_interned_node():
+    node = intern_path("/pickled/path")
+    assert pickle.loads(pickle.dumps(node)) is node  # noqa: S301 - 自分で作ったデータ
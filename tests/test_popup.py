@@ -3,6 +3,7 @@ Test cases for FolderSelectionPopup functionality.
 """
 
 import os
+import threading
 from unittest.mock import patch
 
 import pytest
@@ -229,3 +230,460 @@ class TestFolderSelectionPopup:
 
             # アクションがクリアされているかチェック
             assert final_count <= initial_count + 1  # 新しいアクションのみ
+
+    def test_stale_listing_is_shown_then_patched(self, qtbot, tmp_path):
+        """Stale cache is shown immediately and patched in place after rescan."""
+        from breadcrumb_addressbar.listing import FolderListingCache, ListingPrefetcher
+
+        (tmp_path / "keep").mkdir()
+        (tmp_path / "new").mkdir()
+        directory = str(tmp_path)
+
+        cache = FolderListingCache()
+        prefetcher = ListingPrefetcher(cache=cache)
+        popup = FolderSelectionPopup(cache=cache, prefetcher=prefetcher)
+        qtbot.addWidget(popup)
+
+        # mtimeが一致しない（古い）一覧をキャッシュに入れておく
+        stale = [("gone", os.path.join(directory, "gone")), ("keep", os.path.join(directory, "keep"))]
+        cache.put(directory, stale, mtime_ns=0)
+
+        with qtbot.waitSignal(prefetcher.listingReady, timeout=2000):
+            popup.populateForPath(directory)
+            assert [a.text() for a in popup.actions()] == ["gone", "keep"]
+            keep_action = popup.actions()[1]
+
+        qtbot.waitUntil(lambda: [a.text() for a in popup.actions()] == ["keep", "new"], timeout=2000)
+        # 変更のないエントリは作り直されない
+        assert popup.actions()[0] is keep_action
+
+    def test_patch_replaces_placeholder(self, tmp_path):
+        """Patching an empty listing swaps the placeholder for folder actions."""
+        directory = str(tmp_path)
+        self.popup._current_path = directory
+        self.popup._apply_folders([])
+        assert len(self.popup.actions()) == 1
+        assert not self.popup.actions()[0].isEnabled()
+
+        self.popup._apply_folders([("a", os.path.join(directory, "a"))])
+        assert [a.text() for a in self.popup.actions()] == ["a"]
+
+        self.popup._apply_folders([])
+        assert not self.popup.actions()[0].isEnabled()
+
+    def test_large_listing_is_populated_in_slices(self, qtbot, tmp_path):
+        """Only the first screenful is added synchronously."""
+        directory = str(tmp_path)
+        folders = [(f"d{i:04d}", os.path.join(directory, f"d{i:04d}")) for i in range(500)]
+        self.popup.setProgressivePopulation(first_screen_items=20, slice_budget_ms=1.0)
+        self.popup._current_path = directory
+
+        self.popup._apply_folders(folders)
+        assert len(self.popup.actions()) == 20
+        assert self.popup.isPopulating()
+
+        qtbot.waitUntil(lambda: not self.popup.isPopulating(), timeout=5000)
+        assert [a.text() for a in self.popup.actions()] == [name for name, _ in folders]
+
+    def test_patch_during_progressive_population(self, qtbot, tmp_path):
+        """A fresh listing arriving mid-population keeps order and drops removed entries."""
+        directory = str(tmp_path)
+        folders = [(f"d{i:03d}", os.path.join(directory, f"d{i:03d}")) for i in range(200)]
+        self.popup.setProgressivePopulation(first_screen_items=10, slice_budget_ms=1.0)
+        self.popup._current_path = directory
+        self.popup._apply_folders(folders)
+
+        # 表示済みの範囲に追加、未表示の範囲から削除
+        updated = [("a-first", os.path.join(directory, "a-first"))] + folders[:150]
+        self.popup._apply_folders(updated)
+
+        qtbot.waitUntil(lambda: not self.popup.isPopulating(), timeout=5000)
+        assert [a.text() for a in self.popup.actions()] == [name for name, _ in updated]
+
+    def test_actions_are_recycled_between_opens(self, tmp_path):
+        """Folder actions are re-labelled in place instead of reallocated."""
+        from PySide6.QtGui import QAction
+
+        first = tmp_path / "first"
+        second = tmp_path / "second"
+        for parent in (first, second):
+            for name in ("a", "b", "c"):
+                (parent / name).mkdir(parents=True)
+
+        self.popup.populateForPath(str(first))
+        first_actions = set(self.popup.actions())
+        owned = len(self.popup.findChildren(QAction))
+
+        self.popup.populateForPath(str(second))
+        assert set(self.popup.actions()) == first_actions
+        assert len(self.popup.findChildren(QAction)) == owned
+        assert [str(a.data()) for a in self.popup.actions()] == [str(second / n) for n in ("a", "b", "c")]
+
+    def test_action_data_shares_interned_nodes(self, tmp_path):
+        """Folder actions carry child nodes of the shown folder's interned node."""
+        from breadcrumb_addressbar.pathnode import intern_path
+
+        (tmp_path / "a").mkdir()
+        folder = intern_path(str(tmp_path))
+        self.popup.populateForPath(str(tmp_path))
+        node = self.popup.actions()[0].data()
+        assert node is intern_path(str(tmp_path / "a"))
+        assert node.parent is folder
+
+    def test_single_triggered_dispatch(self, tmp_path):
+        """Selection is routed through QMenu.triggered using action data."""
+        (tmp_path / "target").mkdir()
+        self.popup.populateForPath(str(tmp_path))
+
+        selected: list[str] = []
+        self.popup.folderSelected.connect(selected.append)
+        self.popup.actions()[0].trigger()
+        assert selected == [str(tmp_path / "target")]
+
+        # データを持たないアクション（プレースホルダー等）は無視する
+        self.popup.populateForPath(str(tmp_path / "target"))
+        self.popup._on_action_triggered(self.popup.actions()[0])
+        assert selected == [str(tmp_path / "target")]
+
+    def test_cascading_submenus_are_lazy(self, qtbot, tmp_path):
+        """Folders with sub folders get submenus that are listed on demand."""
+        (tmp_path / "leaf").mkdir()
+        (tmp_path / "branch" / "child" / "grandchild").mkdir(parents=True)
+
+        self.popup.setCascading(True)
+        assert self.popup.isCascading()
+        self.popup.populateForPath(str(tmp_path))
+
+        branch, leaf = self.popup.actions()
+        qtbot.waitUntil(lambda: branch.menu() is not None, timeout=2000)
+        self.popup._prober.wait_for_done(2000)
+        qtbot.wait(10)
+        assert leaf.menu() is None
+
+        # 表示されるまでサブメニューの中身は作らない
+        submenu = branch.menu()
+        assert submenu.actions() == []
+        submenu.aboutToShow.emit()
+        qtbot.waitUntil(lambda: "child" in [a.text() for a in submenu.actions()], timeout=2000)
+        assert str(submenu.actions()[0].data()) == str(tmp_path / "branch")
+
+        # サブメニューでの選択は親から一度だけ通知される
+        selected: list[str] = []
+        self.popup.folderSelected.connect(selected.append)
+        child = submenu.actions()[-1]
+        child.trigger()
+        self.popup._on_action_triggered(child)
+        assert selected == [str(tmp_path / "branch" / "child")]
+
+        # 作り直したメニューにサブメニューが残らない（サブメニュー付きのアクションは再利用しない）
+        self.popup.populateForPath(str(tmp_path / "leaf"))
+        assert [action.menu() for action in self.popup.actions()] == [None]
+
+    def test_unlistable_folder_shows_reason_without_retrying(self, tmp_path):
+        from breadcrumb_addressbar.listing import SCAN_ERROR_NOT_FOUND, FolderListingCache
+
+        cache = FolderListingCache()
+        popup = FolderSelectionPopup(cache=cache)
+        missing = str(tmp_path / "gone")
+
+        popup.populateForPath(missing)
+        assert popup.failureKind() == SCAN_ERROR_NOT_FOUND
+        assert [a.text() for a in popup.actions()] == ["フォルダが存在しません"]
+
+        # 失敗を覚えている間はファイルシステムに触れずに理由を表示する
+        with patch("os.stat", side_effect=AssertionError("stat")), patch("os.listdir", side_effect=AssertionError):
+            popup.populateForPath(missing)
+            popup.populateForPathAsync(missing)
+        assert [a.text() for a in popup.actions()] == ["フォルダが存在しません"]
+
+        (tmp_path / "gone" / "child").mkdir(parents=True)
+        cache.invalidate(missing)
+        popup.populateForPath(missing)
+        assert popup.failureKind() is None
+        assert [a.text() for a in popup.actions()] == ["child"]
+
+    def test_slow_mount_shows_loading_without_estimating(self, qtbot, tmp_path):
+        from breadcrumb_addressbar.latency import MountLatencyTracker
+        from breadcrumb_addressbar.listing import FolderListingCache
+        from breadcrumb_addressbar.popup import STRATEGY_ASYNC
+
+        (tmp_path / "child").mkdir()
+        tracker = MountLatencyTracker(slow_stat_seconds=0.0, min_samples=1)
+        tracker.stat(str(tmp_path))
+        popup = FolderSelectionPopup(cache=FolderListingCache(latency_tracker=tracker))
+        qtbot.addWidget(popup)
+        estimated: list[str] = []
+        popup.setSizeEstimator(lambda path: estimated.append(path) or 1)
+
+        # 推定のstatも待たずに読み込み中を表示する
+        popup.populateForPath(str(tmp_path))
+        assert popup.currentStrategy() == STRATEGY_ASYNC
+        assert estimated == []
+        assert [a.text() for a in popup.actions()] == ["読み込み中..."]
+        qtbot.waitUntil(lambda: [a.text() for a in popup.actions()] == ["child"], timeout=2000)
+        assert popup.strategyStats()["slow_mount"] == 1
+
+    def test_populate_async_shows_loading_then_listing(self, qtbot, tmp_path):
+        """Uncached paths show a loading entry until the scan finishes."""
+        (tmp_path / "late").mkdir()
+
+        self.popup.populateForPathAsync(str(tmp_path))
+        qtbot.waitUntil(lambda: [a.text() for a in self.popup.actions()] == ["late"], timeout=2000)
+
+        # 一覧できなかった理由を表示する
+        self.popup.populateForPathAsync("/nonexistent/path/for/async")
+        qtbot.waitUntil(lambda: [a.text() for a in self.popup.actions()] == ["フォルダが存在しません"], timeout=2000)
+
+    def test_strategy_follows_size_estimate(self, qtbot, tmp_path):
+        """The population strategy is chosen from the estimate before scanning."""
+        from breadcrumb_addressbar.popup import STRATEGY_ASYNC, STRATEGY_CHUNKED, STRATEGY_PLAIN
+
+        for i in range(60):
+            (tmp_path / f"dir{i:02d}").mkdir()
+        self.popup.setProgressivePopulation(first_screen_items=10, slice_budget_ms=1.0)
+        self.popup.setStrategyThresholds(plain_max_items=100, async_min_items=1000)
+
+        self.popup.setSizeEstimator(lambda path: 60)
+        self.popup.populateForPath(str(tmp_path))
+        assert self.popup.currentStrategy() == STRATEGY_PLAIN
+        assert not self.popup.isPopulating()
+        assert len(self.popup.actions()) == 60
+
+        self.popup.setSizeEstimator(lambda path: 500)
+        self.popup.populateForPath(str(tmp_path))
+        assert self.popup.currentStrategy() == STRATEGY_CHUNKED
+        assert self.popup.isPopulating()
+        qtbot.waitUntil(lambda: not self.popup.isPopulating(), timeout=2000)
+
+        # 巨大と推定されたフォルダは未キャッシュならスキャンを待たない
+        fresh = tmp_path / "dir00"
+        (fresh / "child").mkdir()
+        self.popup.setSizeEstimator(lambda path: 5000)
+        self.popup.populateForPath(str(fresh))
+        assert self.popup.currentStrategy() == STRATEGY_ASYNC
+        qtbot.waitUntil(lambda: [a.text() for a in self.popup.actions()] == ["child"], timeout=2000)
+
+        stats = self.popup.strategyStats()
+        assert (stats["plain"], stats["chunked"], stats["async"]) == (1, 1, 1)
+        assert stats["compared"] == 3
+        assert stats["mean_abs_error"] == pytest.approx((0 + 440 + 4999) / 3)
+        assert stats["plain_max_items"] == 100
+
+    def test_strategy_falls_back_to_cached_listing(self, tmp_path):
+        """Without an estimate the cached listing size decides the strategy."""
+        from breadcrumb_addressbar.popup import STRATEGY_CHUNKED, STRATEGY_PLAIN
+
+        (tmp_path / "a").mkdir()
+        self.popup.setSizeEstimator(lambda path: None)
+        self.popup.populateForPath(str(tmp_path))
+        assert self.popup.currentStrategy() == STRATEGY_CHUNKED
+
+        self.popup.populateForPath(str(tmp_path))
+        assert self.popup.currentStrategy() == STRATEGY_PLAIN
+        assert self.popup.strategyStats()["unestimated"] == 1
+
+    def test_metadata_sort_mode(self, qtbot, tmp_path):
+        """Metadata orders appear once the background stat pass finishes."""
+        for i, name in enumerate(("build1", "build2", "build10")):
+            (tmp_path / name).mkdir()
+            os.utime(tmp_path / name, ns=(0, (i + 1) * 1_000_000_000))
+
+        self.popup.setSortMode("mtime")
+        self.popup.populateForPath(str(tmp_path))
+        qtbot.waitUntil(
+            lambda: [a.text() for a in self.popup.actions()] == ["build10", "build2", "build1"], timeout=2000
+        )
+
+        self.popup.setSortMode(None)
+        self.popup.populateForPath(str(tmp_path))
+        assert [a.text() for a in self.popup.actions()] == ["build1", "build2", "build10"]
+        with pytest.raises(ValueError):
+            self.popup.setSortMode("size")
+
+    def test_frecent_folders_are_pinned(self, tmp_path):
+        """The most frecent existing sub folders are listed above the listing."""
+        from breadcrumb_addressbar.frecency import FrecencyStore
+
+        for name in ("alpha", "beta", "gamma", ".hidden"):
+            (tmp_path / name).mkdir()
+        store = FrecencyStore()
+        for name, visits in (("gamma", 3), ("beta", 2), (".hidden", 5), ("deleted", 4)):
+            for _ in range(visits):
+                store.record(str(tmp_path / name))
+
+        self.popup.setFrecencyStore(store, count=2)
+        self.popup.populateForPath(str(tmp_path))
+        # 削除済み・非表示のフォルダは固定表示しない
+        assert self.popup.pinnedFolders() == [str(tmp_path / "gamma"), str(tmp_path / "beta")]
+        texts = [a.text() for a in self.popup.actions() if not a.isSeparator()]
+        assert texts[-3:] == ["alpha", "beta", "gamma"]
+
+        selected: list[str] = []
+        self.popup.folderSelected.connect(selected.append)
+        self.popup._pinned_actions[0].trigger()
+        assert selected == [str(tmp_path / "gamma")]
+
+        self.popup.setFrecencyStore(None)
+        self.popup.populateForPath(str(tmp_path))
+        assert self.popup.pinnedFolders() == []
+
+    def test_pinned_folders_are_not_stated_on_slow_mounts(self, qtbot, tmp_path, monkeypatch):
+        """On a slow mount pinned folders come from the history, minus remembered failures."""
+        import threading
+
+        from breadcrumb_addressbar.frecency import FrecencyStore
+        from breadcrumb_addressbar.latency import MountLatencyTracker
+        from breadcrumb_addressbar.listing import FolderListingCache
+
+        (tmp_path / "alpha").mkdir()
+        tracker = MountLatencyTracker(slow_stat_seconds=0.0, min_samples=1)
+        tracker.stat(str(tmp_path))
+        cache = FolderListingCache(latency_tracker=tracker)
+        with pytest.raises(FileNotFoundError):
+            cache.get_or_scan(str(tmp_path / "gone"))
+        store = FrecencyStore()
+        for name, visits in (("alpha", 3), ("moved", 2), ("gone", 1)):
+            for _ in range(visits):
+                store.record(str(tmp_path / name))
+
+        # statしたスレッド
+        threads = []
+        isdir = os.path.isdir
+
+        def recording_isdir(path):
+            threads.append(threading.get_ident())
+            return isdir(path)
+
+        monkeypatch.setattr(os.path, "isdir", recording_isdir)
+        popup = FolderSelectionPopup(cache=cache)
+        qtbot.addWidget(popup)
+        popup.setFrecencyStore(store, count=3)
+        popup.populateForPath(str(tmp_path))
+        # 一覧できなかったフォルダは除き、確かめていないフォルダは履歴のまま表示する
+        assert popup.pinnedFolders() == [str(tmp_path / "alpha"), str(tmp_path / "moved")]
+        assert threading.get_ident() not in threads
+        popup._prefetcher.wait_for_done(2000)
+
+    def test_search_below_streams_matches(self, qtbot, tmp_path):
+        """Search matches are appended as they arrive and the search stops on repopulation."""
+        for rel in ("src/build", "docs/rebuild", "docs/guide"):
+            (tmp_path / rel).mkdir(parents=True)
+        requested: list[str] = []
+        self.popup.searchRequested.connect(requested.append)
+        self.popup.setSearchEnabled(True)
+        self.popup.populateForPath(str(tmp_path))
+        assert self.popup.isSearchEnabled()
+        self.popup._search_action.trigger()
+        assert requested == [str(tmp_path)]
+
+        searcher_finished = []
+        self.popup.searchBelow(str(tmp_path), "build")
+        self.popup._searcher.searchFinished.connect(lambda *args: searcher_finished.append(args))
+        assert self.popup._search_action is None and self.popup.pinnedFolders() == []
+        qtbot.waitUntil(lambda: bool(searcher_finished) and not self.popup.isPopulating(), timeout=5000)
+        texts = sorted(a.text().replace(os.sep, "/") for a in self.popup.actions())
+        assert texts == ["docs/rebuild", "src/build"]
+
+        selected: list[str] = []
+        self.popup.folderSelected.connect(selected.append)
+        self.popup._folder_actions[str(tmp_path / "src" / "build")].trigger()
+        assert selected == [str(tmp_path / "src" / "build")]
+
+        self.popup.searchBelow(str(tmp_path), "nothing")
+        qtbot.waitUntil(lambda: self.popup._placeholder_action.text() == "一致するフォルダはありません", timeout=5000)
+
+        # 通常の一覧に戻すと検索は終了する
+        self.popup.populateForPath(str(tmp_path))
+        assert not self.popup.isSearching()
+        assert [a.text() for a in self.popup.actions() if not a.isSeparator()][1:] == ["docs", "src"]
+
+
+@pytest.mark.skipif(
+    (not PYSIDE6_AVAILABLE) or (not POPUP_AVAILABLE) or (not PYTEST_QT_ENABLED),
+    reason="PySide6/FolderSelectionPopup/pytest-qt not available",
+)
+class TestPopupMenuCache:
+    """Test cases for PopupMenuCache."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, qtbot):
+        from breadcrumb_addressbar.popup import PopupMenuCache
+
+        self.created: list[FolderSelectionPopup] = []
+
+        def factory() -> FolderSelectionPopup:
+            popup = FolderSelectionPopup()
+            qtbot.addWidget(popup)
+            self.created.append(popup)
+            return popup
+
+        self.cache = PopupMenuCache(factory, max_menus=2)
+        yield
+
+    def test_reuses_built_menu_while_unchanged(self, tmp_path):
+        (tmp_path / "a").mkdir()
+        first = self.cache.acquire(str(tmp_path))
+
+        with patch.object(first, "populateForPath") as populate:
+            assert self.cache.acquire(str(tmp_path)) is first
+            populate.assert_not_called()
+        assert self.cache.stats() == {"menus": 1, "hits": 1, "misses": 1}
+
+    def test_changed_directory_is_repopulated(self, qtbot, tmp_path):
+        (tmp_path / "a").mkdir()
+        menu = self.cache.acquire(str(tmp_path))
+
+        (tmp_path / "b").mkdir()
+        os.utime(tmp_path, ns=(0, 1))
+        assert self.cache.acquire(str(tmp_path)) is menu
+        # 古い一覧を表示したまま裏で再スキャンされる
+        qtbot.waitUntil(lambda: [a.text() for a in menu.actions()] == ["a", "b"], timeout=2000)
+
+        self.cache.invalidate(str(tmp_path))
+        with patch.object(menu, "populateForPath") as populate:
+            self.cache.acquire(str(tmp_path))
+            populate.assert_called_once()
+
+    def test_reused_menu_is_validated_on_the_worker(self, qtbot, tmp_path):
+        (tmp_path / "a").mkdir()
+        menu = self.cache.acquire(str(tmp_path))
+        cache = menu.listingCache()
+        stat = cache.stat
+        threads: list[threading.Thread] = []
+
+        def recording_stat(path: str) -> os.stat_result:
+            threads.append(threading.current_thread())
+            return stat(path)
+
+        # 再利用時のmtimeの確認はUIスレッドでstatしない
+        with (
+            patch.object(cache, "stat", side_effect=recording_stat),
+            qtbot.waitSignal(menu._prefetcher.prefetchFinished, timeout=2000),
+        ):
+            assert self.cache.acquire(str(tmp_path)) is menu
+        assert threads
+        assert threading.main_thread() not in threads
+
+    def test_failed_menu_is_reused_without_stat(self, tmp_path):
+        missing = str(tmp_path / "gone")
+        menu = self.cache.acquire(missing)
+        assert menu.failureKind() is not None
+
+        with patch("os.stat", side_effect=AssertionError("stat")):
+            assert self.cache.acquire(missing) is menu
+        assert self.cache.stats()["hits"] == 1
+
+    def test_live_menus_are_capped(self, tmp_path):
+        paths = []
+        for name in ("one", "two", "three"):
+            (tmp_path / name).mkdir()
+            paths.append(str(tmp_path / name))
+
+        menus = [self.cache.acquire(p) for p in paths]
+        assert len(self.created) == 2
+        # 3つ目は最も古いポップアップを再利用する
+        assert menus[2] is menus[0]
+        assert self.cache.stats()["menus"] == 2
+
+        self.cache.set_max_menus(1)
+        assert self.cache.stats()["menus"] == 1
@@ -0,0 +1,97 @@
+"""
+Tests for `breadcrumb_addressbar.predictor` (NavigationPredictor).
+"""
+
+from breadcrumb_addressbar.predictor import NavigationPredictor
+
+
+def test_predict_orders_by_frequency():
+    predictor = NavigationPredictor()
+    for _ in range(3):
+        predictor.record("/p", "/p/build")
+    predictor.record("/p", "/p/docs")
+
+    assert predictor.predict("/p", k=2) == ["/p/build", "/p/docs"]
+    assert predictor.predict("/p", k=1) == ["/p/build"]
+    assert predictor.predict("/unknown") == []
+
+
+def test_hit_rate_tracks_armed_predictions():
+    predictor = NavigationPredictor()
+    predictor.record("/p", "/p/build")
+    predictor.record("/p/build", "/p/build/artifacts")
+
+    predictor.predict("/p", k=1)
+    predictor.record("/p", "/p/build")  # 的中
+    predictor.predict("/p", k=1)
+    predictor.record("/p", "/p/other")  # 外れ
+
+    stats = predictor.stats()
+    assert stats["predictions"] == 2
+    assert stats["hits"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_memory_is_bounded():
+    predictor = NavigationPredictor(max_states=2, max_transitions=2)
+    predictor.record("/a", "/a/1")
+    predictor.record("/a", "/a/1")
+    predictor.record("/a", "/a/2")
+    predictor.record("/a", "/a/3")  # 最も少ない /a/2 が捨てられる
+    assert set(predictor.predict("/a")) == {"/a/1", "/a/3"}
+
+    predictor.record("/b", "/b/1")
+    predictor.record("/c", "/c/1")  # 最も古い /a が捨てられる
+    assert predictor.predict("/a") == []
+    assert predictor.stats()["states"] == 2
+
+
+def test_ignores_self_and_empty_transitions():
+    predictor = NavigationPredictor()
+    predictor.record("", "/a")
+    predictor.record("/a", "/a")
+    # 区切り文字の違いだけなら同じフォルダ
+    predictor.record("/a/", "/a")
+    assert predictor.stats()["transitions"] == 0
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    model_file = tmp_path / "state" / "navigation.json"
+    predictor = NavigationPredictor()
+    predictor.record("/p", "/p/build")
+    predictor.record("/p/build", "/p/build/artifacts")
+    assert predictor.save(str(model_file))
+
+    restored = NavigationPredictor()
+    assert restored.load(str(model_file))
+    assert restored.predict("/p") == ["/p/build"]
+    assert restored.predict("/p/build") == ["/p/build/artifacts"]
+
+
+def test_load_missing_or_invalid_file(tmp_path):
+    predictor = NavigationPredictor()
+    assert not predictor.load(str(tmp_path / "missing.json"))
+
+    broken = tmp_path / "broken.json"
+    broken.write_text("{not json", encoding="utf-8")
+    assert not predictor.load(str(broken))
+
+    wrong_version = tmp_path / "old.json"
+    wrong_version.write_text('{"version": 0}', encoding="utf-8")
+    assert not predictor.load(str(wrong_version))
+
+    wrong_shape = tmp_path / "shape.json"
+    wrong_shape.write_text('{"version": 1, "transitions": []}', encoding="utf-8")
+    assert not predictor.load(str(wrong_shape))
+
+
+def test_load_skips_invalid_counts(tmp_path):
+    model_file = tmp_path / "navigation.json"
+    model_file.write_text(
+        '{"version": 1, "transitions": {"/p": {"/p/a": "3", "/p/b": null, "/p/c": 2}, "/q": {"/q/a": [1]}}}',
+        encoding="utf-8",
+    )
+    predictor = NavigationPredictor()
+    assert predictor.load(str(model_file))
+    assert predictor.predict("/p") == ["/p/c"]
+    assert predictor.predict("/q") == []
@@ -0,0 +1,231 @@
+"""
+Tests for `breadcrumb_addressbar.scanpool` (ScanProcessPool) and scans
+isolated in helper processes.
+"""
+
+import errno
+import os
+import threading
+import time
+
+import pytest
+
+from breadcrumb_addressbar.scanpool import FileSystemProvider, ScanProcessPool
+
+# Headless 環境でのハング防止（CI向け）
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def _is_pytest_qt_enabled() -> bool:
+    """Return True if pytest-qt plugin is available/enabled."""
+    try:
+        import pytestqt  # type: ignore  # noqa: F401
+
+        return True
+    except Exception:
+        return False
+
+
+PYTEST_QT_ENABLED = _is_pytest_qt_enabled()
+
+try:
+    from breadcrumb_addressbar.latency import MountLatencyTracker
+    from breadcrumb_addressbar.listing import SCAN_ERROR_TIMEOUT, FolderListingCache
+
+    LISTING_AVAILABLE = True
+except Exception:  # pragma: no cover - import guard only
+    LISTING_AVAILABLE = False
+
+# この名前のフォルダ以下は応答しないマウントとして扱う
+DEAD = "dead"
+# ハングしたヘルパーを見捨てるまでの秒数
+TIMEOUT = 0.5
+
+
+class HangingProvider(FileSystemProvider):
+    """Stand-in for a dead network mount: calls below a "dead" folder never return."""
+
+    def stat(self, path: str) -> os.stat_result:
+        _hang_if_dead(path)
+        return super().stat(path)
+
+    def list_folders(self, path, folder_filter):
+        _hang_if_dead(path)
+        return super().list_folders(path, folder_filter)
+
+    def has_subdirectory(self, path, folder_filter):
+        _hang_if_dead(path)
+        return super().has_subdirectory(path, folder_filter)
+
+
+def _hang_if_dead(path: str) -> None:
+    if DEAD in path.split(os.sep):
+        time.sleep(3600)
+
+
+@pytest.fixture
+def pool():
+    pool = ScanProcessPool(processes=1, timeout=TIMEOUT, provider=HangingProvider())
+    yield pool
+    pool.close()
+
+
+def test_pool_lists_and_stats_in_helpers(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    (tmp_path / ".hidden").mkdir()
+    (tmp_path / "file.txt").write_text("x")
+
+    pool = ScanProcessPool(processes=2)
+    try:
+        assert sorted(pool.list_folders(str(tmp_path))) == ["a", "b"]
+        assert pool.stat(str(tmp_path)).st_mtime_ns == os.stat(tmp_path).st_mtime_ns
+        # 失敗はヘルパーで起きた例外のまま届く
+        with pytest.raises(FileNotFoundError):
+            pool.stat(str(tmp_path / "missing"))
+        stats = pool.stats()
+        assert stats["requests"] == 3
+        assert stats["processes"] == 1
+        assert stats["timeouts"] == 0
+    finally:
+        pool.close()
+    assert pool.stats()["processes"] == 0
+    with pytest.raises(OSError):
+        pool.stat(str(tmp_path))
+
+
+def test_hung_helper_is_abandoned_and_replaced(tmp_path, pool):
+    (tmp_path / "ok").mkdir()
+    dead = tmp_path / DEAD
+    dead.mkdir()
+
+    assert pool.list_folders(str(tmp_path)) != []
+    started = time.monotonic()
+    with pytest.raises(TimeoutError) as info:
+        pool.list_folders(str(dead))
+    assert time.monotonic() - started < TIMEOUT + 2.0
+    assert info.value.errno == errno.ETIMEDOUT
+    assert info.value.filename == str(dead)
+
+    # 唯一のヘルパーがハングしても、次の要求は新しいヘルパーが答える
+    assert sorted(pool.list_folders(str(tmp_path))) == [DEAD, "ok"]
+    stats = pool.stats()
+    assert (stats["timeouts"], stats["replaced"], stats["processes"]) == (1, 1, 1)
+
+
+@pytest.mark.skipif(not LISTING_AVAILABLE, reason="FolderListingCache not available")
+def test_cache_remembers_timed_out_folders(tmp_path, pool):
+    (tmp_path / "child").mkdir()
+    dead = str(tmp_path / DEAD)
+    os.mkdir(dead)
+    cache = FolderListingCache(latency_tracker=MountLatencyTracker(), scan_pool=pool)
+
+    assert [name for name, _ in cache.get_or_scan(str(tmp_path))] == ["child", DEAD]
+    with pytest.raises(TimeoutError):
+        cache.get_or_scan(dead)
+    assert cache.failure(dead).kind == SCAN_ERROR_TIMEOUT
+
+    # 覚えている間はヘルパーにも問い合わせない
+    requests = pool.stats()["requests"]
+    with pytest.raises(TimeoutError):
+        cache.get_or_scan(dead)
+    assert pool.stats()["requests"] == requests
+    assert pool.stats()["timeouts"] == 1
+
+
+@pytest.mark.skipif(not LISTING_AVAILABLE, reason="FolderListingCache not available")
+def test_busy_pool_is_not_remembered_as_a_timeout(tmp_path, pool):
+    (tmp_path / "child").mkdir()
+    dead = str(tmp_path / DEAD)
+    os.mkdir(dead)
+    cache = FolderListingCache(latency_tracker=MountLatencyTracker(), scan_pool=pool)
+
+    # 唯一のヘルパーを応答しないフォルダで塞ぐ
+    def hang() -> None:
+        with pytest.raises(TimeoutError):
+            pool.stat(dead, timeout=3 * TIMEOUT)
+
+    hung = threading.Thread(target=hang)
+    hung.start()
+    while pool.stats()["busy"] == 0:
+        time.sleep(0.01)
+
+    # 空きを待ちきれなかっただけのフォルダは、タイムアウトとして覚えない
+    with pytest.raises(BlockingIOError) as info:
+        cache.get_or_scan(str(tmp_path))
+    assert info.value.errno == errno.EAGAIN
+    assert cache.failure(str(tmp_path)) is None
+    stats = pool.stats()
+    assert stats["rejected"] > 0 and stats["timeouts"] == 0
+
+    hung.join()
+    assert [name for name, _ in cache.get_or_scan(str(tmp_path))] == ["child", DEAD]
+
+
+@pytest.mark.skipif(not LISTING_AVAILABLE, reason="FolderListingCache not available")
+def test_cache_probes_and_reads_metadata_in_helpers(tmp_path, pool):
+    (tmp_path / "child" / "inner").mkdir(parents=True)
+    (tmp_path / "empty").mkdir()
+    cache = FolderListingCache(latency_tracker=MountLatencyTracker(), scan_pool=pool)
+    child, empty = str(tmp_path / "child"), str(tmp_path / "empty")
+
+    assert cache.has_subdirectory(child) and not cache.has_subdirectory(empty)
+    child_metadata, empty_metadata = cache.read_metadata([child, empty])
+    assert child_metadata.item_count == 1 and empty_metadata.item_count == 0
+    listing = cache.collect_metadata(str(tmp_path), item_counts=True)
+    assert listing.metadata[child] == child_metadata
+
+    dead = str(tmp_path / DEAD)
+    os.mkdir(dead)
+
+    # 応答しないフォルダはタイムアウトとして覚え、以後はヘルパーにも問い合わせない
+    assert not cache.has_subdirectory(dead)
+    assert cache.failure(dead).kind == SCAN_ERROR_TIMEOUT
+    requests = pool.stats()["requests"]
+    assert not cache.has_subdirectory(dead)
+    assert cache.read_metadata([dead]) == [None]
+    assert pool.stats()["requests"] == requests
+
+
+@pytest.mark.skipif(
+    (not LISTING_AVAILABLE) or (not PYTEST_QT_ENABLED),
+    reason="FolderSelectionPopup/pytest-qt not available",
+)
+def test_popup_shows_timeout_instead_of_loading(qtbot, tmp_path, pool):
+    from breadcrumb_addressbar.popup import STRATEGY_ASYNC, FolderSelectionPopup
+
+    dead = str(tmp_path / DEAD)
+    os.mkdir(dead)
+    popup = FolderSelectionPopup(cache=FolderListingCache(latency_tracker=MountLatencyTracker(), scan_pool=pool))
+    qtbot.addWidget(popup)
+
+    # スキャンはUIスレッドで待たず、期限が過ぎたら理由を表示する
+    popup.populateForPath(dead)
+    assert popup.currentStrategy() == STRATEGY_ASYNC
+    assert [a.text() for a in popup.actions()] == ["読み込み中..."]
+    qtbot.waitUntil(lambda: [a.text() for a in popup.actions()] == ["応答がありません（タイムアウト）"], timeout=5000)
+    assert popup.strategyStats()["isolated"] == 1
+
+
+@pytest.mark.skipif(
+    (not LISTING_AVAILABLE) or (not PYTEST_QT_ENABLED),
+    reason="FolderSelectionPopup/pytest-qt not available",
+)
+def test_cached_popup_on_dead_mount_does_not_block(qtbot, tmp_path, pool):
+    from breadcrumb_addressbar.popup import FolderSelectionPopup, PopupMenuCache
+
+    dead = tmp_path / DEAD
+    (dead / "child").mkdir(parents=True)
+    cache = FolderListingCache(latency_tracker=MountLatencyTracker(), scan_pool=pool)
+    cache.put(str(dead), [("child", str(dead / "child"))], os.stat(dead).st_mtime_ns)
+    popup = FolderSelectionPopup(cache=cache)
+    qtbot.addWidget(popup)
+    menus = PopupMenuCache(lambda: popup)
+
+    # 手元の一覧をすぐに表示し、mtimeの確認はワーカーが期限まで待つ
+    started = time.monotonic()
+    assert menus.acquire(str(dead)) is popup
+    assert menus.acquire(str(dead)) is popup
+    assert time.monotonic() - started < TIMEOUT
+    assert [a.text() for a in popup.actions()] == ["child"]
+    qtbot.waitUntil(lambda: [a.text() for a in popup.actions()] == ["応答がありません（タイムアウト）"], timeout=5000)
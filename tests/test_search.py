@@ -0,0 +1,102 @@
+"""
+Tests for `breadcrumb_addressbar.search` (name_matcher, SubtreeSearch).
+"""
+
+import os
+import re
+
+import pytest
+
+# Headless 対応
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def _is_pytest_qt_enabled() -> bool:
+    try:
+        import pytestqt  # type: ignore  # noqa: F401
+
+        return True
+    except Exception:
+        return False
+
+
+PYTEST_QT_ENABLED = _is_pytest_qt_enabled()
+
+try:
+    from breadcrumb_addressbar import search as search_module
+    from breadcrumb_addressbar.filters import FolderFilter
+    from breadcrumb_addressbar.search import SubtreeSearch, name_matcher
+
+    SEARCH_AVAILABLE = True
+except Exception:  # pragma: no cover - import guard only
+    SEARCH_AVAILABLE = False
+
+
+pytestmark = pytest.mark.skipif(not SEARCH_AVAILABLE, reason="PySide6/search not available")
+
+
+def _make_tree(base) -> None:
+    for rel in ("src/build", "src/app/Build-x86", "docs/rebuild", ".cache/build", "node_modules/build", "a/b/c/build"):
+        (base / rel).mkdir(parents=True)
+    (base / "src" / "build.txt").write_text("x")
+
+
+def _run(qtbot, searcher, *args, **kwargs):
+    """Run a search to completion, returning the relative matches and the finish arguments."""
+    found: list[str] = []
+    searcher.resultsFound.connect(lambda _id, batch: found.extend(rel for rel, _ in batch))
+    with qtbot.waitSignal(searcher.searchFinished, timeout=5000) as blocker:
+        search_id = searcher.start(*args, **kwargs)
+    assert blocker.args[0] == search_id
+    return sorted(p.replace(os.sep, "/") for p in found), blocker.args
+
+
+def test_name_matcher_kinds():
+    assert name_matcher("BUILD")("rebuild")
+    assert not name_matcher("build")("bld")
+    assert name_matcher("build*")("Build-x86") and not name_matcher("build*")("rebuild")
+    assert name_matcher("re:^re")("rebuild") and not name_matcher("re:^re")("prebuild")
+    with pytest.raises(re.error):
+        name_matcher("re:(")
+
+
+@pytest.mark.skipif(not PYTEST_QT_ENABLED, reason="pytest-qt not available")
+class TestSubtreeSearch:
+    def test_matches_honour_filter_and_depth(self, qtbot, tmp_path):
+        _make_tree(tmp_path)
+        searcher = SubtreeSearch(max_threads=3)
+        folder_filter = FolderFilter(exclude=["node_modules"])
+        found, args = _run(qtbot, searcher, str(tmp_path), "build", folder_filter)
+        # 隠し・除外フォルダの中は探さず、ファイルは一致しない
+        assert found == ["a/b/c/build", "docs/rebuild", "src/app/Build-x86", "src/build"]
+        assert args[1] is True and not searcher.is_running()
+
+        found, _ = _run(qtbot, searcher, str(tmp_path), "build", folder_filter, max_depth=2)
+        assert found == ["docs/rebuild", "src/build"]
+
+    def test_results_are_streamed_in_batches(self, qtbot, tmp_path, monkeypatch):
+        monkeypatch.setattr(search_module, "RESULT_BATCH_SIZE", 4)
+        for i in range(10):
+            (tmp_path / f"match{i}").mkdir()
+        searcher = SubtreeSearch(max_threads=1)
+        batches: list[int] = []
+        searcher.resultsFound.connect(lambda _id, batch: batches.append(len(batch)))
+        with qtbot.waitSignal(searcher.searchFinished, timeout=5000):
+            searcher.start(str(tmp_path), "match")
+        assert sum(batches) == 10 and max(batches) <= 10 and len(batches) >= 1
+
+    def test_cancel_stops_the_walk(self, qtbot, tmp_path):
+        for i in range(30):
+            (tmp_path / f"d{i}" / "inner" / "deeper").mkdir(parents=True)
+        searcher = SubtreeSearch(max_threads=2)
+        finished: list[tuple] = []
+        searcher.searchFinished.connect(lambda *args: finished.append(args))
+        first = searcher.start(str(tmp_path), "zzz")
+        # 新しい検索は前の検索を中止する
+        second = searcher.start(str(tmp_path), "inner")
+        assert second == first + 1 and searcher.current_id() == second
+        searcher.cancel()
+        assert not searcher.is_running()
+        assert searcher.wait_for_done(5000)
+        qtbot.waitUntil(lambda: len(finished) == 2, timeout=5000)
+        assert {args[0] for args in finished} == {first, second}
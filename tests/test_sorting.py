@@ -0,0 +1,85 @@
+"""
+Tests for `breadcrumb_addressbar.sorting` (sort keys / SortedListing).
+"""
+
+import os
+
+import pytest
+
+from breadcrumb_addressbar.sorting import (
+    SORT_CASEFOLD,
+    SORT_ITEM_COUNT,
+    SORT_LOCALE,
+    SORT_MTIME,
+    SORT_NATURAL,
+    FolderMetadata,
+    SortedListing,
+    get_sort_key,
+)
+
+
+def _entries(*names: str) -> list[tuple[str, str]]:
+    return [(name, os.path.join("/base", name)) for name in names]
+
+
+class TestSortKeys:
+    def test_natural_order_is_numeric_aware(self):
+        names = ["build10", "Build9", "build1", "alpha"]
+        assert sorted(names, key=get_sort_key(SORT_NATURAL)) == ["alpha", "build1", "Build9", "build10"]
+
+    def test_casefold_order(self):
+        names = ["build10", "Build9", "alpha"]
+        assert sorted(names, key=get_sort_key(SORT_CASEFOLD)) == ["alpha", "build10", "Build9"]
+
+    def test_locale_order_uses_strxfrm(self):
+        names = ["b", "a", "c"]
+        assert sorted(names, key=get_sort_key(SORT_LOCALE)) == ["a", "b", "c"]
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError):
+            get_sort_key("random")
+
+
+class TestSortedListing:
+    def test_sorts_and_keeps_keys(self):
+        listing = SortedListing(_entries("v10", "v2", "v1"))
+        assert [name for name, _ in listing] == ["v1", "v2", "v10"]
+        assert listing.keys == [get_sort_key(SORT_NATURAL)(name) for name, _ in listing]
+        assert listing == _entries("v1", "v2", "v10")
+
+    def test_merge_inserts_batches_in_order(self):
+        listing = SortedListing(_entries("a1", "a5", "a9"))
+        positions = listing.merge(_entries("a10", "a3"))
+
+        assert positions == [3, 1]
+        assert [name for name, _ in listing] == ["a1", "a3", "a5", "a9", "a10"]
+        assert listing.keys == sorted(listing.keys)
+
+    def test_filtered_and_with_mode_reuse_keys(self):
+        listing = SortedListing(_entries("x2", "x10", "y1"))
+        filtered = listing.filtered(lambda entry: entry[0].startswith("x"))
+
+        assert [name for name, _ in filtered] == ["x2", "x10"]
+        assert filtered.keys[0] is listing.keys[0]
+        assert listing.with_mode(SORT_NATURAL) is listing
+        assert [name for name, _ in listing.with_mode(SORT_CASEFOLD)] == ["x10", "x2", "y1"]
+
+    def test_metadata_modes(self):
+        listing = SortedListing(_entries("old", "new", "unknown", "mid"))
+        listing.set_metadata(
+            {
+                "/base/old": FolderMetadata(100, 5),
+                "/base/mid": FolderMetadata(200, 1),
+                "/base/new": FolderMetadata(300, -1),
+            }
+        )
+
+        by_mtime = listing.with_mode(SORT_MTIME)
+        assert [name for name, _ in by_mtime] == ["new", "mid", "old", "unknown"]
+        # 一度並べ替えた結果は再利用する
+        assert listing.with_mode(SORT_MTIME) is by_mtime
+        assert [name for name, _ in listing.with_mode(SORT_ITEM_COUNT)] == ["old", "mid", "new", "unknown"]
+
+        assert listing.has_metadata() and not listing.has_metadata(item_counts=True)
+        listing.set_metadata({}, item_counts=True)
+        assert listing.with_mode(SORT_MTIME) is not by_mtime
@@ -0,0 +1,105 @@
+"""
+Tests for `breadcrumb_addressbar.store` (PersistentListingStore).
+"""
+
+import os
+
+from breadcrumb_addressbar.store import PersistentListingStore, default_store_path
+
+
+def _folders(path: str, *names: str) -> list[tuple[str, str]]:
+    return [(name, os.path.join(path, name)) for name in names]
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    store = PersistentListingStore(str(tmp_path / "cache" / "listings.sqlite3"))
+    directory = str(tmp_path)
+    st = os.stat(directory)
+
+    store.save(directory, _folders(directory, "alpha", "beta"), st)
+    assert store.load(directory, st) == _folders(directory, "alpha", "beta")
+    assert store.stats()["hits"] == 1
+
+    # 空の一覧も保存できる
+    store.save(directory, [], st)
+    assert store.load(directory, st) == []
+    store.close()
+
+
+def test_persists_across_instances(tmp_path):
+    db_path = str(tmp_path / "listings.sqlite3")
+    directory = str(tmp_path)
+    st = os.stat(directory)
+
+    first = PersistentListingStore(db_path)
+    first.save(directory, _folders(directory, "x"), st)
+    first.close()
+
+    second = PersistentListingStore(db_path)
+    assert second.load(directory, st) == _folders(directory, "x")
+    second.close()
+
+
+def test_stale_snapshot_is_rejected(tmp_path):
+    store = PersistentListingStore(":memory:")
+    directory = str(tmp_path)
+    store.save(directory, _folders(directory, "old"), os.stat(directory))
+
+    (tmp_path / "new").mkdir()
+    os.utime(tmp_path, ns=(0, 1))
+
+    assert store.load(directory, os.stat(directory)) is None
+    assert store.load("/missing/dir", os.stat(directory)) is None
+    stats = store.stats()
+    assert stats["stale"] == 1
+    assert stats["misses"] == 1
+
+
+def test_entry_cap_drops_least_recently_used(tmp_path):
+    store = PersistentListingStore(":memory:", max_entries=10)
+    st = os.stat(tmp_path)
+    for i in range(11):
+        store.save(f"/dir{i}", _folders(f"/dir{i}", "child"), st)
+
+    stats = store.stats()
+    assert stats["entries"] == 9
+    assert store.load("/dir0", st) is None
+    assert store.load("/dir10", st) is not None
+
+
+def test_byte_cap_and_compact(tmp_path):
+    store = PersistentListingStore(str(tmp_path / "listings.sqlite3"), max_bytes=100)
+    st = os.stat(tmp_path)
+    for i in range(5):
+        store.save(f"/dir{i}", _folders(f"/dir{i}", "x" * 30), st)
+
+    assert store.stats()["bytes"] <= 100
+    store.remove("/dir4")
+    store.compact()
+    assert store.load("/dir4", st) is None
+    store.close()
+
+
+def test_default_store_path_uses_cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr("sys.platform", "linux")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert default_store_path() == os.path.join(str(tmp_path), "breadcrumb_addressbar", "listings.sqlite3")
+
+
+def test_names_that_are_not_utf8_roundtrip(tmp_path):
+    store = PersistentListingStore(str(tmp_path / "listings.sqlite3"))
+    directory = str(tmp_path)
+    st = os.stat(directory)
+    # POSIXでUTF-8として不正なバイト列の名前はsurrogateescapeで表される
+    undecodable = os.fsdecode(b"caf\xe9")
+
+    store.save(directory, _folders(directory, "alpha", undecodable), st)
+    assert store.load(directory, st) == _folders(directory, "alpha", undecodable)
+
+    # UTF-8にできないパスは保存せず、読み込みは未保存として扱う
+    bad_directory = os.path.join(directory, undecodable)
+    store.save(bad_directory, _folders(bad_directory, "x"), st)
+    assert store.load(bad_directory, st) is None
+    store.remove(bad_directory)
+    assert store.stats()["entries"] == 1
+    store.close()
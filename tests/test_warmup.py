@@ -0,0 +1,139 @@
+"""
+Tests for `breadcrumb_addressbar.warmup` (AncestorWarmup).
+"""
+
+import os
+import threading
+
+import pytest
+
+# Headless 対応
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def _is_pytest_qt_enabled() -> bool:
+    try:
+        import pytestqt  # type: ignore  # noqa: F401
+
+        return True
+    except Exception:
+        return False
+
+
+PYTEST_QT_ENABLED = _is_pytest_qt_enabled()
+
+try:
+    from breadcrumb_addressbar import listing as listing_mod
+    from breadcrumb_addressbar.listing import FolderListingCache, ListingPrefetcher
+    from breadcrumb_addressbar.warmup import AncestorWarmup
+
+    WARMUP_AVAILABLE = True
+except Exception:  # pragma: no cover - import guard only
+    WARMUP_AVAILABLE = False
+
+
+def _make_chain(root, depth: int) -> list[str]:
+    """Create root/d1/d2/... and return the paths deepest first."""
+    paths = [str(root)]
+    current = root
+    for i in range(depth):
+        current = current / f"d{i}"
+        current.mkdir()
+        paths.append(str(current))
+    return list(reversed(paths))
+
+
+@pytest.mark.skipif(
+    (not WARMUP_AVAILABLE) or (not PYTEST_QT_ENABLED),
+    reason="warmup/pytest-qt not available",
+)
+class TestAncestorWarmup:
+    @pytest.fixture(autouse=True)
+    def setup(self, qtbot):
+        self.cache = FolderListingCache()
+        self.prefetcher = ListingPrefetcher(cache=self.cache)
+        yield
+        self.prefetcher.cancel_all()
+        self.prefetcher.wait_for_done(2000)
+
+    def test_warms_all_ancestors_in_bounded_batches(self, qtbot, tmp_path, monkeypatch):
+        paths = _make_chain(tmp_path, 4)
+        in_flight = {"now": 0, "max": 0}
+        lock = threading.Lock()
+        real_scan = listing_mod.scan_folders
+
+        def counting_scan(path: str, *args):
+            with lock:
+                in_flight["now"] += 1
+                in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            try:
+                return real_scan(path, *args)
+            finally:
+                with lock:
+                    in_flight["now"] -= 1
+
+        monkeypatch.setattr(listing_mod, "scan_folders", counting_scan)
+
+        warmup = AncestorWarmup(self.prefetcher, batch_size=1)
+        warmup.start(paths)
+        qtbot.waitUntil(lambda: not warmup.is_running(), timeout=2000)
+
+        assert all(self.cache.get(p, record_stats=False) is not None for p in paths)
+        assert in_flight["max"] == 1
+        stats = warmup.stats()
+        assert stats["scanned"] == len(paths)
+        assert stats["scan_seconds"] >= 0.0
+
+        # 2回目は全てキャッシュ済み（ワーカーで検証し、再スキャンしない）
+        warmup.start(paths)
+        qtbot.waitUntil(lambda: not warmup.is_running(), timeout=2000)
+        assert warmup.stats()["already_cached"] == len(paths)
+        assert warmup.stats()["scanned"] == len(paths)
+
+    def test_max_directories_bounds_the_chain(self, qtbot, tmp_path):
+        paths = _make_chain(tmp_path, 4)
+        warmup = AncestorWarmup(self.prefetcher, max_directories=2)
+        warmup.start(paths)
+        qtbot.waitUntil(lambda: not warmup.is_running(), timeout=2000)
+
+        assert self.cache.get(paths[0], record_stats=False) is not None
+        assert self.cache.get(paths[1], record_stats=False) is not None
+        assert self.cache.get(paths[2], record_stats=False) is None
+
+    def test_new_start_aborts_previous_run(self, qtbot, tmp_path, monkeypatch):
+        (tmp_path / "old").mkdir()
+        (tmp_path / "new").mkdir()
+        old_paths = _make_chain(tmp_path / "old", 3)
+        new_paths = _make_chain(tmp_path / "new", 1)
+
+        release = threading.Event()
+        real_scan = listing_mod.scan_folders
+
+        def blocking_scan(path: str, *args):
+            if path == old_paths[0]:
+                release.wait(2)
+            return real_scan(path, *args)
+
+        monkeypatch.setattr(listing_mod, "scan_folders", blocking_scan)
+
+        warmup = AncestorWarmup(self.prefetcher, batch_size=1)
+        warmup.start(old_paths)
+        warmup.start(new_paths)
+        release.set()
+        qtbot.waitUntil(lambda: not warmup.is_running(), timeout=2000)
+        self.prefetcher.wait_for_done(2000)
+
+        assert warmup.stats()["aborted"] == 1
+        assert all(self.cache.get(p, record_stats=False) is not None for p in new_paths)
+        # 古いチェーンの未着手分はスキャンされない
+        assert self.cache.get(old_paths[-1], record_stats=False) is None
+
+    def test_popup_hit_rate(self, qtbot, tmp_path):
+        paths = _make_chain(tmp_path, 1)
+        warmup = AncestorWarmup(self.prefetcher)
+        warmup.start(paths)
+        qtbot.waitUntil(lambda: not warmup.is_running(), timeout=2000)
+
+        warmup.note_popup_opened(paths[0])
+        warmup.note_popup_opened("/not/warmed")
+        assert warmup.stats()["warmed_hit_rate"] == 0.5
@@ -133,3 +133,79 @@ class TestBreadcrumbItem:
         # その他のキーで else 分岐（super 呼び出し）
         qtbot.keyClick(item, "A")
         assert received["count"] >= 2
+
+    def test_hover_intent_and_leave_signals(self, qtbot):
+        from PySide6.QtCore import QEvent, QPointF
+        from PySide6.QtGui import QEnterEvent
+        from PySide6.QtWidgets import QApplication
+
+        item = BreadcrumbItem("docs", "/docs", parent=self.parent)
+        qtbot.addWidget(item)
+        item.set_hover_intent_delay(0)
+
+        with qtbot.waitSignal(item.hover_intent, timeout=1000) as blocker:
+            QApplication.sendEvent(item, QEnterEvent(QPointF(1, 1), QPointF(1, 1), QPointF(1, 1)))
+        assert blocker.args == ["/docs"]
+
+        with qtbot.waitSignal(item.hover_left, timeout=1000) as blocker:
+            QApplication.sendEvent(item, QEvent(QEvent.Type.Leave))
+        assert blocker.args == ["/docs"]
+        assert not item._hover_timer.isActive()
+
+
+@pytest.mark.skipif(
+    (not PYSIDE6_AVAILABLE) or (not WIDGETS_AVAILABLE) or (not PYTEST_QT_ENABLED),
+    reason="PySide6/widgets/pytest-qt not available",
+)
+class TestJumpBox:
+    def test_candidates_and_choice(self, qtbot, tmp_path):
+        from breadcrumb_addressbar.widgets import JumpBox
+
+        box = JumpBox()
+        qtbot.addWidget(box)
+        queries: list[tuple[str, int]] = []
+
+        def search(text: str, limit: int) -> list[str]:
+            queries.append((text, limit))
+            return [f"/x/{text}1", f"/x/{text}2"]
+
+        box.set_search(search)
+        box.textEdited.emit("ab")
+        assert box.candidates() == ["/x/ab1", "/x/ab2"]
+        assert queries == [("ab", 20)]
+
+        with qtbot.waitSignal(box.folder_chosen, timeout=1000) as blocker:
+            box.returnPressed.emit()
+        assert blocker.args == ["/x/ab1"]
+        assert box.text() == "" and box.candidates() == []
+
+        # 実在するパスを入力した場合はそのまま移動する
+        box.setText(str(tmp_path))
+        with qtbot.waitSignal(box.folder_chosen, timeout=1000) as blocker:
+            box.returnPressed.emit()
+        assert blocker.args == [str(tmp_path)]
+
+
+@pytest.mark.skipif(
+    (not PYSIDE6_AVAILABLE) or (not WIDGETS_AVAILABLE) or (not PYTEST_QT_ENABLED),
+    reason="PySide6/widgets/pytest-qt not available",
+)
+class TestJumpPopup:
+    def test_ranked_list_and_keyboard_selection(self, qtbot):
+        from PySide6.QtCore import QPoint, Qt
+
+        from breadcrumb_addressbar.widgets import JumpPopup
+
+        popup = JumpPopup()
+        qtbot.addWidget(popup)
+        popup.set_search(lambda text, limit: [f"/x/{text}{i}" for i in range(3)])
+        popup.show_at(QPoint(0, 0))
+
+        popup.line_edit().textEdited.emit("ab")
+        assert popup.candidates() == ["/x/ab0", "/x/ab1", "/x/ab2"]
+
+        qtbot.keyClick(popup.line_edit(), Qt.Key.Key_Down)
+        with qtbot.waitSignal(popup.folder_chosen, timeout=1000) as blocker:
+            popup.line_edit().returnPressed.emit()
+        assert blocker.args == ["/x/ab1"]
+        assert not popup.isVisible()